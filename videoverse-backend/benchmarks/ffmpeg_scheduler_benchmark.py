@@ -0,0 +1,110 @@
+"""
+Compare a burst of concurrent trims with and without the CPU scheduler.
+
+A clip is generated with ffmpeg, then a mix of re-encoding and stream-copy trims is started at once,
+first with every ffmpeg using its default threading and then admitted through a CpuScheduler. The
+table shows the time until the whole burst is done and the median and worst latency of each kind of
+trim. Run from the project root:
+
+    STORAGE_BACKEND=memory python benchmarks/ffmpeg_scheduler_benchmark.py --encodes 6 --copies 12
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from videoverse_backend.services import CpuScheduler, ProcessRunner, VideoService, WorkClass
+
+
+def generate_clip(path: Path, duration: int) -> None:
+	subprocess.run(
+		[
+			"ffmpeg",
+			"-v",
+			"error",
+			"-f",
+			"lavfi",
+			"-i",
+			"testsrc2=size=1280x720:rate=30",
+			"-f",
+			"lavfi",
+			"-i",
+			"sine=frequency=440",
+			"-t",
+			str(duration),
+			"-c:v",
+			"libx264",
+			"-c:a",
+			"aac",
+			str(path),
+		],
+		check=True,
+	)
+
+
+async def timed_trim(work_class: WorkClass, clip: Path, output: Path, burst_start: float) -> tuple[WorkClass, float]:
+	if work_class == WorkClass.ENCODE:
+		await VideoService.precise_trim_video(str(clip), 1.0, 6.0, str(output), "h264")
+	else:
+		await VideoService.trim_video(str(clip), 1.0, None, str(output))
+	return work_class, time.perf_counter() - burst_start
+
+
+async def run_burst(
+	clip: Path, directory: Path, encodes: int, copies: int
+) -> tuple[float, dict[WorkClass, list[float]]]:
+	work = [WorkClass.ENCODE] * encodes + [WorkClass.COPY] * copies
+	started = time.perf_counter()
+	results = await asyncio.gather(
+		*(
+			timed_trim(work_class, clip, directory / f"out-{index}.mp4", started)
+			for index, work_class in enumerate(work)
+		),
+	)
+	makespan = time.perf_counter() - started
+	latencies: dict[WorkClass, list[float]] = {work_class: [] for work_class in WorkClass}
+	for work_class, latency in results:
+		latencies[work_class].append(latency)
+	return makespan, latencies
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--encodes", type=int, default=6, help="re-encoding trims in the burst")
+	parser.add_argument("--copies", type=int, default=12, help="stream-copy trims in the burst")
+	parser.add_argument("--budget", type=int, default=os.cpu_count() or 1, help="cores given to the scheduler")
+	parser.add_argument("--encode-threads", type=int, default=4, help="threads per re-encode with the scheduler")
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as directory:
+		clip = Path(directory) / "source.mp4"
+		generate_clip(clip, 20)
+		runners = {
+			"unscheduled": ProcessRunner(args.encodes + args.copies, 600),
+			"scheduled": ProcessRunner(
+				args.encodes + args.copies,
+				600,
+				CpuScheduler(args.budget, args.encode_threads, os.path.join(directory, "slots")),
+			),
+		}
+		print(f"{args.encodes} re-encodes and {args.copies} stream copies on a budget of {args.budget} cores")
+		print(f"{'runner':<12} {'burst':>8} {'encode p50':>11} {'encode max':>11} {'copy p50':>9} {'copy max':>9}")
+		for name, runner in runners.items():
+			VideoService.ffmpeg_runner = runner
+			outputs = Path(directory) / name
+			outputs.mkdir()
+			makespan, latencies = asyncio.run(run_burst(clip, outputs, args.encodes, args.copies))
+			encode, copy = latencies[WorkClass.ENCODE] or [0.0], latencies[WorkClass.COPY] or [0.0]
+			print(
+				f"{name:<12} {makespan:7.2f}s {statistics.median(encode):10.2f}s {max(encode):10.2f}s"
+				f" {statistics.median(copy):8.2f}s {max(copy):8.2f}s",
+			)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,186 @@
+"""
+Compare the file merge with the streamed merge on wall time and scratch disk.
+
+Clips are generated with ffmpeg (with their index up front, so they can be streamed) and stored in an
+in-memory store that holds every transfer to a fixed rate per connection, like a remote bucket. The
+file merge downloads every input, concatenates them to a file and uploads it; the streamed merge feeds
+the inputs to ffmpeg through pipes and uploads its output as it is produced. The temporary directory
+is sampled while each merge runs to find the most scratch space it used. Run from the project root:
+
+    STORAGE_BACKEND=memory python benchmarks/merge_benchmark.py --inputs 4 --duration 30 --rate 50
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from videoverse_backend.services import VideoService
+from videoverse_backend.services.storage import AsyncStorage, InMemoryStorage, ObjectWriter
+from videoverse_backend.services.video_service import STREAM_MUXERS
+
+
+class ThrottledWriter(ObjectWriter):
+	def __init__(self, storage: "ThrottledStorage", storage_path: str) -> None:
+		self.storage = storage
+		self.storage_path = storage_path
+		self.chunks: list[bytes] = []
+
+	def write(self, data: bytes) -> None:
+		self.storage.transfer(len(data))
+		self.chunks.append(data)
+
+	def commit(self) -> str:
+		return self.storage.put(self.storage_path, b"".join(self.chunks))
+
+	def abort(self) -> None:
+		self.chunks = []
+
+
+class ThrottledStorage(InMemoryStorage):
+	def __init__(self, rate: float) -> None:
+		super().__init__()
+		self.rate = rate
+
+	def transfer(self, size: int) -> None:
+		time.sleep(size / self.rate)
+
+	def upload_file(self, storage_path: str, file_path: str) -> str:
+		self.transfer(os.path.getsize(file_path))
+		return super().upload_file(storage_path, file_path)
+
+	def open_writer(self, storage_path: str) -> ObjectWriter:
+		return ThrottledWriter(self, storage_path)
+
+	def read_range(self, storage_path: str, version: str, start: int, end: int) -> bytes:
+		self.transfer(end - start)
+		return super().read_range(storage_path, version, start, end)
+
+	def download_to_filename(self, storage_path: str, destination: str) -> None:
+		self.transfer(len(self.objects[storage_path]))
+		super().download_to_filename(storage_path, destination)
+
+
+class ScratchSampler:
+	"""Polls the size of everything under a directory from a thread and keeps the peak."""
+
+	def __init__(self, directory: Path) -> None:
+		self.directory = directory
+		self.peak = 0
+		self._stop = threading.Event()
+		self._thread = threading.Thread(target=self._sample)
+
+	def __enter__(self) -> "ScratchSampler":
+		self._thread.start()
+		return self
+
+	def __exit__(self, *exc_info: object) -> None:
+		self._stop.set()
+		self._thread.join()
+
+	def _sample(self) -> None:
+		while not self._stop.wait(0.02):
+			size = 0
+			for root, _, files in os.walk(self.directory):
+				for name in files:
+					try:
+						size += os.path.getsize(os.path.join(root, name))
+					except OSError:
+						pass
+			self.peak = max(self.peak, size)
+
+
+def generate_clip(path: Path, duration: int, index: int) -> None:
+	subprocess.run(
+		[
+			"ffmpeg",
+			"-v",
+			"error",
+			"-f",
+			"lavfi",
+			"-i",
+			f"testsrc2=size=1280x720:rate=30,hue=h={index * 40}",
+			"-f",
+			"lavfi",
+			"-i",
+			"sine=frequency=440",
+			"-t",
+			str(duration),
+			"-c:v",
+			"libx264",
+			"-preset",
+			"veryfast",
+			"-c:a",
+			"aac",
+			"-movflags",
+			"+faststart",
+			str(path),
+		],
+		check=True,
+	)
+
+
+async def file_merge(storage: AsyncStorage, paths: list[str], scratch: Path) -> None:
+	with tempfile.TemporaryDirectory(dir=scratch) as directory:
+		inputs = [os.path.join(directory, os.path.basename(path)) for path in paths]
+		await asyncio.gather(*(storage.download_to_filename(path, local) for path, local in zip(paths, inputs)))
+		list_file = os.path.join(directory, "input_list.txt")
+		with open(list_file, "w") as listing:
+			listing.writelines(f"file '{local}'\n" for local in inputs)
+		output = os.path.join(directory, "merged.mp4")
+		await VideoService.merge_videos(list_file, output)
+		await storage.upload_file("videos/merged-file.mp4", output)
+
+
+async def stream_merge(storage: AsyncStorage, paths: list[str]) -> None:
+	inputs = [storage.iter_chunks(path, await storage.stat(path)) for path in paths]
+	merged = VideoService.stream_merge_videos(inputs, STREAM_MUXERS[".mp4"], 8 * 1024 * 1024)
+	await storage.upload_stream("videos/merged-stream.mp4", merged)
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--inputs", type=int, default=4, help="clips to merge")
+	parser.add_argument("--duration", type=int, default=30, help="length of every clip in seconds")
+	parser.add_argument("--rate", type=float, default=50, help="MB/s of every connection to the store")
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as directory:
+		scratch = Path(directory) / "scratch"
+		scratch.mkdir()
+		# The streamed merge stages its list file and pipes in the default temporary directory.
+		tempfile.tempdir = str(scratch)
+		storage = AsyncStorage(
+			ThrottledStorage(args.rate * 1024 * 1024), 8, range_chunk_size=8 * 1024 * 1024, range_parallelism=2
+		)
+		paths = []
+		total = 0
+		for index in range(args.inputs):
+			clip = Path(directory) / f"clip{index}.mp4"
+			generate_clip(clip, args.duration, index)
+			total += clip.stat().st_size
+			storage.backend.upload_file(f"videos/clip{index}.mp4", str(clip))  # type: ignore
+			paths.append(f"videos/clip{index}.mp4")
+
+		print(
+			f"{args.inputs} clips, {total / 1024 / 1024:.1f} MiB in total, store at {args.rate:g} MB/s per connection"
+		)
+		print(f"{'mode':<8} {'time':>8} {'peak scratch':>13} {'output':>10}")
+		for mode in ("file", "stream"):
+			with ScratchSampler(scratch) as sampler:
+				started = time.perf_counter()
+				if mode == "file":
+					asyncio.run(file_merge(storage, paths, scratch))
+				else:
+					asyncio.run(stream_merge(storage, paths))
+				elapsed = time.perf_counter() - started
+			output_size = len(storage.backend.objects[f"videos/merged-{mode}.mp4"]) / 1024 / 1024  # type: ignore
+			print(f"{mode:<8} {elapsed:7.2f}s {sampler.peak / 1024 / 1024:10.1f} MiB {output_size:6.1f} MiB")
+
+
+if __name__ == "__main__":
+	main()
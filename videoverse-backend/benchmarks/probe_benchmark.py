@@ -0,0 +1,111 @@
+"""
+Compare the in-process header parser with ffprobe for reading video durations.
+
+A corpus of short clips is generated with ffmpeg in a temporary directory, then every clip is
+probed repeatedly through both paths. Run from the project root:
+
+    python benchmarks/probe_benchmark.py --repeat 50
+"""
+
+import argparse
+import asyncio
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from videoverse_backend.services import MediaProbe, VideoService
+
+CORPUS = [
+	("h264_10s.mp4", ["-c:v", "libx264", "-c:a", "aac"], 10),
+	("h264_120s_faststart.mp4", ["-c:v", "libx264", "-c:a", "aac", "-movflags", "+faststart"], 120),
+	("h264_30s.mov", ["-c:v", "libx264", "-c:a", "aac"], 30),
+	("h264_30s.mkv", ["-c:v", "libx264", "-c:a", "aac"], 30),
+	("vp9_30s.webm", ["-c:v", "libvpx-vp9", "-deadline", "realtime", "-c:a", "libopus"], 30),
+	("h264_30s_fragmented.mp4", ["-c:v", "libx264", "-c:a", "aac", "-movflags", "frag_keyframe+empty_moov"], 30),
+]
+
+
+def generate_corpus(directory: Path) -> list[Path]:
+	clips = []
+	for name, codec_args, duration in CORPUS:
+		clip = directory / name
+		subprocess.run(
+			[
+				"ffmpeg",
+				"-v",
+				"error",
+				"-f",
+				"lavfi",
+				"-i",
+				"testsrc=size=640x360:rate=30",
+				"-f",
+				"lavfi",
+				"-i",
+				"sine=frequency=440",
+				"-t",
+				str(duration),
+				*codec_args,
+				str(clip),
+			],
+			check=True,
+		)
+		clips.append(clip)
+	return clips
+
+
+def time_header_parser(clip: Path, repeat: int) -> tuple[list[float], float | None]:
+	timings = []
+	media_info = None
+	for _ in range(repeat):
+		started = time.perf_counter()
+		media_info = MediaProbe.probe(str(clip))
+		timings.append(time.perf_counter() - started)
+	return timings, media_info.duration if media_info else None
+
+
+async def time_ffprobe(clip: Path, repeat: int) -> tuple[list[float], float]:
+	timings = []
+	duration = 0.0
+	for _ in range(repeat):
+		started = time.perf_counter()
+		duration = await VideoService.get_video_duration_ffprobe(str(clip))
+		timings.append(time.perf_counter() - started)
+	return timings, duration
+
+
+def format_ms(timings: list[float]) -> str:
+	return f"{statistics.median(timings) * 1000:9.3f} ms"
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--repeat", type=int, default=20, help="probes per clip and path")
+	args = parser.parse_args()
+
+	has_ffprobe = shutil.which("ffprobe") is not None
+	with tempfile.TemporaryDirectory() as directory:
+		clips = generate_corpus(Path(directory))
+		print(f"{'clip':<28} {'header parser':>13} {'ffprobe':>12} {'speedup':>8}  durations")
+		for clip in clips:
+			parser_timings, parser_duration = time_header_parser(clip, args.repeat)
+			if parser_duration is None:
+				parser_column = f"{'fallback':>13}"
+			else:
+				parser_column = format_ms(parser_timings).rjust(13)
+
+			if has_ffprobe:
+				ffprobe_timings, ffprobe_duration = asyncio.run(time_ffprobe(clip, args.repeat))
+				ffprobe_column = format_ms(ffprobe_timings).rjust(12)
+				speedup = statistics.median(ffprobe_timings) / statistics.median(parser_timings)
+				speedup_column = f"{speedup:7.0f}x" if parser_duration is not None else f"{'-':>8}"
+				durations = f"{parser_duration} / {ffprobe_duration}"
+			else:
+				ffprobe_column, speedup_column, durations = f"{'n/a':>12}", f"{'-':>8}", f"{parser_duration}"
+			print(f"{clip.name:<28} {parser_column} {ffprobe_column} {speedup_column}  {durations}")
+
+
+if __name__ == "__main__":
+	main()
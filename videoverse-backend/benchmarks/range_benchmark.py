@@ -0,0 +1,176 @@
+"""
+Compare single-stream downloads with parallel byte-range downloads through AsyncStorage.
+
+A local HTTP server stands in for the object store. It keeps the objects uploaded to it in memory,
+honours Range headers and caps every connection at a fixed rate, like the per-connection throughput
+limit of a remote store. Run from the project root:
+
+    STORAGE_BACKEND=memory python benchmarks/range_benchmark.py --size 64 --rate 20 --parallelism 1 4 8
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from requests.adapters import HTTPAdapter
+from videoverse_backend.services.storage import AsyncStorage, ObjectInfo, StorageBackend
+
+WRITE_SIZE = 64 * 1024
+
+
+def make_handler(objects: dict[str, bytes], rate: float) -> type[BaseHTTPRequestHandler]:
+	class RangeHandler(BaseHTTPRequestHandler):
+		protocol_version = "HTTP/1.1"
+
+		def do_HEAD(self) -> None:  # noqa: N802
+			content = self._find_object()
+			if content is not None:
+				self.send_response(200)
+				self.send_header("Content-Length", str(len(content)))
+				self.send_header("ETag", hashlib.md5(content).hexdigest())
+				self.end_headers()
+
+		def do_PUT(self) -> None:  # noqa: N802
+			objects[self.path] = self.rfile.read(int(self.headers["Content-Length"]))
+			self._send_empty(204)
+
+		def do_DELETE(self) -> None:  # noqa: N802
+			objects.pop(self.path, None)
+			self._send_empty(204)
+
+		def do_GET(self) -> None:  # noqa: N802
+			content = self._find_object()
+			if content is None:
+				return
+			start, end = 0, len(content)
+			if range_header := self.headers.get("Range"):
+				first, _, last = range_header.removeprefix("bytes=").partition("-")
+				start, end = int(first), int(last) + 1
+				self.send_response(206)
+				self.send_header("Content-Range", f"bytes {start}-{end - 1}/{len(content)}")
+			else:
+				self.send_response(200)
+			self.send_header("Content-Length", str(end - start))
+			self.end_headers()
+
+			started = time.perf_counter()
+			for offset in range(start, end, WRITE_SIZE):
+				chunk = content[offset : min(offset + WRITE_SIZE, end)]
+				self.wfile.write(chunk)
+				# Hold the connection to the configured rate.
+				delay = (offset + len(chunk) - start) / rate - (time.perf_counter() - started)
+				if delay > 0:
+					time.sleep(delay)
+
+		def log_message(self, format: str, *args: object) -> None:
+			pass
+
+		def _find_object(self) -> bytes | None:
+			content = objects.get(self.path)
+			if content is None:
+				self._send_empty(404)
+			return content
+
+		def _send_empty(self, status: int) -> None:
+			self.send_response(status)
+			self.send_header("Content-Length", "0")
+			self.end_headers()
+
+	return RangeHandler
+
+
+class HttpRangeStorage(StorageBackend):
+	supports_ranges = True
+
+	def __init__(self, base_url: str, connections: int) -> None:
+		self.base_url = base_url
+		self.session = requests.Session()
+		self.session.mount("http://", HTTPAdapter(pool_connections=connections, pool_maxsize=connections))
+
+	def upload_file(self, storage_path: str, file_path: str) -> str:
+		with open(file_path, "rb") as upload:
+			self.session.put(f"{self.base_url}/{storage_path}", data=upload).raise_for_status()
+		return self.stat(storage_path).version
+
+	def stat(self, storage_path: str) -> ObjectInfo:
+		response = self.session.head(f"{self.base_url}/{storage_path}")
+		if response.status_code == 404:
+			raise FileNotFoundError(storage_path)
+		response.raise_for_status()
+		md5 = response.headers["ETag"]
+		return ObjectInfo(version=md5, size=int(response.headers["Content-Length"]), md5=md5)
+
+	def read_range(self, storage_path: str, version: str, start: int, end: int) -> bytes:
+		response = self.session.get(f"{self.base_url}/{storage_path}", headers={"Range": f"bytes={start}-{end - 1}"})
+		response.raise_for_status()
+		return response.content
+
+	def download_to_filename(self, storage_path: str, destination: str) -> None:
+		with self.session.get(f"{self.base_url}/{storage_path}", stream=True) as response:
+			response.raise_for_status()
+			with open(destination, "wb") as downloaded:
+				for chunk in response.iter_content(WRITE_SIZE):
+					downloaded.write(chunk)
+
+	def get_signed_url(self, storage_path: str, expiration: timedelta) -> str:
+		return f"{self.base_url}/{storage_path}"
+
+	def exists(self, storage_path: str) -> bool:
+		return self.session.head(f"{self.base_url}/{storage_path}").status_code == 200
+
+	def delete(self, storage_path: str) -> None:
+		self.session.delete(f"{self.base_url}/{storage_path}").raise_for_status()
+
+
+async def time_download(storage: AsyncStorage, destination: str) -> float:
+	started = time.perf_counter()
+	await storage.download_to_filename("video.mp4", destination)
+	return time.perf_counter() - started
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--size", type=int, default=64, help="object size in MB")
+	parser.add_argument("--rate", type=float, default=20, help="per-connection rate in MB/s")
+	parser.add_argument("--chunk-size", type=int, default=8, help="range size in MB")
+	parser.add_argument("--parallelism", type=int, nargs="+", default=[1, 4, 8], help="ranges in flight")
+	args = parser.parse_args()
+
+	server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler({}, args.rate * 1024 * 1024))
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	base_url = f"http://127.0.0.1:{server.server_address[1]}"
+	connections = max(args.parallelism)
+	backend = HttpRangeStorage(base_url, connections)
+
+	with tempfile.TemporaryDirectory() as directory:
+		source = os.path.join(directory, "source.mp4")
+		with open(source, "wb") as random_content:
+			random_content.write(os.urandom(args.size * 1024 * 1024))
+		backend.upload_file("video.mp4", source)
+		destination = os.path.join(directory, "video.mp4")
+		single = asyncio.run(time_download(AsyncStorage(backend, connections), destination))
+		print(f"{'mode':<16} {'time':>8} {'MB/s':>8}")
+		print(f"{'single stream':<16} {single:7.2f}s {args.size / single:8.1f}")
+		for parallelism in args.parallelism:
+			storage = AsyncStorage(
+				backend,
+				connections,
+				range_threshold=1,
+				range_chunk_size=args.chunk_size * 1024 * 1024,
+				range_parallelism=parallelism,
+			)
+			ranged = asyncio.run(time_download(storage, destination))
+			print(f"{f'{parallelism} ranges':<16} {ranged:7.2f}s {args.size / ranged:8.1f}")
+		backend.delete("video.mp4")
+	server.shutdown()
+
+
+if __name__ == "__main__":
+	main()
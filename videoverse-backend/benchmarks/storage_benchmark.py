@@ -0,0 +1,68 @@
+"""
+Compare merge input downloads issued one after another with downloads through AsyncStorage.
+
+Each download goes through an in-memory backend that sleeps for a configurable latency to stand in
+for a remote store. Run from the project root:
+
+    python benchmarks/storage_benchmark.py --inputs 2 4 8 --latency 0.25
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from videoverse_backend.services.storage import AsyncStorage, InMemoryStorage
+
+
+class SlowStorage(InMemoryStorage):
+	def __init__(self, latency: float) -> None:
+		super().__init__()
+		self.latency = latency
+
+	def download_to_filename(self, storage_path: str, destination: str) -> None:
+		time.sleep(self.latency)
+		super().download_to_filename(storage_path, destination)
+
+
+def time_sequential(backend: SlowStorage, paths: list[str], directory: str) -> float:
+	started = time.perf_counter()
+	for index, path in enumerate(paths):
+		backend.download_file(f"sequential_{index}.mp4", path, directory)
+	return time.perf_counter() - started
+
+
+async def time_async(storage: AsyncStorage, paths: list[str], directory: str) -> float:
+	started = time.perf_counter()
+	await asyncio.gather(
+		*(storage.download_file(f"async_{index}.mp4", path, directory) for index, path in enumerate(paths)),
+	)
+	return time.perf_counter() - started
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--inputs", type=int, nargs="+", default=[2, 4, 8], help="number of videos to download")
+	parser.add_argument("--latency", type=float, default=0.25, help="seconds spent on every download")
+	parser.add_argument("--workers", type=int, default=8, help="storage pool size")
+	args = parser.parse_args()
+
+	backend = SlowStorage(args.latency)
+	storage = AsyncStorage(backend, args.workers)
+	with tempfile.TemporaryDirectory() as directory:
+		source = Path(directory) / "source.mp4"
+		source.write_bytes(b"\x00" * 1024 * 1024)
+
+		print(f"{'inputs':>6} {'sequential':>11} {'async':>9} {'speedup':>8}")
+		for inputs in args.inputs:
+			paths = [f"videos/{index}.mp4" for index in range(inputs)]
+			for path in paths:
+				backend.upload_file(path, str(source))
+			sequential = time_sequential(backend, paths, directory)
+			parallel = asyncio.run(time_async(storage, paths, directory))
+			print(f"{inputs:>6} {sequential:10.3f}s {parallel:8.3f}s {sequential / parallel:7.1f}x")
+
+
+if __name__ == "__main__":
+	main()
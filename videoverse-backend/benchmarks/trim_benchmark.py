@@ -0,0 +1,101 @@
+"""
+Compare the trim modes: stream copy, full re-encode and smart cut.
+
+A clip with a fixed GOP is generated with ffmpeg so its keyframe times are known without ffprobe,
+then a range that starts and ends between keyframes is cut with every mode. Each output is decoded
+to count its frames against the number the range should contain. Run from the project root:
+
+    python benchmarks/trim_benchmark.py --duration 120 --gop 60
+"""
+
+import argparse
+import asyncio
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from videoverse_backend.services import VideoService
+
+FRAME_RATE = 30
+
+
+def generate_clip(path: Path, duration: int, gop: int) -> None:
+	subprocess.run(
+		[
+			"ffmpeg",
+			"-v",
+			"error",
+			"-f",
+			"lavfi",
+			"-i",
+			f"testsrc2=size=1280x720:rate={FRAME_RATE}",
+			"-f",
+			"lavfi",
+			"-i",
+			"sine=frequency=440",
+			"-t",
+			str(duration),
+			"-c:v",
+			"libx264",
+			"-g",
+			str(gop),
+			"-keyint_min",
+			str(gop),
+			"-sc_threshold",
+			"0",
+			"-c:a",
+			"aac",
+			str(path),
+		],
+		check=True,
+	)
+
+
+def count_frames(path: Path) -> int:
+	result = subprocess.run(
+		["ffmpeg", "-v", "error", "-i", str(path), "-map", "0:v:0", "-f", "framecrc", "-"],
+		check=True,
+		capture_output=True,
+		text=True,
+	)
+	return sum(1 for line in result.stdout.splitlines() if line.startswith("0,"))
+
+
+async def time_mode(mode: str, clip: Path, output: Path, start: float, end: float, keyframes: list[int]) -> float:
+	started = time.perf_counter()
+	if mode == "copy":
+		await VideoService.trim_video(str(clip), start, end, str(output))
+	elif mode == "precise":
+		await VideoService.precise_trim_video(str(clip), start, end, str(output), "h264")
+	else:
+		await VideoService.smart_trim_video(str(clip), start, end, str(output), keyframes, "h264", "yuv420p")
+	return time.perf_counter() - started
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--duration", type=int, default=120, help="length of the generated clip in seconds")
+	parser.add_argument("--gop", type=int, default=60, help="frames between keyframes")
+	args = parser.parse_args()
+
+	keyframes = [frame * 1_000_000 // FRAME_RATE for frame in range(0, args.duration * FRAME_RATE, args.gop)]
+	# Start and end a third of a GOP past a keyframe, so both edges fall inside a GOP.
+	offset = args.gop / FRAME_RATE / 3
+	start = round(args.duration * 0.25 // 1 + offset, 3)
+	end = round(args.duration * 0.75 // 1 + offset, 3)
+	expected_frames = round((end - start) * FRAME_RATE)
+
+	with tempfile.TemporaryDirectory() as directory:
+		clip = Path(directory) / "source.mp4"
+		generate_clip(clip, args.duration, args.gop)
+		print(f"cut {start}s to {end}s of a {args.duration}s clip, {expected_frames} frames expected")
+		print(f"{'mode':<8} {'time':>10} {'frames':>7}")
+		for mode in ("copy", "precise", "smart"):
+			output = Path(directory) / f"{mode}.mp4"
+			elapsed = asyncio.run(time_mode(mode, clip, output, start, end, keyframes))
+			print(f"{mode:<8} {elapsed:9.2f}s {count_frames(output):>7}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,39 @@
+"""Builders for the request bodies and media headers the tests feed to the services."""
+
+MP4_HEADER = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom"
+BOUNDARY = "videoverse-test-boundary"
+
+
+def box(box_type, payload=b""):
+	"""An ISO base media box, the unit MP4 files are built from."""
+	return (8 + len(payload)).to_bytes(4, "big") + box_type + payload
+
+
+class Chunks:
+	"""Chunks of an incoming body, counting how many of them were received."""
+
+	def __init__(self, chunks):
+		self.chunks = chunks
+		self.received = 0
+
+	async def __aiter__(self):
+		for chunk in self.chunks:
+			self.received += 1
+			yield chunk
+
+
+class MultipartUpload(Chunks):
+	"""A ``multipart/form-data`` upload of one file whose content arrives in ``chunks``."""
+
+	def __init__(self, filename, chunks, content_length=None, field="file"):
+		head = f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n\r\n'
+		super().__init__([head.encode(), *chunks, f"\r\n--{BOUNDARY}--\r\n".encode()])
+		self.content_type = f"multipart/form-data; boundary={BOUNDARY}"
+		self.content_length = content_length
+
+	async def send(self, controller):
+		return await controller.upload_video(self.content_type, self.content_length, self)
+
+
+def make_upload(filename, chunks, size=None):
+	return MultipartUpload(filename, chunks, content_length=size)
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from videoverse_backend.services.cpu_scheduler import CpuScheduler, WorkClass
+
+
+@pytest.mark.asyncio
+async def test_stream_copies_do_not_queue_behind_encodes(tmp_path):
+	scheduler = CpuScheduler(budget=1, encode_threads=4, slot_dir=str(tmp_path))
+	admitted = []
+
+	async def work(work_class, name):
+		async with scheduler.admit(work_class):
+			admitted.append(name)
+
+	async with scheduler.admit(WorkClass.ENCODE) as threads:
+		assert threads == 1
+		encode = asyncio.create_task(work(WorkClass.ENCODE, "encode"))
+		await asyncio.sleep(0.01)
+		await asyncio.wait_for(work(WorkClass.COPY, "copy"), 1)
+		assert scheduler.snapshot()["waiting"] == {"copy": 0, "encode": 1}
+
+	await encode
+	assert admitted == ["copy", "encode"]
+	assert scheduler.stats[WorkClass.ENCODE].runs == 2
+	assert scheduler.stats[WorkClass.ENCODE].max_wait_time > 0
+
+
+@pytest.mark.asyncio
+async def test_budget_is_shared_through_the_slot_directory(tmp_path):
+	# Two schedulers on one directory behave like two server processes on one host.
+	first = CpuScheduler(budget=4, encode_threads=3, slot_dir=str(tmp_path), poll_interval=0.01)
+	second = CpuScheduler(budget=4, encode_threads=3, slot_dir=str(tmp_path), poll_interval=0.01)
+
+	async with first.admit(WorkClass.ENCODE):
+		async with second.admit(WorkClass.COPY):
+			pass
+		admission = second.admit(WorkClass.ENCODE)
+		encode = asyncio.create_task(admission.__aenter__())
+		await asyncio.sleep(0.05)
+		assert not encode.done()
+
+	assert await asyncio.wait_for(encode, 1) == 3
+	await admission.__aexit__(None, None, None)
+
+
+def test_with_threads_limits_every_input_and_the_output():
+	command = ["ffmpeg", "-f", "concat", "-i", "list.txt", "-ss", "1", "-i", "in.mp4", "-c", "copy", "out.mp4"]
+
+	limited = CpuScheduler.with_threads(command, 2)
+
+	assert limited == [
+		"ffmpeg",
+		"-f",
+		"concat",
+		"-threads",
+		"2",
+		"-i",
+		"list.txt",
+		"-ss",
+		"1",
+		"-threads",
+		"2",
+		"-i",
+		"in.mp4",
+		"-c",
+		"copy",
+		"-threads",
+		"2",
+		"out.mp4",
+	]
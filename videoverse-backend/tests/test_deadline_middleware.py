@@ -0,0 +1,142 @@
+import asyncio
+import json
+import time
+
+import pytest
+from videoverse_backend.core import requested_deadline
+from videoverse_backend.middlewares import DeadlineMiddleware
+
+
+async def call(
+	app, headers=None, disconnect_after=None, default_timeout=0.05, max_timeout=10, chunks=(b"",), chunk_delay=0
+):
+	"""
+	Run a request through the middleware, the client disconnects after ``disconnect_after`` seconds.
+
+	The body arrives as ``chunks``, each one ``chunk_delay`` seconds after the previous one.
+	"""
+	messages = []
+	requests = [
+		{"type": "http.request", "body": chunk, "more_body": index < len(chunks) - 1}
+		for index, chunk in enumerate(chunks)
+	]
+
+	async def receive():
+		if requests:
+			await asyncio.sleep(chunk_delay)
+			return requests.pop(0)
+		await asyncio.sleep(60 if disconnect_after is None else disconnect_after)
+		return {"type": "http.disconnect"}
+
+	async def send(message):
+		messages.append(message)
+
+	scope = {"type": "http", "method": "POST", "path": "/api/video/trim", "headers": headers or []}
+	middleware = DeadlineMiddleware(app, default_timeout=default_timeout, max_timeout=max_timeout)
+	await asyncio.wait_for(middleware(scope, receive, send), 1)
+	return messages
+
+
+def sleeper(seconds, events):
+	async def app(scope, receive, send):
+		events.append(requested_deadline.get())
+		try:
+			await receive()
+			await asyncio.sleep(seconds)
+			events.append("finished")
+		except asyncio.CancelledError:
+			events.append("cancelled")
+			raise
+		await send({"type": "http.response.start", "status": 202, "headers": []})
+		await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+	return app
+
+
+def reader(seconds, events):
+	async def app(scope, receive, send):
+		body = b""
+		while True:
+			message = await receive()
+			body += message["body"]
+			if not message["more_body"]:
+				break
+		events.append(body)
+		try:
+			await asyncio.sleep(seconds)
+		except asyncio.CancelledError:
+			events.append("cancelled")
+			raise
+		await send({"type": "http.response.start", "status": 202, "headers": []})
+		await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+	return app
+
+
+@pytest.mark.asyncio
+async def test_request_past_its_deadline_is_cancelled():
+	events = []
+	start, body = await call(sleeper(60, events))
+
+	assert events == [None, "cancelled"]
+	assert start["status"] == 504
+	assert "deadline of 0.05 seconds" in json.loads(body["body"])["message"]
+
+
+@pytest.mark.asyncio
+async def test_request_timeout_header_sets_the_deadline():
+	events = []
+	start, _ = await call(sleeper(0.1, events), headers=[(b"x-request-timeout", b"0.5")])
+
+	assert start["status"] == 202
+	assert events[0] == pytest.approx(time.time() + 0.5, abs=0.3)
+	assert events[1:] == ["finished"]
+
+	events = []
+	start, _ = await call(sleeper(0.1, events), headers=[(b"x-request-timeout", b"100")], max_timeout=0.05)
+
+	assert start["status"] == 504
+	assert events[1:] == ["cancelled"]
+
+	start, _ = await call(sleeper(0, []), headers=[(b"x-request-timeout", b"soon")])
+
+	assert start["status"] == 400
+
+
+@pytest.mark.asyncio
+async def test_disconnected_client_cancels_the_request():
+	events = []
+	messages = await call(sleeper(60, events), disconnect_after=0.01, default_timeout=0)
+
+	assert events == [None, "cancelled"]
+	assert messages == []
+
+
+@pytest.mark.asyncio
+async def test_deadline_stops_once_the_response_started():
+	async def stream(scope, receive, send):
+		await send({"type": "http.response.start", "status": 200, "headers": []})
+		for _ in range(3):
+			await asyncio.sleep(0.03)
+			await send({"type": "http.response.body", "body": b"x", "more_body": True})
+		await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+	messages = await call(stream)
+
+	assert b"".join(message.get("body", b"") for message in messages) == b"xxx"
+
+
+@pytest.mark.asyncio
+async def test_deadline_starts_once_the_body_arrived():
+	events = []
+	# The upload takes longer than the deadline, the work after it does not.
+	start, _ = await call(reader(0.01, events), chunks=[b"a", b"b", b"c", b"d", b"e"], chunk_delay=0.03)
+
+	assert start["status"] == 202
+	assert events == [b"abcde"]
+
+	events = []
+	start, _ = await call(reader(60, events), chunks=[b"a", b"b", b"c"], chunk_delay=0.03)
+
+	assert start["status"] == 504
+	assert events == [b"abc", "cancelled"]
@@ -0,0 +1,51 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from videoverse_backend.services.derivation_cache import DerivationCache
+
+
+def video(content_hash):
+	return MagicMock(id=uuid.uuid4(), content_hash=content_hash)
+
+
+def test_fingerprint_depends_on_content_order_and_parameters():
+	first, second = video("a" * 64), video("b" * 64)
+	parameters = {"merge_mode": "file", "extension": ".mp4"}
+
+	fingerprint = DerivationCache.fingerprint("merge", [first, second], parameters)
+
+	# Another row with the same content is the same source.
+	assert fingerprint == DerivationCache.fingerprint("merge", [video("a" * 64), second], dict(parameters))
+	assert fingerprint != DerivationCache.fingerprint("merge", [second, first], parameters)
+	assert fingerprint != DerivationCache.fingerprint("merge", [first, second], {**parameters, "merge_mode": "stream"})
+	assert fingerprint != DerivationCache.fingerprint("trim", [first, second], parameters)
+
+
+def test_fingerprint_needs_the_content_of_every_source():
+	assert DerivationCache.fingerprint("merge", [video("a" * 64), video(None)], {}) is None
+
+
+@pytest.mark.asyncio
+async def test_lookup_drops_entries_whose_video_is_gone():
+	derivation = MagicMock(id=uuid.uuid4(), video_id=uuid.uuid4())
+	with (
+		patch("videoverse_backend.services.derivation_cache.DerivationDAO") as dao_class,
+		patch("videoverse_backend.services.derivation_cache.VideoDAO.get", return_value=None),
+	):
+		dao = dao_class.return_value
+		dao.get_by_fingerprint = AsyncMock(return_value=derivation)
+		dao.delete = AsyncMock()
+
+		assert await DerivationCache.lookup("f" * 64) is None
+
+	dao.delete.assert_called_once_with(derivation.id)
+
+
+@pytest.mark.asyncio
+async def test_record_keeps_the_first_of_concurrent_outputs():
+	with patch("videoverse_backend.services.derivation_cache.DerivationDAO") as dao_class:
+		dao_class.return_value.create = AsyncMock(side_effect=IntegrityError("INSERT", {}, Exception("UNIQUE")))
+
+		await DerivationCache.record("f" * 64, "trim", uuid.uuid4())
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from videoverse_backend.services.ffmpeg_progress import ProgressSample, ProgressTracker
+
+
+def test_sample_reads_figures_and_skips_missing_ones():
+	sample = ProgressSample.from_fields(
+		{
+			"frame": "120",
+			"fps": "N/A",
+			"bitrate": "1024.5kbits/s",
+			"out_time_us": "-9223372036854775807",
+			"speed": "N/A",
+		},
+	)
+
+	assert sample == ProgressSample(out_time=0.0, frame=120, fps=None, bitrate=1024.5, speed=None)
+
+
+@pytest.mark.asyncio
+async def test_follow_updates_the_run_after_each_block():
+	progress = ProgressTracker(history_size=10)
+	run_id = progress.start("merge", "copy", 1234)
+	reader = asyncio.StreamReader()
+	following = asyncio.create_task(progress.follow(run_id, reader))
+
+	reader.feed_data(b"frame=10\nout_time_us=500000\nspeed=2.5x\n")
+	await asyncio.sleep(0)
+	assert progress.running[run_id].sample is None
+
+	reader.feed_data(b"progress=continue\nframe=20\n")
+	await asyncio.sleep(0)
+	assert progress.running[run_id].sample == ProgressSample(out_time=0.5, frame=10, speed=2.5)
+
+	reader.feed_data(b"out_time_us=1000000\nprogress=end\n")
+	reader.feed_eof()
+	await following
+	assert progress.running[run_id].sample.frame == 20
+
+
+@pytest.mark.asyncio
+async def test_finished_runs_are_kept_with_their_real_time_factor():
+	progress = ProgressTracker(history_size=2)
+	for operation in ["merge", "trim", "trim"]:
+		run_id = progress.start(operation, "copy", 1234)
+		progress.running[run_id] = progress.running[run_id]._replace(started_at=progress.running[run_id].started_at - 2)
+		progress.update(run_id, ProgressSample(out_time=4.0))
+		progress.finish(run_id, 0)
+
+	snapshot = progress.snapshot()
+
+	assert snapshot["running"] == []
+	assert [run["operation"] for run in snapshot["recent"]] == ["trim", "trim"]
+	assert snapshot["operations"]["trim"]["runs"] == 2
+	assert snapshot["operations"]["trim"]["mean_realtime_factor"] == pytest.approx(2.0, rel=0.01)
+
+
+@pytest.mark.asyncio
+async def test_updates_start_with_the_running_runs_and_send_heartbeats():
+	progress = ProgressTracker(history_size=10)
+	running_id = progress.start("package", "encode", 1234)
+	updates = progress.updates(heartbeat=0.01)
+
+	assert (await anext(updates)).id == running_id
+	progress.update(running_id, ProgressSample(out_time=1.0))
+	assert (await anext(updates)).sample.out_time == 1.0
+	assert await anext(updates) is None
+	await updates.aclose()
@@ -0,0 +1,117 @@
+import hashlib
+import os
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from videoverse_backend.core.errors import FileTooLargeError, MalformedUploadError, UnsupportedMediaError
+from videoverse_backend.services import FileService
+
+from tests.helpers import MP4_HEADER, Chunks, box
+
+
+@pytest.mark.parametrize(
+	("header", "container"),
+	[
+		(MP4_HEADER, "mp4"),
+		(b"\x1a\x45\xdf\xa3\x9f\x42\x86\x81\x01\x42\xf7\x81", "matroska"),
+		(b"RIFF\x00\x00\x00\x00AVI LIST", "avi"),
+		(b"FLV\x01\x05\x00\x00\x00\x09\x00\x00\x00", "flv"),
+		(b"\x47" + b"\x00" * 187 + b"\x47\x00", "mpegts"),
+		(b"\x47" + b"\x00" * 187 + b"\x00\x00", None),
+		(b"G is not a transport stream", None),
+		(b"plain text is not a video", None),
+		(b"", None),
+	],
+)
+def test_sniff_container(header, container):
+	assert FileService.sniff_container(header) == container
+
+
+@pytest.mark.parametrize(
+	("header", "streamable"),
+	[
+		(box(b"ftyp", b"isom" * 4) + box(b"moov", b"\x00" * 64) + box(b"mdat"), True),
+		(box(b"ftyp", b"isom" * 4) + box(b"free") + box(b"mdat", b"\x00" * 64) + box(b"moov"), False),
+		(box(b"ftyp", b"isom" * 4) + (1 << 20).to_bytes(4, "big") + b"free", False),
+		(b"\x1a\x45\xdf\xa3\x9f\x42\x86\x81\x01\x42\xf7\x81", True),
+		(b"RIFF\x00\x00\x00\x00AVI LIST", False),
+	],
+)
+def test_is_streamable(header, streamable):
+	assert FileService.is_streamable(header) == streamable
+
+
+@pytest.mark.asyncio
+async def test_stream_to_disk_hashes_all_chunks():
+	chunks = [MP4_HEADER, b"a" * 1000, b"b" * 10]
+
+	ingested = await FileService.stream_to_disk(Chunks(chunks), max_size=10_000)
+	try:
+		with open(ingested.path, "rb") as stored:
+			content = stored.read()
+	finally:
+		os.unlink(ingested.path)
+
+	assert content == b"".join(chunks)
+	assert ingested.size == len(content)
+	assert ingested.sha256 == hashlib.sha256(content).hexdigest()
+	assert ingested.container == "mp4"
+
+
+@pytest.mark.asyncio
+async def test_stream_to_disk_removes_scratch_file_when_too_large():
+	with patch("videoverse_backend.services.file_service.os.unlink", wraps=os.unlink) as mock_unlink:
+		with pytest.raises(FileTooLargeError):
+			await FileService.stream_to_disk(Chunks([MP4_HEADER, b"x" * 100]), max_size=64)
+
+	removed_path = mock_unlink.call_args.args[0]
+	assert not os.path.exists(removed_path)
+
+
+@pytest.mark.asyncio
+async def test_stream_to_disk_rejects_non_video_on_first_chunk():
+	mock_file = Chunks([b"<html>" + b" " * 1024 + b"</html>", b"never read"])
+
+	with pytest.raises(UnsupportedMediaError):
+		await FileService.stream_to_disk(mock_file, max_size=10_000)
+
+	assert mock_file.received == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_to_disk_sniffs_headers_split_across_chunks():
+	packet = b"\x47" + b"\x00" * 187
+	chunks = [packet[:100], packet[100:] + packet[:1], packet[1:]]
+
+	ingested = await FileService.stream_to_disk(Chunks(chunks), max_size=10_000)
+	os.unlink(ingested.path)
+
+	assert ingested.container == "mpegts"
+	assert ingested.size == 2 * len(packet)
+	assert ingested.sha256 == hashlib.sha256(packet * 2).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_read_multipart_file_reads_the_body_up_to_the_file():
+	head = b'--b\r\nContent-Disposition: form-data; name="title"\r\n\r\nholiday\r\n'
+	head += b'--b\r\nContent-Disposition: form-data; name="file"; filename="clip.mp4"\r\n'
+	body = Chunks([head, b"Content-Type: video/mp4\r\n\r\n" + MP4_HEADER, b"more\r\n--b", b"--\r\n", b"unread"])
+
+	filename, chunks = await FileService.read_multipart_file("multipart/form-data; boundary=b", body)
+	assert (filename, body.received) == ("clip.mp4", 2)
+	content = b"".join([chunk async for chunk in chunks])
+
+	assert content == MP4_HEADER + b"more"
+	# The end of the boundary tells the file is over, what follows it is left unread.
+	assert body.received == 4
+
+
+@pytest.mark.asyncio
+async def test_read_multipart_file_rejects_other_requests():
+	with pytest.raises(MalformedUploadError):
+		await FileService.read_multipart_file("application/octet-stream", Chunks([MP4_HEADER]))
+
+	body = Chunks([b'--b\r\nContent-Disposition: form-data; name="file"; filename="clip.mp4"\r\n\r\n', MP4_HEADER])
+	_, chunks = await FileService.read_multipart_file("multipart/form-data; boundary=b", body)
+	with pytest.raises(MalformedUploadError):
+		await FileService.stream_to_disk(chunks, max_size=10_000)
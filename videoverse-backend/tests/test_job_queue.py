@@ -0,0 +1,188 @@
+import asyncio
+import uuid
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from videoverse_backend.core import JobKind, JobStatus
+from videoverse_backend.core.errors import JobQueueFullError
+from videoverse_backend.services.job_queue import JobQueue
+
+
+@pytest.fixture
+def job_dao():
+	with patch("videoverse_backend.services.job_queue.JobDAO") as dao_class:
+		dao = dao_class.return_value
+		dao.count_by_status = AsyncMock(return_value=0)
+		dao.create = AsyncMock(side_effect=lambda values: MagicMock(id=uuid.uuid4(), **values))
+		dao.update = AsyncMock()
+		dao.finish = AsyncMock(return_value=True)
+		dao.fail_stale = AsyncMock(return_value=0)
+		dao.claim_next = AsyncMock(return_value=None)
+		dao.get_active = AsyncMock(return_value=None)
+		yield dao
+
+
+def statuses(job_dao):
+	return [call.args[1].get("status") for call in job_dao.finish.call_args_list]
+
+
+@pytest.mark.asyncio
+async def test_submit_refuses_when_queue_is_full(job_dao):
+	queue = JobQueue(workers=1, max_depth=2, poll_interval=1, heartbeat_interval=30)
+	job_dao.count_by_status.return_value = 2
+
+	with pytest.raises(JobQueueFullError):
+		await queue.submit(JobKind.TRIM, {})
+
+	job_dao.create.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_submit_returns_the_unfinished_job_of_a_video(job_dao):
+	queue = JobQueue(workers=1, max_depth=1, poll_interval=1, heartbeat_interval=30)
+	video_id = uuid.uuid4()
+	active = MagicMock(id=uuid.uuid4(), status=JobStatus.RUNNING.value)
+	job_dao.get_active.return_value = active
+	job_dao.count_by_status.return_value = 1
+
+	assert await queue.submit(JobKind.RENDER, {"video_id": str(video_id)}, video_id=video_id) is active
+	job_dao.get_active.assert_awaited_once_with(JobKind.RENDER, video_id)
+	job_dao.create.assert_not_called()
+
+	# A submission that loses the race to store its job gets the job of the winner.
+	job_dao.get_active.side_effect = [None, active]
+	job_dao.count_by_status.return_value = 0
+	job_dao.create.side_effect = IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed"))
+
+	assert await queue.submit(JobKind.RENDER, {"video_id": str(video_id)}, video_id=video_id) is active
+	assert job_dao.create.call_args.args[0]["video_id"] == video_id
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_claimed_job_and_records_result(job_dao):
+	queue = JobQueue(workers=1, max_depth=10, poll_interval=0.01, heartbeat_interval=30)
+	result_video_id = uuid.uuid4()
+	finished = asyncio.Event()
+
+	async def trim(payload, report_progress):
+		await report_progress(0.5)
+		finished.set()
+		return result_video_id
+
+	queue.register(JobKind.TRIM, trim)
+	job = MagicMock(id=uuid.uuid4(), kind="trim", payload={"video_id": "x"}, deadline_at=None)
+	job_dao.claim_next.side_effect = [job, None, None, None]
+
+	queue.start()
+	await asyncio.wait_for(finished.wait(), 1)
+	await asyncio.sleep(0.05)
+	await queue.stop()
+
+	progress_values = [call.args[1]["progress"] for call in job_dao.update.call_args_list]
+	assert progress_values == [0.5]
+	assert job_dao.finish.call_args.args[1]["progress"] == 1.0
+	assert statuses(job_dao) == [JobStatus.SUCCEEDED.value]
+	assert job_dao.finish.call_args.args[1]["result_video_id"] == result_video_id
+
+
+@pytest.mark.asyncio
+async def test_failed_and_interrupted_jobs_are_recorded(job_dao):
+	queue = JobQueue(workers=1, max_depth=10, poll_interval=1, heartbeat_interval=30)
+	started = asyncio.Event()
+
+	async def broken(payload, report_progress):
+		raise RuntimeError("ffmpeg exploded")
+
+	async def slow(payload, report_progress):
+		started.set()
+		await asyncio.sleep(60)
+
+	queue.register(JobKind.TRIM, broken)
+	queue.register(JobKind.MERGE, slow)
+
+	await queue._run(MagicMock(id=uuid.uuid4(), kind="trim", payload={}, deadline_at=None))
+	assert job_dao.finish.call_args.args[1]["error"] == "ffmpeg exploded"
+
+	task = asyncio.create_task(queue._run(MagicMock(id=uuid.uuid4(), kind="merge", payload={}, deadline_at=None)))
+	await started.wait()
+	task.cancel()
+	with pytest.raises(asyncio.CancelledError):
+		await task
+
+	assert statuses(job_dao) == [JobStatus.FAILED.value, JobStatus.FAILED.value]
+	assert "shutdown" in job_dao.finish.call_args.args[1]["error"]
+
+
+@pytest.mark.asyncio
+async def test_job_producing_several_videos_records_all_of_them(job_dao):
+	queue = JobQueue(workers=1, max_depth=10, poll_interval=1, heartbeat_interval=30)
+	clip_ids = [uuid.uuid4(), uuid.uuid4()]
+
+	async def batch_trim(payload, report_progress):
+		return clip_ids
+
+	queue.register(JobKind.BATCH_TRIM, batch_trim)
+	await queue._run(MagicMock(id=uuid.uuid4(), kind="batch_trim", payload={}, deadline_at=None))
+
+	assert statuses(job_dao) == [JobStatus.SUCCEEDED.value]
+	assert job_dao.finish.call_args.args[1]["result_video_ids"] == [str(clip_id) for clip_id in clip_ids]
+	assert "result_video_id" not in job_dao.finish.call_args.args[1]
+
+
+@pytest.mark.asyncio
+async def test_job_past_its_deadline_is_failed(job_dao):
+	queue = JobQueue(workers=1, max_depth=10, poll_interval=1, heartbeat_interval=30)
+	started = asyncio.Event()
+
+	async def slow(payload, report_progress):
+		started.set()
+		await asyncio.sleep(60)
+
+	queue.register(JobKind.TRIM, slow)
+	expired = JobQueue._now() - timedelta(seconds=1)
+	await queue._run(MagicMock(id=uuid.uuid4(), kind="trim", payload={}, deadline_at=expired))
+
+	assert not started.is_set()
+	assert "before it started" in job_dao.finish.call_args.args[1]["error"]
+
+	soon = JobQueue._now() + timedelta(seconds=0.05)
+	await asyncio.wait_for(queue._run(MagicMock(id=uuid.uuid4(), kind="trim", payload={}, deadline_at=soon)), 1)
+
+	assert started.is_set()
+	assert statuses(job_dao) == [JobStatus.FAILED.value, JobStatus.FAILED.value]
+	assert "did not finish before its deadline" in job_dao.finish.call_args.args[1]["error"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_job_is_stopped(job_dao):
+	queue = JobQueue(workers=1, max_depth=10, poll_interval=1, heartbeat_interval=0.01)
+	started = asyncio.Event()
+	stopped = asyncio.Event()
+
+	async def slow(payload, report_progress):
+		started.set()
+		try:
+			await asyncio.sleep(60)
+		finally:
+			stopped.set()
+
+	queue.register(JobKind.TRIM, slow)
+	job = MagicMock(id=uuid.uuid4(), kind="trim", payload={}, deadline_at=None)
+	task = asyncio.create_task(queue._run(job))
+	await started.wait()
+	queue.cancel(job.id)
+	await asyncio.wait_for(task, 1)
+
+	assert stopped.is_set()
+	assert statuses(job_dao) == []
+
+	# Cancelled through another server process, the heartbeat finds the status.
+	started.clear()
+	stopped.clear()
+	job_dao.update.return_value = MagicMock(status=JobStatus.CANCELLED.value)
+	await asyncio.wait_for(queue._run(job), 1)
+
+	assert stopped.is_set()
+	assert statuses(job_dao) == []
@@ -0,0 +1,95 @@
+import struct
+
+import pytest
+from videoverse_backend.services import MediaProbe
+
+from tests.helpers import box
+
+
+def mvhd(timescale, duration, version=0):
+	if version == 1:
+		return box(b"mvhd", bytes([1, 0, 0, 0]) + b"\x00" * 16 + struct.pack(">IQ", timescale, duration) + b"\x00" * 80)
+	return box(b"mvhd", b"\x00" * 12 + struct.pack(">II", timescale, duration) + b"\x00" * 80)
+
+
+def video_trak(fourcc=b"avc1", width=1280, height=720):
+	sample_entry = box(
+		fourcc, b"\x00" * 6 + b"\x00\x01" + b"\x00" * 16 + struct.pack(">HH", width, height) + b"\x00" * 50
+	)
+	stsd = box(b"stsd", b"\x00" * 4 + struct.pack(">I", 1) + sample_entry)
+	hdlr = box(b"hdlr", b"\x00" * 8 + b"vide" + b"\x00" * 13)
+	return box(b"trak", box(b"tkhd", b"\x00" * 84) + box(b"mdia", hdlr + box(b"minf", box(b"stbl", stsd))))
+
+
+def ebml(element_id, payload):
+	size = len(payload)
+	return (
+		element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+		+ (0x10000000 | size).to_bytes(4, "big")
+		+ payload
+	)
+
+
+def write(tmp_path, name, content):
+	path = tmp_path / name
+	path.write_bytes(content)
+	return str(path)
+
+
+def test_probe_mp4_with_moov_after_mdat(tmp_path):
+	content = box(b"ftyp", b"isom\x00\x00\x02\x00") + box(b"mdat", b"\x00" * 4096)
+	content += box(b"moov", mvhd(1000, 12_345) + video_trak())
+
+	media_info = MediaProbe.probe(write(tmp_path, "clip.mp4", content))
+
+	assert media_info.duration_us == 12_345_000
+	assert media_info.duration == pytest.approx(12.345)
+	assert (media_info.video_codec, media_info.width, media_info.height) == ("h264", 1280, 720)
+
+
+def test_probe_mp4_version_1_mvhd(tmp_path):
+	content = box(b"ftyp", b"qt  \x00\x00\x00\x00") + box(b"moov", mvhd(90_000, 900_000, version=1))
+
+	media_info = MediaProbe.probe(write(tmp_path, "clip.mov", content))
+
+	assert media_info.duration_us == 10_000_000
+	assert media_info.video_codec is None
+
+
+def test_probe_fragmented_mp4_uses_mehd(tmp_path):
+	mehd = box(b"mehd", b"\x00" * 4 + struct.pack(">I", 5_000))
+	content = box(b"ftyp", b"iso5\x00\x00\x02\x00") + box(b"moov", mvhd(1000, 0) + box(b"mvex", mehd))
+
+	assert MediaProbe.probe(write(tmp_path, "frag.mp4", content)).duration_us == 5_000_000
+
+
+def test_probe_mp4_without_duration_falls_back(tmp_path):
+	content = box(b"ftyp", b"iso5\x00\x00\x02\x00") + box(b"moov", mvhd(1000, 0))
+
+	assert MediaProbe.probe(write(tmp_path, "live.mp4", content)) is None
+
+
+def test_probe_matroska(tmp_path):
+	info = ebml(0x2AD7B1, (1_000_000).to_bytes(3, "big")) + ebml(0x4489, struct.pack(">d", 7_500.0))
+	video = ebml(0xB0, (640).to_bytes(2, "big")) + ebml(0xBA, (360).to_bytes(2, "big"))
+	audio_track = ebml(0xAE, ebml(0x83, b"\x02") + ebml(0x86, b"A_OPUS"))
+	video_track = ebml(0xAE, ebml(0x83, b"\x01") + ebml(0x86, b"V_VP9") + ebml(0xE0, video))
+	segment = ebml(0x1549A966, info) + ebml(0x1654AE6B, audio_track + video_track) + ebml(0x1F43B675, b"\x00" * 64)
+	content = ebml(0x1A45DFA3, ebml(0x4282, b"webm")) + ebml(0x18538067, segment)
+
+	media_info = MediaProbe.probe(write(tmp_path, "clip.webm", content))
+
+	assert media_info.duration_us == 7_500_000
+	assert (media_info.video_codec, media_info.width, media_info.height) == ("vp9", 640, 360)
+
+
+@pytest.mark.parametrize(
+	"content",
+	[
+		b"plain text is not a video at all",
+		box(b"ftyp", b"isom") + struct.pack(">I4s", 4096, b"moov") + b"\x00" * 10,
+		b"\x1a\x45\xdf\xa3\x00",
+	],
+)
+def test_probe_unparseable_returns_none(tmp_path, content):
+	assert MediaProbe.probe(write(tmp_path, "broken.bin", content)) is None
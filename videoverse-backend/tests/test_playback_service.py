@@ -0,0 +1,89 @@
+import time
+import uuid
+from datetime import timedelta
+from urllib.parse import urlparse
+
+import pytest
+from videoverse_backend.services.playback_service import PlaybackService
+from videoverse_backend.services.storage import AsyncStorage, InMemoryStorage
+
+MEDIA_PLAYLIST = """#EXTM3U
+#EXT-X-VERSION:7
+#EXT-X-TARGETDURATION:6
+#EXT-X-PLAYLIST-TYPE:VOD
+#EXT-X-MAP:URI="init_0.mp4"
+#EXTINF:6.000000,
+segment00000.m4s
+#EXTINF:2.000000,
+segment00001.m4s
+#EXT-X-ENDLIST
+"""
+MASTER_PLAYLIST = """#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=3052603,RESOLUTION=1280x720
+0/index.m3u8
+"""
+
+
+@pytest.fixture
+def playback():
+	return PlaybackService(AsyncStorage(InMemoryStorage(), max_workers=2), "https://api.test/api/playback/", "key")
+
+
+def test_manifest_url_carries_the_signature_in_its_path(playback):
+	video_id = uuid.uuid4()
+	signed_url = playback.manifest_url(video_id, timedelta(hours=1))
+
+	base, expires, signature, playlist = urlparse(signed_url.url).path.rsplit("/", 3)
+	assert base == f"/api/playback/{video_id}"
+	assert playlist == "master.m3u8"
+	assert int(expires) == int(signed_url.expires_at.timestamp())
+	assert playback.verify_signature(video_id, int(expires), signature)
+	assert not playback.verify_signature(uuid.uuid4(), int(expires), signature)
+	assert not playback.verify_signature(video_id, int(time.time()) - 1, playback._sign(video_id, int(time.time()) - 1))
+
+
+def test_resolve_playlist_stays_inside_the_package():
+	manifest = "videos/clip_hls_1/master.m3u8"
+
+	assert PlaybackService.resolve_playlist(manifest, "master.m3u8") == manifest
+	assert PlaybackService.resolve_playlist(manifest, "0/index.m3u8") == "videos/clip_hls_1/0/index.m3u8"
+	assert PlaybackService.resolve_playlist(manifest, "../clip_hls_2/master.m3u8") is None
+	assert PlaybackService.resolve_playlist(manifest, "0/segment00000.m4s") is None
+
+
+@pytest.mark.asyncio
+async def test_upload_and_render_playlists(playback, tmp_path):
+	(tmp_path / "0").mkdir()
+	(tmp_path / "master.m3u8").write_text(MASTER_PLAYLIST)
+	(tmp_path / "0" / "index.m3u8").write_text(MEDIA_PLAYLIST)
+	for name in ("init_0.mp4", "segment00000.m4s", "segment00001.m4s"):
+		(tmp_path / "0" / name).write_bytes(b"media")
+
+	manifest = await playback.upload_package(str(tmp_path), "videos/clip_hls_1")
+	expires = int(time.time()) + 3600
+	master = await playback.render_playlist(manifest, expires)
+	media = await playback.render_playlist("videos/clip_hls_1/0/index.m3u8", expires)
+
+	assert manifest == "videos/clip_hls_1/master.m3u8"
+	assert len(playback.storage.backend.objects) == 5
+	assert master == MASTER_PLAYLIST
+	assert '#EXT-X-MAP:URI="memory://videos/clip_hls_1/0/init_0.mp4?expires=' in media
+	assert "\nmemory://videos/clip_hls_1/0/segment00001.m4s?expires=" in media
+	assert "\nsegment00000.m4s" not in media
+
+
+@pytest.mark.asyncio
+async def test_delete_package_removes_every_file(playback, tmp_path):
+	(tmp_path / "0").mkdir()
+	(tmp_path / "master.m3u8").write_text(MASTER_PLAYLIST)
+	(tmp_path / "0" / "index.m3u8").write_text(MEDIA_PLAYLIST)
+	await playback.storage.upload_file("videos/clip.mp4", str(tmp_path / "master.m3u8"))
+	await playback.upload_package(str(tmp_path), "videos/clip_hls_1")
+
+	deletions = playback.delete_package(str(tmp_path), "videos/clip_hls_1")
+	# The files are named up front, the local directory is not needed once the deletions started.
+	for path in (tmp_path / "0" / "index.m3u8", tmp_path / "master.m3u8"):
+		path.unlink()
+	await deletions
+
+	assert list(playback.storage.backend.objects) == ["videos/clip.mp4"]
@@ -0,0 +1,122 @@
+import asyncio
+import subprocess
+import sys
+import time
+
+import pytest
+from videoverse_backend.services.ffmpeg_progress import ProgressTracker
+from videoverse_backend.services.process_runner import ProcessRunner
+
+
+@pytest.mark.asyncio
+async def test_run_captures_output():
+	runner = ProcessRunner(max_processes=2, timeout=10)
+
+	result = await runner.run([sys.executable, "-c", "print('hello')"])
+
+	assert result.returncode == 0
+	assert result.stdout.strip() == b"hello"
+
+
+@pytest.mark.asyncio
+async def test_run_raises_called_process_error_with_stderr():
+	runner = ProcessRunner(max_processes=2, timeout=10)
+
+	with pytest.raises(subprocess.CalledProcessError) as error:
+		await runner.run([sys.executable, "-c", "import sys; sys.stderr.write('boom'); sys.exit(3)"])
+
+	assert error.value.returncode == 3
+	assert error.value.stderr == b"boom"
+
+
+@pytest.mark.asyncio
+async def test_run_kills_process_on_timeout():
+	runner = ProcessRunner(max_processes=1, timeout=10)
+
+	started = time.monotonic()
+	with pytest.raises(subprocess.TimeoutExpired):
+		await runner.run([sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.5)
+
+	assert time.monotonic() - started < 5
+
+
+@pytest.mark.asyncio
+async def test_run_limits_concurrency_without_blocking_the_loop():
+	runner = ProcessRunner(max_processes=1, timeout=10)
+	ticks = 0
+
+	async def ticker():
+		nonlocal ticks
+		while True:
+			ticks += 1
+			await asyncio.sleep(0.01)
+
+	ticker_task = asyncio.create_task(ticker())
+	started = time.monotonic()
+	await asyncio.gather(*(runner.run([sys.executable, "-c", "import time; time.sleep(0.3)"]) for _ in range(2)))
+	elapsed = time.monotonic() - started
+	ticker_task.cancel()
+
+	assert elapsed >= 0.6
+	assert ticks > 10
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_output_in_chunks():
+	runner = ProcessRunner(max_processes=1, timeout=10)
+
+	chunks = [chunk async for chunk in runner.stream([sys.executable, "-c", "print('x' * 2499)"], 1000)]
+
+	assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+
+
+@pytest.mark.asyncio
+async def test_stream_fails_before_the_end_when_process_fails():
+	runner = ProcessRunner(max_processes=1, timeout=10)
+	received = []
+
+	with pytest.raises(subprocess.CalledProcessError) as error:
+		command = [sys.executable, "-c", "import sys; print('output'); sys.stderr.write('boom'); sys.exit(2)"]
+		async for chunk in runner.stream(command, 1000):
+			received.append(chunk)
+
+	assert received == [b"output\n"]
+	assert error.value.stderr == b"boom"
+
+
+@pytest.mark.asyncio
+async def test_stream_kills_process_on_timeout():
+	runner = ProcessRunner(max_processes=1, timeout=10)
+
+	started = time.monotonic()
+	with pytest.raises(subprocess.TimeoutExpired):
+		async for _ in runner.stream([sys.executable, "-c", "import time; time.sleep(30)"], 1000, timeout=0.5):
+			pass
+
+	assert time.monotonic() - started < 5
+
+
+@pytest.mark.asyncio
+async def test_progress_is_read_from_a_pipe_of_the_process(tmp_path):
+	fake_ffmpeg = tmp_path / "ffmpeg"
+	fake_ffmpeg.write_text(
+		f"#!{sys.executable}\n"
+		"import os, sys\n"
+		"assert sys.argv[3] == '-nostats'\n"
+		"fd = int(sys.argv[2].removeprefix('pipe:'))\n"
+		"os.write(fd, b'frame=30\\nfps=N/A\\nout_time_us=1000000\\nspeed=N/A\\nprogress=continue\\n')\n"
+		"os.write(fd, b'frame=60\\nfps=60.0\\nbitrate=512.0kbits/s\\n')\n"
+		"os.write(fd, b'out_time_us=2000000\\nspeed=4.0x\\nprogress=end\\n')\n"
+		"print(sys.argv[4])\n",
+	)
+	fake_ffmpeg.chmod(0o755)
+	progress = ProgressTracker(history_size=10)
+	runner = ProcessRunner(max_processes=1, timeout=10, progress=progress)
+
+	result = await runner.run([str(fake_ffmpeg), "output.mp4"], operation="trim")
+
+	assert result.stdout.strip() == b"output.mp4"
+	assert progress.running == {}
+	[run] = progress.history
+	assert (run.operation, run.work_class, run.returncode) == ("trim", "encode", 0)
+	assert (run.sample.frame, run.sample.out_time, run.sample.speed, run.sample.bitrate) == (60, 2.0, 4.0, 512.0)
@@ -0,0 +1,114 @@
+from contextlib import asynccontextmanager
+
+import pytest
+from videoverse_backend.core import ByteRange, RangeResponse, parse_range_header
+from videoverse_backend.core.schema.range_response import ZERO_COPY_SEND
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.mark.parametrize(
+	("header", "expected"),
+	[
+		("bytes=0-99", [ByteRange(0, 100)]),
+		("bytes=1000-", [ByteRange(1000, 1024)]),
+		("bytes=-24", [ByteRange(1000, 1024)]),
+		("bytes=-5000", [ByteRange(0, 1024)]),
+		("bytes=1000-5000", [ByteRange(1000, 1024)]),
+		("bytes=500-599, 0-9, 550-700", [ByteRange(0, 10), ByteRange(500, 701)]),
+		("bytes=0-9,10-19", [ByteRange(0, 20)]),
+		("bytes=1024-", []),
+		("bytes=-0", []),
+		("bytes=9-0", None),
+		("bytes=a-b", None),
+		("bytes=-", None),
+		("items=0-9", None),
+		("bytes=" + ",".join(f"{i * 10}-{i * 10}" for i in range(17)), None),
+	],
+)
+def test_parse_range_header(header, expected):
+	assert parse_range_header(header, len(CONTENT)) == expected
+
+
+async def send_response(response, extensions=None, method="GET"):
+	messages = []
+
+	async def send(message):
+		messages.append(message)
+
+	scope = {"type": "http", "method": method, "extensions": extensions or {}}
+	await response(scope, None, send)
+	start, *body = messages
+	return start, dict((k.decode(), v.decode()) for k, v in start["headers"]), body
+
+
+def make_response(ranges, file_path=None, reads=None):
+	@asynccontextmanager
+	async def open_file():
+		yield file_path
+
+	async def read(start, end):
+		reads.append((start, end))
+		yield CONTENT[start:end]
+
+	return RangeResponse(len(CONTENT), ranges, "video/mp4", open_file, read, headers={"ETag": '"1"'})
+
+
+@pytest.fixture
+def content_file(tmp_path):
+	path = tmp_path / "clip.mp4"
+	path.write_bytes(CONTENT)
+	return str(path)
+
+
+@pytest.mark.asyncio
+async def test_single_range_is_read_from_the_local_file(content_file):
+	start, headers, body = await send_response(make_response([ByteRange(10, 20)], content_file))
+
+	assert start["status"] == 206
+	assert headers["content-range"] == "bytes 10-19/1024"
+	assert headers["content-length"] == "10"
+	assert headers["accept-ranges"] == "bytes"
+	assert headers["etag"] == '"1"'
+	assert b"".join(message["body"] for message in body) == CONTENT[10:20]
+
+
+@pytest.mark.asyncio
+async def test_local_file_is_handed_to_the_server_when_it_can_send_it(content_file):
+	start, headers, body = await send_response(make_response(None, content_file), {ZERO_COPY_SEND: {}})
+
+	assert start["status"] == 200
+	assert headers["content-length"] == "1024"
+	assert [(message["type"], message.get("offset"), message.get("count")) for message in body] == [
+		(ZERO_COPY_SEND, 0, 1024),
+		("http.response.body", None, None),
+	]
+
+
+@pytest.mark.asyncio
+async def test_several_ranges_are_proxied_as_multipart_byteranges():
+	reads = []
+	start, headers, body = await send_response(make_response([ByteRange(0, 4), ByteRange(100, 104)], reads=reads))
+	content = b"".join(message["body"] for message in body)
+	boundary = headers["content-type"].removeprefix("multipart/byteranges; boundary=")
+
+	assert start["status"] == 206
+	assert int(headers["content-length"]) == len(content)
+	assert reads == [(0, 4), (100, 104)]
+	assert content == (
+		f"--{boundary}\r\nContent-Type: video/mp4\r\nContent-Range: bytes 0-3/1024\r\n\r\n".encode()
+		+ CONTENT[0:4]
+		+ f"\r\n--{boundary}\r\nContent-Type: video/mp4\r\nContent-Range: bytes 100-103/1024\r\n\r\n".encode()
+		+ CONTENT[100:104]
+		+ f"\r\n--{boundary}--\r\n".encode()
+	)
+
+
+@pytest.mark.asyncio
+async def test_replaced_file_is_refused(tmp_path):
+	path = tmp_path / "clip.mp4"
+	path.write_bytes(CONTENT[:10])
+
+	start, _, _ = await send_response(make_response(None, str(path)))
+
+	assert start["status"] == 503
@@ -0,0 +1,457 @@
+import asyncio
+import os
+import subprocess
+import threading
+from datetime import UTC, datetime, timedelta
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pytest
+from videoverse_backend.core.errors import ChecksumMismatchError
+from videoverse_backend.services.storage import (
+	AsyncStorage,
+	BlobCache,
+	InMemoryStorage,
+	LocalStorage,
+	SignedUrl,
+	SignedUrlCache,
+)
+
+
+@pytest.fixture
+def source_file(tmp_path):
+	path = tmp_path / "source.mp4"
+	path.write_bytes(b"video bytes")
+	return str(path)
+
+
+@pytest.fixture
+def local_storage(tmp_path):
+	return LocalStorage(str(tmp_path / "store"), "http://testserver/api/storage", "secret")
+
+
+@pytest.mark.parametrize("backend", ["local", "memory"])
+def test_round_trip(backend, source_file, local_storage, tmp_path):
+	storage = local_storage if backend == "local" else InMemoryStorage()
+
+	storage.upload_file("videos/clip.mp4", source_file)
+	downloaded = storage.download_file("clip.mp4", "videos/clip.mp4", str(tmp_path / "out"))
+
+	assert storage.exists("videos/clip.mp4")
+	with open(downloaded, "rb") as copy:
+		assert copy.read() == b"video bytes"
+
+	storage.delete("videos/clip.mp4")
+	assert not storage.exists("videos/clip.mp4")
+	with pytest.raises(FileNotFoundError):
+		storage.download_file("clip.mp4", "videos/clip.mp4", str(tmp_path / "out"))
+
+
+def test_local_download_replaces_existing_destination(source_file, local_storage, tmp_path):
+	local_storage.upload_file("videos/clip.mp4", source_file)
+	destination = tmp_path / "clip.mp4"
+	destination.write_bytes(b"stale")
+
+	local_storage.download_to_filename("videos/clip.mp4", str(destination))
+
+	assert destination.read_bytes() == b"video bytes"
+
+
+def test_local_upload_leaves_no_staging_files(source_file, local_storage):
+	local_storage.upload_file("videos/clip.mp4", source_file)
+	local_storage.upload_file("videos/clip.mp4", source_file)
+
+	assert os.listdir(os.path.join(local_storage.root, "videos")) == ["clip.mp4"]
+
+
+def test_local_rejects_paths_outside_root(local_storage):
+	with pytest.raises(ValueError):
+		local_storage.resolve("../escape.mp4")
+
+
+def test_local_signed_url_verifies(local_storage):
+	url = urlparse(local_storage.get_signed_url("videos/my clip.mp4", timedelta(hours=1)))
+	query = parse_qs(url.query)
+	storage_path = unquote(url.path.removeprefix("/api/storage/"))
+	expires, signature = int(query["expires"][0]), query["signature"][0]
+
+	assert storage_path == "videos/my clip.mp4"
+	assert local_storage.verify_signature(storage_path, expires, signature)
+	assert not local_storage.verify_signature("videos/other.mp4", expires, signature)
+	assert not local_storage.verify_signature(storage_path, expires + 1, signature)
+
+
+def test_local_signed_url_expires(local_storage):
+	url = urlparse(local_storage.get_signed_url("videos/clip.mp4", timedelta(seconds=-1)))
+	query = parse_qs(url.query)
+
+	assert not local_storage.verify_signature("videos/clip.mp4", int(query["expires"][0]), query["signature"][0])
+
+
+@pytest.mark.asyncio
+async def test_async_storage_runs_transfers_in_parallel(source_file, tmp_path):
+	class BarrierStorage(InMemoryStorage):
+		"""Every download waits until all of them are in flight, which only succeeds when they run in parallel."""
+
+		def __init__(self, parties):
+			super().__init__()
+			self.barrier = threading.Barrier(parties, timeout=5)
+
+		def download_to_filename(self, storage_path, destination):
+			self.barrier.wait()
+			super().download_to_filename(storage_path, destination)
+
+	backend = BarrierStorage(parties=3)
+	storage = AsyncStorage(backend, max_workers=3)
+	for index in range(3):
+		await storage.upload_file(f"videos/{index}.mp4", source_file)
+
+	downloaded = await asyncio.gather(
+		*(storage.download_file(f"{index}.mp4", f"videos/{index}.mp4", str(tmp_path / "out")) for index in range(3)),
+	)
+
+	assert sorted(os.path.basename(path) for path in downloaded) == ["0.mp4", "1.mp4", "2.mp4"]
+
+
+def make_fetch(content, calls):
+	async def fetch(destination):
+		calls.append(destination)
+		await asyncio.sleep(0.01)
+		with open(destination, "wb") as fetched:
+			fetched.write(content)
+
+	return fetch
+
+
+@pytest.mark.asyncio
+async def test_blob_cache_shares_concurrent_fetches(tmp_path):
+	cache = BlobCache(str(tmp_path / "cache"), max_bytes=1024)
+	calls = []
+
+	async def read(version):
+		async with cache.open("videos/clip.mp4", version, make_fetch(b"clip", calls)) as local_path:
+			with open(local_path, "rb") as cached:
+				return cached.read()
+
+	assert await asyncio.gather(read("1"), read("1"), read("1")) == [b"clip"] * 3
+	assert len(calls) == 1
+
+	await read("2")
+	assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_blob_cache_evicts_least_recently_used_unpinned(tmp_path):
+	cache = BlobCache(str(tmp_path / "cache"), max_bytes=10)
+	calls = []
+
+	async with cache.open("videos/a.mp4", "1", make_fetch(b"a" * 6, calls)) as pinned_path:
+		async with cache.open("videos/b.mp4", "1", make_fetch(b"b" * 6, calls)):
+			pass
+		# b was released and is over the budget, a is still being read.
+		assert os.path.exists(pinned_path)
+		assert cache.size == 6
+
+	async with cache.open("videos/a.mp4", "1", make_fetch(b"a" * 6, calls)):
+		pass
+	assert len(calls) == 2
+
+
+def test_blob_cache_takes_over_files_of_exited_processes_only(tmp_path):
+	exited = subprocess.Popen(["true"])
+	exited.wait()
+	root = tmp_path / "cache"
+	(root / f"process-{exited.pid}").mkdir(parents=True)
+	(root / f"process-{exited.pid}" / "abandoned.mp4").write_bytes(b"abandoned")
+	(root / f"process-{exited.pid}" / ".fetch-abandoned").write_bytes(b"partial")
+	(root / f"process-{os.getppid()}").mkdir()
+	(root / f"process-{os.getppid()}" / "in-use.mp4").write_bytes(b"in use")
+	(root / f"process-{os.getppid()}" / ".fetch-in-progress").write_bytes(b"partial")
+
+	cache = BlobCache(str(root), max_bytes=1024)
+
+	assert os.listdir(cache.directory) == ["abandoned.mp4"]
+	assert cache.size == len(b"abandoned")
+	assert not (root / f"process-{exited.pid}").exists()
+	assert sorted(os.listdir(root / f"process-{os.getppid()}")) == [".fetch-in-progress", "in-use.mp4"]
+
+
+@pytest.mark.asyncio
+async def test_async_storage_upload_populates_cache(source_file, tmp_path):
+	class CountingStorage(InMemoryStorage):
+		downloads = 0
+
+		def download_to_filename(self, storage_path, destination):
+			self.downloads += 1
+			super().download_to_filename(storage_path, destination)
+
+	backend = CountingStorage()
+	storage = AsyncStorage(backend, max_workers=2, cache=BlobCache(str(tmp_path / "cache"), max_bytes=1024))
+
+	await storage.upload_file("videos/clip.mp4", source_file)
+	async with storage.open("videos/clip.mp4") as local_path:
+		with open(local_path, "rb") as cached:
+			assert cached.read() == b"video bytes"
+	assert backend.downloads == 0
+
+	backend.objects["videos/clip.mp4"] = b"replaced"
+	backend.versions["videos/clip.mp4"] += 1
+	async with storage.open("videos/clip.mp4") as local_path:
+		with open(local_path, "rb") as cached:
+			assert cached.read() == b"replaced"
+	assert backend.downloads == 1
+
+
+class RangeRecordingStorage(InMemoryStorage):
+	def __init__(self):
+		super().__init__()
+		self.ranges = []
+
+	def read_range(self, storage_path, version, start, end):
+		self.ranges.append((start, end))
+		return super().read_range(storage_path, version, start, end)
+
+
+@pytest.mark.asyncio
+async def test_ranged_download_reassembles_object(tmp_path):
+	content = os.urandom(10_000)
+	source = tmp_path / "large.mp4"
+	source.write_bytes(content)
+	backend = RangeRecordingStorage()
+	storage = AsyncStorage(backend, max_workers=4, range_threshold=4096, range_chunk_size=3000, range_parallelism=3)
+	await storage.upload_file("videos/large.mp4", str(source))
+
+	downloaded = await storage.download_file("large.mp4", "videos/large.mp4", str(tmp_path / "out"))
+
+	with open(downloaded, "rb") as copy:
+		assert copy.read() == content
+	assert sorted(backend.ranges) == [(0, 3000), (3000, 6000), (6000, 9000), (9000, 10_000)]
+
+
+@pytest.mark.asyncio
+async def test_ranged_download_skips_small_objects(source_file, tmp_path):
+	backend = RangeRecordingStorage()
+	storage = AsyncStorage(backend, max_workers=2, range_threshold=4096, range_chunk_size=1024)
+	await storage.upload_file("videos/clip.mp4", source_file)
+
+	await storage.download_file("clip.mp4", "videos/clip.mp4", str(tmp_path / "out"))
+
+	assert backend.ranges == []
+
+
+@pytest.mark.asyncio
+async def test_ranged_download_rejects_corrupt_range(tmp_path):
+	class CorruptingStorage(InMemoryStorage):
+		def read_range(self, storage_path, version, start, end):
+			data = super().read_range(storage_path, version, start, end)
+			return data if start else b"\xff" * len(data)
+
+	source = tmp_path / "large.mp4"
+	source.write_bytes(b"\x00" * 8192)
+	storage = AsyncStorage(CorruptingStorage(), max_workers=2, range_threshold=4096, range_chunk_size=4096)
+	await storage.upload_file("videos/large.mp4", str(source))
+
+	with pytest.raises(ChecksumMismatchError):
+		await storage.download_file("large.mp4", "videos/large.mp4", str(tmp_path / "out"))
+
+
+@pytest.mark.asyncio
+async def test_cancelled_ranged_download_lets_running_ranges_finish(tmp_path):
+	class BlockingStorage(RangeRecordingStorage):
+		def __init__(self):
+			super().__init__()
+			self.started = threading.Event()
+			self.release = threading.Event()
+
+		def read_range(self, storage_path, version, start, end):
+			self.started.set()
+			self.release.wait(5)
+			return super().read_range(storage_path, version, start, end)
+
+	content = os.urandom(8192)
+	source = tmp_path / "large.mp4"
+	source.write_bytes(content)
+	backend = BlockingStorage()
+	storage = AsyncStorage(backend, max_workers=2, range_threshold=4096, range_chunk_size=4096, range_parallelism=2)
+	await storage.upload_file("videos/large.mp4", str(source))
+	destination = str(tmp_path / "copy.mp4")
+	written = []
+	write_range = storage._write_range
+
+	def record_write(*args):
+		try:
+			write_range(*args)
+		except OSError as exception:
+			written.append(exception)
+			raise
+		written.append(args[3])
+
+	storage._write_range = record_write
+	download = asyncio.create_task(storage.download_to_filename("videos/large.mp4", destination))
+	await asyncio.to_thread(backend.started.wait, 5)
+	download.cancel()
+	with pytest.raises(asyncio.CancelledError):
+		await download
+	# The ranges in the pool outlive the cancelled download and still write to its file.
+	backend.release.set()
+	await asyncio.to_thread(storage._executor.shutdown)
+
+	assert not [result for result in written if isinstance(result, OSError)]
+	assert sorted(written) == [0, 4096]
+	with open(destination, "rb") as copy:
+		assert copy.read() == content
+
+
+def test_signed_url_cache_reuses_until_remaining_lifetime_drops():
+	cache = SignedUrlCache(max_entries=10, min_remaining=0.5)
+	hour = timedelta(hours=1)
+	cache.put("videos/fresh.mp4", hour, SignedUrl("fresh", datetime.now(UTC) + hour))
+	cache.put("videos/stale.mp4", hour, SignedUrl("stale", datetime.now(UTC) + hour * 0.4))
+
+	assert cache.get("videos/fresh.mp4", hour).url == "fresh"
+	assert cache.get("videos/fresh.mp4", hour * 2) is None
+	assert cache.get("videos/stale.mp4", hour) is None
+
+
+def test_signed_url_cache_evicts_least_recently_used():
+	cache = SignedUrlCache(max_entries=2, min_remaining=0.5)
+	hour = timedelta(hours=1)
+	for name in ("a", "b"):
+		cache.put(name, hour, SignedUrl(name, datetime.now(UTC) + hour))
+	cache.get("a", hour)
+	cache.put("c", hour, SignedUrl("c", datetime.now(UTC) + hour))
+
+	assert cache.get("b", hour) is None
+	assert cache.get("a", hour) is not None
+
+
+def test_signed_url_cache_reuses_for_nearby_lifetimes():
+	cache = SignedUrlCache(max_entries=10, min_remaining=0.9)
+	hour = timedelta(hours=1)
+	cache.put("videos/clip.mp4", hour, SignedUrl("hour", datetime.now(UTC) + hour))
+
+	# A playlist asks for the time left until its expiry, which shrinks between requests.
+	assert cache.get("videos/clip.mp4", hour - timedelta(seconds=3)).url == "hour"
+	assert cache.get("videos/clip.mp4", hour * 0.95).url == "hour"
+	# Neither a much longer nor a much shorter link is handed out.
+	assert cache.get("videos/clip.mp4", hour * 2) is None
+	assert cache.get("videos/clip.mp4", hour * 0.5) is None
+
+	cache.put("videos/clip.mp4", hour * 0.5, SignedUrl("half", datetime.now(UTC) + hour * 0.5))
+
+	assert cache.get("videos/clip.mp4", hour * 0.5).url == "half"
+	assert cache.get("videos/clip.mp4", hour).url == "hour"
+
+
+@pytest.mark.asyncio
+async def test_async_storage_signs_once_until_object_is_replaced(source_file):
+	class CountingStorage(InMemoryStorage):
+		signatures = 0
+
+		def get_signed_url(self, storage_path, expiration):
+			self.signatures += 1
+			return super().get_signed_url(storage_path, expiration)
+
+	backend = CountingStorage()
+	storage = AsyncStorage(backend, max_workers=1, url_cache=SignedUrlCache(max_entries=10, min_remaining=0.9))
+	await storage.upload_file("videos/clip.mp4", source_file)
+
+	first = await storage.get_signed_url("videos/clip.mp4", timedelta(hours=24))
+	assert await storage.get_signed_url("videos/clip.mp4", timedelta(hours=24)) == first
+	assert backend.signatures == 1
+
+	await storage.upload_file("videos/clip.mp4", source_file)
+	await storage.get_signed_url("videos/clip.mp4", timedelta(hours=24))
+	assert backend.signatures == 2
+
+
+@pytest.mark.asyncio
+async def test_iter_chunks_reads_ranges_in_order_only_when_asked():
+	content = os.urandom(10_000)
+	backend = RangeRecordingStorage()
+	backend.put("videos/large.mp4", content)
+	storage = AsyncStorage(backend, max_workers=4, range_chunk_size=3000, range_parallelism=2)
+	info = await storage.stat("videos/large.mp4")
+
+	chunks = storage.iter_chunks("videos/large.mp4", info)
+	await asyncio.sleep(0.05)
+	assert backend.ranges == []
+
+	assert b"".join([chunk async for chunk in chunks]) == content
+	assert backend.ranges == [(0, 3000), (3000, 6000), (6000, 9000), (9000, 10_000)]
+
+
+@pytest.mark.asyncio
+async def test_iter_chunks_rejects_corrupt_content():
+	class CorruptingStorage(InMemoryStorage):
+		def read_range(self, storage_path, version, start, end):
+			data = super().read_range(storage_path, version, start, end)
+			return data if start else b"\xff" * len(data)
+
+	backend = CorruptingStorage()
+	backend.put("videos/large.mp4", b"\x00" * 8192)
+	storage = AsyncStorage(backend, max_workers=2, range_chunk_size=4096)
+
+	with pytest.raises(ChecksumMismatchError):
+		async for _ in storage.iter_chunks("videos/large.mp4", await storage.stat("videos/large.mp4")):
+			pass
+
+
+@pytest.mark.asyncio
+async def test_iter_chunks_reads_a_sub_range():
+	content = os.urandom(10_000)
+	backend = RangeRecordingStorage()
+	backend.put("videos/large.mp4", content)
+	storage = AsyncStorage(backend, max_workers=4, range_chunk_size=3000)
+	info = await storage.stat("videos/large.mp4")
+
+	chunks = [chunk async for chunk in storage.iter_chunks("videos/large.mp4", info, 2500, 6100)]
+
+	assert b"".join(chunks) == content[2500:6100]
+	assert backend.ranges == [(2500, 5500), (5500, 6100)]
+
+
+@pytest.mark.asyncio
+async def test_open_local_never_fetches_from_a_ranged_backend(source_file, local_storage, tmp_path):
+	local = AsyncStorage(local_storage, max_workers=2)
+	await local.upload_file("videos/clip.mp4", source_file)
+	async with local.open_local("videos/clip.mp4", await local.stat("videos/clip.mp4")) as local_path:
+		assert local_path == local_storage.resolve("videos/clip.mp4")
+
+	backend = RangeRecordingStorage()
+	backend.put("videos/clip.mp4", b"video bytes")
+	remote = AsyncStorage(backend, max_workers=2, cache=BlobCache(str(tmp_path / "cache"), max_bytes=1024))
+	info = await remote.stat("videos/clip.mp4")
+	async with remote.open_local("videos/clip.mp4", info) as local_path:
+		assert local_path is None
+
+	async with remote.open("videos/clip.mp4"):
+		pass
+	async with remote.open_local("videos/clip.mp4", info) as local_path:
+		with open(local_path, "rb") as cached:
+			assert cached.read() == b"video bytes"
+
+
+@pytest.mark.parametrize("backend", ["local", "memory"])
+@pytest.mark.asyncio
+async def test_upload_stream_replaces_object_only_when_stream_completes(backend, source_file, local_storage, tmp_path):
+	storage = AsyncStorage(local_storage if backend == "local" else InMemoryStorage(), max_workers=2)
+	await storage.upload_file("videos/clip.mp4", source_file)
+
+	async def broken():
+		yield b"partial "
+		raise ConnectionError("producer failed")
+
+	async def complete():
+		yield b"streamed "
+		yield b"bytes"
+
+	with pytest.raises(ConnectionError):
+		await storage.upload_stream("videos/clip.mp4", broken())
+	assert (await storage.stat("videos/clip.mp4")).size == len(b"video bytes")
+
+	await storage.upload_stream("videos/clip.mp4", complete())
+	downloaded = await storage.download_file("clip.mp4", "videos/clip.mp4", str(tmp_path / "out"))
+	with open(downloaded, "rb") as copy:
+		assert copy.read() == b"streamed bytes"
+	if backend == "local":
+		assert [name for name in os.listdir(os.path.join(local_storage.root, "videos")) if name.startswith(".")] == []
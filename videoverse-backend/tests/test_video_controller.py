@@ -1,13 +1,46 @@
+import asyncio
+import hashlib
 import json
 import os
+import subprocess
+import time
 import uuid
-from unittest.mock import AsyncMock, MagicMock, patch
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import UTC, datetime
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
 import pytest
-from fastapi import UploadFile
-from videoverse_backend.core import StatusEnum
+from videoverse_backend.core import JobKind, JobStatus, StatusEnum, requested_deadline
+from videoverse_backend.core.errors import JobError, JobQueueFullError
+from videoverse_backend.db import JobModel
+from videoverse_backend.services.file_service import IngestedFile
+from videoverse_backend.services.storage import AsyncStorage, BlobCache, InMemoryStorage, ObjectInfo, SignedUrl
+from videoverse_backend.services.video_service import ProbeMetadata
+from videoverse_backend.settings import settings
 from videoverse_backend.web.api.video.controller import VideoController
-from videoverse_backend.web.api.video.schema import MergeSchema, ShareLinkSchema, TrimSchema, TrimType
+from videoverse_backend.web.api.video.schema import (
+	BatchShareLinkSchema,
+	BatchTrimSchema,
+	MergeMode,
+	MergeSchema,
+	Playback,
+	ShareLinkSchema,
+	TrimMode,
+	TrimSchema,
+	TrimType,
+)
+
+from tests.helpers import MP4_HEADER, MultipartUpload, make_upload
+
+STREAM_PARAMETERS = {
+	"video_codec": "h264",
+	"width": 1280,
+	"height": 720,
+	"pixel_format": "yuv420p",
+	"frame_rate": 30.0,
+	"audio_codec": "aac",
+	"audio_sample_rate": 48000,
+}
 
 
 @pytest.fixture
@@ -15,22 +48,76 @@ def video_controller():
 	return VideoController()
 
 
+@pytest.fixture(autouse=True)
+def no_duplicate_content():
+	with patch("videoverse_backend.web.api.video.controller.VideoDAO.get_by_content_hash", return_value=None) as lookup:
+		yield lookup
+
+
+@pytest.fixture(autouse=True)
+def no_virtual_videos():
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoSegmentDAO.get_by_video", return_value=[]),
+		patch("videoverse_backend.web.api.video.controller.VideoSegmentDAO.get_video_ids_by_source", return_value=[]),
+		patch("videoverse_backend.web.api.video.controller.VideoSegmentDAO.delete_by_video", return_value=0),
+	):
+		yield
+
+
+@pytest.fixture(autouse=True)
+def no_derivations():
+	with (
+		patch("videoverse_backend.web.api.video.controller.DerivationCache.fingerprint", return_value=None),
+		patch("videoverse_backend.web.api.video.controller.DerivationCache.invalidate"),
+	):
+		yield
+
+
+@pytest.fixture(autouse=True)
+def probe_video():
+	metadata = ProbeMetadata(duration=30.0, container="mov,mp4,m4a,3gp,3g2,mj2", keyframes=(0, 2_000_000))
+	with patch(
+		"videoverse_backend.web.api.video.controller.VideoService.probe_video",
+		return_value=metadata._replace(**STREAM_PARAMETERS),
+	) as mock_probe:
+		yield mock_probe
+
+
+def make_source(duration, **parameters):
+	return MagicMock(
+		id=str(uuid.uuid4()),
+		duration=duration,
+		path=f"videos/{uuid.uuid4()}.mp4",
+		keyframes=None,
+		**{**STREAM_PARAMETERS, **parameters},
+	)
+
+
+def make_output(path="/tmp/output.mp4", size=1024 * 1024, sha256="ab" * 32):
+	return IngestedFile(path=path, size=size, sha256=sha256, container="mp4")
+
+
+def open_as(local_path):
+	@asynccontextmanager
+	async def open_source(storage_path):
+		yield local_path
+
+	return open_source
+
+
 @pytest.mark.asyncio
 async def test_upload_video_success(video_controller):
-	mock_file = AsyncMock(spec=UploadFile)
-	mock_file.filename = "test_video.mp4"
-	mock_file.read.return_value = b"fake video content"
+	mock_file = make_upload("test_video.mp4", [MP4_HEADER, b"fake video content"])
 
 	video_id = str(uuid.uuid4())
 
 	with (
-		patch("videoverse_backend.web.api.video.controller.FileService.get_file_size", return_value=5),
 		patch("videoverse_backend.web.api.video.controller.VideoService.get_video_duration", return_value=30),
-		patch("videoverse_backend.web.api.video.controller.firebase_service.upload_file"),
+		patch("videoverse_backend.web.api.video.controller.storage.upload_file"),
 		patch("videoverse_backend.web.api.video.controller.VideoDAO.create") as mock_create,
 	):
 		mock_create.return_value = MagicMock(id=video_id)
-		response = await video_controller.upload_video(mock_file)
+		response = await mock_file.send(video_controller)
 	assert response.status_code == 201
 	res = json.loads(response.body.decode("utf-8"))
 	assert res.get("status") == StatusEnum.SUCCESS
@@ -39,15 +126,63 @@ async def test_upload_video_success(video_controller):
 
 @pytest.mark.asyncio
 async def test_upload_video_file_too_large(video_controller):
-	mock_file = AsyncMock(spec=UploadFile)
-	mock_file.filename = "large_video.mp4"
+	mock_file = make_upload("large_video.mp4", [], size=1000 * 1024 * 1024)
+
+	response = await mock_file.send(video_controller)
+
+	res = json.loads(response.body.decode("utf-8"))
+	assert res.get("status") == StatusEnum.ERROR
+	assert response.status_code == 413
+	assert mock_file.received == 0
+
+
+@pytest.mark.asyncio
+async def test_upload_video_too_large_while_streaming(video_controller):
+	mock_file = make_upload("large_video.mp4", [MP4_HEADER, b"\x00" * 512, b"\x00" * 512])
 
-	with patch("videoverse_backend.web.api.video.controller.FileService.get_file_size", return_value=1000):
-		response = await video_controller.upload_video(mock_file)
+	with patch("videoverse_backend.web.api.video.controller.settings.MAX_FILE_SIZE", 0):
+		response = await mock_file.send(video_controller)
 
 	res = json.loads(response.body.decode("utf-8"))
 	assert res.get("status") == StatusEnum.ERROR
 	assert response.status_code == 413
+	# The part headers and the first chunk, the rest of the body is never received.
+	assert mock_file.received == 2
+
+
+@pytest.mark.asyncio
+async def test_upload_video_unsupported_media(video_controller):
+	mock_file = make_upload("notes.mp4", [b"just some plain text, not a video"])
+
+	with patch("videoverse_backend.web.api.video.controller.VideoService.get_video_duration") as mock_duration:
+		response = await mock_file.send(video_controller)
+
+	res = json.loads(response.body.decode("utf-8"))
+	assert res.get("status") == StatusEnum.ERROR
+	assert response.status_code == 415
+	mock_duration.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_upload_video_stops_reading_after_a_bad_first_chunk(video_controller):
+	mock_file = make_upload("page.mp4", [b"<html>" + b" " * 1024 + b"</html>", b"never read", b"never read"])
+
+	response = await mock_file.send(video_controller)
+
+	assert response.status_code == 415
+	assert mock_file.received == 2
+
+
+@pytest.mark.asyncio
+async def test_upload_video_without_file_field(video_controller):
+	response = await MultipartUpload("notes.txt", [b"hello"], field="notes").send(video_controller)
+
+	assert response.status_code == 422
+	assert json.loads(response.body)["message"] == "The request has no file field"
+
+	response = await video_controller.upload_video("application/json", 2, MultipartUpload("", []))
+
+	assert response.status_code == 422
 
 
 @pytest.mark.asyncio
@@ -67,44 +202,82 @@ async def test_trim_video_success(video_controller):
 	video_id = str(uuid.uuid4())
 	mock_video = MagicMock(id=video_id, filename="video.mp4", duration=60, path="path/to/video.mp4")
 	trim_schema = TrimSchema(video_id=video_id, trim_type=TrimType.START, trim_time=10, save_as_new=False)
+	report_progress = AsyncMock()
 
 	mock_input_path = "/tmp/mock_input.mp4"
 
 	with (
 		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=mock_video),
-		patch(
-			"videoverse_backend.web.api.video.controller.firebase_service.download_file",
-			return_value=mock_input_path,
-		),
+		patch("videoverse_backend.web.api.video.controller.storage.open", new=open_as(mock_input_path)),
 		patch("videoverse_backend.web.api.video.controller.VideoService.trim_video") as mock_trim,
-		patch("videoverse_backend.web.api.video.controller.firebase_service.upload_file"),
-		patch("videoverse_backend.web.api.video.controller.VideoDAO.update"),
+		patch("videoverse_backend.web.api.video.controller.FileService.inspect_file", return_value=make_output()),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.count_by_path", return_value=1),
+		patch("videoverse_backend.web.api.video.controller.storage.upload_file") as mock_upload,
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.update") as mock_update,
 		patch("os.unlink"),
 		patch("os.path.exists", return_value=True),
 		patch("os.path.getsize", return_value=1000000),
 	):
-		response = await video_controller.trim_video(trim_schema)
+		result = await video_controller.run_trim_job(trim_schema.model_dump(mode="json"), report_progress)
 
-		res = json.loads(response.body)
-		assert res.get("status") == StatusEnum.SUCCESS.value
-		assert response.status_code == 200
+		assert str(result) == video_id
+		assert [call.args[0] for call in report_progress.call_args_list] == [0.25, 0.75]
 
 		mock_trim.assert_called_once()
 		args, _ = mock_trim.call_args
 		assert args[0] == mock_input_path
 		assert abs(args[1] - 10.0) < 1e-6
-		assert args[2] == 60
+		assert args[2] is None
 		valid_path_prefixes = ["/var/folders/", "/tmp/"]
 		assert any(args[3].startswith(prefix) for prefix in valid_path_prefixes)
 		mock_trim.assert_called_once()
+		# The trimmed content goes to a new path, the row switches to it in the same update as its metadata.
+		new_path = mock_upload.call_args.args[0]
+		assert new_path.startswith("videos/video_trimmed_")
+		mock_upload.assert_called_once_with(new_path, "/tmp/output.mp4")
+		assert mock_update.call_args.args[1]["path"] == new_path
+
+
+@pytest.mark.asyncio
+async def test_trim_video_smart_mode_uses_catalogued_keyframes(video_controller):
+	video_id = str(uuid.uuid4())
+	mock_video = MagicMock(
+		id=video_id,
+		filename="video.mp4",
+		duration=60,
+		path="path/to/video.mp4",
+		video_codec="h264",
+		pixel_format="yuv420p",
+		keyframes=ProbeMetadata.pack_keyframes([0, 2_000_000, 4_000_000]),
+	)
+	trim_schema = TrimSchema(video_id=video_id, trim_type=TrimType.START, trim_time=3.5, trim_mode=TrimMode.SMART)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=mock_video),
+		patch("videoverse_backend.web.api.video.controller.storage.open", new=open_as("/tmp/mock_input.mp4")),
+		patch("videoverse_backend.web.api.video.controller.VideoService.smart_trim_video") as mock_smart_trim,
+		patch("videoverse_backend.web.api.video.controller.VideoService.trim_video") as mock_trim,
+		patch("videoverse_backend.web.api.video.controller.FileService.inspect_file", return_value=make_output()),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.count_by_path", return_value=1),
+		patch("videoverse_backend.web.api.video.controller.storage.upload_file"),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.update"),
+		patch("os.unlink"),
+	):
+		await video_controller.run_trim_job(trim_schema.model_dump(mode="json"), AsyncMock())
+
+	mock_trim.assert_not_called()
+	args = mock_smart_trim.call_args.args
+	assert args[0] == "/tmp/mock_input.mp4"
+	assert (args[1], args[2]) == (3.5, None)
+	assert args[4:] == ((0, 2_000_000, 4_000_000), "h264", "yuv420p")
 
 
 @pytest.mark.asyncio
 async def test_merge_videos_success(video_controller):
 	video_id1, video_id2 = str(uuid.uuid4()), str(uuid.uuid4())
 	mock_videos = [
-		MagicMock(id=video_id1, filename="video1.mp4", duration=30),
-		MagicMock(id=video_id2, filename="video2.mp4", duration=40),
+		MagicMock(id=video_id1, filename="video1.mp4", duration=30, **STREAM_PARAMETERS),
+		MagicMock(id=video_id2, filename="video2.mp4", duration=40, **STREAM_PARAMETERS),
 	]
 	merge_schema = MergeSchema(video_ids=[video_id1, video_id2], output_filename="merged.mp4")
 
@@ -112,8 +285,8 @@ async def test_merge_videos_success(video_controller):
 	mock_temp_dir = "/tmp/mock_temp_dir"
 	mock_output_path = os.path.join(mock_temp_dir, f"merged_{new_video_id}_merged.mp4")
 
-	async def mock_download_videos(videos, temp_dir):
-		return [os.path.join(temp_dir, video.filename) for video in videos]
+	async def mock_open_videos(videos, sources):
+		return [os.path.join("/tmp/cache", video.filename) for video in videos]
 
 	mock_file = AsyncMock()
 	mock_file.__aenter__.return_value = mock_file
@@ -123,11 +296,12 @@ async def test_merge_videos_success(video_controller):
 	mock_named_temp_file.__enter__.return_value.name = mock_output_path
 
 	with (
-		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", side_effect=mock_videos),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=mock_videos),
 		patch("videoverse_backend.web.api.video.controller.aiofiles.tempfile.TemporaryDirectory") as mock_temp_dir_ctx,
-		patch.object(VideoController, "_download_videos", new=mock_download_videos),
+		patch.object(VideoController, "_open_videos", new=mock_open_videos),
 		patch("videoverse_backend.web.api.video.controller.VideoService.merge_videos") as mock_merge,
-		patch("videoverse_backend.web.api.video.controller.firebase_service.upload_file"),
+		patch("videoverse_backend.web.api.video.controller.FileService.inspect_file", return_value=make_output()),
+		patch("videoverse_backend.web.api.video.controller.storage.upload_file"),
 		patch("videoverse_backend.web.api.video.controller.VideoDAO.create") as mock_create,
 		patch("os.path.exists", return_value=True),
 		patch("os.path.getsize", return_value=1000000),
@@ -139,18 +313,76 @@ async def test_merge_videos_success(video_controller):
 		mock_merge.return_value = mock_output_path
 		mock_create.return_value = MagicMock(id=new_video_id, filename="merged.mp4", duration=70, size=10)
 
-		response = await video_controller.merge_videos(merge_schema)
+		result = await video_controller.run_merge_job(merge_schema.model_dump(mode="json"), AsyncMock())
 
-	res = json.loads(response.body)
-	assert res.get("status") == StatusEnum.SUCCESS.value
-	assert response.status_code == 200
-	assert res.get("data").get("new_video_id") == new_video_id
+	assert result == new_video_id
 
 	mock_merge.assert_called_once()
 	mock_create.assert_called_once()
 	mock_file.write.assert_called()
 
 
+@pytest.mark.asyncio
+async def test_stream_merge_job_uploads_output_as_it_is_produced(video_controller):
+	mock_videos = [
+		MagicMock(id=str(uuid.uuid4()), path="videos/a.mp4", duration=30.0, keyframes=b"", **STREAM_PARAMETERS),
+		MagicMock(id=str(uuid.uuid4()), path="videos/b.mp4", duration=40.0, keyframes=b"", **STREAM_PARAMETERS),
+	]
+	merge_schema = MergeSchema(
+		video_ids=[video.id for video in mock_videos], output_filename="merged.mp4", merge_mode=MergeMode.STREAM
+	)
+	uploaded = {}
+
+	async def stream_source(video, sources):
+		return f"/tmp/cache/{os.path.basename(video.path)}"
+
+	async def stream_merge(inputs, muxer, chunk_size):
+		assert inputs == ["/tmp/cache/a.mp4", "/tmp/cache/b.mp4"]
+		yield b"merged "
+		yield b"video"
+
+	async def upload_stream(storage_path, chunks):
+		uploaded[storage_path] = b"".join([chunk async for chunk in chunks])
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=mock_videos),
+		patch.object(VideoController, "_stream_source", new=stream_source),
+		patch("videoverse_backend.web.api.video.controller.VideoService.stream_merge_videos", new=stream_merge),
+		patch("videoverse_backend.web.api.video.controller.storage.upload_stream", new=upload_stream),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.create") as mock_create,
+	):
+		mock_create.return_value = MagicMock(id="merged-id")
+		result = await video_controller.run_merge_job(merge_schema.model_dump(mode="json"), AsyncMock())
+
+	assert result == "merged-id"
+	[(storage_path, content)] = uploaded.items()
+	assert storage_path.startswith("videos/merged_") and content == b"merged video"
+	row = mock_create.call_args.args[0]
+	assert row["path"] == storage_path
+	assert row["content_hash"] == hashlib.sha256(b"merged video").hexdigest()
+	assert row["duration"] == 70.0
+	assert row["container"] == "mov,mp4,m4a,3gp,3g2,mj2"
+	assert row["video_codec"] == "h264"
+
+
+@pytest.mark.asyncio
+async def test_merge_videos_stream_mode_needs_a_pipe_friendly_output(video_controller):
+	mock_videos = [MagicMock(id=str(uuid.uuid4()), **STREAM_PARAMETERS) for _ in range(2)]
+	merge_schema = MergeSchema(
+		video_ids=[video.id for video in mock_videos], output_filename="merged.avi", merge_mode=MergeMode.STREAM
+	)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=mock_videos),
+		patch.object(VideoController, "_submit_job") as mock_submit,
+	):
+		response = await video_controller.merge_videos(merge_schema)
+
+	assert response.status_code == 400
+	assert ".mkv" in json.loads(response.body).get("message")
+	mock_submit.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_share_video_success(video_controller):
 	video_id = str(uuid.uuid4())
@@ -160,28 +392,24 @@ async def test_share_video_success(video_controller):
 	with (
 		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=mock_video),
 		patch(
-			"videoverse_backend.web.api.video.controller.firebase_service.get_signed_url",
-			return_value="https://signed-url.com",
+			"videoverse_backend.web.api.video.controller.storage.get_signed_url",
+			return_value=SignedUrl("https://signed-url.com", datetime(2030, 1, 1, tzinfo=UTC)),
 		),
 	):
 		response = await video_controller.share_video(share_schema)
 	res = json.loads(response.body)
 	assert res.get("status") == StatusEnum.SUCCESS
 	assert response.status_code == 200
-	assert "share_link" in res.get("data")
+	assert res.get("data").get("share_link") == "https://signed-url.com"
+	assert res.get("data").get("expiry_time") == "2030-01-01T00:00:00+00:00"
 
 
 @pytest.mark.asyncio
 async def test_upload_video_invalid_duration(video_controller):
-	mock_file = AsyncMock(spec=UploadFile)
-	mock_file.filename = "short_video.mp4"
-	mock_file.read.return_value = b"fake video content"
+	mock_file = make_upload("short_video.mp4", [MP4_HEADER, b"fake video content"])
 
-	with (
-		patch("videoverse_backend.web.api.video.controller.FileService.get_file_size", return_value=5),
-		patch("videoverse_backend.web.api.video.controller.VideoService.get_video_duration", return_value=1),
-	):
-		response = await video_controller.upload_video(mock_file)
+	with patch("videoverse_backend.web.api.video.controller.VideoService.get_video_duration", return_value=1):
+		response = await mock_file.send(video_controller)
 
 	res = json.loads(response.body)
 	assert res.get("status") == StatusEnum.ERROR.value
@@ -189,6 +417,117 @@ async def test_upload_video_invalid_duration(video_controller):
 	assert "Video duration must be between" in res.get("message")
 
 
+@pytest.mark.asyncio
+async def test_trim_video_queues_job(video_controller):
+	video_id = str(uuid.uuid4())
+	job_id = uuid.uuid4()
+	mock_video = MagicMock(id=video_id, filename="video.mp4", duration=60, path="path/to/video.mp4")
+	trim_schema = TrimSchema(video_id=video_id, trim_type=TrimType.START, trim_time=10)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=mock_video),
+		patch("videoverse_backend.web.api.video.controller.job_queue.submit") as mock_submit,
+		patch("videoverse_backend.web.api.video.controller.VideoService.trim_video") as mock_trim,
+	):
+		mock_submit.return_value = MagicMock(id=job_id, status=JobStatus.QUEUED.value)
+		response = await video_controller.trim_video(trim_schema)
+
+	res = json.loads(response.body)
+	assert response.status_code == 202
+	assert res["data"] == {"job_id": str(job_id), "status": "queued"}
+	kind, payload, deadline_at = mock_submit.call_args.args
+	assert kind == JobKind.TRIM
+	assert deadline_at is None
+	assert TrimSchema.model_validate(payload) == trim_schema
+	mock_trim.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_merge_videos_refused_when_queue_is_full(video_controller):
+	mock_videos = [MagicMock(id=uuid.uuid4(), **STREAM_PARAMETERS) for _ in range(2)]
+	merge_schema = MergeSchema(video_ids=[video.id for video in mock_videos], output_filename="merged.mp4")
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=mock_videos),
+		patch(
+			"videoverse_backend.web.api.video.controller.job_queue.submit",
+			side_effect=JobQueueFullError("100 jobs are already queued"),
+		),
+	):
+		response = await video_controller.merge_videos(merge_schema)
+
+	assert response.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_trim_job_fails_when_ffmpeg_fails(video_controller):
+	mock_video = MagicMock(id=uuid.uuid4(), filename="video.mp4", duration=60, path="path/to/video.mp4")
+	trim_schema = TrimSchema(video_id=mock_video.id, trim_type=TrimType.START, trim_time=10)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=mock_video),
+		patch("videoverse_backend.web.api.video.controller.storage.open", new=open_as("/tmp/in.mp4")),
+		patch(
+			"videoverse_backend.web.api.video.controller.VideoService.trim_video",
+			side_effect=subprocess.CalledProcessError(1, ["ffmpeg"], b"", b"Invalid data"),
+		),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.update") as mock_update,
+		pytest.raises(JobError, match="Error while trimming video"),
+	):
+		await video_controller.run_trim_job(trim_schema.model_dump(mode="json"), AsyncMock())
+
+	mock_update.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_job_not_found(video_controller):
+	with patch("videoverse_backend.web.api.video.controller.JobDAO.get", return_value=None):
+		response = await video_controller.get_job(uuid.uuid4())
+
+	assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_job_queued_with_the_deadline_of_the_request(video_controller):
+	deadline = datetime(2026, 10, 18, 19, 0, tzinfo=UTC)
+	token = requested_deadline.set(deadline.timestamp())
+	try:
+		with patch("videoverse_backend.web.api.video.controller.job_queue.submit") as mock_submit:
+			mock_submit.return_value = MagicMock(id=uuid.uuid4(), status=JobStatus.QUEUED.value)
+			await video_controller._submit_job(JobKind.MERGE, {})
+	finally:
+		requested_deadline.reset(token)
+
+	mock_submit.assert_awaited_once_with(JobKind.MERGE, {}, deadline.replace(tzinfo=None), video_id=None)
+
+
+@pytest.mark.asyncio
+async def test_cancel_job(video_controller):
+	job = MagicMock(id=uuid.uuid4(), status=JobStatus.SUCCEEDED.value)
+	cancelled = JobModel(id=job.id, kind="trim", status=JobStatus.CANCELLED.value, payload={})
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.JobDAO.get", return_value=job),
+		patch("videoverse_backend.web.api.video.controller.JobDAO.cancel", return_value=None),
+		patch("videoverse_backend.web.api.video.controller.job_queue.cancel") as mock_cancel,
+	):
+		response = await video_controller.cancel_job(job.id)
+
+	assert response.status_code == 409
+	mock_cancel.assert_not_called()
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.JobDAO.get", return_value=job),
+		patch("videoverse_backend.web.api.video.controller.JobDAO.cancel", return_value=cancelled),
+		patch("videoverse_backend.web.api.video.controller.job_queue.cancel") as mock_cancel,
+	):
+		response = await video_controller.cancel_job(job.id)
+
+	assert response.status_code == 200
+	assert json.loads(response.body)["data"]["status"] == "cancelled"
+	mock_cancel.assert_called_once_with(job.id)
+
+
 @pytest.mark.asyncio
 async def test_trim_video_not_found(video_controller):
 	video_id = str(uuid.uuid4())
@@ -230,12 +569,87 @@ async def test_merge_videos_not_enough_videos(video_controller):
 	assert "At least two videos are required to merge" in res.get("message")
 
 
+@pytest.mark.asyncio
+async def test_merge_videos_with_a_mismatching_video_is_queued(video_controller):
+	video_id1, video_id2 = str(uuid.uuid4()), str(uuid.uuid4())
+	mock_videos = [
+		MagicMock(id=video_id1, filename="video1.mp4", duration=30, **STREAM_PARAMETERS),
+		MagicMock(id=video_id2, filename="video2.mp4", duration=40, **{**STREAM_PARAMETERS, "width": 640}),
+	]
+	merge_schema = MergeSchema(video_ids=[video_id1, video_id2], output_filename="merged.mp4")
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=mock_videos),
+		patch.object(VideoController, "_submit_job", return_value="queued") as mock_submit,
+	):
+		response = await video_controller.merge_videos(merge_schema)
+
+	assert response == "queued"
+	mock_submit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_merge_videos_rejected_when_outliers_cannot_be_converted(video_controller):
+	vp9 = {**STREAM_PARAMETERS, "video_codec": "vp9", "audio_codec": "opus"}
+	mock_videos = [
+		MagicMock(id=str(uuid.uuid4()), filename="video1.webm", duration=60, **vp9),
+		MagicMock(id=str(uuid.uuid4()), filename="video2.mp4", duration=10, **STREAM_PARAMETERS),
+	]
+	merge_schema = MergeSchema(video_ids=[video.id for video in mock_videos], output_filename="merged.webm")
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=mock_videos),
+		patch.object(VideoController, "_open_videos") as mock_open,
+	):
+		response = await video_controller.merge_videos(merge_schema)
+
+	res = json.loads(response.body)
+	assert response.status_code == 422
+	assert "vp9" in res.get("message")
+	mock_open.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_merge_job_converts_only_the_outliers(video_controller, tmp_path):
+	mock_videos = [
+		MagicMock(id=str(uuid.uuid4()), filename="a.mp4", duration=30, **STREAM_PARAMETERS),
+		MagicMock(id=str(uuid.uuid4()), filename="b.mp4", duration=5, **{**STREAM_PARAMETERS, "height": 480}),
+		MagicMock(id=str(uuid.uuid4()), filename="c.mp4", duration=30, **STREAM_PARAMETERS),
+	]
+	merge_schema = MergeSchema(video_ids=[video.id for video in mock_videos], output_filename="merged.mp4")
+
+	async def mock_open_videos(videos, sources):
+		return [f"/tmp/cache/{video.filename}" for video in videos]
+
+	async def mock_merge_ffmpeg(input_files, output_filename, temp_dir):
+		merged_inputs.extend(input_files)
+		return output_filename, str(tmp_path / "merged.mp4")
+
+	merged_inputs = []
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=mock_videos),
+		patch.object(VideoController, "_open_videos", new=mock_open_videos),
+		patch.object(VideoController, "_merge_videos_ffmpeg", new=mock_merge_ffmpeg),
+		patch("videoverse_backend.web.api.video.controller.VideoService._run_all") as mock_run_all,
+		patch.object(VideoController, "_upload_and_save_video", return_value=MagicMock(id="merged-id")),
+	):
+		result = await video_controller.run_merge_job(merge_schema.model_dump(mode="json"), AsyncMock())
+
+	assert result == "merged-id"
+	commands, operation = mock_run_all.call_args.args
+	assert operation == "normalize"
+	[(command, _)] = commands
+	assert command[command.index("-i") + 1] == "/tmp/cache/b.mp4"
+	assert merged_inputs[0] == "/tmp/cache/a.mp4" and merged_inputs[2] == "/tmp/cache/c.mp4"
+	assert merged_inputs[1] == command[-1] and merged_inputs[1].endswith("normalized1.mp4")
+
+
 @pytest.mark.asyncio
 async def test_merge_videos_one_video_not_found(video_controller):
 	video_id1, video_id2 = str(uuid.uuid4()), str(uuid.uuid4())
 	merge_schema = MergeSchema(video_ids=[video_id1, video_id2], output_filename="merged.mp4")
 
-	with patch("videoverse_backend.web.api.video.controller.VideoDAO.get", side_effect=[MagicMock(), None]):
+	with patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=[MagicMock(), None]):
 		response = await video_controller.merge_videos(merge_schema)
 
 	res = json.loads(response.body)
@@ -244,6 +658,29 @@ async def test_merge_videos_one_video_not_found(video_controller):
 	assert "One or more videos do not exist" in res.get("message")
 
 
+@pytest.mark.asyncio
+async def test_open_videos_releases_opened_sources_when_one_fails(tmp_path):
+	class SlowStorage(InMemoryStorage):
+		def download_to_filename(self, storage_path, destination):
+			time.sleep(0.1)
+			super().download_to_filename(storage_path, destination)
+
+	backend = SlowStorage()
+	backend.put("videos/a.mp4", b"a")
+	cache = BlobCache(str(tmp_path / "cache"), max_bytes=1024)
+	videos = [MagicMock(path="videos/a.mp4"), MagicMock(path="videos/missing.mp4")]
+
+	with patch("videoverse_backend.web.api.video.controller.storage", AsyncStorage(backend, 2, cache)):
+		async with AsyncExitStack() as sources:
+			with pytest.raises(FileNotFoundError):
+				await VideoController._open_videos(videos, sources)
+
+	# The shared fetch of the other source still completes, nothing holds it afterwards.
+	while cache._fetches:
+		await asyncio.sleep(0.01)
+	assert [entry.pins for entry in cache._entries.values()] == [0]
+
+
 @pytest.mark.asyncio
 async def test_share_video_not_found(video_controller):
 	video_id = str(uuid.uuid4())
@@ -267,7 +704,7 @@ async def test_share_video_firebase_error(video_controller):
 	with (
 		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=mock_video),
 		patch(
-			"videoverse_backend.web.api.video.controller.firebase_service.get_signed_url",
+			"videoverse_backend.web.api.video.controller.storage.get_signed_url",
 			side_effect=Exception("Firebase error"),
 		),
 	):
@@ -277,3 +714,840 @@ async def test_share_video_firebase_error(video_controller):
 	assert res.get("status") == StatusEnum.ERROR.value
 	assert response.status_code == 500
 	assert "Error generating shareable link" in res.get("message")
+
+
+async def stream_chunks(*chunks):
+	for chunk in chunks:
+		yield chunk
+
+
+@pytest.mark.asyncio
+async def test_append_upload_chunk_resumes_from_stored_offset(video_controller, tmp_path):
+	upload_id = uuid.uuid4()
+	upload_session = MagicMock(id=upload_id, offset=4, length=10)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.settings.UPLOAD_SESSION_DIR", str(tmp_path)),
+		patch("videoverse_backend.web.api.video.controller.UploadSessionDAO.get", return_value=upload_session),
+		patch(
+			"videoverse_backend.web.api.video.controller.UploadSessionDAO.advance", return_value=True
+		) as mock_advance,
+	):
+		response = await video_controller.append_upload_chunk(upload_id, 4, stream_chunks(b"ef", b"gh"))
+
+	assert response.status_code == 200
+	assert response.headers["Upload-Offset"] == "8"
+	assert os.listdir(tmp_path) == [f"{upload_id}.{4:020d}.part"]
+	assert (tmp_path / f"{upload_id}.{4:020d}.part").read_bytes() == b"efgh"
+	mock_advance.assert_called_once_with(upload_id, 4, 8)
+
+
+@pytest.mark.asyncio
+async def test_append_upload_chunk_discards_chunk_when_another_request_stored_one_first(video_controller, tmp_path):
+	upload_id = uuid.uuid4()
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.settings.UPLOAD_SESSION_DIR", str(tmp_path)),
+		patch(
+			"videoverse_backend.web.api.video.controller.UploadSessionDAO.get",
+			side_effect=[MagicMock(id=upload_id, offset=4, length=10), MagicMock(id=upload_id, offset=6, length=10)],
+		),
+		patch("videoverse_backend.web.api.video.controller.UploadSessionDAO.advance", return_value=False),
+	):
+		response = await video_controller.append_upload_chunk(upload_id, 4, stream_chunks(b"efgh"))
+
+	assert response.status_code == 409
+	assert response.headers["Upload-Offset"] == "6"
+	assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_append_upload_chunk_offset_mismatch(video_controller, tmp_path):
+	upload_id = uuid.uuid4()
+	upload_session = MagicMock(id=upload_id, offset=4, length=10)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.settings.UPLOAD_SESSION_DIR", str(tmp_path)),
+		patch("videoverse_backend.web.api.video.controller.UploadSessionDAO.get", return_value=upload_session),
+	):
+		response = await video_controller.append_upload_chunk(upload_id, 0, stream_chunks(b"abcd"))
+
+	assert response.status_code == 409
+	assert response.headers["Upload-Offset"] == "4"
+
+
+@pytest.mark.asyncio
+async def test_complete_upload_session_incomplete(video_controller):
+	upload_id = uuid.uuid4()
+	upload_session = MagicMock(id=upload_id, offset=4, length=10)
+
+	with patch("videoverse_backend.web.api.video.controller.UploadSessionDAO.get", return_value=upload_session):
+		response = await video_controller.complete_upload_session(upload_id)
+
+	res = json.loads(response.body)
+	assert res.get("status") == StatusEnum.ERROR.value
+	assert response.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_upload_video_duplicate_content_skips_probe_and_upload(
+	video_controller,
+	no_duplicate_content,
+	probe_video,
+):
+	mock_file = make_upload("again.mp4", [MP4_HEADER, b"fake video content"])
+	no_duplicate_content.return_value = MagicMock(
+		id=uuid.uuid4(),
+		path="videos/first_upload.mp4",
+		duration=30,
+		keyframes=b"\x00" * 8,
+		**STREAM_PARAMETERS,
+	)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoService.get_video_duration") as mock_duration,
+		patch("videoverse_backend.web.api.video.controller.storage.upload_file") as mock_upload,
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.create") as mock_create,
+	):
+		mock_create.return_value = MagicMock(id=str(uuid.uuid4()))
+		response = await mock_file.send(video_controller)
+
+	assert response.status_code == 201
+	mock_duration.assert_not_called()
+	probe_video.assert_not_called()
+	mock_upload.assert_not_called()
+	created = mock_create.call_args.args[0]
+	assert created["path"] == "videos/first_upload.mp4"
+	assert created["video_codec"] == "h264"
+	assert created["keyframes"] == b"\x00" * 8
+	assert created["filename"] == "again.mp4"
+	assert created["content_hash"] == no_duplicate_content.call_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_trim_video_in_place_does_not_overwrite_shared_blob(video_controller):
+	video_id = str(uuid.uuid4())
+	mock_video = MagicMock(id=video_id, filename="video.mp4", duration=60, path="videos/shared.mp4")
+	trim_schema = TrimSchema(video_id=video_id, trim_type=TrimType.START, trim_time=10, save_as_new=False)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=mock_video),
+		patch("videoverse_backend.web.api.video.controller.storage.open", new=open_as("/tmp/in.mp4")),
+		patch("videoverse_backend.web.api.video.controller.VideoService.trim_video"),
+		patch("videoverse_backend.web.api.video.controller.FileService.inspect_file", return_value=make_output()),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.count_by_path", return_value=2),
+		patch("videoverse_backend.web.api.video.controller.storage.upload_file") as mock_upload,
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.update") as mock_update,
+	):
+		await video_controller.run_trim_job(trim_schema.model_dump(mode="json"), AsyncMock())
+
+	new_path = mock_upload.call_args.args[0]
+	assert new_path != "videos/shared.mp4"
+	assert mock_update.call_args.args[1]["path"] == new_path
+
+
+@pytest.mark.asyncio
+async def test_trim_video_in_place_deletes_blob_replaced_by_a_duplicate(video_controller):
+	video_id = str(uuid.uuid4())
+	mock_video = MagicMock(id=video_id, filename="video.mp4", duration=60, path="videos/old.mp4")
+	duplicate = MagicMock(id=str(uuid.uuid4()), path="videos/other.mp4", hls_path=None)
+	trim_schema = TrimSchema(video_id=video_id, trim_type=TrimType.START, trim_time=10, save_as_new=False)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=mock_video),
+		patch("videoverse_backend.web.api.video.controller.storage.open", new=open_as("/tmp/in.mp4")),
+		patch("videoverse_backend.web.api.video.controller.VideoService.trim_video"),
+		patch("videoverse_backend.web.api.video.controller.FileService.inspect_file", return_value=make_output()),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_by_content_hash", return_value=duplicate),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.count_by_path", return_value=0) as mock_count,
+		patch("videoverse_backend.web.api.video.controller.storage.upload_file") as mock_upload,
+		patch("videoverse_backend.web.api.video.controller.storage.delete") as mock_delete,
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.update") as mock_update,
+	):
+		mock_update.return_value = MagicMock(id=video_id, path="videos/other.mp4")
+		await video_controller.run_trim_job(trim_schema.model_dump(mode="json"), AsyncMock())
+
+	mock_upload.assert_not_called()
+	assert mock_update.call_args.args[1]["path"] == "videos/other.mp4"
+	mock_count.assert_any_call("videos/old.mp4")
+	mock_delete.assert_called_once_with("videos/old.mp4")
+
+
+@pytest.mark.asyncio
+async def test_complete_upload_session_success(video_controller, tmp_path):
+	upload_id = uuid.uuid4()
+	content = MP4_HEADER + b"fake video content"
+	upload_session = MagicMock(id=upload_id, offset=len(content), length=len(content), filename="big.mp4")
+	(tmp_path / f"{upload_id}.{0:020d}.part").write_bytes(content[:10])
+	(tmp_path / f"{upload_id}.{10:020d}.part").write_bytes(content[10:])
+	video_id = str(uuid.uuid4())
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.settings.UPLOAD_SESSION_DIR", str(tmp_path)),
+		patch("videoverse_backend.web.api.video.controller.UploadSessionDAO.get", return_value=upload_session),
+		patch("videoverse_backend.web.api.video.controller.UploadSessionDAO.delete") as mock_delete,
+		patch("videoverse_backend.web.api.video.controller.VideoService.get_video_duration", return_value=30),
+		patch("videoverse_backend.web.api.video.controller.storage.upload_file") as mock_upload,
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.create") as mock_create,
+	):
+		mock_create.return_value = MagicMock(id=video_id)
+		response = await video_controller.complete_upload_session(upload_id)
+
+	res = json.loads(response.body)
+	assert response.status_code == 201
+	assert res.get("data").get("id") == video_id
+	assert mock_upload.call_args.args[0].startswith("videos/big_")
+	mock_delete.assert_called_once_with(upload_id)
+	assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_complete_upload_session_keeps_chunks_when_storing_fails(video_controller, tmp_path):
+	upload_id = uuid.uuid4()
+	content = MP4_HEADER + b"fake video content"
+	upload_session = MagicMock(id=upload_id, offset=len(content), length=len(content), filename="big.mp4")
+	(tmp_path / f"{upload_id}.{0:020d}.part").write_bytes(content)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.settings.UPLOAD_SESSION_DIR", str(tmp_path)),
+		patch("videoverse_backend.web.api.video.controller.UploadSessionDAO.get", return_value=upload_session),
+		patch("videoverse_backend.web.api.video.controller.UploadSessionDAO.delete") as mock_delete,
+		patch("videoverse_backend.web.api.video.controller.VideoService.get_video_duration", return_value=30),
+		patch("videoverse_backend.web.api.video.controller.storage.upload_file", side_effect=Exception("offline")),
+	):
+		response = await video_controller.complete_upload_session(upload_id)
+
+	assert response.status_code == 500
+	mock_delete.assert_not_called()
+	assert os.listdir(tmp_path) == [f"{upload_id}.{0:020d}.part"]
+
+
+@pytest.mark.asyncio
+async def test_complete_upload_session_rewinds_to_a_missing_chunk(video_controller, tmp_path):
+	upload_id = uuid.uuid4()
+	upload_session = MagicMock(id=upload_id, offset=12, length=12, filename="big.mp4")
+	(tmp_path / f"{upload_id}.{0:020d}.part").write_bytes(b"a" * 4)
+	(tmp_path / f"{upload_id}.{8:020d}.part").write_bytes(b"c" * 4)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.settings.UPLOAD_SESSION_DIR", str(tmp_path)),
+		patch("videoverse_backend.web.api.video.controller.UploadSessionDAO.get", return_value=upload_session),
+		patch("videoverse_backend.web.api.video.controller.UploadSessionDAO.advance") as mock_advance,
+	):
+		response = await video_controller.complete_upload_session(upload_id)
+
+	assert response.status_code == 409
+	assert "4 of 12 bytes" in json.loads(response.body).get("message")
+	mock_advance.assert_called_once_with(upload_id, 12, 4)
+
+
+@pytest.mark.asyncio
+async def test_share_videos_reports_partial_failures(video_controller):
+	found, missing, broken = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+	videos = [
+		MagicMock(id=found, filename="found.mp4", path="videos/found.mp4"),
+		MagicMock(id=broken, filename="broken.mp4", path="videos/broken.mp4"),
+	]
+
+	async def sign(storage_path, expiration):
+		if storage_path == "videos/broken.mp4":
+			raise Exception("signing failed")
+		return SignedUrl(f"https://signed/{storage_path}", datetime(2030, 1, 1, tzinfo=UTC))
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=videos) as mock_get,
+		patch("videoverse_backend.web.api.video.controller.storage.get_signed_url", side_effect=sign),
+	):
+		response = await video_controller.share_videos(
+			BatchShareLinkSchema(video_ids=[found, missing, broken, found], expiry_hours=2),
+		)
+
+	res = json.loads(response.body)
+	assert response.status_code == 207
+	mock_get.assert_awaited_once_with([found, missing, broken])
+	results = res.get("data").get("results")
+	assert [result["video_id"] for result in results] == [str(found), str(missing), str(broken)]
+	assert [result["status"] for result in results] == ["success", "error", "error"]
+	assert results[0]["share_link"] == "https://signed/videos/found.mp4"
+	assert res.get("data").get("failed") == 2
+
+
+@pytest.mark.asyncio
+async def test_share_videos_all_succeed(video_controller):
+	video = MagicMock(id=uuid.uuid4(), filename="found.mp4", path="videos/found.mp4")
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=[video]),
+		patch(
+			"videoverse_backend.web.api.video.controller.storage.get_signed_url",
+			return_value=SignedUrl("https://signed", datetime(2030, 1, 1, tzinfo=UTC)),
+		),
+	):
+		response = await video_controller.share_videos(BatchShareLinkSchema(video_ids=[video.id]))
+
+	res = json.loads(response.body)
+	assert response.status_code == 200
+	assert res.get("status") == StatusEnum.SUCCESS.value
+	assert res.get("data").get("succeeded") == 1
+
+
+@pytest.mark.asyncio
+async def test_virtual_trim_flattens_into_the_stored_sources(video_controller):
+	first, second = make_source(10.0), make_source(30.0)
+	virtual = MagicMock(id=str(uuid.uuid4()), filename="cut.mp4", duration=30.0, path=None)
+	stored_segments = [
+		MagicMock(source_video_id=first.id, start=0.0, end=10.0),
+		MagicMock(source_video_id=second.id, start=5.0, end=25.0),
+	]
+	trim_schema = TrimSchema(
+		video_id=str(uuid.uuid4()), trim_time=8.0, trim_type=TrimType.START, save_as_new=True, virtual=True
+	)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=virtual),
+		patch("videoverse_backend.web.api.video.controller.VideoSegmentDAO.get_by_video", return_value=stored_segments),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=[first, second]),
+		patch(
+			"videoverse_backend.web.api.video.controller.VideoDAO.create_with_segments",
+			return_value=MagicMock(id="clip-id", duration=22.0),
+		) as mock_create,
+		patch.object(VideoController, "_submit_job") as mock_submit,
+	):
+		response = await video_controller.trim_video(trim_schema)
+
+	assert response.status_code == 201
+	assert json.loads(response.body)["data"]["id"] == "clip-id"
+	mock_submit.assert_not_called()
+	columns, segments = mock_create.call_args.args
+	assert segments == [
+		{"source_video_id": first.id, "start": 8.0, "end": 10.0},
+		{"source_video_id": second.id, "start": 5.0, "end": 25.0},
+	]
+	assert columns["path"] is None and columns["duration"] == 22.0 and columns["width"] == 1280
+	assert columns["filename"].startswith("cut_trimmed_")
+
+
+@pytest.mark.asyncio
+async def test_virtual_trim_in_place_needs_a_virtual_video(video_controller):
+	video = make_source(30.0, filename="video.mp4")
+	trim_schema = TrimSchema(video_id=str(uuid.uuid4()), trim_time=5.0, trim_type=TrimType.START, virtual=True)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=video),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.update_with_segments") as mock_update,
+	):
+		response = await video_controller.trim_video(trim_schema)
+
+	assert response.status_code == 400
+	mock_update.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_virtual_merge_records_segments_without_a_job(video_controller):
+	first, second = make_source(10.0), make_source(20.0, width=640, height=360)
+	merge_schema = MergeSchema(
+		video_ids=[str(uuid.uuid4()), str(uuid.uuid4())], output_filename="merged.mp4", virtual=True
+	)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=[first, second]),
+		patch(
+			"videoverse_backend.web.api.video.controller.VideoDAO.create_with_segments",
+			return_value=MagicMock(id="merged-id", duration=30.0),
+		) as mock_create,
+		patch.object(VideoController, "_submit_job") as mock_submit,
+	):
+		response = await video_controller.merge_videos(merge_schema)
+
+	assert response.status_code == 201
+	mock_submit.assert_not_called()
+	columns, segments = mock_create.call_args.args
+	assert [segment["source_video_id"] for segment in segments] == [first.id, second.id]
+	# The render converges on the profile covering the most playing time.
+	assert (columns["filename"], columns["duration"], columns["width"]) == ("merged.mp4", 30.0, 640)
+
+
+@pytest.mark.asyncio
+async def test_share_queues_rendering_a_virtual_video(video_controller):
+	virtual = MagicMock(id=str(uuid.uuid4()), filename="cut.mp4", duration=18.0, path=None)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=virtual),
+		patch.object(VideoController, "_materialize") as mock_materialize,
+		patch.object(VideoController, "_submit_job", return_value="queued") as mock_submit,
+	):
+		response = await video_controller.share_video(ShareLinkSchema(video_id=str(uuid.uuid4())))
+		content = await video_controller.get_video_content(uuid.uuid4(), None, None, None)
+
+	assert response == content == "queued"
+	assert mock_submit.call_args_list == [((JobKind.RENDER, {"video_id": virtual.id}, uuid.UUID(virtual.id)),)] * 2
+	mock_materialize.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_render_job_renders_a_virtual_video(video_controller):
+	first, second = make_source(10.0), make_source(20.0)
+	virtual = MagicMock(id=str(uuid.uuid4()), filename="cut.mp4", duration=18.0, path=None)
+	rendered = MagicMock(id=virtual.id, filename="cut.mp4", path="videos/cut_rendered.mp4")
+	stored_segments = [
+		MagicMock(source_video_id=first.id, start=2.0, end=10.0),
+		MagicMock(source_video_id=second.id, start=0.0, end=20.0),
+	]
+	merged_inputs = []
+
+	async def mock_merge_ffmpeg(input_files, output_filename, temp_dir):
+		merged_inputs.extend(input_files)
+		return output_filename, "/tmp/rendered.mp4"
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=virtual),
+		patch("videoverse_backend.web.api.video.controller.VideoSegmentDAO.get_by_video", return_value=stored_segments),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=[first, second]),
+		patch(
+			"videoverse_backend.web.api.video.controller.storage.open", new=lambda path: open_as(f"/cache/{path}")(path)
+		),
+		patch("videoverse_backend.web.api.video.controller.VideoService.smart_trim_video") as mock_smart_trim,
+		patch.object(VideoController, "_merge_videos_ffmpeg", new=mock_merge_ffmpeg),
+		patch("videoverse_backend.web.api.video.controller.FileService.inspect_file", return_value=make_output()),
+		patch("videoverse_backend.web.api.video.controller.storage.upload_file") as mock_upload,
+		patch(
+			"videoverse_backend.web.api.video.controller.VideoDAO.store_render", return_value=rendered
+		) as mock_store_render,
+	):
+		video_id = await video_controller.run_render_job({"video_id": str(uuid.uuid4())}, AsyncMock())
+
+	assert video_id == virtual.id
+	# Only the partial segment is cut, the whole source joins the concat as it is.
+	mock_smart_trim.assert_called_once()
+	assert mock_smart_trim.call_args.args[:3] == (f"/cache/{first.path}", 2.0, None)
+	# Copied audio would bring its pre-roll into the concat.
+	assert mock_smart_trim.call_args.args[-1] == "aac"
+	assert merged_inputs[1] == f"/cache/{second.path}" and merged_inputs[0].endswith("segment0.mp4")
+	storage_path = mock_upload.call_args.args[0]
+	assert mock_store_render.call_args.args[1]["path"] == storage_path
+
+
+@pytest.mark.asyncio
+async def test_render_that_lost_to_another_job_removes_its_file(video_controller):
+	virtual = MagicMock(id=str(uuid.uuid4()), filename="cut.mp4", duration=18.0, path=None)
+	rendered = MagicMock(id=virtual.id, filename="cut.mp4", path="videos/cut_first.mp4")
+	source = make_source(10.0)
+	segments = [MagicMock(source_video_id=source.id, start=2.0, end=10.0)]
+
+	with (
+		patch(
+			"videoverse_backend.web.api.video.controller.VideoSegmentDAO.get_by_video",
+			return_value=segments,
+		),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=[source]),
+		patch.object(VideoController, "_render_segments", return_value="/tmp/rendered.mp4"),
+		patch("videoverse_backend.web.api.video.controller.FileService.inspect_file", return_value=make_output()),
+		patch("videoverse_backend.web.api.video.controller.storage.upload_file") as mock_upload,
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.store_render", return_value=None),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.count_by_path", return_value=0),
+		patch("videoverse_backend.web.api.video.controller.storage.delete") as mock_delete,
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=rendered),
+	):
+		assert await VideoController._materialize(virtual) is rendered
+
+	mock_delete.assert_called_once_with(mock_upload.call_args.args[0])
+
+
+@pytest.mark.asyncio
+async def test_rendering_a_whole_source_reuses_its_file(video_controller):
+	source = make_source(20.0, size=3.0, content_hash="cd" * 32)
+	virtual = MagicMock(id=str(uuid.uuid4()), filename="copy.mp4", duration=20.0, path=None)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=virtual),
+		patch(
+			"videoverse_backend.web.api.video.controller.VideoSegmentDAO.get_by_video",
+			return_value=[MagicMock(source_video_id=source.id, start=0.0, end=20.0)],
+		),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=[source]),
+		patch("videoverse_backend.web.api.video.controller.VideoService.smart_trim_video") as mock_smart_trim,
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.store_render") as mock_store_render,
+	):
+		await VideoController._materialize(virtual)
+
+	mock_smart_trim.assert_not_called()
+	stored = mock_store_render.call_args.args[1]
+	assert (stored["path"], stored["content_hash"], stored["video_codec"]) == (source.path, source.content_hash, "h264")
+
+
+@pytest.mark.asyncio
+async def test_in_place_trim_renders_virtual_videos_cut_from_it_first(video_controller):
+	video = make_source(30.0, filename="video.mp4")
+	dependent = MagicMock(id="dependent-id", path=None)
+	calls = []
+
+	async def mock_materialize(target):
+		calls.append(("render", target.id))
+		return target
+
+	async def mock_delete_by_video(dao, video_id):
+		calls.append(("detach", video_id))
+		return 1
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=video),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=[dependent]),
+		patch(
+			"videoverse_backend.web.api.video.controller.VideoSegmentDAO.get_video_ids_by_source",
+			return_value=["dependent-id"],
+		),
+		patch("videoverse_backend.web.api.video.controller.VideoSegmentDAO.delete_by_video", new=mock_delete_by_video),
+		patch.object(VideoController, "_materialize", new=mock_materialize),
+		patch("videoverse_backend.web.api.video.controller.storage.open", new=open_as("/tmp/source.mp4")),
+		patch.object(VideoController, "_trim_ffmpeg"),
+		patch("videoverse_backend.web.api.video.controller.FileService.inspect_file", return_value=make_output()),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.count_by_path", return_value=1),
+		patch("videoverse_backend.web.api.video.controller.storage.upload_file"),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.update") as mock_update,
+	):
+		trim_schema = TrimSchema(video_id=str(uuid.uuid4()), trim_time=5.0, trim_type=TrimType.START)
+		await video_controller.run_trim_job(trim_schema.model_dump(mode="json"), AsyncMock())
+
+	assert calls == [("render", video.id), ("render", "dependent-id"), ("detach", "dependent-id"), ("detach", video.id)]
+	mock_update.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_repeated_merge_shares_the_file_of_the_earlier_video(video_controller):
+	mock_videos = [make_source(10.0), make_source(20.0)]
+	merge_schema = MergeSchema(video_ids=[str(uuid.uuid4()), str(uuid.uuid4())], output_filename="again.mp4")
+	earlier = make_source(30.0, filename="merged.mp4", size=2.0, content_hash="ab" * 32, hls_path="videos/m_hls/x")
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get_many", return_value=mock_videos),
+		patch("videoverse_backend.web.api.video.controller.DerivationCache.fingerprint", return_value="f" * 64),
+		patch(
+			"videoverse_backend.web.api.video.controller.DerivationCache.lookup", return_value=earlier
+		) as mock_lookup,
+		patch(
+			"videoverse_backend.web.api.video.controller.VideoDAO.create",
+			side_effect=lambda values: MagicMock(id="reused-id", **values),
+		) as mock_create_video,
+		patch(
+			"videoverse_backend.web.api.video.controller.JobDAO.create",
+			side_effect=lambda values: MagicMock(id="job-id", **values),
+		) as mock_create_job,
+		patch.object(VideoController, "_submit_job") as mock_submit,
+	):
+		response = await video_controller.merge_videos(merge_schema)
+
+	res = json.loads(response.body)
+	assert response.status_code == 200
+	assert res["data"] == {"job_id": "job-id", "status": JobStatus.SUCCEEDED.value, "result_video_id": "reused-id"}
+	mock_lookup.assert_called_once_with("f" * 64)
+	# A video of its own under the requested name, sharing the file like a duplicate upload.
+	created = mock_create_video.call_args.args[0]
+	assert created["filename"] == "again.mp4"
+	assert (created["path"], created["content_hash"], created["hls_path"]) == (
+		earlier.path,
+		earlier.content_hash,
+		earlier.hls_path,
+	)
+	assert (created["duration"], created["size"], created["video_codec"]) == (30.0, 2.0, "h264")
+	assert mock_create_job.call_args.args[0]["result_video_id"] == "reused-id"
+	mock_submit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_repeated_trim_gets_a_video_named_after_its_source(video_controller):
+	video = make_source(30.0, filename="video.mp4")
+	trim_schema = TrimSchema(video_id=str(uuid.uuid4()), trim_time=5.0, trim_type=TrimType.START, save_as_new=True)
+	earlier = make_source(25.0, filename="video_trimmed_1.mp4", size=1.0, content_hash="cd" * 32, hls_path=None)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=video),
+		patch("videoverse_backend.web.api.video.controller.DerivationCache.fingerprint", return_value="f" * 64),
+		patch("videoverse_backend.web.api.video.controller.DerivationCache.lookup", return_value=earlier),
+		patch(
+			"videoverse_backend.web.api.video.controller.VideoDAO.create",
+			side_effect=lambda values: MagicMock(id="reused-id", **values),
+		) as mock_create_video,
+		patch(
+			"videoverse_backend.web.api.video.controller.JobDAO.create",
+			side_effect=lambda values: MagicMock(id="job-id", **values),
+		),
+		patch.object(VideoController, "_queue_packaging") as mock_queue_packaging,
+		patch.object(VideoController, "_submit_job") as mock_submit,
+	):
+		response = await video_controller.trim_video(trim_schema)
+
+	assert json.loads(response.body)["data"]["result_video_id"] == "reused-id"
+	created = mock_create_video.call_args.args[0]
+	assert created["filename"].startswith("video_trimmed_") and created["filename"] != earlier.filename
+	assert (created["path"], created["content_hash"]) == (earlier.path, earlier.content_hash)
+	# The shared file has no package yet, the new video is queued for one like any other.
+	assert mock_queue_packaging.call_args.args[0].id == "reused-id"
+	mock_submit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_trim_job_records_its_output_for_reuse(video_controller):
+	video = make_source(30.0, filename="video.mp4")
+	trim_schema = TrimSchema(video_id=str(uuid.uuid4()), trim_time=5.0, trim_type=TrimType.START, save_as_new=True)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=video),
+		patch("videoverse_backend.web.api.video.controller.storage.open", new=open_as("/tmp/source.mp4")),
+		patch.object(VideoController, "_trim_ffmpeg"),
+		patch("videoverse_backend.web.api.video.controller.FileService.inspect_file", return_value=make_output()),
+		patch("videoverse_backend.web.api.video.controller.storage.upload_file"),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.create", return_value=MagicMock(id="trimmed-id")),
+		patch(
+			"videoverse_backend.web.api.video.controller.DerivationCache.fingerprint", return_value="f" * 64
+		) as mock_fingerprint,
+		patch("videoverse_backend.web.api.video.controller.DerivationCache.record") as mock_record,
+	):
+		await video_controller.run_trim_job(trim_schema.model_dump(mode="json"), AsyncMock())
+
+	operation, sources, parameters = mock_fingerprint.call_args.args
+	assert (operation, sources) == (JobKind.TRIM.value, [video])
+	assert parameters == {"trim_time": 5.0, "trim_type": "start", "trim_mode": "copy"}
+	mock_record.assert_called_once_with("f" * 64, JobKind.TRIM.value, "trimmed-id")
+
+
+@pytest.mark.asyncio
+async def test_in_place_trim_forgets_operations_that_produced_the_video(video_controller):
+	video = make_source(30.0, filename="video.mp4")
+	trim_schema = TrimSchema(video_id=str(uuid.uuid4()), trim_time=5.0, trim_type=TrimType.START)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=video),
+		patch("videoverse_backend.web.api.video.controller.storage.open", new=open_as("/tmp/source.mp4")),
+		patch.object(VideoController, "_trim_ffmpeg"),
+		patch("videoverse_backend.web.api.video.controller.FileService.inspect_file", return_value=make_output()),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.count_by_path", return_value=1),
+		patch("videoverse_backend.web.api.video.controller.storage.upload_file"),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.update"),
+		patch("videoverse_backend.web.api.video.controller.DerivationCache.invalidate") as mock_invalidate,
+		patch("videoverse_backend.web.api.video.controller.DerivationCache.record") as mock_record,
+	):
+		await video_controller.run_trim_job(trim_schema.model_dump(mode="json"), AsyncMock())
+
+	mock_invalidate.assert_called_once_with(video.id)
+	mock_record.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_share_video_as_hls_signs_the_manifest(video_controller):
+	video_id = uuid.uuid4()
+	mock_video = MagicMock(id=video_id, filename="video.mp4", hls_path="videos/video_hls_1/master.m3u8")
+	share_schema = ShareLinkSchema(video_id=video_id, playback=Playback.HLS)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=mock_video),
+		patch("videoverse_backend.web.api.video.controller.storage.get_signed_url") as mock_sign,
+	):
+		response = await video_controller.share_video(share_schema)
+
+	res = json.loads(response.body)
+	assert response.status_code == 200
+	assert res["data"]["share_link"].startswith(f"{settings.PLAYBACK_BASE_URL}/{video_id}/")
+	assert res["data"]["share_link"].endswith("/master.m3u8")
+	mock_sign.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_share_video_as_hls_queues_packaging_first(video_controller):
+	video_id = uuid.uuid4()
+	job_id = uuid.uuid4()
+	mock_video = MagicMock(id=video_id, filename="video.mp4", path="videos/video.mp4", hls_path=None)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=mock_video),
+		patch("videoverse_backend.web.api.video.controller.job_queue.submit") as mock_submit,
+	):
+		mock_submit.return_value = MagicMock(id=job_id, status=JobStatus.QUEUED.value)
+		response = await video_controller.share_video(ShareLinkSchema(video_id=video_id, playback=Playback.HLS))
+
+	assert response.status_code == 202
+	assert json.loads(response.body)["data"] == {"job_id": str(job_id), "status": "queued"}
+	mock_submit.assert_awaited_once_with(JobKind.PACKAGE, {"video_id": str(video_id)}, None, video_id=video_id)
+
+
+@pytest.mark.asyncio
+async def test_package_job_stores_the_package_next_to_the_source(video_controller):
+	video_id = uuid.uuid4()
+	mock_video = make_source(30.0, hls_path=None, content_hash="ab" * 32)
+	mock_video.id = video_id
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=mock_video),
+		patch(
+			"videoverse_backend.web.api.video.controller.VideoDAO.store_package",
+			return_value=mock_video,
+		) as mock_store,
+		patch("videoverse_backend.web.api.video.controller.storage.open", open_as("/tmp/source.mp4")),
+		patch("videoverse_backend.web.api.video.controller.VideoService.package_hls") as mock_package,
+		patch(
+			"videoverse_backend.web.api.video.controller.playback_service.upload_package",
+			side_effect=lambda local_dir, package_dir: f"{package_dir}/master.m3u8",
+		) as mock_upload,
+		patch(
+			"videoverse_backend.web.api.video.controller.playback_service.delete_package",
+			new_callable=AsyncMock,
+		) as mock_delete,
+	):
+		result = await video_controller.run_package_job({"video_id": str(video_id)}, AsyncMock())
+
+	assert result == video_id
+	assert mock_package.call_args.args[0] == "/tmp/source.mp4"
+	package_dir = mock_upload.call_args.args[1]
+	assert package_dir.startswith(f"{mock_video.path.removesuffix('.mp4')}_hls_")
+	mock_store.assert_awaited_once_with(video_id, f"{package_dir}/master.m3u8", mock_video.path, "ab" * 32)
+	mock_delete.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_package_job_drops_its_package_when_another_job_stored_one(video_controller):
+	video_id = uuid.uuid4()
+	mock_video = make_source(30.0, hls_path=None, content_hash="ab" * 32)
+	mock_video.id = video_id
+	packaged_meanwhile = make_source(30.0, hls_path="videos/other_hls/master.m3u8", content_hash="ab" * 32)
+	packaged_meanwhile.id, packaged_meanwhile.path = video_id, mock_video.path
+
+	with (
+		patch(
+			"videoverse_backend.web.api.video.controller.VideoDAO.get",
+			side_effect=[mock_video, packaged_meanwhile],
+		),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.store_package", return_value=None),
+		patch("videoverse_backend.web.api.video.controller.storage.open", open_as("/tmp/source.mp4")),
+		patch("videoverse_backend.web.api.video.controller.VideoService.package_hls"),
+		patch("videoverse_backend.web.api.video.controller.playback_service.upload_package") as mock_upload,
+		patch(
+			"videoverse_backend.web.api.video.controller.playback_service.delete_package",
+			new_callable=AsyncMock,
+		) as mock_delete,
+	):
+		result = await video_controller.run_package_job({"video_id": str(video_id)}, AsyncMock())
+
+	assert result == video_id
+	mock_delete.assert_called_once_with(ANY, mock_upload.call_args.args[1])
+
+
+@pytest.mark.asyncio
+async def test_package_job_drops_the_package_of_replaced_content(video_controller):
+	video_id = uuid.uuid4()
+	mock_video = make_source(30.0, hls_path=None, content_hash="ab" * 32)
+	mock_video.id = video_id
+	trimmed_meanwhile = make_source(20.0, content_hash="cd" * 32)
+	trimmed_meanwhile.id, trimmed_meanwhile.path = video_id, mock_video.path
+
+	with (
+		patch(
+			"videoverse_backend.web.api.video.controller.VideoDAO.get",
+			side_effect=[mock_video, trimmed_meanwhile],
+		),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.store_package", return_value=None),
+		patch("videoverse_backend.web.api.video.controller.storage.open", open_as("/tmp/source.mp4")),
+		patch("videoverse_backend.web.api.video.controller.VideoService.package_hls"),
+		patch("videoverse_backend.web.api.video.controller.playback_service.upload_package") as mock_upload,
+		patch(
+			"videoverse_backend.web.api.video.controller.playback_service.delete_package",
+			new_callable=AsyncMock,
+		) as mock_delete,
+		pytest.raises(JobError),
+	):
+		await video_controller.run_package_job({"video_id": str(video_id)}, AsyncMock())
+
+	mock_delete.assert_called_once_with(ANY, mock_upload.call_args.args[1])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+	("range_header", "if_range", "if_none_match", "expected_status"),
+	[
+		("bytes=0-99", None, None, 206),
+		("bytes=0-99", '"1-1024"', None, 206),
+		("bytes=0-99", '"0-1024"', None, 200),
+		("bytes=1024-", None, None, 416),
+		(None, None, 'W/"0-1024", "1-1024"', 304),
+	],
+)
+async def test_get_video_content_honours_conditional_ranges(
+	video_controller,
+	range_header,
+	if_range,
+	if_none_match,
+	expected_status,
+):
+	mock_video = make_source(30.0, filename="video.mp4")
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=mock_video),
+		patch("videoverse_backend.web.api.video.controller.storage.stat", return_value=ObjectInfo("1-1024", 1024)),
+	):
+		response = await video_controller.get_video_content(mock_video.id, range_header, if_range, if_none_match)
+
+	assert response.status_code == expected_status
+	assert response.headers["etag"] == '"1-1024"'
+	if expected_status == 416:
+		assert response.headers["content-range"] == "bytes */1024"
+	if expected_status == 206:
+		assert response.headers["content-range"] == "bytes 0-99/1024"
+		assert response.headers["content-type"] == "video/mp4"
+
+
+@pytest.mark.asyncio
+async def test_trim_video_batch_refuses_two_in_place_clips(video_controller):
+	mock_video = make_source(30.0)
+	body = BatchTrimSchema(
+		video_id=uuid.uuid4(),
+		clips=[{"start": 0, "end": 5, "save_as_new": False}, {"start": 5, "end": 10, "save_as_new": False}],
+	)
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=mock_video),
+		patch("videoverse_backend.web.api.video.controller.job_queue.submit") as mock_submit,
+	):
+		response = await video_controller.trim_video_batch(body)
+
+	assert response.status_code == 400
+	mock_submit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_batch_trim_job_cuts_once_and_creates_the_clips_in_one_write(video_controller):
+	mock_video = make_source(30.0, filename="match.mp4")
+	body = BatchTrimSchema(
+		video_id=uuid.uuid4(),
+		clips=[
+			{"start": 0, "end": 5},
+			{"start": 10, "end": 20, "save_as_new": False},
+			{"start": 3, "end": 8},
+		],
+	)
+	outputs = [make_output(path=f"/tmp/clip{index}.mp4", sha256=f"{index}" * 64) for index in range(3)]
+	created_ids = [uuid.uuid4(), uuid.uuid4()]
+
+	with (
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.get", return_value=mock_video),
+		patch("videoverse_backend.web.api.video.controller.storage.open", open_as("/tmp/source.mp4")),
+		patch("videoverse_backend.web.api.video.controller.VideoService.trim_clips") as mock_trim_clips,
+		patch("videoverse_backend.web.api.video.controller.FileService.inspect_file", side_effect=outputs),
+		patch("videoverse_backend.web.api.video.controller.storage.upload_file") as mock_upload,
+		patch(
+			"videoverse_backend.web.api.video.controller.VideoDAO.create_many",
+			side_effect=lambda rows: [MagicMock(id=clip_id, **row) for clip_id, row in zip(created_ids, rows)],
+		) as mock_create_many,
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.count_by_path", return_value=1),
+		patch("videoverse_backend.web.api.video.controller.VideoDAO.update") as mock_update,
+	):
+		result = await video_controller.run_batch_trim_job(body.model_dump(mode="json"), AsyncMock())
+
+	assert result == [created_ids[0], uuid.UUID(mock_video.id), created_ids[1]]
+	mock_trim_clips.assert_called_once()
+	assert mock_trim_clips.call_args.args[1] == [(0, 5), (10, 20), (3, 8)]
+	[rows] = mock_create_many.call_args.args
+	assert [row["content_hash"] for row in rows] == ["0" * 64, "2" * 64]
+	assert all(row["filename"].startswith("match_trimmed_") for row in rows)
+	assert mock_upload.call_count == 3
+	mock_update.assert_awaited_once()
+	in_place_path = mock_update.call_args.args[1]["path"]
+	assert in_place_path != mock_video.path
+	assert in_place_path in [call.args[0] for call in mock_upload.call_args_list]
@@ -0,0 +1,273 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+from videoverse_backend.services.cpu_scheduler import WorkClass
+from videoverse_backend.services.video_service import STREAM_MUXERS, ProbeMetadata, Segment, VideoService
+
+PROFILE = {
+	"video_codec": "h264",
+	"width": 1280,
+	"height": 720,
+	"pixel_format": "yuv420p",
+	"frame_rate": 30.0,
+	"audio_codec": "aac",
+	"audio_sample_rate": 48000,
+}
+FFPROBE_OUTPUT = {
+	"packets": [
+		{"stream_index": 0, "pts_time": "0.000000", "flags": "K__"},
+		{"stream_index": 1, "pts_time": "0.000000", "flags": "K__"},
+		{"stream_index": 0, "pts_time": "0.040000", "flags": "___"},
+		{"stream_index": 0, "pts_time": "2.002000", "flags": "K__"},
+		{"stream_index": 1, "pts_time": "0.021333", "flags": "K__"},
+	],
+	"streams": [
+		{
+			"index": 0,
+			"codec_name": "h264",
+			"codec_type": "video",
+			"width": 1920,
+			"height": 1080,
+			"pix_fmt": "yuv420p",
+			"avg_frame_rate": "30000/1001",
+		},
+		{"index": 1, "codec_name": "aac", "codec_type": "audio", "sample_rate": "48000", "avg_frame_rate": "0/0"},
+	],
+	"format": {"format_name": "mov,mp4,m4a,3gp,3g2,mj2", "duration": "12.345000", "bit_rate": "4500000"},
+}
+
+
+def test_probe_metadata_from_ffprobe():
+	metadata = ProbeMetadata.from_ffprobe(FFPROBE_OUTPUT)
+
+	assert metadata.duration == pytest.approx(12.345)
+	assert (metadata.video_codec, metadata.audio_codec) == ("h264", "aac")
+	assert (metadata.width, metadata.height, metadata.pixel_format) == (1920, 1080, "yuv420p")
+	assert metadata.frame_rate == pytest.approx(29.97, abs=0.01)
+	assert metadata.bit_rate == 4_500_000
+	assert metadata.audio_sample_rate == 48_000
+	assert metadata.keyframes == (0, 2_002_000)
+
+
+def test_probe_metadata_keyframes_round_trip_through_columns():
+	metadata = ProbeMetadata(duration=10.0, keyframes=(0, 1_001_000, 9_999_999))
+
+	columns = metadata.to_columns()
+
+	assert len(columns["keyframes"]) == 3 * 8
+	assert ProbeMetadata.unpack_keyframes(columns["keyframes"]) == metadata.keyframes
+	assert ProbeMetadata.unpack_keyframes(None) == ()
+
+
+def test_find_merge_incompatibility_ignores_unprobed_videos():
+	probed = dict(
+		video_codec="h264", width=1280, height=720, pixel_format="yuv420p", frame_rate=30.0, audio_codec="aac"
+	)
+	videos = [
+		MagicMock(audio_sample_rate=48000, **probed),
+		MagicMock(video_codec=None),
+		MagicMock(audio_sample_rate=44100, **probed),
+	]
+
+	assert VideoService.find_merge_incompatibility(videos[:2]) is None
+	assert "audio sample rate" in VideoService.find_merge_incompatibility(videos)
+
+
+def test_plan_merge_targets_the_profile_with_the_most_playing_time():
+	videos = [
+		MagicMock(duration=10.0, **PROFILE),
+		MagicMock(duration=50.0, **{**PROFILE, "width": 1920, "height": 1080}),
+		MagicMock(duration=5.0, video_codec=None),
+		MagicMock(duration=15.0, **PROFILE),
+	]
+
+	plan = VideoService.plan_merge(videos)
+
+	assert plan.profile["width"] == 1920
+	assert plan.outliers == (0, 3)
+
+
+def test_normalize_command_reencodes_only_the_streams_that_differ():
+	profile = PROFILE
+	audio_outlier = MagicMock(**{**PROFILE, "audio_sample_rate": 44100})
+	video_outlier = MagicMock(**{**PROFILE, "width": 640, "height": 360})
+
+	audio_command, audio_class = VideoService._normalize_command("a.mp4", audio_outlier, profile, "a-out.mp4")
+	video_command, video_class = VideoService._normalize_command("v.mp4", video_outlier, profile, "v-out.mp4")
+
+	assert audio_command[audio_command.index("-c:v") + 1] == "copy"
+	assert audio_command[audio_command.index("-ar") + 1] == "48000"
+	assert audio_class == WorkClass.COPY
+	assert "libx264" in video_command and "scale=1280:720" in video_command[video_command.index("-vf") + 1]
+	assert video_command[video_command.index("-c:a") + 1] == "copy"
+	assert video_class == WorkClass.ENCODE
+
+
+def test_merge_converts_videos_of_another_frame_rate():
+	videos = [
+		MagicMock(duration=20.0, **{**PROFILE, "frame_rate": 30000 / 1001}),
+		MagicMock(duration=10.0, **{**PROFILE, "frame_rate": 29.9701}),
+		MagicMock(duration=10.0, **{**PROFILE, "frame_rate": 25.0}),
+	]
+
+	plan = VideoService.plan_merge(videos)
+	command, work_class = VideoService._normalize_command("c.mp4", videos[2], plan.profile, "c-out.mp4")
+
+	# Average frame rates a hair apart are the same rate.
+	assert plan.outliers == (2,)
+	assert "Videos differ in frame rate" in VideoService.find_merge_incompatibility(videos)
+	assert command[command.index("-vf") + 1].endswith(",fps=30000/1001")
+	assert work_class == WorkClass.ENCODE
+
+
+def test_package_command_copies_the_source_and_scales_only_smaller_renditions():
+	video = MagicMock(**PROFILE, keyframes=ProbeMetadata.pack_keyframes([0, 2_000_000, 4_000_000]))
+
+	command, work_class = VideoService._package_command("in.mp4", "out", video, [1080, 480, 360], 6)
+
+	assert "[0:v:0]split=2[split0][split1];[split0]scale=-2:480[scaled0];[split1]scale=-2:360[scaled1]" in command
+	assert command[command.index("-c:v:0") + 1] == "copy"
+	assert command[command.index("-force_key_frames:v:1") + 1] == "0.000000,2.000000,4.000000"
+	assert command[command.index("-maxrate:v:2") + 1] == str(round(640 * 360 * 30 * 0.1))
+	assert command[command.index("-var_stream_map") + 1] == "v:0,a:0 v:1,a:1 v:2,a:2"
+	assert work_class == WorkClass.ENCODE
+
+
+def test_package_command_only_remuxes_codecs_players_take():
+	video = MagicMock(**{**PROFILE, "audio_codec": None}, keyframes=None)
+	converted = MagicMock(**{**PROFILE, "video_codec": "vp9", "audio_codec": "opus"}, keyframes=None)
+
+	command, work_class = VideoService._package_command("in.mp4", "out", video, [], 6)
+	converted_command, converted_class = VideoService._package_command("in.mp4", "out", converted, [], 4)
+
+	assert "-filter_complex" not in command and "-c:a" not in command
+	assert command[command.index("-var_stream_map") + 1] == "v:0"
+	assert work_class == WorkClass.COPY
+	assert "-c:v:0" not in converted_command
+	assert converted_command[converted_command.index("-force_key_frames:v:0") + 1] == "expr:gte(t,n_forced*4)"
+	assert converted_command[converted_command.index("-c:a") + 1] == "aac"
+	assert converted_class == WorkClass.ENCODE
+
+
+def test_cut_segments_trims_on_the_played_timeline():
+	segments = [Segment("a", 10.0, 20.0), Segment("b", 0.0, 5.0), Segment("c", 30.0, 40.0)]
+
+	assert VideoService.cut_segments(segments, 17.0, None) == [Segment("c", 32.0, 40.0)]
+
+	assert VideoService.cut_segments(segments, 4.0, 17.0) == [
+		Segment("a", 14.0, 20.0),
+		Segment("b", 0.0, 5.0),
+		Segment("c", 30.0, 32.0),
+	]
+
+	assert VideoService.cut_segments(segments, 0.0, 10.0) == segments[:1]
+
+
+def test_plan_smart_cut_copies_between_inner_keyframes():
+	keyframes = (0, 2_000_000, 4_000_000, 6_000_000)
+
+	plan = VideoService.plan_smart_cut(1_500_000, 5_000_000, keyframes)
+
+	assert (plan.first_keyframe, plan.last_keyframe) == (2_000_000, 4_000_000)
+	assert plan.has_head and plan.has_tail
+	assert not VideoService.plan_smart_cut(2_000_000, 6_000_000, keyframes).has_head
+	assert VideoService.plan_smart_cut(2_500_000, 3_500_000, keyframes) is None
+
+
+def test_smart_cut_commands_reencode_only_the_edges(tmp_path):
+	plan = VideoService.plan_smart_cut(1_500_000, None, (0, 2_000_000, 4_000_000))
+
+	pieces, commands = VideoService._smart_cut_commands("in.mp4", plan, "h264", "yuv420p", str(tmp_path))
+
+	assert pieces == [str(tmp_path / "head.mp4"), str(tmp_path / "middle.mp4")]
+	(head, head_work), (middle, middle_work) = commands
+	assert (head_work, middle_work) == (WorkClass.ENCODE, WorkClass.COPY)
+	assert head[head.index("-t") + 1] == "0.499000"
+	assert "libx264" in head and head[head.index("-pix_fmt") + 1] == "yuv420p"
+	assert middle[middle.index("-ss") + 1] == "2.001000"
+	assert middle[middle.index("-c") + 1] == "copy" and "-t" not in middle
+
+
+@pytest.mark.asyncio
+async def test_smart_trim_falls_back_to_precise_without_encoder():
+	with (
+		patch.object(VideoService, "precise_trim_video") as mock_precise,
+		patch.object(VideoService.ffmpeg_runner, "run") as mock_run,
+	):
+		await VideoService.smart_trim_video("in.webm", 1.5, None, "out.webm", (0, 2_000_000), "vp9")
+
+	mock_precise.assert_called_once_with("in.webm", 1.5, None, "out.webm", "vp9", None)
+	mock_run.assert_not_called()
+
+
+def test_concat_metadata_offsets_keyframes_of_later_inputs():
+	videos = [
+		MagicMock(duration=10.0, keyframes=ProbeMetadata.pack_keyframes((0, 5_000_000)), **PROFILE),
+		MagicMock(duration=6.0, keyframes=ProbeMetadata.pack_keyframes((0, 2_000_000)), **PROFILE),
+	]
+
+	metadata = VideoService.concat_metadata(videos, "matroska,webm", 2_000_000, VideoService.plan_merge(videos))
+
+	assert metadata.duration == 16.0
+	assert metadata.container == "matroska,webm"
+	assert metadata.keyframes == (0, 5_000_000, 10_000_000, 12_000_000)
+	assert metadata.bit_rate == 1_000_000
+	assert (metadata.video_codec, metadata.width, metadata.frame_rate) == ("h264", 1280, 30.0)
+
+
+@pytest.mark.asyncio
+async def test_stream_merge_feeds_streams_through_pipes_in_order(tmp_path):
+	local_input = tmp_path / "local.mp4"
+	local_input.write_bytes(b"local|")
+
+	async def remote(*chunks):
+		for chunk in chunks:
+			yield chunk
+
+	def read_file(path):
+		with open(path, "rb") as source:
+			return source.read()
+
+	async def fake_ffmpeg(command, chunk_size, work_class, operation):
+		# Reads the inputs one after the other like the concat demuxer does.
+		with open(command[command.index("-i") + 1]) as list_file:
+			paths = [line.strip()[len("file '") : -1] for line in list_file]
+		for path in paths:
+			# A pipe blocks until its writer shows up, which needs the event loop.
+			yield await asyncio.to_thread(read_file, path)
+
+	with patch.object(VideoService.ffmpeg_runner, "stream", new=fake_ffmpeg):
+		merged = VideoService.stream_merge_videos(
+			[remote(b"first", b"|"), str(local_input), remote(b"third")], STREAM_MUXERS[".mp4"], 1024
+		)
+		output = b"".join([chunk async for chunk in merged])
+
+	assert output == b"first|local|third"
+
+
+@pytest.mark.asyncio
+async def test_trim_clips_copies_every_clip_in_one_process():
+	with patch.object(VideoService.ffmpeg_runner, "run") as mock_run:
+		await VideoService.trim_clips("in.mp4", [(0, 4), (2.5, 6)], ["a.mp4", "b.mp4"], precise=False)
+
+	[command] = mock_run.call_args.args
+	assert command[1:11] == ["-ss", "0", "-t", "4", "-i", "in.mp4", "-ss", "2.5", "-t", "3.5"]
+	first_output = command[command.index("-map") : command.index("a.mp4") + 1]
+	assert first_output == ["-map", "0:v:0", "-map", "0:a:0?", "-c", "copy", "a.mp4"]
+	assert command[-1] == "b.mp4" and "1:v:0" in command
+	assert mock_run.call_args.kwargs["work_class"] == WorkClass.COPY
+
+
+@pytest.mark.asyncio
+async def test_trim_clips_encodes_every_precise_clip_in_its_own_process():
+	with patch.object(VideoService.ffmpeg_runner, "run") as mock_run:
+		await VideoService.trim_clips(
+			"in.mp4", [(0, 4), (2.5, 6)], ["a.mp4", "b.mp4"], precise=True, video_codec="h264"
+		)
+
+	commands = [call.args[0] for call in mock_run.call_args_list]
+	assert [command[-1] for command in commands] == ["a.mp4", "b.mp4"]
+	assert commands[1][1:7] == ["-ss", "2.5", "-i", "in.mp4", "-t", "3.5"]
+	assert all("libx264" in command and command.count("-i") == 1 for command in commands)
+	assert [call.kwargs["work_class"] for call in mock_run.call_args_list] == [WorkClass.ENCODE] * 2
@@ -1,3 +1,4 @@
+from videoverse_backend.db.migrate import migrate
 from videoverse_backend.settings import settings
 from videoverse_backend.web.application import get_app
 from videoverse_backend.web.granian_app import GranianApplication
@@ -6,6 +7,8 @@ from videoverse_backend.web.hypercorn_app import HypercornApplication
 
 def main() -> None:
 	"""Entrypoint of the application."""
+	# Migrating once before the workers start keeps them from racing each other over the schema.
+	migrate()
 	if settings.USE_HYPERCORN:
 		app = get_app()
 		hypercorn_app = HypercornApplication(app)
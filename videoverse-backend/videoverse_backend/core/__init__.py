@@ -1,17 +1,27 @@
 from videoverse_backend.core.schema.common_response_schema import APIResponse, CommonResponseSchema
-from videoverse_backend.core.utils.constants import DEFAULT_ROUTE_OPTIONS, SKIP_URLS, TOKENS
-from videoverse_backend.core.utils.enums import StatusEnum
+from videoverse_backend.core.schema.range_response import ByteRange, RangeResponse, parse_range_header
+from videoverse_backend.core.utils.constants import DEFAULT_ROUTE_OPTIONS, SKIP_URL_PREFIXES, SKIP_URLS, TOKENS
+from videoverse_backend.core.utils.context import requested_deadline
+from videoverse_backend.core.utils.enums import JobKind, JobStatus, StatusEnum
 from videoverse_backend.core.utils.logging import configure_logging, end_stage_logger, logger, stage_logger
 
 __all__ = [
 	# Constants
 	"StatusEnum",
+	"JobKind",
+	"JobStatus",
 	"DEFAULT_ROUTE_OPTIONS",
 	"SKIP_URLS",
+	"SKIP_URL_PREFIXES",
 	"TOKENS",
 	# Common Schemas
 	"CommonResponseSchema",
 	"APIResponse",
+	"RangeResponse",
+	"ByteRange",
+	"parse_range_header",
+	# Request context
+	"requested_deadline",
 	# Logging
 	"logger",
 	"stage_logger",
@@ -0,0 +1,21 @@
+from videoverse_backend.core.errors.env_error import EnvError
+from videoverse_backend.core.errors.job_error import JobError, JobQueueFullError
+from videoverse_backend.core.errors.storage_error import ChecksumMismatchError, StorageError
+from videoverse_backend.core.errors.upload_error import (
+	FileTooLargeError,
+	MalformedUploadError,
+	UnsupportedMediaError,
+	UploadError,
+)
+
+__all__ = [
+	"EnvError",
+	"UploadError",
+	"FileTooLargeError",
+	"UnsupportedMediaError",
+	"MalformedUploadError",
+	"StorageError",
+	"ChecksumMismatchError",
+	"JobError",
+	"JobQueueFullError",
+]
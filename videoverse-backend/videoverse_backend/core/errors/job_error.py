@@ -0,0 +1,17 @@
+class JobError(Exception):
+	"""Base exception raised when a background job cannot be queued or does not complete.
+
+	Attributes:
+		message -- explanation of the error
+	"""
+
+	def __init__(self, message: str) -> None:
+		self.message = message
+		super().__init__(self.message)
+
+	def __str__(self) -> str:
+		return self.message
+
+
+class JobQueueFullError(JobError):
+	"""Raised when a job is submitted while the queue already holds the configured number of jobs."""
@@ -0,0 +1,17 @@
+class StorageError(Exception):
+	"""Base exception raised when a transfer to or from the storage fails.
+
+	Attributes:
+		message -- explanation of the error
+	"""
+
+	def __init__(self, message: str) -> None:
+		self.message = message
+		super().__init__(self.message)
+
+	def __str__(self) -> str:
+		return self.message
+
+
+class ChecksumMismatchError(StorageError):
+	"""Raised when a downloaded file does not match the checksum the storage reports for the object."""
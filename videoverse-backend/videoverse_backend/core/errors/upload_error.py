@@ -0,0 +1,25 @@
+class UploadError(Exception):
+	"""Base exception raised when an incoming upload is rejected.
+
+	Attributes:
+		message -- explanation of the error
+	"""
+
+	def __init__(self, message: str) -> None:
+		self.message = message
+		super().__init__(self.message)
+
+	def __str__(self) -> str:
+		return self.message
+
+
+class FileTooLargeError(UploadError):
+	"""Raised when an upload exceeds the configured size limit."""
+
+
+class UnsupportedMediaError(UploadError):
+	"""Raised when the uploaded bytes are not a recognised video container."""
+
+
+class MalformedUploadError(UploadError):
+	"""Raised when an upload request does not carry a file the way it should."""
@@ -0,0 +1,170 @@
+import asyncio
+import os
+from contextlib import aclosing
+from typing import AsyncContextManager, AsyncGenerator, BinaryIO, Callable, Iterator, NamedTuple
+from uuid import uuid4
+
+from starlette import status
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# Bytes read per step when a local file is sent without the zero-copy extension of the server.
+FILE_CHUNK_SIZE = 256 * 1024
+# A Range header with more ranges than this is served whole, many tiny ranges only cost overhead.
+MAX_RANGES = 16
+# ASGI extension that hands a file descriptor to the server to send with sendfile.
+ZERO_COPY_SEND = "http.response.zerocopysend"
+
+
+class ByteRange(NamedTuple):
+	start: int
+	# Exclusive, unlike the last byte position of a Range header.
+	end: int
+
+	@property
+	def length(self) -> int:
+		return self.end - self.start
+
+	def content_range(self, size: int) -> str:
+		return f"bytes {self.start}-{self.end - 1}/{size}"
+
+
+def parse_range_header(header: str, size: int) -> list[ByteRange] | None:
+	"""
+	Parse a ``Range`` header against content of ``size`` bytes.
+
+	Overlapping and adjacent ranges are merged, in ascending order.
+
+	:return: the satisfiable ranges, an empty list when none is satisfiable, None when the header is
+		malformed or asks for too many ranges and the whole content should be served.
+	"""
+	unit, _, range_set = header.partition("=")
+	if unit.strip().lower() != "bytes":
+		return None
+	specs = [spec.strip() for spec in range_set.split(",") if spec.strip()]
+	if not specs or len(specs) > MAX_RANGES:
+		return None
+
+	ranges = []
+	for spec in specs:
+		first, dash, last = spec.partition("-")
+		if not dash or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+			return None
+		if not first:
+			# A suffix range, the last bytes of the content.
+			if int(last) > 0 and size > 0:
+				ranges.append(ByteRange(max(size - int(last), 0), size))
+			continue
+		if last and int(last) < int(first):
+			return None
+		if int(first) < size:
+			ranges.append(ByteRange(int(first), min(int(last) + 1, size) if last else size))
+
+	merged: list[ByteRange] = []
+	for byte_range in sorted(ranges):
+		if merged and byte_range.start <= merged[-1].end:
+			merged[-1] = ByteRange(merged[-1].start, max(merged[-1].end, byte_range.end))
+		else:
+			merged.append(byte_range)
+	return merged
+
+
+class RangeResponse(Response):
+	"""
+	Content served whole or as byte ranges, streamed without holding it in memory.
+
+	The content is read from the local file ``open_file`` yields, which is handed to the server to send
+	with ``sendfile`` when it offers the ASGI zero-copy extension, or read in chunks off the event loop
+	otherwise. When it yields None, the content is proxied from ``read``. Several ranges are sent as a
+	``multipart/byteranges`` body.
+	"""
+
+	def __init__(
+		self,
+		size: int,
+		ranges: list[ByteRange] | None,
+		media_type: str,
+		open_file: Callable[[], AsyncContextManager[str | None]],
+		read: Callable[[int, int], AsyncGenerator[bytes, None]],
+		headers: dict[str, str] | None = None,
+	) -> None:
+		self.size = size
+		self.ranges = ranges or [ByteRange(0, size)]
+		self.content_type = media_type
+		self.open_file = open_file
+		self.read = read
+		self.boundary = uuid4().hex if len(self.ranges) > 1 else None
+
+		headers = {**(headers or {}), "Accept-Ranges": "bytes"}
+		if self.boundary:
+			media_type = f"multipart/byteranges; boundary={self.boundary}"
+		elif ranges:
+			headers["Content-Range"] = self.ranges[0].content_range(size)
+		content_length = sum(len(prefix) + byte_range.length for prefix, byte_range in self._parts())
+		headers["Content-Length"] = str(content_length + len(self._epilogue()))
+		super().__init__(
+			status_code=status.HTTP_206_PARTIAL_CONTENT if ranges else status.HTTP_200_OK,
+			headers=headers,
+			media_type=media_type,
+		)
+
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		async with self.open_file() as file_path:
+			if file_path is None:
+				await self._send(scope, send, None)
+			else:
+				with open(file_path, "rb") as file:
+					if os.fstat(file.fileno()).st_size != self.size:
+						# Replaced since it was looked up, the headers no longer describe it.
+						response = Response(
+							"The content changed, retry the request", status.HTTP_503_SERVICE_UNAVAILABLE
+						)
+						await response(scope, receive, send)
+						return
+					await self._send(scope, send, file)
+		if self.background is not None:
+			await self.background()
+
+	async def _send(self, scope: Scope, send: Send, file: BinaryIO | None) -> None:
+		await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+		if scope["method"] != "HEAD":
+			zero_copy = file is not None and ZERO_COPY_SEND in scope.get("extensions", {})
+			for prefix, byte_range in self._parts():
+				if prefix:
+					await send({"type": "http.response.body", "body": prefix, "more_body": True})
+				if zero_copy:
+					await send(
+						{
+							"type": ZERO_COPY_SEND,
+							"file": file,
+							"offset": byte_range.start,
+							"count": byte_range.length,
+							"more_body": True,
+						},
+					)
+					continue
+				chunks = _read_file(file.fileno(), byte_range) if file else self.read(*byte_range)
+				async with aclosing(chunks):
+					async for chunk in chunks:
+						await send({"type": "http.response.body", "body": chunk, "more_body": True})
+		await send({"type": "http.response.body", "body": self._epilogue(), "more_body": False})
+
+	def _parts(self) -> Iterator[tuple[bytes, ByteRange]]:
+		for index, byte_range in enumerate(self.ranges):
+			if self.boundary is None:
+				yield b"", byte_range
+				continue
+			# The CRLF ending a part belongs to the delimiter of the next one.
+			delimiter = f"\r\n--{self.boundary}\r\n" if index else f"--{self.boundary}\r\n"
+			part_headers = (
+				f"Content-Type: {self.content_type}\r\nContent-Range: {byte_range.content_range(self.size)}\r\n\r\n"
+			)
+			yield (delimiter + part_headers).encode(), byte_range
+
+	def _epilogue(self) -> bytes:
+		return f"\r\n--{self.boundary}--\r\n".encode() if self.boundary else b""
+
+
+async def _read_file(fd: int, byte_range: ByteRange) -> AsyncGenerator[bytes, None]:
+	for start in range(byte_range.start, byte_range.end, FILE_CHUNK_SIZE):
+		yield await asyncio.to_thread(os.pread, fd, min(FILE_CHUNK_SIZE, byte_range.end - start), start)
@@ -27,6 +27,12 @@ SKIP_URLS = [
 	"/static/docs/swagger-ui.css",
 ]
 
+# Paths under these prefixes authenticate through their own signature instead of an API token.
+SKIP_URL_PREFIXES = [
+	"/api/storage/",
+	"/api/playback/",
+]
+
 TOKENS = [
 	"a3f8b00a7f21d0d8f9f6f3d52cfe1a90f7d36d8e8a3e4c5b1d1d5f3d9c9e3e1f",
 ]
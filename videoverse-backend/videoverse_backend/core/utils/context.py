@@ -0,0 +1,5 @@
+from contextvars import ContextVar
+
+# Unix time by which the client of the current request asked for it, and the jobs it queues, to be done.
+# None unless the request set an X-Request-Timeout header.
+requested_deadline: ContextVar[float | None] = ContextVar("requested_deadline", default=None)
@@ -5,3 +5,19 @@ class StatusEnum(str, Enum):
 	SUCCESS = "success"
 	ERROR = "error"
 	FAILURE = "failure"
+
+
+class JobStatus(str, Enum):
+	QUEUED = "queued"
+	RUNNING = "running"
+	SUCCEEDED = "succeeded"
+	FAILED = "failed"
+	CANCELLED = "cancelled"
+
+
+class JobKind(str, Enum):
+	TRIM = "trim"
+	MERGE = "merge"
+	PACKAGE = "package"
+	BATCH_TRIM = "batch_trim"
+	RENDER = "render"
@@ -1,3 +1,7 @@
+from videoverse_backend.dao.derivation_dao import DerivationDAO
+from videoverse_backend.dao.job_dao import JobDAO
+from videoverse_backend.dao.upload_session_dao import UploadSessionDAO
 from videoverse_backend.dao.video_dao import VideoDAO
+from videoverse_backend.dao.video_segment_dao import VideoSegmentDAO
 
-__all__ = ["VideoDAO"]
+__all__ = ["DerivationDAO", "JobDAO", "UploadSessionDAO", "VideoDAO", "VideoSegmentDAO"]
@@ -1,7 +1,7 @@
 # app/dao/base.py
 from typing import Any, Generic, Sequence, Type, TypeVar
 
-from sqlalchemy import Uuid, delete, select, update
+from sqlalchemy import Uuid, delete, insert, select, update
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -9,6 +9,9 @@ from videoverse_backend.db import inject_session
 
 T = TypeVar("T")
 
+# Ids looked up per IN clause by get_many, well below the bound parameter limit of SQLite.
+IN_CLAUSE_SIZE = 500
+
 
 class BaseDAO(Generic[T]):
 	def __init__(self, model: Type[T]):
@@ -26,6 +29,22 @@ class BaseDAO(Generic[T]):
 			await session.rollback()
 			raise exception
 
+	@inject_session
+	async def create_many(self, objs_in: list[dict[Any, Any]], session: AsyncSession) -> list[T]:
+		"""Create every row in one statement, the rows are returned in the same order."""
+		if not objs_in:
+			return []
+		try:
+			result = await session.scalars(
+				insert(self.model).returning(self.model, sort_by_parameter_order=True), objs_in
+			)
+			rows = list(result.all())
+			await session.commit()
+			return rows
+		except SQLAlchemyError as exception:
+			await session.rollback()
+			raise exception
+
 	@inject_session
 	async def get(self, unique_id: int | Uuid, session: AsyncSession) -> T | None:  # type: ignore
 		try:
@@ -35,6 +54,25 @@ class BaseDAO(Generic[T]):
 		except SQLAlchemyError as exception:
 			raise exception
 
+	@inject_session
+	async def get_many(self, unique_ids: Sequence[int | Uuid], session: AsyncSession) -> list[T | None]:  # type: ignore
+		"""
+		Load rows by primary key in one session, with one ``IN`` query per ``IN_CLAUSE_SIZE`` ids.
+
+		:return: the row of each id in the order of ``unique_ids``, None for the ids that do not exist.
+		"""
+		try:
+			distinct_ids = list(dict.fromkeys(unique_ids))
+			rows = {}
+			for start in range(0, len(distinct_ids), IN_CLAUSE_SIZE):
+				chunk = distinct_ids[start : start + IN_CLAUSE_SIZE]
+				statement = select(self.model).where(self.model.id.in_(chunk))  # type: ignore
+				for row in (await session.execute(statement)).scalars():
+					rows[row.id] = row  # type: ignore
+			return [rows.get(unique_id) for unique_id in unique_ids]
+		except SQLAlchemyError as exception:
+			raise exception
+
 	@inject_session
 	async def get_all(self, session: AsyncSession) -> Sequence[T]:
 		try:
@@ -0,0 +1,31 @@
+from sqlalchemy import Uuid, delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from videoverse_backend.dao.base_dao import BaseDAO
+from videoverse_backend.db import DerivationModel, inject_session
+
+
+class DerivationDAO(BaseDAO[DerivationModel]):
+	def __init__(self) -> None:
+		super().__init__(DerivationModel)
+
+	@inject_session
+	async def get_by_fingerprint(self, fingerprint: str, session: AsyncSession) -> DerivationModel | None:
+		try:
+			statement = select(DerivationModel).where(DerivationModel.fingerprint == fingerprint)
+			result = await session.execute(statement)
+			return result.scalars().first()
+		except SQLAlchemyError as exception:
+			raise exception
+
+	@inject_session
+	async def delete_by_video(self, video_id: Uuid, session: AsyncSession) -> int:  # type: ignore
+		try:
+			statement = delete(DerivationModel).where(DerivationModel.video_id == video_id)
+			result = await session.execute(statement)
+			await session.commit()
+			return result.rowcount  # noqa
+		except SQLAlchemyError as exception:
+			await session.rollback()
+			raise exception
@@ -0,0 +1,144 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import Uuid, func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from videoverse_backend.core.utils.enums import JobKind, JobStatus
+from videoverse_backend.dao.base_dao import BaseDAO
+from videoverse_backend.db import JobModel, inject_session
+
+
+class JobDAO(BaseDAO[JobModel]):
+	def __init__(self) -> None:
+		super().__init__(JobModel)
+
+	@inject_session
+	async def count_by_status(self, status: JobStatus, session: AsyncSession) -> int:
+		try:
+			statement = select(func.count()).select_from(JobModel).where(JobModel.status == status.value)
+			result = await session.execute(statement)
+			return result.scalar_one()
+		except SQLAlchemyError as exception:
+			raise exception
+
+	@inject_session
+	async def get_active(self, kind: JobKind, video_id: Uuid, session: AsyncSession) -> JobModel | None:  # type: ignore
+		"""
+		Find the queued or running job of a kind that works on a video.
+
+		:return: the job, or None when no such job is unfinished.
+		"""
+		try:
+			statement = select(JobModel).where(
+				JobModel.kind == kind.value,
+				JobModel.video_id == video_id,
+				JobModel.status.in_([JobStatus.QUEUED.value, JobStatus.RUNNING.value]),
+			)
+			return (await session.execute(statement)).scalars().first()
+		except SQLAlchemyError as exception:
+			raise exception
+
+	@inject_session
+	async def claim_next(self, now: datetime, session: AsyncSession) -> JobModel | None:
+		"""
+		Move the oldest queued job to running.
+
+		The update only matches while the job is still queued, so when several workers or server processes
+		race for the same job exactly one of them gets it.
+
+		:param now: time recorded as the first heartbeat.
+		:return: the claimed job, or None when nothing is queued.
+		"""
+		try:
+			while True:
+				statement = (
+					select(JobModel.id)
+					.where(JobModel.status == JobStatus.QUEUED.value)
+					.order_by(JobModel.created_at)
+					.limit(1)
+				)
+				job_id = (await session.execute(statement)).scalar_one_or_none()
+				if job_id is None:
+					return None
+				statement = (
+					update(JobModel)
+					.where(JobModel.id == job_id, JobModel.status == JobStatus.QUEUED.value)
+					.values(status=JobStatus.RUNNING.value, heartbeat_at=now)
+					.returning(JobModel)
+				)
+				job = (await session.execute(statement)).scalars().first()
+				await session.commit()
+				if job is not None:
+					return job
+		except SQLAlchemyError as exception:
+			await session.rollback()
+			raise exception
+
+	@inject_session
+	async def fail_stale(self, heartbeat_before: datetime, error: str, session: AsyncSession) -> int:
+		"""
+		Mark running jobs whose worker stopped sending heartbeats as failed.
+
+		:return: number of jobs marked.
+		"""
+		try:
+			statement = (
+				update(JobModel)
+				.where(JobModel.status == JobStatus.RUNNING.value, JobModel.heartbeat_at < heartbeat_before)
+				.values(status=JobStatus.FAILED.value, error=error)
+			)
+			result = await session.execute(statement)
+			await session.commit()
+			return result.rowcount  # type: ignore
+		except SQLAlchemyError as exception:
+			await session.rollback()
+			raise exception
+
+	@inject_session
+	async def finish(self, job_id: Uuid, values: dict[str, Any], session: AsyncSession) -> bool:  # type: ignore
+		"""
+		Record the outcome of a running job.
+
+		The update only matches while the job is still running, so the outcome of a job that was cancelled
+		or marked failed in the meantime is dropped instead of overwriting that status.
+
+		:return: whether the job was still running.
+		"""
+		try:
+			statement = (
+				update(JobModel)
+				.where(JobModel.id == job_id, JobModel.status == JobStatus.RUNNING.value)
+				.values(**values)
+			)
+			result = await session.execute(statement)
+			await session.commit()
+			return result.rowcount > 0  # type: ignore
+		except SQLAlchemyError as exception:
+			await session.rollback()
+			raise exception
+
+	@inject_session
+	async def cancel(self, job_id: Uuid, session: AsyncSession) -> JobModel | None:  # type: ignore
+		"""
+		Mark a job that has not finished yet as cancelled.
+
+		:return: the cancelled job, or None when it does not exist or already finished.
+		"""
+		try:
+			statement = (
+				update(JobModel)
+				.where(
+					JobModel.id == job_id,
+					JobModel.status.in_([JobStatus.QUEUED.value, JobStatus.RUNNING.value]),
+				)
+				.values(status=JobStatus.CANCELLED.value, error="Cancelled by the client")
+				.returning(JobModel)
+			)
+			job = (await session.execute(statement)).scalars().first()
+			await session.commit()
+			return job
+		except SQLAlchemyError as exception:
+			await session.rollback()
+			raise exception
@@ -0,0 +1,33 @@
+from sqlalchemy import Uuid, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from videoverse_backend.dao.base_dao import BaseDAO
+from videoverse_backend.db import UploadSessionModel, inject_session
+
+
+class UploadSessionDAO(BaseDAO[UploadSessionModel]):
+	def __init__(self) -> None:
+		super().__init__(UploadSessionModel)
+
+	@inject_session
+	async def advance(self, upload_id: Uuid, expected: int, offset: int, session: AsyncSession) -> bool:  # type: ignore
+		"""
+		Move the offset of an upload session, if nobody moved it since it was read.
+
+		:param expected: offset the caller read.
+		:param offset: new offset.
+		:return: whether the offset was still the expected one.
+		"""
+		try:
+			statement = (
+				update(UploadSessionModel)
+				.where(UploadSessionModel.id == upload_id, UploadSessionModel.offset == expected)
+				.values(offset=offset)
+			)
+			result = await session.execute(statement)
+			await session.commit()
+			return result.rowcount > 0  # type: ignore
+		except SQLAlchemyError as exception:
+			await session.rollback()
+			raise exception
@@ -1,7 +1,137 @@
+from typing import Any, Sequence
+
+from pydantic import UUID4
+from sqlalchemy import Uuid, delete, func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from videoverse_backend.dao.base_dao import BaseDAO
-from videoverse_backend.db import VideoModel
+from videoverse_backend.db import VideoModel, VideoSegmentModel, inject_session
 
 
 class VideoDAO(BaseDAO[VideoModel]):
 	def __init__(self) -> None:
 		super().__init__(VideoModel)
+
+	@inject_session
+	async def get_by_content_hash(self, content_hash: str, session: AsyncSession) -> VideoModel | None:
+		try:
+			statement = select(VideoModel).where(VideoModel.content_hash == content_hash).limit(1)
+			result = await session.execute(statement)
+			return result.scalars().first()
+		except SQLAlchemyError as exception:
+			raise exception
+
+	@inject_session
+	async def create_with_segments(
+		self,
+		obj_in: dict[Any, Any],
+		segments: list[dict[str, Any]],
+		session: AsyncSession,
+	) -> VideoModel:
+		"""Create a virtual video together with its segments, in segment order."""
+		try:
+			video = VideoModel(**obj_in)
+			session.add(video)
+			await session.flush()
+			session.add_all(
+				VideoSegmentModel(video_id=video.id, position=position, **segment)
+				for position, segment in enumerate(segments)
+			)
+			await session.commit()
+			await session.refresh(video)
+			return video
+		except SQLAlchemyError as exception:
+			await session.rollback()
+			raise exception
+
+	@inject_session
+	async def update_with_segments(
+		self,
+		unique_id: Uuid,  # type: ignore
+		obj_in: dict[Any, Any],
+		segments: list[dict[str, Any]],
+		session: AsyncSession,
+	) -> VideoModel | None:
+		"""Update a virtual video and replace its segments in one transaction."""
+		try:
+			statement = update(VideoModel).where(VideoModel.id == unique_id).values(**obj_in).returning(VideoModel)
+			video = (await session.execute(statement)).scalars().first()
+			await session.execute(delete(VideoSegmentModel).where(VideoSegmentModel.video_id == unique_id))
+			session.add_all(
+				VideoSegmentModel(video_id=unique_id, position=position, **segment)
+				for position, segment in enumerate(segments)
+			)
+			await session.commit()
+			return video
+		except SQLAlchemyError as exception:
+			await session.rollback()
+			raise exception
+
+	@inject_session
+	async def store_render(
+		self,
+		unique_id: Uuid,  # type: ignore
+		obj_in: dict[Any, Any],
+		session: AsyncSession,
+	) -> VideoModel | None:
+		"""Set the file of a virtual video, unless another render stored one first."""
+		try:
+			statement = (
+				update(VideoModel)
+				.where(VideoModel.id == unique_id, VideoModel.path.is_(None))
+				.values(**obj_in)
+				.returning(VideoModel)
+			)
+			result = await session.execute(statement)
+			await session.commit()
+			return result.scalars().first()
+		except SQLAlchemyError as exception:
+			await session.rollback()
+			raise exception
+
+	@inject_session
+	async def store_package(
+		self,
+		unique_id: Uuid,  # type: ignore
+		hls_path: str,
+		path: str,
+		content_hash: str | None,
+		session: AsyncSession,
+	) -> VideoModel | None:
+		"""
+		Set the HLS package of a video, unless another package was stored first.
+
+		The package is only stored while the video still has the content it was made from.
+
+		:param path: file the package was made from.
+		:param content_hash: content the package was made from.
+		:return: the packaged video, or None when the video has a package or other content by now.
+		"""
+		try:
+			statement = (
+				update(VideoModel)
+				.where(
+					VideoModel.id == unique_id,
+					VideoModel.hls_path.is_(None),
+					VideoModel.path == path,
+					VideoModel.content_hash == content_hash,
+				)
+				.values(hls_path=hls_path)
+				.returning(VideoModel)
+			)
+			result = await session.execute(statement)
+			await session.commit()
+			return result.scalars().first()
+		except SQLAlchemyError as exception:
+			await session.rollback()
+			raise exception
+
+	@inject_session
+	async def count_by_path(self, path: str, session: AsyncSession) -> int:
+		try:
+			statement = select(func.count()).select_from(VideoModel).where(VideoModel.path == path)
+			result = await session.execute(statement)
+			return result.scalar_one()
+		except SQLAlchemyError as exception:
+			raise exception
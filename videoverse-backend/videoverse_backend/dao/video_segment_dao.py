@@ -0,0 +1,50 @@
+from typing import Sequence
+
+from sqlalchemy import Uuid, delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from videoverse_backend.dao.base_dao import BaseDAO
+from videoverse_backend.db import VideoSegmentModel, inject_session
+
+
+class VideoSegmentDAO(BaseDAO[VideoSegmentModel]):
+	def __init__(self) -> None:
+		super().__init__(VideoSegmentModel)
+
+	@inject_session
+	async def get_by_video(self, video_id: Uuid, session: AsyncSession) -> Sequence[VideoSegmentModel]:  # type: ignore
+		try:
+			statement = (
+				select(VideoSegmentModel)
+				.where(VideoSegmentModel.video_id == video_id)
+				.order_by(VideoSegmentModel.position)
+			)
+			result = await session.execute(statement)
+			return result.scalars().all()
+		except SQLAlchemyError as exception:
+			raise exception
+
+	@inject_session
+	async def get_video_ids_by_source(self, source_video_id: Uuid, session: AsyncSession) -> Sequence[Uuid]:  # type: ignore
+		try:
+			statement = (
+				select(VideoSegmentModel.video_id)
+				.where(VideoSegmentModel.source_video_id == source_video_id)
+				.distinct()
+			)
+			result = await session.execute(statement)
+			return result.scalars().all()
+		except SQLAlchemyError as exception:
+			raise exception
+
+	@inject_session
+	async def delete_by_video(self, video_id: Uuid, session: AsyncSession) -> int:  # type: ignore
+		try:
+			statement = delete(VideoSegmentModel).where(VideoSegmentModel.video_id == video_id)
+			result = await session.execute(statement)
+			await session.commit()
+			return result.rowcount  # noqa
+		except SQLAlchemyError as exception:
+			await session.rollback()
+			raise exception
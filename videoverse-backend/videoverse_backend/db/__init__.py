@@ -3,7 +3,11 @@ from typing import Any, AsyncGenerator, Awaitable, Callable, TypeVar, cast
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from videoverse_backend.db.models.derivation_model import DerivationModel
+from videoverse_backend.db.models.job_model import JobModel
+from videoverse_backend.db.models.upload_session_model import UploadSessionModel
 from videoverse_backend.db.models.video_model import VideoModel
+from videoverse_backend.db.models.video_segment_model import VideoSegmentModel
 from videoverse_backend.settings import settings
 
 F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
@@ -52,5 +56,9 @@ def inject_session(func: F) -> F:
 __all__ = [
 	"database",
 	"inject_session",
+	"DerivationModel",
+	"JobModel",
+	"UploadSessionModel",
 	"VideoModel",
+	"VideoSegmentModel",
 ]
@@ -0,0 +1,18 @@
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+
+
+def migrate() -> None:
+	"""
+	Bring the database up to the latest migration.
+
+	The schema only comes from the migrations, an empty database gets every table and one that is
+	behind gets the changes it misses. The database URL is the one of the settings.
+	"""
+	config = Config()
+	config.set_main_option("script_location", str(MIGRATIONS_DIR))
+	command.upgrade(config, "head")
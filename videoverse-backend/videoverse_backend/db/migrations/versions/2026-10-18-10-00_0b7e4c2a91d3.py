@@ -0,0 +1,35 @@
+"""Create the video table.
+
+Revision ID: 0b7e4c2a91d3
+Revises: 819cbf6e030b
+Create Date: 2026-10-18 10:00:12.530418
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0b7e4c2a91d3"
+down_revision = "819cbf6e030b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	# The table used to be created at startup from the model, a database from back then already has it.
+	if sa.inspect(op.get_bind()).has_table("video"):
+		return
+	op.create_table(
+		"video",
+		sa.Column("id", sa.Uuid(), nullable=False),
+		sa.Column("duration", sa.Float(), nullable=False),
+		sa.Column("path", sa.String(), nullable=False),
+		sa.Column("filename", sa.String(), nullable=False),
+		sa.Column("size", sa.Float(), nullable=False),
+		sa.PrimaryKeyConstraint("id"),
+	)
+
+
+def downgrade() -> None:
+	op.drop_table("video")
@@ -0,0 +1,33 @@
+"""Add upload sessions for resumable uploads.
+
+Revision ID: 5d0c2be1a7f4
+Revises: 0b7e4c2a91d3
+Create Date: 2026-10-18 10:12:41.207311
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5d0c2be1a7f4"
+down_revision = "0b7e4c2a91d3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	op.create_table(
+		"upload_session",
+		sa.Column("id", sa.Uuid(), nullable=False),
+		sa.Column("filename", sa.String(), nullable=False),
+		sa.Column("length", sa.BigInteger(), nullable=False),
+		sa.Column("offset", sa.BigInteger(), nullable=False),
+		sa.Column("created_at", sa.DateTime(), nullable=True),
+		sa.Column("updated_at", sa.DateTime(), nullable=True),
+		sa.PrimaryKeyConstraint("id"),
+	)
+
+
+def downgrade() -> None:
+	op.drop_table("upload_session")
@@ -0,0 +1,28 @@
+"""Add content hash to videos.
+
+Revision ID: a93e4f7c2d18
+Revises: 5d0c2be1a7f4
+Create Date: 2026-10-18 11:03:17.845120
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a93e4f7c2d18"
+down_revision = "5d0c2be1a7f4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	with op.batch_alter_table("video") as batch_op:
+		batch_op.add_column(sa.Column("content_hash", sa.String(length=64), nullable=True))
+		batch_op.create_index("ix_video_content_hash", ["content_hash"], unique=False)
+
+
+def downgrade() -> None:
+	with op.batch_alter_table("video") as batch_op:
+		batch_op.drop_index("ix_video_content_hash")
+		batch_op.drop_column("content_hash")
@@ -0,0 +1,44 @@
+"""Add probe metadata to videos.
+
+Revision ID: e41b7d09c6a2
+Revises: a93e4f7c2d18
+Create Date: 2026-10-18 12:20:52.113094
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e41b7d09c6a2"
+down_revision = "a93e4f7c2d18"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	with op.batch_alter_table("video") as batch_op:
+		batch_op.add_column(sa.Column("container", sa.String(), nullable=True))
+		batch_op.add_column(sa.Column("video_codec", sa.String(), nullable=True))
+		batch_op.add_column(sa.Column("audio_codec", sa.String(), nullable=True))
+		batch_op.add_column(sa.Column("width", sa.Integer(), nullable=True))
+		batch_op.add_column(sa.Column("height", sa.Integer(), nullable=True))
+		batch_op.add_column(sa.Column("pixel_format", sa.String(), nullable=True))
+		batch_op.add_column(sa.Column("frame_rate", sa.Float(), nullable=True))
+		batch_op.add_column(sa.Column("bit_rate", sa.BigInteger(), nullable=True))
+		batch_op.add_column(sa.Column("audio_sample_rate", sa.Integer(), nullable=True))
+		batch_op.add_column(sa.Column("keyframes", sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+	with op.batch_alter_table("video") as batch_op:
+		batch_op.drop_column("keyframes")
+		batch_op.drop_column("audio_sample_rate")
+		batch_op.drop_column("bit_rate")
+		batch_op.drop_column("frame_rate")
+		batch_op.drop_column("pixel_format")
+		batch_op.drop_column("height")
+		batch_op.drop_column("width")
+		batch_op.drop_column("audio_codec")
+		batch_op.drop_column("video_codec")
+		batch_op.drop_column("container")
@@ -0,0 +1,39 @@
+"""Add background jobs.
+
+Revision ID: 3b8e2f6d1c94
+Revises: e41b7d09c6a2
+Create Date: 2026-10-18 13:40:27.518306
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3b8e2f6d1c94"
+down_revision = "e41b7d09c6a2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	op.create_table(
+		"job",
+		sa.Column("id", sa.Uuid(), nullable=False),
+		sa.Column("kind", sa.String(), nullable=False),
+		sa.Column("status", sa.String(), nullable=False),
+		sa.Column("payload", sa.JSON(), nullable=False),
+		sa.Column("progress", sa.Float(), nullable=False),
+		sa.Column("result_video_id", sa.Uuid(), nullable=True),
+		sa.Column("error", sa.String(), nullable=True),
+		sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+		sa.Column("created_at", sa.DateTime(), nullable=True),
+		sa.Column("updated_at", sa.DateTime(), nullable=True),
+		sa.PrimaryKeyConstraint("id"),
+	)
+	op.create_index("ix_job_status", "job", ["status"], unique=False)
+
+
+def downgrade() -> None:
+	op.drop_index("ix_job_status", table_name="job")
+	op.drop_table("job")
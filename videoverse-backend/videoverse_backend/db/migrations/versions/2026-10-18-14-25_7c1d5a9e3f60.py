@@ -0,0 +1,47 @@
+"""Add virtual videos.
+
+Revision ID: 7c1d5a9e3f60
+Revises: 3b8e2f6d1c94
+Create Date: 2026-10-18 14:25:09.641872
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7c1d5a9e3f60"
+down_revision = "3b8e2f6d1c94"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	with op.batch_alter_table("video") as batch_op:
+		batch_op.alter_column("path", existing_type=sa.String(), nullable=True)
+		batch_op.alter_column("size", existing_type=sa.Float(), nullable=True)
+
+	op.create_table(
+		"video_segment",
+		sa.Column("id", sa.Uuid(), nullable=False),
+		sa.Column("video_id", sa.Uuid(), nullable=False),
+		sa.Column("position", sa.Integer(), nullable=False),
+		sa.Column("source_video_id", sa.Uuid(), nullable=False),
+		sa.Column("start", sa.Float(), nullable=False),
+		sa.Column("end", sa.Float(), nullable=False),
+		sa.PrimaryKeyConstraint("id"),
+	)
+	op.create_index("ix_video_segment_video_id", "video_segment", ["video_id"], unique=False)
+	op.create_index("ix_video_segment_source_video_id", "video_segment", ["source_video_id"], unique=False)
+
+
+def downgrade() -> None:
+	op.drop_index("ix_video_segment_source_video_id", table_name="video_segment")
+	op.drop_index("ix_video_segment_video_id", table_name="video_segment")
+	op.drop_table("video_segment")
+
+	# Virtual videos that were never rendered have no file to fall back on.
+	op.execute("DELETE FROM video WHERE path IS NULL")
+	with op.batch_alter_table("video") as batch_op:
+		batch_op.alter_column("size", existing_type=sa.Float(), nullable=False)
+		batch_op.alter_column("path", existing_type=sa.String(), nullable=False)
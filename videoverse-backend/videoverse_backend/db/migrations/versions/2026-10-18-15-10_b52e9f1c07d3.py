@@ -0,0 +1,35 @@
+"""Add the derivation cache.
+
+Revision ID: b52e9f1c07d3
+Revises: 7c1d5a9e3f60
+Create Date: 2026-10-18 15:10:44.208517
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b52e9f1c07d3"
+down_revision = "7c1d5a9e3f60"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	op.create_table(
+		"derivation",
+		sa.Column("id", sa.Uuid(), nullable=False),
+		sa.Column("fingerprint", sa.String(length=64), nullable=False),
+		sa.Column("operation", sa.String(), nullable=False),
+		sa.Column("video_id", sa.Uuid(), nullable=False),
+		sa.Column("created_at", sa.DateTime(), nullable=True),
+		sa.PrimaryKeyConstraint("id"),
+		sa.UniqueConstraint("fingerprint"),
+	)
+	op.create_index("ix_derivation_video_id", "derivation", ["video_id"], unique=False)
+
+
+def downgrade() -> None:
+	op.drop_index("ix_derivation_video_id", table_name="derivation")
+	op.drop_table("derivation")
@@ -0,0 +1,26 @@
+"""Add the HLS package to videos.
+
+Revision ID: d4a7c3e9b182
+Revises: b52e9f1c07d3
+Create Date: 2026-10-18 16:05:41.203518
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d4a7c3e9b182"
+down_revision = "b52e9f1c07d3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	with op.batch_alter_table("video") as batch_op:
+		batch_op.add_column(sa.Column("hls_path", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+	with op.batch_alter_table("video") as batch_op:
+		batch_op.drop_column("hls_path")
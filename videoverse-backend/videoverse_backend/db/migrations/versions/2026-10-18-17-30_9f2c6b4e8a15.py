@@ -0,0 +1,26 @@
+"""Add the videos of batch jobs to jobs.
+
+Revision ID: 9f2c6b4e8a15
+Revises: d4a7c3e9b182
+Create Date: 2026-10-18 17:30:12.648301
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9f2c6b4e8a15"
+down_revision = "d4a7c3e9b182"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	with op.batch_alter_table("job") as batch_op:
+		batch_op.add_column(sa.Column("result_video_ids", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+	with op.batch_alter_table("job") as batch_op:
+		batch_op.drop_column("result_video_ids")
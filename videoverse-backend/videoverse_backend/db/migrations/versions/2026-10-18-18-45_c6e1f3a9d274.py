@@ -0,0 +1,26 @@
+"""Add deadlines to jobs.
+
+Revision ID: c6e1f3a9d274
+Revises: 9f2c6b4e8a15
+Create Date: 2026-10-18 18:45:37.215904
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c6e1f3a9d274"
+down_revision = "9f2c6b4e8a15"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	with op.batch_alter_table("job") as batch_op:
+		batch_op.add_column(sa.Column("deadline_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+	with op.batch_alter_table("job") as batch_op:
+		batch_op.drop_column("deadline_at")
@@ -0,0 +1,37 @@
+"""Add the video a job works on to jobs.
+
+Revision ID: 4e8b1d6f2a37
+Revises: c6e1f3a9d274
+Create Date: 2026-10-18 19:20:06.381527
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4e8b1d6f2a37"
+down_revision = "c6e1f3a9d274"
+branch_labels = None
+depends_on = None
+
+ACTIVE_VIDEO_JOB = sa.text("video_id IS NOT NULL AND status IN ('queued', 'running')")
+
+
+def upgrade() -> None:
+	with op.batch_alter_table("job") as batch_op:
+		batch_op.add_column(sa.Column("video_id", sa.Uuid(), nullable=True))
+	op.create_index(
+		"ix_job_active_video",
+		"job",
+		["kind", "video_id"],
+		unique=True,
+		sqlite_where=ACTIVE_VIDEO_JOB,
+		postgresql_where=ACTIVE_VIDEO_JOB,
+	)
+
+
+def downgrade() -> None:
+	op.drop_index("ix_job_active_video", table_name="job")
+	with op.batch_alter_table("job") as batch_op:
+		batch_op.drop_column("video_id")
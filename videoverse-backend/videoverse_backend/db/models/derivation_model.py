@@ -0,0 +1,19 @@
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import DateTime, String, Uuid, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from videoverse_backend.db.models.base import BaseModel
+
+
+class DerivationModel(BaseModel):
+	__tablename__ = "derivation"
+
+	id: Mapped[Uuid] = mapped_column(Uuid, primary_key=True, default=uuid4)  # type: ignore
+	# SHA-256 of the operation, its parameters and the content of its sources.
+	fingerprint: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+	operation: Mapped[str] = mapped_column(String, nullable=False)
+	# Video the operation produced.
+	video_id: Mapped[Uuid] = mapped_column(Uuid, nullable=False, index=True)  # type: ignore
+	created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
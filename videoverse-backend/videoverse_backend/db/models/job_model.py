@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Any
+from uuid import uuid4
+
+from sqlalchemy import JSON, DateTime, Float, Index, String, Uuid, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from videoverse_backend.core.utils.enums import JobStatus
+from videoverse_backend.db.models.base import BaseModel
+
+# Jobs that still hold their video, a finished job leaves it to the next one.
+ACTIVE_VIDEO_JOB = text(f"video_id IS NOT NULL AND status IN ('{JobStatus.QUEUED.value}', '{JobStatus.RUNNING.value}')")
+
+
+class JobModel(BaseModel):
+	__tablename__ = "job"
+	__table_args__ = (
+		# A video has at most one unfinished job of each kind that works on it, see ``JobQueue.submit``.
+		Index(
+			"ix_job_active_video",
+			"kind",
+			"video_id",
+			unique=True,
+			sqlite_where=ACTIVE_VIDEO_JOB,
+			postgresql_where=ACTIVE_VIDEO_JOB,
+		),
+	)
+
+	id: Mapped[Uuid] = mapped_column(Uuid, primary_key=True, default=uuid4)  # type: ignore
+	kind: Mapped[str] = mapped_column(String, nullable=False)
+	status: Mapped[str] = mapped_column(String, nullable=False, default=JobStatus.QUEUED.value, index=True)
+	# Request body the job was submitted with, the handler validates it again when the job runs.
+	payload: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+	# Video a job that must not run twice at once works on, like the rendering of a virtual video.
+	video_id: Mapped[Uuid | None] = mapped_column(Uuid, nullable=True)  # type: ignore
+	progress: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+	result_video_id: Mapped[Uuid | None] = mapped_column(Uuid, nullable=True)  # type: ignore
+	# Videos of a job that produces several, in the order of its request.
+	result_video_ids: Mapped[list[str] | None] = mapped_column(JSON, nullable=True)
+	error: Mapped[str | None] = mapped_column(String, nullable=True)
+	# Naive UTC time the client stops waiting for the job, it is failed instead of finished afterwards.
+	deadline_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+	# Refreshed by the worker while the job runs, a stale value means the worker is gone.
+	heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+	created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+	updated_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
@@ -0,0 +1,18 @@
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import BigInteger, DateTime, String, Uuid, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from videoverse_backend.db.models.base import BaseModel
+
+
+class UploadSessionModel(BaseModel):
+	__tablename__ = "upload_session"
+
+	id: Mapped[Uuid] = mapped_column(Uuid, primary_key=True, default=uuid4)  # type: ignore
+	filename: Mapped[str] = mapped_column(String, nullable=False)
+	length: Mapped[int] = mapped_column(BigInteger, nullable=False)
+	offset: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+	created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+	updated_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
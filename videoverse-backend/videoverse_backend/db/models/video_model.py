@@ -1,6 +1,6 @@
 from uuid import uuid4
 
-from sqlalchemy import Float, String, Uuid
+from sqlalchemy import BigInteger, Float, Integer, LargeBinary, String, Uuid
 from sqlalchemy.orm import Mapped, mapped_column
 
 from videoverse_backend.db.models.base import BaseModel
@@ -9,8 +9,25 @@ from videoverse_backend.db.models.base import BaseModel
 class VideoModel(BaseModel):
 	__tablename__ = "video"
 
-	id: Mapped[Uuid] = mapped_column(Uuid, primary_key=True, default=uuid4())  # type: ignore
+	id: Mapped[Uuid] = mapped_column(Uuid, primary_key=True, default=uuid4)  # type: ignore
 	duration: Mapped[float] = mapped_column(Float, nullable=False)
-	path: Mapped[str] = mapped_column(String, nullable=False)
+	# None for a virtual video that was not rendered yet, its content is the list of its segments.
+	path: Mapped[str | None] = mapped_column(String, nullable=True)
 	filename: Mapped[str] = mapped_column(String)
-	size: Mapped[float] = mapped_column(Float)
+	size: Mapped[float | None] = mapped_column(Float, nullable=True)
+	content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+	# Master playlist of the HLS package once the video is packaged, its renditions are stored next to it.
+	hls_path: Mapped[str | None] = mapped_column(String, nullable=True)
+
+	# Probe metadata, captured once when the file is stored.
+	container: Mapped[str | None] = mapped_column(String, nullable=True)
+	video_codec: Mapped[str | None] = mapped_column(String, nullable=True)
+	audio_codec: Mapped[str | None] = mapped_column(String, nullable=True)
+	width: Mapped[int | None] = mapped_column(Integer, nullable=True)
+	height: Mapped[int | None] = mapped_column(Integer, nullable=True)
+	pixel_format: Mapped[str | None] = mapped_column(String, nullable=True)
+	frame_rate: Mapped[float | None] = mapped_column(Float, nullable=True)
+	bit_rate: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+	audio_sample_rate: Mapped[int | None] = mapped_column(Integer, nullable=True)
+	# Presentation times of the video keyframes in microseconds, packed as little-endian int64.
+	keyframes: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
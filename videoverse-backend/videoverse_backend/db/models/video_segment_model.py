@@ -0,0 +1,20 @@
+from uuid import uuid4
+
+from sqlalchemy import Float, Integer, Uuid
+from sqlalchemy.orm import Mapped, mapped_column
+
+from videoverse_backend.db.models.base import BaseModel
+
+
+class VideoSegmentModel(BaseModel):
+	__tablename__ = "video_segment"
+
+	id: Mapped[Uuid] = mapped_column(Uuid, primary_key=True, default=uuid4)  # type: ignore
+	# Virtual video the segment belongs to, its segments play in position order.
+	video_id: Mapped[Uuid] = mapped_column(Uuid, nullable=False, index=True)  # type: ignore
+	position: Mapped[int] = mapped_column(Integer, nullable=False)
+	# Always a video with a stored file, segments of virtual videos are flattened into their own sources.
+	source_video_id: Mapped[Uuid] = mapped_column(Uuid, nullable=False, index=True)  # type: ignore
+	# Seconds into the source.
+	start: Mapped[float] = mapped_column(Float, nullable=False)
+	end: Mapped[float] = mapped_column(Float, nullable=False)
@@ -1,4 +1,5 @@
+from videoverse_backend.middlewares.deadline_middleware import DeadlineMiddleware
 from videoverse_backend.middlewares.logging_middleware import LoggingMiddleware
 from videoverse_backend.middlewares.static_token_middleware import StaticAPITokenMiddleware
 
-__all__ = ["LoggingMiddleware", "StaticAPITokenMiddleware"]
+__all__ = ["DeadlineMiddleware", "LoggingMiddleware", "StaticAPITokenMiddleware"]
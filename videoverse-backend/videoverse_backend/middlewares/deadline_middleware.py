@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+from starlette import status
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from videoverse_backend.core import APIResponse, StatusEnum, logger, requested_deadline
+
+# Seconds the client is willing to wait for the request, and for the jobs it queues.
+REQUEST_TIMEOUT_HEADER = b"x-request-timeout"
+
+
+class DeadlineMiddleware:
+	"""
+	Stops working on a request as soon as nobody waits for it anymore.
+
+	The request is cancelled when its client disconnects, or when its response has not started by its
+	deadline: ``default_timeout`` seconds, or the seconds of an ``X-Request-Timeout`` header up to
+	``max_timeout``. The deadline counts from the end of the request body, so a slow upload is not cut off
+	while it is still arriving. Cancelling reaches whatever the request awaits, so its ffmpeg processes are
+	killed and its temporary files removed right away. A body that is already being sent is only cut short by a
+	disconnect, and background work started after the response is left alone.
+	"""
+
+	def __init__(self, app: ASGIApp, default_timeout: float, max_timeout: float) -> None:
+		self.app = app
+		self.default_timeout = default_timeout
+		self.max_timeout = max_timeout
+
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		if scope["type"] != "http":
+			await self.app(scope, receive, send)
+			return
+
+		header = dict(scope["headers"]).get(REQUEST_TIMEOUT_HEADER)
+		requested = DeadlineMiddleware._parse_timeout(header) if header is not None else None
+		if requested == 0:
+			response = APIResponse(
+				status_=StatusEnum.ERROR,
+				message="X-Request-Timeout must be a positive number of seconds",
+				status_code=status.HTTP_400_BAD_REQUEST,
+			)
+			await response(scope, receive, send)
+			return
+		if requested is not None:
+			requested = min(requested, self.max_timeout)
+		timeout = requested or self.default_timeout
+
+		loop = asyncio.get_running_loop()
+		# The body reaches the request one message at a time, so reading ahead never buffers an upload.
+		inbox: asyncio.Queue[Message] = asyncio.Queue(1)
+		outcome: dict[str, bool] = {"started": False, "complete": False, "expired": False, "disconnected": False}
+		timer: asyncio.TimerHandle | None = None
+
+		async def receive_message() -> Message:
+			message = await inbox.get()
+			if message["type"] == "http.disconnect":
+				# Every later call sees the disconnect as well.
+				inbox.put_nowait(message)
+			return message
+
+		async def send_message(message: Message) -> None:
+			if message["type"] == "http.response.start":
+				outcome["started"] = True
+				if timer is not None:
+					timer.cancel()
+			elif message["type"] == "http.response.body" and not message.get("more_body", False):
+				outcome["complete"] = True
+			await send(message)
+
+		async def watch_disconnect() -> None:
+			nonlocal timer
+			while True:
+				message = await receive()
+				if message["type"] == "http.request" and not message.get("more_body", False):
+					# The body is in, from here on only the work of the request counts.
+					if timeout and not outcome["started"]:
+						timer = loop.call_later(timeout, expire)
+				elif message["type"] == "http.disconnect":
+					if not outcome["complete"]:
+						outcome["disconnected"] = True
+						request.cancel()
+					await inbox.put(message)
+					return
+				await inbox.put(message)
+
+		def expire() -> None:
+			outcome["expired"] = True
+			request.cancel()
+
+		async def handle() -> None:
+			await self.app(scope, receive_message, send_message)
+
+		token = requested_deadline.set(time.time() + requested if requested else None)
+		try:
+			request: asyncio.Task[None] = asyncio.create_task(handle())
+		finally:
+			requested_deadline.reset(token)
+		watcher = asyncio.create_task(watch_disconnect())
+		try:
+			await request
+		except asyncio.CancelledError:
+			if asyncio.current_task().cancelling() or not (outcome["expired"] or outcome["disconnected"]):  # type: ignore
+				raise
+			description = f'"{scope["method"]} {scope["path"]}"'
+			if outcome["disconnected"]:
+				logger.info(f"Stopped {description}, its client disconnected")
+				return
+			logger.warning(f"Stopped {description}, it did not respond within {timeout:g}s")
+			# The deadline only runs until the response starts, nothing was sent yet.
+			response = APIResponse(
+				status_=StatusEnum.ERROR,
+				message=f"The request did not finish within its deadline of {timeout:g} seconds",
+				status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+			)
+			await response(scope, receive, send)
+		finally:
+			if timer is not None:
+				timer.cancel()
+			watcher.cancel()
+
+	@staticmethod
+	def _parse_timeout(header: bytes) -> float:
+		"""Seconds of an ``X-Request-Timeout`` header, 0 when it is not a positive number."""
+		try:
+			timeout = float(header)
+		except ValueError:
+			return 0
+		return timeout if 0 < timeout < float("inf") else 0
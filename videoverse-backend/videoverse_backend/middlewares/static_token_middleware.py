@@ -2,7 +2,7 @@ from fastapi import FastAPI, HTTPException, Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 from starlette.status import HTTP_401_UNAUTHORIZED
 
-from videoverse_backend.core import SKIP_URLS
+from videoverse_backend.core import SKIP_URL_PREFIXES, SKIP_URLS
 
 
 class StaticAPITokenMiddleware(BaseHTTPMiddleware):
@@ -11,7 +11,7 @@ class StaticAPITokenMiddleware(BaseHTTPMiddleware):
 		self.api_tokens = api_tokens
 
 	async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-		if request.url.path in SKIP_URLS:
+		if request.url.path in SKIP_URLS or request.url.path.startswith(tuple(SKIP_URL_PREFIXES)):
 			return await call_next(request)
 
 		authorization: str = request.headers.get("Authorization", "")
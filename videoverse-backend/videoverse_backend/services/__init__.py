@@ -1,11 +1,34 @@
 """Services for videoverse_backend."""
 
+from videoverse_backend.services.cpu_scheduler import CpuScheduler, WorkClass
+from videoverse_backend.services.derivation_cache import DerivationCache
+from videoverse_backend.services.ffmpeg_progress import ProgressTracker, ffmpeg_progress
 from videoverse_backend.services.file_service import FileService
-from videoverse_backend.services.firebase_service import FirebaseService
-from videoverse_backend.services.video_service import VideoService
+from videoverse_backend.services.job_queue import JobQueue, job_queue
+from videoverse_backend.services.media_probe import MediaInfo, MediaProbe
+from videoverse_backend.services.playback_service import PlaybackService, playback_service
+from videoverse_backend.services.process_runner import ProcessRunner
+from videoverse_backend.services.storage import AsyncStorage, StorageBackend, get_storage, storage
+from videoverse_backend.services.video_service import ProbeMetadata, VideoService
 
 __all__ = [
+	"CpuScheduler",
+	"WorkClass",
+	"DerivationCache",
 	"FileService",
+	"ProgressTracker",
+	"ffmpeg_progress",
+	"JobQueue",
+	"job_queue",
 	"VideoService",
-	"FirebaseService",
+	"MediaInfo",
+	"MediaProbe",
+	"PlaybackService",
+	"playback_service",
+	"ProbeMetadata",
+	"ProcessRunner",
+	"AsyncStorage",
+	"StorageBackend",
+	"get_storage",
+	"storage",
 ]
@@ -0,0 +1,151 @@
+import asyncio
+import fcntl
+import itertools
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Any, AsyncIterator, NamedTuple
+
+from videoverse_backend.core import logger
+
+
+class WorkClass(str, Enum):
+	"""Kind of ffmpeg work, each kind is admitted in its own lane."""
+
+	COPY = "copy"
+	ENCODE = "encode"
+
+
+class WorkStats(NamedTuple):
+	runs: int = 0
+	wait_time: float = 0.0
+	run_time: float = 0.0
+	max_wait_time: float = 0.0
+
+	def add(self, wait_time: float, run_time: float) -> "WorkStats":
+		return WorkStats(
+			runs=self.runs + 1,
+			wait_time=self.wait_time + wait_time,
+			run_time=self.run_time + run_time,
+			max_wait_time=max(self.max_wait_time, wait_time),
+		)
+
+
+class CpuScheduler:
+	"""
+	Admits ffmpeg processes against a core budget shared by every server process on the host.
+
+	Each core of the budget is a slot file in ``slot_dir``; running work holds an exclusive ``flock`` on
+	its slots, so the budget is shared across processes without any coordinator and the locks go away
+	with a process that dies. A re-encode holds ``encode_threads`` cores. A stream copy barely loads a
+	core, it holds one slot of a separate lane of the same size, so cheap copies never queue behind a
+	re-encode. Within a lane work is admitted first come first served; work that does not fit waits for
+	a release here or, as other processes cannot signal us, for the next ``poll_interval`` check.
+	"""
+
+	def __init__(self, budget: int, encode_threads: int, slot_dir: str, poll_interval: float = 0.05) -> None:
+		self.budget = budget
+		self.encode_threads = max(1, min(encode_threads, budget))
+		self.slot_dir = slot_dir
+		self.poll_interval = poll_interval
+		self.stats: dict[WorkClass, WorkStats] = {work_class: WorkStats() for work_class in WorkClass}
+		self._waiting: dict[WorkClass, deque[int]] = {work_class: deque() for work_class in WorkClass}
+		self._sequence = itertools.count()
+		self._wakeups: set[asyncio.Future[None]] = set()
+		os.makedirs(slot_dir, exist_ok=True)
+
+	def threads_for(self, work_class: WorkClass) -> int:
+		return self.encode_threads if work_class == WorkClass.ENCODE else 1
+
+	@asynccontextmanager
+	async def admit(self, work_class: WorkClass) -> AsyncIterator[int]:
+		"""
+		Wait for cores and hold them while the context is open.
+
+		:param work_class: kind of work, decides the priority and the number of cores.
+		:return: number of threads the work may use.
+		"""
+		threads = self.threads_for(work_class)
+		waiting = self._waiting[work_class]
+		ticket = next(self._sequence)
+		waiting.append(ticket)
+		queued_at = time.monotonic()
+		try:
+			slots = self._try_acquire(work_class, threads) if waiting[0] == ticket else None
+			while slots is None:
+				await self._wait_for_release()
+				slots = self._try_acquire(work_class, threads) if waiting[0] == ticket else None
+		finally:
+			waiting.remove(ticket)
+			self._wake_all()
+
+		started_at = time.monotonic()
+		try:
+			yield threads
+		finally:
+			CpuScheduler._release(slots)
+			self._wake_all()
+			wait_time, run_time = started_at - queued_at, time.monotonic() - started_at
+			self.stats[work_class] = self.stats[work_class].add(wait_time, run_time)
+			logger.info(
+				f"ffmpeg {work_class.value} on {threads} threads waited {wait_time:.2f}s, ran {run_time:.2f}s",
+			)
+
+	def snapshot(self) -> dict[str, Any]:
+		"""Budget, queue length and wait against run time per work class."""
+		return {
+			"budget": self.budget,
+			"encode_threads": self.encode_threads,
+			"waiting": {work_class.value: len(waiting) for work_class, waiting in self._waiting.items()},
+			"work": {work_class.value: stats._asdict() for work_class, stats in self.stats.items()},
+		}
+
+	@staticmethod
+	def with_threads(command: list[str], threads: int) -> list[str]:
+		"""Limit the decoders of every input and the encoders of the output to ``threads``."""
+		limited = [command[0]]
+		for argument in command[1:-1]:
+			if argument == "-i":
+				limited.extend(["-threads", str(threads)])
+			limited.append(argument)
+		limited.extend(["-threads", str(threads), command[-1]])
+		return limited
+
+	def _try_acquire(self, work_class: WorkClass, count: int) -> list[int] | None:
+		held: list[int] = []
+		for index in range(self.budget):
+			slot = f"{work_class.value}-{index}"
+			fd = os.open(os.path.join(self.slot_dir, slot), os.O_RDWR | os.O_CREAT, 0o600)
+			try:
+				fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+			except BlockingIOError:
+				os.close(fd)
+				continue
+			held.append(fd)
+			if len(held) == count:
+				return held
+		CpuScheduler._release(held)
+		return None
+
+	async def _wait_for_release(self) -> None:
+		wakeup = asyncio.get_running_loop().create_future()
+		self._wakeups.add(wakeup)
+		try:
+			await asyncio.wait_for(wakeup, self.poll_interval)
+		except TimeoutError:
+			pass
+		finally:
+			self._wakeups.discard(wakeup)
+
+	def _wake_all(self) -> None:
+		for wakeup in self._wakeups:
+			if not wakeup.done():
+				wakeup.set_result(None)
+
+	@staticmethod
+	def _release(slots: list[int]) -> None:
+		for fd in slots:
+			# Closing the only descriptor of the open file drops its lock.
+			os.close(fd)
@@ -0,0 +1,57 @@
+import hashlib
+import json
+from typing import Any, Sequence
+
+from sqlalchemy.exc import IntegrityError
+
+from videoverse_backend.core import logger
+from videoverse_backend.dao import DerivationDAO, VideoDAO
+from videoverse_backend.db import VideoModel
+
+
+class DerivationCache:
+	"""
+	Remembers which video a trim or merge produced, so repeating it returns that video.
+
+	Entries are keyed by a fingerprint of the operation, its parameters and the content hashes of its
+	sources in order. Overwriting a source changes its hash, so nothing derived from the old content is
+	found again; overwriting a produced video drops the entries that point at it.
+	"""
+
+	@staticmethod
+	def fingerprint(operation: str, sources: Sequence[Any], parameters: dict[str, Any]) -> str | None:
+		"""
+		:param operation: name of the operation.
+		:param sources: source videos in the order the operation uses them.
+		:param parameters: JSON-serialisable parameters that change the output.
+		:return: hex SHA-256, None when a source has no content hash (virtual videos that were never
+			rendered and videos stored before hashes were kept) and the result cannot be reused.
+		"""
+		versions = [source.content_hash for source in sources]
+		if None in versions:
+			return None
+		key = json.dumps({"operation": operation, "sources": versions, "parameters": parameters}, sort_keys=True)
+		return hashlib.sha256(key.encode()).hexdigest()
+
+	@staticmethod
+	async def lookup(fingerprint: str) -> VideoModel | None:
+		derivation = await DerivationDAO().get_by_fingerprint(fingerprint)  # type: ignore
+		if derivation is None:
+			return None
+		video = await VideoDAO().get(derivation.video_id)  # type: ignore
+		if video is None:
+			await DerivationDAO().delete(derivation.id)  # type: ignore
+		return video
+
+	@staticmethod
+	async def record(fingerprint: str, operation: str, video_id: Any) -> None:
+		try:
+			await DerivationDAO().create({"fingerprint": fingerprint, "operation": operation, "video_id": video_id})  # type: ignore
+		except IntegrityError:
+			# The same operation ran concurrently and was recorded first, either output is as good.
+			logger.info(f"{operation} {fingerprint} is already recorded")
+
+	@staticmethod
+	async def invalidate(video_id: Any) -> None:
+		"""Forget the operations that produced a video whose content is about to change."""
+		await DerivationDAO().delete_by_video(video_id)  # type: ignore
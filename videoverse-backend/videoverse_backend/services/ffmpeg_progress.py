@@ -0,0 +1,178 @@
+import asyncio
+import itertools
+import os
+import socket
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, NamedTuple
+
+from videoverse_backend.core import logger
+from videoverse_backend.settings import settings
+
+# Updates a subscriber may fall behind by, older ones are dropped for it.
+SUBSCRIBER_BACKLOG = 64
+
+
+class ProgressSample(NamedTuple):
+	"""One block of the ``-progress`` output of ffmpeg, ending with its ``progress=`` line."""
+
+	# Seconds of output written.
+	out_time: float
+	frame: int | None = None
+	fps: float | None = None
+	# Output rate in kbit/s.
+	bitrate: float | None = None
+	# Seconds of output written per second of wall time.
+	speed: float | None = None
+	total_size: int | None = None
+
+	@staticmethod
+	def from_fields(fields: dict[str, str]) -> "ProgressSample":
+		out_time_us = _number(fields.get("out_time_us") or fields.get("out_time_ms"))
+		return ProgressSample(
+			out_time=max(out_time_us or 0, 0) / 1_000_000,
+			frame=_integer(fields.get("frame")),
+			fps=_number(fields.get("fps")),
+			bitrate=_number(fields.get("bitrate", "").removesuffix("kbits/s")),
+			speed=_number(fields.get("speed", "").removesuffix("x")),
+			total_size=_integer(fields.get("total_size")),
+		)
+
+
+class FfmpegRun(NamedTuple):
+	id: int
+	operation: str
+	work_class: str
+	pid: int
+	started_at: float
+	sample: ProgressSample | None = None
+	# Set once the process exited.
+	finished_at: float | None = None
+	returncode: int | None = None
+
+	@property
+	def realtime_factor(self) -> float | None:
+		"""Seconds of output per second of wall time since the process started."""
+		if self.sample is None:
+			return None
+		elapsed = (self.finished_at or time.time()) - self.started_at
+		return self.sample.out_time / elapsed if elapsed > 0 else None
+
+	def to_dict(self) -> dict[str, Any]:
+		return {
+			**self._asdict(),
+			"sample": self.sample._asdict() if self.sample else None,
+			"realtime_factor": self.realtime_factor,
+		}
+
+
+class ProgressTracker:
+	"""
+	Live progress of the ffmpeg processes of this server process.
+
+	Runs are tracked from the key/value blocks ffmpeg writes with ``-progress``; finished runs are kept
+	for the last ``history_size`` runs so slow operations, or a node slower than its peers, stand out
+	after the fact. Every update is also published to the subscribers of :meth:`updates`.
+	"""
+
+	def __init__(self, history_size: int) -> None:
+		self.running: dict[int, FfmpegRun] = {}
+		self.history: deque[FfmpegRun] = deque(maxlen=history_size)
+		self._ids = itertools.count(1)
+		self._subscribers: set[asyncio.Queue[FfmpegRun]] = set()
+
+	def start(self, operation: str, work_class: str, pid: int) -> int:
+		run = FfmpegRun(next(self._ids), operation, work_class, pid, time.time())
+		self.running[run.id] = run
+		self._publish(run)
+		return run.id
+
+	def update(self, run_id: int, sample: ProgressSample) -> None:
+		run = self.running.get(run_id)
+		if run is not None:
+			self.running[run_id] = run._replace(sample=sample)
+			self._publish(self.running[run_id])
+
+	def finish(self, run_id: int, returncode: int | None) -> None:
+		run = self.running.pop(run_id, None)
+		if run is None:
+			return
+		finished_at = time.time()
+		run = run._replace(finished_at=finished_at, returncode=returncode)
+		self.history.append(run)
+		self._publish(run)
+		speed = f"{run.realtime_factor:.2f}x realtime" if run.realtime_factor is not None else "no progress"
+		logger.info(
+			f"ffmpeg {run.operation} exited with {returncode} after {finished_at - run.started_at:.2f}s, {speed}"
+		)
+
+	async def follow(self, run_id: int, reader: asyncio.StreamReader) -> None:
+		"""Parse the ``-progress`` output of a run as it is written, until the process closes it."""
+		fields: dict[str, str] = {}
+		while line := await reader.readline():
+			key, separator, value = line.decode(errors="replace").strip().partition("=")
+			if not separator:
+				continue
+			fields[key] = value
+			if key == "progress":
+				self.update(run_id, ProgressSample.from_fields(fields))
+				fields = {}
+
+	def snapshot(self) -> dict[str, Any]:
+		"""Running and recently finished runs, with the mean real-time factor of each operation."""
+		operations: dict[str, list[float]] = {}
+		for run in self.history:
+			if run.returncode == 0 and run.realtime_factor is not None:
+				operations.setdefault(run.operation, []).append(run.realtime_factor)
+		return {
+			"node": socket.gethostname(),
+			"pid": os.getpid(),
+			"running": [run.to_dict() for run in self.running.values()],
+			"recent": [run.to_dict() for run in reversed(self.history)],
+			"operations": {
+				operation: {"runs": len(factors), "mean_realtime_factor": sum(factors) / len(factors)}
+				for operation, factors in operations.items()
+			},
+		}
+
+	async def updates(self, heartbeat: float) -> AsyncGenerator[FfmpegRun | None, None]:
+		"""
+		Follow every update from now on, after the runs that are running already.
+
+		:param heartbeat: seconds without an update after which None is yielded, to keep a connection alive.
+		:return: the runs as they change, None when nothing changed for ``heartbeat`` seconds.
+		"""
+		queue: asyncio.Queue[FfmpegRun] = asyncio.Queue(SUBSCRIBER_BACKLOG)
+		self._subscribers.add(queue)
+		try:
+			for run in list(self.running.values()):
+				yield run
+			while True:
+				try:
+					yield await asyncio.wait_for(queue.get(), heartbeat)
+				except TimeoutError:
+					yield None
+		finally:
+			self._subscribers.discard(queue)
+
+	def _publish(self, run: FfmpegRun) -> None:
+		for queue in self._subscribers:
+			if queue.full():
+				queue.get_nowait()
+			queue.put_nowait(run)
+
+
+def _number(value: str | None) -> float | None:
+	try:
+		return float(value) if value is not None else None
+	except ValueError:
+		# ffmpeg writes N/A before it has a figure.
+		return None
+
+
+def _integer(value: str | None) -> int | None:
+	number = _number(value)
+	return int(number) if number is not None else None
+
+
+ffmpeg_progress = ProgressTracker(settings.FFMPEG_PROGRESS_HISTORY)
@@ -1,10 +1,264 @@
-from fastapi import UploadFile
+import hashlib
+import os
+from typing import Any, AsyncGenerator, AsyncIterator, NamedTuple
+
+import aiofiles
+from aiofiles import tempfile
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+from videoverse_backend.core.errors import FileTooLargeError, MalformedUploadError, UnsupportedMediaError
+from videoverse_backend.settings import settings
+
+ISO_BMFF_BOX_TYPES = {b"ftyp", b"moov", b"mdat", b"free", b"wide", b"skip", b"pnot"}
+MPEG_TS_PACKET_SIZE = 188
+# Leading bytes of an upload needed to tell every known container, MPEG-TS takes two sync bytes.
+SNIFF_HEADER_SIZE = MPEG_TS_PACKET_SIZE + 1
+# Room for the boundaries and part headers around the file of a multipart upload.
+MULTIPART_OVERHEAD = 16 * 1024
+# Leading bytes fetched to tell whether a stored file can be streamed to ffmpeg.
+STREAM_HEADER_SIZE = 64 * 1024
+# Containers ffmpeg reads front to back without seeking, MP4 is streamable only with its index first.
+SEQUENTIAL_CONTAINERS = {"matroska", "flv", "mpeg", "mpegts"}
+
+
+class IngestedFile(NamedTuple):
+	path: str
+	size: int
+	sha256: str
+	container: str
 
 
 class FileService:
 	@staticmethod
-	def get_file_size(file: UploadFile) -> float:
-		file.file.seek(0, 2)
-		file_size = file.file.tell() / (1024 * 1024)
-		file.file.seek(0)
-		return file_size
+	def sniff_container(header: bytes) -> str | None:
+		"""
+		Identify the video container from the leading bytes of a file.
+
+		:param header: first bytes of the file, at least 12 are needed for a reliable answer and 189 for MPEG-TS.
+		:return: container name, or None when the bytes are not a known video container.
+		"""
+		if len(header) >= 8 and header[4:8] in ISO_BMFF_BOX_TYPES:
+			return "mp4"
+		if header.startswith(b"\x1a\x45\xdf\xa3"):
+			return "matroska"
+		if header.startswith(b"RIFF") and header[8:12] == b"AVI ":
+			return "avi"
+		if header.startswith(b"FLV"):
+			return "flv"
+		if header.startswith(b"\x00\x00\x01\xba"):
+			return "mpeg"
+		if header.startswith(b"\x30\x26\xb2\x75\x8e\x66\xcf\x11"):
+			return "asf"
+		# A lone 0x47 is too common a first byte, MPEG-TS needs the sync byte of the next packet as well.
+		if len(header) > MPEG_TS_PACKET_SIZE and header[0] == header[MPEG_TS_PACKET_SIZE] == 0x47:
+			return "mpegts"
+		return None
+
+	@staticmethod
+	def is_streamable(header: bytes) -> bool:
+		"""
+		Tell from the leading bytes of a file whether ffmpeg can read it from a pipe.
+
+		An MP4 is only readable without seeking when its ``moov`` box comes before the media data,
+		as written by ``-movflags faststart`` or by a fragmenting muxer.
+
+		:param header: first bytes of the file, the boxes before ``moov`` or ``mdat`` must fit in them.
+		:return: whether the file can be streamed, False when the header does not tell.
+		"""
+		container = FileService.sniff_container(header)
+		if container != "mp4":
+			return container in SEQUENTIAL_CONTAINERS
+		offset = 0
+		while offset + 8 <= len(header):
+			box_type = header[offset + 4 : offset + 8]
+			if box_type == b"moov":
+				return True
+			if box_type == b"mdat":
+				return False
+			box_size = int.from_bytes(header[offset : offset + 4], "big")
+			if box_size == 1 and offset + 16 <= len(header):
+				box_size = int.from_bytes(header[offset + 8 : offset + 16], "big")
+			if box_size < 8:
+				return False
+			offset += box_size
+		return False
+
+	@staticmethod
+	async def read_multipart_file(content_type: str, body: AsyncIterator[bytes]) -> tuple[str, AsyncIterator[bytes]]:
+		"""
+		Find the ``file`` field of a ``multipart/form-data`` body while it arrives.
+
+		The body is only read up to the headers of the file here. Its content is read as the returned
+		chunks are consumed, so the caller can stop the upload at any point, and nothing after the file
+		is read at all.
+
+		:param content_type: Content-Type header of the request, with the boundary of the parts.
+		:param body: incoming request body.
+		:return: name of the uploaded file and the chunks of its content.
+		"""
+		events = FileService._multipart_events(content_type, body)
+		async for event, value in events:
+			if event != "headers":
+				continue
+			_, options = parse_options_header(value.get(b"content-disposition", b""))
+			if options.get(b"name") == b"file" and b"filename" in options:
+				return options[b"filename"].decode(), FileService._part_content(events)
+		raise MalformedUploadError("The request has no file field")
+
+	@staticmethod
+	async def _multipart_events(
+		content_type: str,
+		body: AsyncIterator[bytes],
+	) -> AsyncGenerator[tuple[str, Any], None]:
+		"""Parse a multipart body chunk by chunk, yielding the headers, data and end of each part."""
+		mime_type, options = parse_options_header(content_type)
+		if mime_type != b"multipart/form-data" or not options.get(b"boundary"):
+			raise MalformedUploadError("The request must be multipart/form-data")
+
+		events: list[tuple[str, Any]] = []
+		headers: dict[bytes, bytes] = {}
+		field = bytearray()
+		value = bytearray()
+
+		def on_header_end() -> None:
+			headers[bytes(field).lower()] = bytes(value)
+			field.clear()
+			value.clear()
+
+		def on_headers_finished() -> None:
+			events.append(("headers", dict(headers)))
+			headers.clear()
+
+		parser = MultipartParser(
+			options[b"boundary"],
+			{
+				"on_header_field": lambda data, start, end: field.extend(data[start:end]),
+				"on_header_value": lambda data, start, end: value.extend(data[start:end]),
+				"on_header_end": on_header_end,
+				"on_headers_finished": on_headers_finished,
+				"on_part_data": lambda data, start, end: events.append(("data", bytes(data[start:end]))),
+				"on_part_end": lambda: events.append(("end", None)),
+			},
+		)
+		async for chunk in body:
+			try:
+				parser.write(chunk)
+			except MultipartParseError as exception:
+				raise MalformedUploadError("The multipart body is malformed") from exception
+			for event in events:
+				yield event
+			events.clear()
+
+	@staticmethod
+	async def _part_content(events: AsyncGenerator[tuple[str, Any], None]) -> AsyncGenerator[bytes, None]:
+		"""Data of the part whose headers were just read, the rest of the body is left unread."""
+		try:
+			async for event, value in events:
+				if event == "data":
+					yield value
+				elif event == "end":
+					return
+			raise MalformedUploadError("The request body ended before the file")
+		finally:
+			await events.aclose()
+
+	@staticmethod
+	async def stream_to_disk(chunks: AsyncIterator[bytes], max_size: int) -> IngestedFile:
+		"""
+		Copy an upload to a scratch file as its bytes arrive.
+
+		The size limit and the container check are enforced chunk by chunk, the container as soon as
+		enough leading bytes came in to tell it, and the SHA-256 of the content is computed in the same
+		pass. Memory use stays at one chunk whatever the size of the upload, and a rejected upload is
+		not read any further. The scratch file is removed when the upload is rejected.
+
+		:param chunks: content of the uploaded file.
+		:param max_size: maximum accepted size in bytes.
+		:return: location, size in bytes, checksum and container of the stored file.
+		"""
+		digest = hashlib.sha256()
+		size = 0
+		header = b""
+		container: str | None = None
+		async with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+			temp_file_path = str(temp_file.name)
+			try:
+				async for chunk in chunks:
+					size += len(chunk)
+					if size > max_size:
+						raise FileTooLargeError(f"File size must be less than {max_size} bytes")
+					if container is None:
+						header += chunk
+						if len(header) < SNIFF_HEADER_SIZE:
+							continue
+						container = FileService._sniff_upload(header)
+						chunk = header
+					digest.update(chunk)
+					await temp_file.write(chunk)
+				if container is None:
+					# The whole upload is shorter than the header needed to sniff it.
+					container = FileService._sniff_upload(header)
+					digest.update(header)
+					await temp_file.write(header)
+			except BaseException:
+				os.unlink(temp_file_path)
+				raise
+
+		return IngestedFile(path=temp_file_path, size=size, sha256=digest.hexdigest(), container=container)
+
+	@staticmethod
+	def _sniff_upload(header: bytes) -> str:
+		if not header:
+			raise UnsupportedMediaError("The uploaded file is empty")
+		container = FileService.sniff_container(header)
+		if container is None:
+			raise UnsupportedMediaError("The uploaded file is not a supported video container")
+		return container
+
+	@staticmethod
+	async def inspect_file(file_path: str) -> IngestedFile:
+		"""
+		Sniff the container and compute the checksum of a file that is already on disk.
+
+		:param file_path: file to inspect.
+		:return: location, size in bytes, checksum and container of the file.
+		"""
+		digest = hashlib.sha256()
+		size = 0
+		container: str | None = None
+		async with aiofiles.open(file_path, "rb") as stored_file:
+			while chunk := await stored_file.read(settings.UPLOAD_CHUNK_SIZE):
+				if container is None:
+					container = FileService.sniff_container(chunk)
+					if container is None:
+						raise UnsupportedMediaError("The uploaded file is not a supported video container")
+				size += len(chunk)
+				digest.update(chunk)
+		if container is None:
+			raise UnsupportedMediaError("The uploaded file is empty")
+
+		return IngestedFile(path=file_path, size=size, sha256=digest.hexdigest(), container=container)
+
+	@staticmethod
+	async def write_chunks_at(file_path: str, offset: int, chunks: AsyncIterator[bytes], max_size: int) -> None:
+		"""
+		Write a stream of chunks into an existing file starting at the given offset.
+
+		Anything stored after the offset is discarded first, so the size of the file is always
+		the offset up to which the content is known to be valid, even when the stream breaks.
+
+		:param file_path: file to write into.
+		:param offset: position of the first byte of the stream.
+		:param chunks: incoming bytes.
+		:param max_size: size the file must not grow beyond.
+		"""
+		async with aiofiles.open(file_path, "r+b") as part_file:
+			await part_file.truncate(offset)
+			await part_file.seek(offset)
+			position = offset
+			async for chunk in chunks:
+				if position + len(chunk) > max_size:
+					raise FileTooLargeError(f"File size must be less than {max_size} bytes")
+				await part_file.write(chunk)
+				position += len(chunk)
@@ -0,0 +1,221 @@
+import asyncio
+from contextlib import suppress
+from datetime import UTC, datetime, timedelta
+from typing import Any, Awaitable, Callable
+from uuid import UUID
+
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from videoverse_backend.core import JobKind, JobStatus, logger
+from videoverse_backend.core.errors import JobError, JobQueueFullError
+from videoverse_backend.dao import JobDAO
+from videoverse_backend.db import JobModel
+from videoverse_backend.settings import settings
+
+ReportProgress = Callable[[float], Awaitable[None]]
+# Runs a job from its payload and returns the id of the video it produced or changed, or the ids of the videos.
+JobHandler = Callable[[dict[str, Any], ReportProgress], Awaitable[UUID | list[UUID] | None]]
+
+# A running job is given up on once this many heartbeats in a row are missing.
+MISSED_HEARTBEATS = 4
+
+
+class JobQueue:
+	"""
+	Runs long video operations in the background, backed by the job table.
+
+	Submitting stores a queued job and wakes a worker. Workers claim jobs from the table rather than from
+	memory, so jobs queued before a restart or by another server process are picked up as well. While a
+	job runs its worker refreshes a heartbeat; a running job whose heartbeat stops because its process died
+	is marked failed instead of being run again, since a half-applied in-place trim must not be repeated.
+	A job past its deadline is failed and a cancelled one is stopped, killing its ffmpeg processes.
+	"""
+
+	def __init__(self, workers: int, max_depth: int, poll_interval: float, heartbeat_interval: float) -> None:
+		self.workers = workers
+		self.max_depth = max_depth
+		self.poll_interval = poll_interval
+		self.heartbeat_interval = heartbeat_interval
+		self._handlers: dict[str, JobHandler] = {}
+		self._tasks: list[asyncio.Task[None]] = []
+		# Jobs running in this process, to stop one as soon as it is cancelled.
+		self._running: dict[UUID, asyncio.Task[UUID | list[UUID] | None]] = {}
+		self._wakeup: asyncio.Event | None = None
+
+	def register(self, kind: JobKind, handler: JobHandler) -> None:
+		self._handlers[kind.value] = handler
+
+	async def submit(
+		self,
+		kind: JobKind,
+		payload: dict[str, Any],
+		deadline_at: datetime | None = None,
+		video_id: UUID | None = None,
+	) -> JobModel:
+		"""
+		Queue a job for the workers.
+
+		A job submitted for a ``video_id`` is queued only when no job of the same kind is queued or running
+		for that video, the unfinished job is returned instead. A unique index on the table settles
+		submissions that race each other, so exactly one job is stored for them.
+
+		:param kind: operation to run, a handler must be registered for it.
+		:param payload: JSON-serialisable arguments passed to the handler.
+		:param deadline_at: naive UTC time after which the job is failed instead of finished.
+		:param video_id: video the job works on, when a second job for it would only repeat the work.
+		:raises JobQueueFullError: the queue already holds ``max_depth`` jobs.
+		:return: the stored job.
+		"""
+		if video_id is not None and (active := await JobDAO().get_active(kind, video_id)):  # type: ignore
+			return active
+		if await JobDAO().count_by_status(JobStatus.QUEUED) >= self.max_depth:  # type: ignore
+			raise JobQueueFullError(f"{self.max_depth} jobs are already queued")
+		try:
+			job = await JobDAO().create(  # type: ignore
+				{
+					"kind": kind.value,
+					"payload": payload,
+					"status": JobStatus.QUEUED.value,
+					"deadline_at": deadline_at,
+					"video_id": video_id,
+				}
+			)
+		except IntegrityError:
+			# Another submission for the video was stored first, unless that job finished in the meantime.
+			active = await JobDAO().get_active(kind, video_id)  # type: ignore
+			if active is None:
+				raise
+			return active
+		if self._wakeup is not None:
+			self._wakeup.set()
+		return job
+
+	def cancel(self, job_id: UUID) -> None:
+		"""Stop a job marked cancelled if it runs in this process, other processes notice on their heartbeat."""
+		execution = self._running.get(job_id)
+		if execution is not None:
+			execution.cancel()
+
+	def start(self) -> None:
+		if self._tasks:
+			return
+		self._wakeup = asyncio.Event()
+		self._tasks = [asyncio.create_task(self._work(), name=f"job-worker-{index}") for index in range(self.workers)]
+		logger.info(f"Started {self.workers} job workers")
+
+	async def stop(self) -> None:
+		for task in self._tasks:
+			task.cancel()
+		await asyncio.gather(*self._tasks, return_exceptions=True)
+		self._tasks = []
+		self._wakeup = None
+
+	async def _work(self) -> None:
+		while True:
+			try:
+				job = await self._claim()
+			except SQLAlchemyError as exception:
+				logger.error(f"Could not claim a job: {exception}")
+				job = None
+			if job is None:
+				with suppress(TimeoutError):
+					await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)  # type: ignore
+				continue
+			await self._run(job)
+
+	async def _claim(self) -> JobModel | None:
+		self._wakeup.clear()  # type: ignore
+		now = JobQueue._now()
+		stale_before = now - timedelta(seconds=self.heartbeat_interval * MISSED_HEARTBEATS)
+		if await JobDAO().fail_stale(stale_before, "The worker running this job stopped"):  # type: ignore
+			logger.warning("Marked jobs of a stopped worker as failed")
+		return await JobDAO().claim_next(now)  # type: ignore
+
+	async def _run(self, job: JobModel) -> None:
+		logger.info(f"Running {job.kind} job {job.id}")
+		# The column is typed as the SQLAlchemy type, the queue works with plain UUIDs.
+		job_id = UUID(str(job.id))
+		execution = asyncio.create_task(self._execute(job))
+		self._running[job_id] = execution
+		heartbeat = asyncio.create_task(self._heartbeat(job_id, execution))
+		try:
+			result = await execution
+		except asyncio.CancelledError:
+			if not asyncio.current_task().cancelling():  # type: ignore
+				# Only the job was cancelled, its status already says so.
+				logger.info(f"{job.kind} job {job.id} was cancelled")
+				return
+			await asyncio.shield(
+				self._finish(job_id, {"status": JobStatus.FAILED.value, "error": "Interrupted by a shutdown"})
+			)
+			raise
+		except Exception as exception:
+			logger.error(f"{job.kind} job {job.id} failed: {exception}")
+			await self._finish(job_id, {"status": JobStatus.FAILED.value, "error": str(exception)})
+		else:
+			outcome: dict[str, Any]
+			if isinstance(result, list):
+				outcome = {"result_video_ids": [str(video_id) for video_id in result]}
+			else:
+				outcome = {"result_video_id": result}
+			await self._finish(job_id, {"status": JobStatus.SUCCEEDED.value, "progress": 1.0, **outcome})
+		finally:
+			heartbeat.cancel()
+			self._running.pop(job_id, None)
+
+	async def _execute(self, job: JobModel) -> UUID | list[UUID] | None:
+		handler = self._handlers.get(job.kind)
+		if handler is None:
+			raise JobError(f"No handler is registered for {job.kind} jobs")
+		timeout = None
+		if job.deadline_at is not None:
+			timeout = (job.deadline_at - JobQueue._now()).total_seconds()
+			if timeout <= 0:
+				raise JobError("The deadline of the job passed before it started")
+
+		async def report_progress(progress: float) -> None:
+			await self._update(job.id, {"progress": progress})  # type: ignore
+
+		try:
+			async with asyncio.timeout(timeout) as deadline:
+				return await handler(job.payload, report_progress)
+		except TimeoutError as exception:
+			if deadline.expired():
+				raise JobError("The job did not finish before its deadline") from exception
+			raise
+
+	async def _heartbeat(self, job_id: UUID, execution: asyncio.Task[Any]) -> None:
+		while True:
+			await asyncio.sleep(self.heartbeat_interval)
+			job = await self._update(job_id, {})
+			if job is not None and job.status == JobStatus.CANCELLED.value:
+				# Cancelled through another server process.
+				execution.cancel()
+
+	async def _update(self, job_id: UUID, values: dict[str, Any]) -> JobModel | None:
+		try:
+			return await JobDAO().update(job_id, {**values, "heartbeat_at": JobQueue._now()})  # type: ignore
+		except SQLAlchemyError as exception:
+			logger.error(f"Could not update job {job_id}: {exception}")
+			return None
+
+	async def _finish(self, job_id: UUID, values: dict[str, Any]) -> None:
+		# A job cancelled or given up on in the meantime keeps that status, whatever its handler made of it.
+		try:
+			if not await JobDAO().finish(job_id, {**values, "heartbeat_at": JobQueue._now()}):  # type: ignore
+				logger.warning(f"Job {job_id} stopped running before it finished, its outcome is not recorded")
+		except SQLAlchemyError as exception:
+			logger.error(f"Could not update job {job_id}: {exception}")
+
+	@staticmethod
+	def _now() -> datetime:
+		# Stored naive, like the rest of the timestamps SQLite keeps.
+		return datetime.now(UTC).replace(tzinfo=None)
+
+
+job_queue = JobQueue(
+	settings.JOB_WORKERS,
+	settings.JOB_QUEUE_DEPTH,
+	settings.JOB_POLL_INTERVAL,
+	settings.JOB_HEARTBEAT_INTERVAL,
+)
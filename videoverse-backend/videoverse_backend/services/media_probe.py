@@ -0,0 +1,292 @@
+import os
+import struct
+from typing import BinaryIO, Iterator, NamedTuple
+
+from videoverse_backend.services.file_service import FileService
+
+# Headers bigger than this are not worth reading in-process, ffprobe handles them instead.
+MAX_HEADER_SIZE = 64 * 1024 * 1024
+
+MP4_CODECS = {
+	b"avc1": "h264",
+	b"avc3": "h264",
+	b"hvc1": "hevc",
+	b"hev1": "hevc",
+	b"av01": "av1",
+	b"vp08": "vp8",
+	b"vp09": "vp9",
+	b"mp4v": "mpeg4",
+	b"jpeg": "mjpeg",
+	b"apch": "prores",
+	b"apcn": "prores",
+	b"apcs": "prores",
+	b"apco": "prores",
+	b"ap4h": "prores",
+}
+
+MATROSKA_CODECS = {
+	"V_MPEG4/ISO/AVC": "h264",
+	"V_MPEGH/ISO/HEVC": "hevc",
+	"V_AV1": "av1",
+	"V_VP8": "vp8",
+	"V_VP9": "vp9",
+	"V_MPEG4/ISO/ASP": "mpeg4",
+	"V_MJPEG": "mjpeg",
+	"V_PRORES": "prores",
+}
+
+EBML_ID = 0x1A45DFA3
+SEGMENT_ID = 0x18538067
+INFO_ID = 0x1549A966
+TRACKS_ID = 0x1654AE6B
+CLUSTER_ID = 0x1F43B675
+TIMECODE_SCALE_ID = 0x2AD7B1
+DURATION_ID = 0x4489
+TRACK_ENTRY_ID = 0xAE
+TRACK_TYPE_ID = 0x83
+CODEC_ID_ID = 0x86
+VIDEO_ID = 0xE0
+PIXEL_WIDTH_ID = 0xB0
+PIXEL_HEIGHT_ID = 0xBA
+MATROSKA_VIDEO_TRACK = 1
+
+
+class MediaInfo(NamedTuple):
+	duration_us: int
+	video_codec: str | None = None
+	width: int | None = None
+	height: int | None = None
+
+	@property
+	def duration(self) -> float:
+		return self.duration_us / 1_000_000
+
+
+class MediaProbe:
+	"""
+	Reads duration, video codec and resolution straight from the container header.
+
+	Only MP4/MOV (``moov/mvhd``) and Matroska/WebM (``Segment/Info`` and ``Segment/Tracks``) are
+	understood. Anything else, or a header that does not carry a duration, returns None so the
+	caller can fall back to ffprobe.
+	"""
+
+	@staticmethod
+	def probe(file_path: str) -> MediaInfo | None:
+		try:
+			with open(file_path, "rb") as media_file:
+				container = FileService.sniff_container(media_file.read(12))
+				if container == "mp4":
+					return MediaProbe._probe_mp4(media_file)
+				if container == "matroska":
+					return MediaProbe._probe_matroska(media_file)
+		except (OSError, ValueError, IndexError, struct.error):
+			return None
+		return None
+
+	@staticmethod
+	def _probe_mp4(media_file: BinaryIO) -> MediaInfo | None:
+		moov = MediaProbe._read_top_level_box(media_file, b"moov")
+		if moov is None:
+			return None
+
+		timescale, duration = 0, 0
+		video_codec, width, height = None, None, None
+		for box_type, start, end in MediaProbe._iter_boxes(moov, 0, len(moov)):
+			if box_type == b"mvhd":
+				if moov[start] == 1:
+					timescale, duration = struct.unpack_from(">IQ", moov, start + 20)
+				else:
+					timescale, duration = struct.unpack_from(">II", moov, start + 12)
+			elif box_type == b"mvex" and not duration:
+				# Fragmented files keep the total duration in mvex/mehd and leave mvhd at zero.
+				mehd = MediaProbe._find_box(moov, start, end, b"mehd")
+				if mehd is not None:
+					fmt = ">Q" if moov[mehd[0]] == 1 else ">I"
+					(duration,) = struct.unpack_from(fmt, moov, mehd[0] + 4)
+			elif box_type == b"trak" and video_codec is None:
+				video_codec, width, height = MediaProbe._parse_mp4_video_track(moov, start, end)
+
+		if not timescale or not duration:
+			return None
+		return MediaInfo(
+			duration_us=duration * 1_000_000 // timescale,
+			video_codec=video_codec,
+			width=width,
+			height=height,
+		)
+
+	@staticmethod
+	def _parse_mp4_video_track(moov: bytes, start: int, end: int) -> tuple[str | None, int | None, int | None]:
+		mdia = MediaProbe._find_box(moov, start, end, b"mdia")
+		if mdia is None:
+			return None, None, None
+		hdlr = MediaProbe._find_box(moov, *mdia, b"hdlr")
+		if hdlr is None or moov[hdlr[0] + 8 : hdlr[0] + 12] != b"vide":
+			return None, None, None
+
+		stsd = None
+		minf = MediaProbe._find_box(moov, *mdia, b"minf")
+		stbl = MediaProbe._find_box(moov, *minf, b"stbl") if minf else None
+		stsd = MediaProbe._find_box(moov, *stbl, b"stsd") if stbl else None
+		if stsd is None:
+			return None, None, None
+
+		# stsd: version/flags, entry count, then the first VisualSampleEntry.
+		entry_type = moov[stsd[0] + 12 : stsd[0] + 16]
+		width, height = struct.unpack_from(">HH", moov, stsd[0] + 8 + 8 + 24)
+		return MP4_CODECS.get(entry_type, entry_type.decode("latin-1").strip()), width, height
+
+	@staticmethod
+	def _read_top_level_box(media_file: BinaryIO, wanted: bytes) -> bytes | None:
+		file_size = os.fstat(media_file.fileno()).st_size
+		offset = 0
+		while offset + 8 <= file_size:
+			media_file.seek(offset)
+			header = media_file.read(16)
+			size, box_type = struct.unpack_from(">I4s", header)
+			header_size = 8
+			if size == 1:
+				(size,) = struct.unpack_from(">Q", header, 8)
+				header_size = 16
+			elif size == 0:
+				size = file_size - offset
+			if size < header_size:
+				return None
+			if box_type == wanted:
+				if size > MAX_HEADER_SIZE:
+					return None
+				media_file.seek(offset + header_size)
+				return media_file.read(size - header_size)
+			offset += size
+		return None
+
+	@staticmethod
+	def _iter_boxes(data: bytes, start: int, end: int) -> Iterator[tuple[bytes, int, int]]:
+		offset = start
+		while offset + 8 <= end:
+			size, box_type = struct.unpack_from(">I4s", data, offset)
+			header_size = 8
+			if size == 1:
+				(size,) = struct.unpack_from(">Q", data, offset + 8)
+				header_size = 16
+			elif size == 0:
+				size = end - offset
+			if size < header_size or offset + size > end:
+				raise ValueError(f"Truncated {box_type!r} box")
+			yield box_type, offset + header_size, offset + size
+			offset += size
+
+	@staticmethod
+	def _find_box(data: bytes, start: int, end: int, wanted: bytes) -> tuple[int, int] | None:
+		for box_type, box_start, box_end in MediaProbe._iter_boxes(data, start, end):
+			if box_type == wanted:
+				return box_start, box_end
+		return None
+
+	@staticmethod
+	def _probe_matroska(media_file: BinaryIO) -> MediaInfo | None:
+		file_size = os.fstat(media_file.fileno()).st_size
+		element_id, size, position = MediaProbe._read_element_header_at(media_file, 0)
+		if element_id != EBML_ID or size is None:
+			return None
+		element_id, size, segment_start = MediaProbe._read_element_header_at(media_file, position + size)
+		if element_id != SEGMENT_ID:
+			return None
+		segment_end = file_size if size is None else min(segment_start + size, file_size)
+
+		info: bytes | None = None
+		tracks: bytes | None = None
+		position = segment_start
+		while position < segment_end and (info is None or tracks is None):
+			element_id, size, body_start = MediaProbe._read_element_header_at(media_file, position)
+			if element_id == CLUSTER_ID or size is None:
+				break
+			if element_id in (INFO_ID, TRACKS_ID) and size <= MAX_HEADER_SIZE:
+				media_file.seek(body_start)
+				if element_id == INFO_ID:
+					info = media_file.read(size)
+				else:
+					tracks = media_file.read(size)
+			position = body_start + size
+
+		if info is None:
+			return None
+		timecode_scale, duration = 1_000_000, None
+		for element_id, start, end in MediaProbe._iter_elements(info, 0, len(info)):
+			if element_id == TIMECODE_SCALE_ID:
+				timecode_scale = int.from_bytes(info[start:end], "big")
+			elif element_id == DURATION_ID:
+				(duration,) = struct.unpack(">f" if end - start == 4 else ">d", info[start:end])
+		if not duration:
+			return None
+
+		video_codec, width, height = MediaProbe._parse_matroska_video_track(tracks) if tracks else (None, None, None)
+		return MediaInfo(
+			duration_us=round(duration * timecode_scale / 1000),
+			video_codec=video_codec,
+			width=width,
+			height=height,
+		)
+
+	@staticmethod
+	def _parse_matroska_video_track(tracks: bytes) -> tuple[str | None, int | None, int | None]:
+		for element_id, start, end in MediaProbe._iter_elements(tracks, 0, len(tracks)):
+			if element_id != TRACK_ENTRY_ID:
+				continue
+			track_type, codec_id, width, height = None, None, None, None
+			for child_id, child_start, child_end in MediaProbe._iter_elements(tracks, start, end):
+				if child_id == TRACK_TYPE_ID:
+					track_type = int.from_bytes(tracks[child_start:child_end], "big")
+				elif child_id == CODEC_ID_ID:
+					codec_id = tracks[child_start:child_end].rstrip(b"\x00").decode("ascii")
+				elif child_id == VIDEO_ID:
+					for video_id, video_start, video_end in MediaProbe._iter_elements(tracks, child_start, child_end):
+						if video_id == PIXEL_WIDTH_ID:
+							width = int.from_bytes(tracks[video_start:video_end], "big")
+						elif video_id == PIXEL_HEIGHT_ID:
+							height = int.from_bytes(tracks[video_start:video_end], "big")
+			if track_type == MATROSKA_VIDEO_TRACK:
+				return MATROSKA_CODECS.get(codec_id or "", codec_id), width, height
+		return None, None, None
+
+	@staticmethod
+	def _read_element_header_at(media_file: BinaryIO, position: int) -> tuple[int, int | None, int]:
+		media_file.seek(position)
+		window = media_file.read(12)
+		element_id, size, header_size = MediaProbe._parse_element_header(window, 0)
+		return element_id, size, position + header_size
+
+	@staticmethod
+	def _iter_elements(data: bytes, start: int, end: int) -> Iterator[tuple[int, int, int]]:
+		offset = start
+		while offset < end:
+			element_id, size, header_size = MediaProbe._parse_element_header(data, offset)
+			body_start = offset + header_size
+			body_end = end if size is None else body_start + size
+			if body_end > end:
+				raise ValueError(f"Truncated element {element_id:#x}")
+			yield element_id, body_start, body_end
+			offset = body_end
+
+	@staticmethod
+	def _parse_element_header(data: bytes, offset: int) -> tuple[int, int | None, int]:
+		"""
+		Decode an EBML element ID and data size.
+
+		:return: element ID (marker bit kept, as in the specification), data size or None when the size is
+			unknown, and the number of header bytes.
+		"""
+		id_length = MediaProbe._vint_length(data[offset])
+		element_id = int.from_bytes(data[offset : offset + id_length], "big")
+		size_length = MediaProbe._vint_length(data[offset + id_length])
+		raw_size = int.from_bytes(data[offset + id_length : offset + id_length + size_length], "big")
+		value_mask = (1 << (7 * size_length)) - 1
+		size = raw_size & value_mask
+		return element_id, None if size == value_mask else size, id_length + size_length
+
+	@staticmethod
+	def _vint_length(first_byte: int) -> int:
+		if not first_byte:
+			raise ValueError("Invalid EBML variable length integer")
+		return 9 - first_byte.bit_length()
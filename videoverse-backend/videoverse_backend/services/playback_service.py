@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import posixpath
+import re
+import secrets
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import aiofiles
+
+from videoverse_backend.core import logger
+from videoverse_backend.services.storage import AsyncStorage, SignedUrl, storage
+from videoverse_backend.services.video_service import HLS_MASTER_PLAYLIST
+from videoverse_backend.settings import settings
+
+HLS_PLAYLIST_TYPE = "application/vnd.apple.mpegurl"
+# The init segment is the only file a media playlist names in a tag rather than on a line of its own.
+MAP_URI = re.compile(r'^(#EXT-X-MAP:.*URI=")([^"]+)(".*)$')
+
+
+class PlaybackService:
+	"""
+	Signed HLS playback of packaged videos.
+
+	A manifest URL carries an HMAC over the video and the expiry time in its path rather than in its
+	query, so the playlists the master playlist names relatively inherit the signature. Playlists are
+	served by the API and point every segment at a signed URL of the storage, which is valid until the
+	manifest URL expires; the segments themselves are fetched from the store, or a CDN in front of it,
+	and never pass through the API.
+	"""
+
+	def __init__(self, storage: AsyncStorage, base_url: str, signing_key: str) -> None:
+		self.storage = storage
+		self.base_url = base_url.rstrip("/")
+		self.signing_key = signing_key.encode()
+
+	def manifest_url(self, video_id: Any, expiration: timedelta) -> SignedUrl:
+		expires = int((datetime.now(UTC) + expiration).timestamp())
+		expires_at = datetime.fromtimestamp(expires, UTC)
+		url = f"{self.base_url}/{video_id}/{expires}/{self._sign(video_id, expires)}/{HLS_MASTER_PLAYLIST}"
+		return SignedUrl(url=url, expires_at=expires_at)
+
+	def verify_signature(self, video_id: Any, expires: int, signature: str) -> bool:
+		if expires < time.time():
+			return False
+		return hmac.compare_digest(self._sign(video_id, expires), signature)
+
+	@staticmethod
+	def resolve_playlist(manifest_path: str, playlist_path: str) -> str | None:
+		"""
+		Map a playlist path relative to a master playlist to its storage path.
+
+		:return: the storage path, None when it is not a playlist of the package.
+		"""
+		package_dir = posixpath.dirname(manifest_path)
+		storage_path = posixpath.normpath(posixpath.join(package_dir, playlist_path))
+		if not storage_path.startswith(f"{package_dir}/") or not storage_path.endswith(".m3u8"):
+			return None
+		return storage_path
+
+	async def upload_package(self, local_dir: str, package_dir: str) -> str:
+		"""
+		Store every file of a package produced in a local directory, concurrently on the storage pool.
+
+		:param local_dir: directory with the master playlist and the rendition directories.
+		:param package_dir: storage directory to store the package under.
+		:return: storage path of the master playlist.
+		"""
+		files = PlaybackService._package_files(local_dir)
+		# Every upload settles before a failure is raised, so no file lands after the package is deleted.
+		results = await asyncio.gather(
+			*(self.storage.upload_file(f"{package_dir}/{name}", file_path) for file_path, name in files),
+			return_exceptions=True,
+		)
+		for result in results:
+			if isinstance(result, BaseException):
+				raise result
+		logger.info(f"Stored {len(files)} files of the package {package_dir}")
+		return f"{package_dir}/{HLS_MASTER_PLAYLIST}"
+
+	def delete_package(self, local_dir: str, package_dir: str) -> asyncio.Future[list[None]]:
+		"""
+		Remove a package stored by :meth:`upload_package`, for one that is not going to be played.
+
+		The files are named and their deletions started before this returns, so the local directory may be
+		removed while they run.
+
+		:param local_dir: directory the package was produced in, it names the files to remove.
+		:param package_dir: storage directory the package was stored under.
+		:return: the deletions.
+		"""
+		files = PlaybackService._package_files(local_dir)
+		logger.info(f"Deleting the package {package_dir}")
+		return asyncio.gather(*(self.storage.delete(f"{package_dir}/{name}") for _, name in files))
+
+	@staticmethod
+	def _package_files(local_dir: str) -> list[tuple[str, str]]:
+		"""Local path and path within the package of every file of a package produced in a directory."""
+		files = []
+		for root, _, names in os.walk(local_dir):
+			for name in names:
+				file_path = os.path.join(root, name)
+				files.append((file_path, os.path.relpath(file_path, local_dir).replace(os.sep, "/")))
+		return files
+
+	async def render_playlist(self, storage_path: str, expires: int) -> str:
+		"""
+		Read a stored playlist and point its segments at signed URLs of the storage.
+
+		Playlists are left relative, they are fetched through the same signed path as the manifest.
+
+		:param storage_path: playlist to serve.
+		:param expires: unix time the segment URLs stay valid until.
+		:raises FileNotFoundError: nothing is stored under the path.
+		:return: the playlist to hand to the player.
+		"""
+		async with self.storage.open(storage_path) as local_path, aiofiles.open(local_path) as playlist:
+			lines = (await playlist.read()).splitlines()
+
+		base_dir = posixpath.dirname(storage_path)
+		uris: dict[int, str] = {}
+		for index, line in enumerate(lines):
+			map_tag = MAP_URI.match(line)
+			if map_tag:
+				uris[index] = map_tag.group(2)
+			elif line and not line.startswith("#") and not line.endswith(".m3u8"):
+				uris[index] = line
+
+		expiration = timedelta(seconds=max(expires - time.time(), 0))
+		signed_urls = await asyncio.gather(
+			*(self.storage.get_signed_url(posixpath.join(base_dir, uri), expiration) for uri in uris.values()),
+		)
+		for index, signed_url in zip(uris, signed_urls):
+			map_tag = MAP_URI.match(lines[index])
+			lines[index] = f"{map_tag.group(1)}{signed_url.url}{map_tag.group(3)}" if map_tag else signed_url.url
+		return "\n".join(lines) + "\n"
+
+	def _sign(self, video_id: Any, expires: int) -> str:
+		return hmac.new(self.signing_key, f"{video_id}\n{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def _playback_signing_key() -> str:
+	if settings.STORAGE_SIGNING_KEY:
+		return settings.STORAGE_SIGNING_KEY
+	logger.warning("STORAGE_SIGNING_KEY is not set, HLS manifest URLs will only be valid for this process")
+	return secrets.token_hex(32)
+
+
+playback_service = PlaybackService(storage, settings.PLAYBACK_BASE_URL, _playback_signing_key())
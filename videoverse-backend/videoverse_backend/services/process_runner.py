@@ -0,0 +1,221 @@
+import asyncio
+import os
+import signal
+import subprocess
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, NamedTuple
+
+from videoverse_backend.core import logger
+from videoverse_backend.services.cpu_scheduler import CpuScheduler, WorkClass
+from videoverse_backend.services.ffmpeg_progress import ProgressTracker
+
+# Seconds the progress of a run may still be read after its process exited.
+PROGRESS_DRAIN_TIMEOUT = 1.0
+
+
+class ProcessResult(NamedTuple):
+	returncode: int
+	stdout: bytes
+	stderr: bytes
+
+
+class ProcessRunner:
+	"""
+	Runs external programs on the event loop without blocking it.
+
+	At most ``max_processes`` children run at the same time, the rest wait for a slot. With a
+	``scheduler`` the children are admitted against its core budget instead and get a ``-threads``
+	limit to match. Every child is started in its own process group so that a timeout or a cancelled
+	request can kill it together with anything it spawned. Output too large to capture is read as it
+	is produced through :meth:`stream`. With a ``progress`` tracker the children, which must be ffmpeg,
+	report their progress to it through ``-progress`` on a pipe of their own.
+	"""
+
+	def __init__(
+		self,
+		max_processes: int,
+		timeout: float,
+		scheduler: CpuScheduler | None = None,
+		progress: ProgressTracker | None = None,
+	) -> None:
+		self.max_processes = max_processes
+		self.timeout = timeout
+		self.scheduler = scheduler
+		self.progress = progress
+		self._semaphore = asyncio.Semaphore(max_processes)
+
+	async def run(
+		self,
+		command: list[str],
+		timeout: float | None = None,
+		work_class: WorkClass = WorkClass.ENCODE,
+		operation: str = "run",
+	) -> ProcessResult:
+		"""
+		Run a command and capture its output.
+
+		:param command: program and arguments.
+		:param timeout: seconds the process may run, defaults to the runner timeout.
+		:param work_class: kind of work for the scheduler, ignored without one.
+		:param operation: name the progress of the process is reported under.
+		:raises subprocess.CalledProcessError: the process exited with a non-zero status, stderr is attached.
+		:raises subprocess.TimeoutExpired: the process ran out of time and was killed.
+		:return: exit status and captured output.
+		"""
+		async with (
+			self._slot(command, work_class) as admitted_command,
+			self._spawn(admitted_command, work_class, operation) as process,
+		):
+			return await self._run(process, admitted_command, timeout or self.timeout)
+
+	async def stream(
+		self,
+		command: list[str],
+		chunk_size: int,
+		timeout: float | None = None,
+		work_class: WorkClass = WorkClass.ENCODE,
+		operation: str = "stream",
+	) -> AsyncIterator[bytes]:
+		"""
+		Run a command and yield its standard output while it runs.
+
+		The exit status is checked before the iteration ends, so a consumer that stores the output
+		only once the stream is exhausted never keeps the output of a failed process. Closing the
+		iteration early kills the process.
+
+		:param command: program and arguments.
+		:param chunk_size: size of the yielded chunks, only the last one may be shorter.
+		:param timeout: seconds the process may run, defaults to the runner timeout.
+		:param work_class: kind of work for the scheduler, ignored without one.
+		:param operation: name the progress of the process is reported under.
+		:raises subprocess.CalledProcessError: the process exited with a non-zero status, stderr is attached.
+		:raises subprocess.TimeoutExpired: the process ran out of time and was killed.
+		:return: the output of the process.
+		"""
+		timeout = timeout or self.timeout
+		async with (
+			self._slot(command, work_class) as admitted_command,
+			self._spawn(admitted_command, work_class, operation) as process,
+		):
+			timed_out = False
+
+			def expire() -> None:
+				nonlocal timed_out
+				timed_out = True
+				ProcessRunner._kill_group(process.pid)
+
+			# The consumer decides the pace, so the deadline is enforced by a timer instead of a wait.
+			expiry = asyncio.get_running_loop().call_later(timeout, expire)
+			stderr = asyncio.create_task(process.stderr.read())  # type: ignore
+			try:
+				while chunk := await ProcessRunner._read_chunk(process.stdout, chunk_size):  # type: ignore
+					yield chunk
+				await process.wait()
+			except BaseException:
+				await self._kill(process)
+				raise
+			finally:
+				expiry.cancel()
+				stderr_output = await stderr
+
+			if timed_out:
+				logger.error(f"{command[0]} did not finish in {timeout}s, killed process group {process.pid}")
+				raise subprocess.TimeoutExpired(command, timeout)
+			if process.returncode:
+				raise subprocess.CalledProcessError(process.returncode, admitted_command, None, stderr_output)
+
+	@asynccontextmanager
+	async def _slot(self, command: list[str], work_class: WorkClass) -> AsyncIterator[list[str]]:
+		if self.scheduler is None:
+			async with self._semaphore:
+				yield command
+			return
+		async with self.scheduler.admit(work_class) as threads:
+			yield CpuScheduler.with_threads(command, threads)
+
+	@asynccontextmanager
+	async def _spawn(
+		self,
+		command: list[str],
+		work_class: WorkClass,
+		operation: str,
+	) -> AsyncIterator[asyncio.subprocess.Process]:
+		if self.progress is None:
+			yield await ProcessRunner._create_process(command)
+			return
+
+		read_fd, write_fd = os.pipe()
+		try:
+			# The child writes to its copy of the pipe, ours is closed so the reader sees its end.
+			process = await ProcessRunner._create_process(
+				[command[0], "-progress", f"pipe:{write_fd}", "-nostats", *command[1:]],
+				pass_fds=(write_fd,),
+			)
+		except BaseException:
+			os.close(read_fd)
+			raise
+		finally:
+			os.close(write_fd)
+
+		reader = asyncio.StreamReader()
+		transport, _ = await asyncio.get_running_loop().connect_read_pipe(
+			lambda: asyncio.StreamReaderProtocol(reader),
+			os.fdopen(read_fd, "rb"),
+		)
+		run_id = self.progress.start(operation, work_class.value, process.pid)
+		following = asyncio.create_task(self.progress.follow(run_id, reader))
+		try:
+			yield process
+		finally:
+			try:
+				await asyncio.wait_for(following, PROGRESS_DRAIN_TIMEOUT)
+			except TimeoutError:
+				pass
+			finally:
+				transport.close()
+				self.progress.finish(run_id, process.returncode)
+
+	@staticmethod
+	async def _create_process(command: list[str], pass_fds: tuple[int, ...] = ()) -> asyncio.subprocess.Process:
+		return await asyncio.create_subprocess_exec(
+			*command,
+			stdin=asyncio.subprocess.DEVNULL,
+			stdout=asyncio.subprocess.PIPE,
+			stderr=asyncio.subprocess.PIPE,
+			start_new_session=True,
+			pass_fds=pass_fds,
+		)
+
+	async def _run(self, process: asyncio.subprocess.Process, command: list[str], timeout: float) -> ProcessResult:
+		try:
+			stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+		except TimeoutError:
+			logger.error(f"{command[0]} did not finish in {timeout}s, killing process group {process.pid}")
+			await self._kill(process)
+			raise subprocess.TimeoutExpired(command, timeout)
+		except asyncio.CancelledError:
+			await self._kill(process)
+			raise
+
+		if process.returncode:
+			raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+		return ProcessResult(returncode=process.returncode or 0, stdout=stdout, stderr=stderr)
+
+	@staticmethod
+	async def _read_chunk(reader: asyncio.StreamReader, chunk_size: int) -> bytes:
+		try:
+			return await reader.readexactly(chunk_size)
+		except asyncio.IncompleteReadError as end_of_stream:
+			return end_of_stream.partial
+
+	@staticmethod
+	async def _kill(process: asyncio.subprocess.Process) -> None:
+		ProcessRunner._kill_group(process.pid)
+		await process.wait()
+
+	@staticmethod
+	def _kill_group(pid: int) -> None:
+		try:
+			os.killpg(pid, signal.SIGKILL)
+		except ProcessLookupError:
+			pass
@@ -0,0 +1,71 @@
+"""Storage backends for video files."""
+
+import secrets
+from functools import lru_cache
+
+from videoverse_backend.core import logger
+from videoverse_backend.core.errors import EnvError
+from videoverse_backend.services.storage.async_storage import AsyncStorage
+from videoverse_backend.services.storage.base import ObjectInfo, ObjectWriter, StorageBackend
+from videoverse_backend.services.storage.blob_cache import BlobCache
+from videoverse_backend.services.storage.local_storage import LocalStorage
+from videoverse_backend.services.storage.memory_storage import InMemoryStorage
+from videoverse_backend.services.storage.signed_url_cache import SignedUrl, SignedUrlCache
+from videoverse_backend.settings import Environment, settings
+
+
+@lru_cache
+def get_storage() -> StorageBackend:
+	"""Create the storage backend selected by the STORAGE_BACKEND setting."""
+	if settings.STORAGE_BACKEND == "firebase":
+		from videoverse_backend.services.storage.firebase_storage import FirebaseStorage
+
+		return FirebaseStorage(
+			settings.FIREBASE_CREDENTIALS,
+			settings.FIREBASE_STORAGE_BUCKET,
+			max_connections=settings.STORAGE_MAX_WORKERS,
+			chunk_size=settings.STORAGE_UPLOAD_CHUNK_SIZE,
+		)
+	if settings.STORAGE_BACKEND == "local":
+		signing_key = settings.STORAGE_SIGNING_KEY
+		if not signing_key:
+			if settings.ENVIRONMENT == Environment.PROD:
+				raise EnvError("STORAGE_SIGNING_KEY must be set to use local storage in production")
+			logger.warning("STORAGE_SIGNING_KEY is not set, signed URLs will only be valid for this process")
+			signing_key = secrets.token_hex(32)
+		return LocalStorage(settings.LOCAL_STORAGE_DIR, settings.LOCAL_STORAGE_BASE_URL, signing_key)
+	if settings.STORAGE_BACKEND == "memory":
+		return InMemoryStorage()
+	raise EnvError(f"Unknown STORAGE_BACKEND {settings.STORAGE_BACKEND!r}, use firebase, local or memory")
+
+
+storage = AsyncStorage(
+	get_storage(),
+	settings.STORAGE_MAX_WORKERS,
+	# Every server process keeps its own copies, the budget is split between them.
+	BlobCache(settings.BLOB_CACHE_DIR, settings.BLOB_CACHE_SIZE * 1024 * 1024 // max(settings.WORKERS_COUNT, 1))
+	if settings.BLOB_CACHE_SIZE
+	else None,
+	range_threshold=settings.STORAGE_RANGE_THRESHOLD or None,
+	range_chunk_size=settings.STORAGE_RANGE_CHUNK_SIZE,
+	range_parallelism=settings.STORAGE_RANGE_PARALLELISM,
+	url_cache=(
+		SignedUrlCache(settings.SIGNED_URL_CACHE_SIZE, settings.SIGNED_URL_MIN_REMAINING)
+		if settings.SIGNED_URL_CACHE_SIZE
+		else None
+	),
+)
+
+__all__ = [
+	"AsyncStorage",
+	"BlobCache",
+	"ObjectInfo",
+	"ObjectWriter",
+	"SignedUrl",
+	"SignedUrlCache",
+	"StorageBackend",
+	"LocalStorage",
+	"InMemoryStorage",
+	"get_storage",
+	"storage",
+]
@@ -0,0 +1,286 @@
+import asyncio
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime, timedelta
+from functools import partial
+from typing import Any, AsyncGenerator, AsyncIterable, AsyncIterator, Callable, TypeVar
+
+from videoverse_backend.core.errors import ChecksumMismatchError
+from videoverse_backend.services.storage.base import ObjectInfo, StorageBackend
+from videoverse_backend.services.storage.blob_cache import BlobCache
+from videoverse_backend.services.storage.signed_url_cache import SignedUrl, SignedUrlCache
+
+T = TypeVar("T")
+
+
+class AsyncStorage:
+	"""
+	Awaitable front for a storage backend.
+
+	Backend calls are blocking, so every call is handed to a dedicated pool of ``max_workers``
+	threads instead of the default executor that file I/O and probing share. Transfers issued
+	together, such as the inputs of a merge, run in parallel up to that limit while the event
+	loop keeps serving requests. With a ``cache``, reads through :meth:`open` are served from local
+	disk while the stored version is unchanged and uploads seed the cache with the uploaded file.
+
+	Objects of at least ``range_threshold`` bytes on a backend that serves byte ranges are fetched
+	as ``range_chunk_size`` ranges, up to ``range_parallelism`` at a time per object, written at
+	their offsets into a preallocated file and checked against the MD5 digest of the object.
+	:meth:`iter_chunks` reads the same ranges in order for consumers that stream an object, and
+	:meth:`upload_stream` stores an object as it is produced, without a local copy of it.
+
+	With a ``url_cache``, signed URLs are reused across requests until the object is replaced.
+	"""
+
+	def __init__(
+		self,
+		backend: StorageBackend,
+		max_workers: int,
+		cache: BlobCache | None = None,
+		range_threshold: int | None = None,
+		range_chunk_size: int = 16 * 1024 * 1024,
+		range_parallelism: int = 4,
+		url_cache: SignedUrlCache | None = None,
+	) -> None:
+		self.backend = backend
+		self.max_workers = max_workers
+		self.cache = cache
+		self.range_threshold = range_threshold
+		self.range_chunk_size = range_chunk_size
+		self.range_parallelism = range_parallelism
+		self.url_cache = url_cache
+		self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage")
+
+	async def upload_file(self, storage_path: str, file_path: str) -> None:
+		version = await self._run(self.backend.upload_file, storage_path, file_path)
+		if self.url_cache is not None:
+			self.url_cache.invalidate(storage_path)
+		if self.cache is not None:
+			await self.cache.put(storage_path, version, file_path)
+
+	async def upload_stream(self, storage_path: str, chunks: AsyncIterable[bytes]) -> None:
+		"""
+		Store an object from a stream of chunks, the object is only replaced once the stream ends.
+
+		The next chunk is produced while the previous one is written, so the producer and the
+		upload overlap with at most two chunks in memory.
+
+		:param storage_path: where to store the object.
+		:param chunks: content of the object, an error raised while iterating aborts the upload.
+		"""
+		iterator = aiter(chunks)
+		writer = await self._run(self.backend.open_writer, storage_path)
+		next_chunk: asyncio.Future[bytes | None] = asyncio.ensure_future(anext(iterator, None))
+		try:
+			while (chunk := await next_chunk) is not None:
+				next_chunk = asyncio.ensure_future(anext(iterator, None))
+				await self._run(writer.write, chunk)
+			await self._run(writer.commit)
+		except BaseException:
+			next_chunk.cancel()
+			await asyncio.shield(self._run(writer.abort))
+			raise
+		if self.url_cache is not None:
+			self.url_cache.invalidate(storage_path)
+
+	async def stat(self, storage_path: str) -> ObjectInfo:
+		return await self._run(self.backend.stat, storage_path)
+
+	def is_cached(self, storage_path: str, info: ObjectInfo) -> bool:
+		"""Tell whether :meth:`open` would serve this version of the object from the local cache."""
+		return self.cache is not None and self.cache.contains(storage_path, info.version)
+
+	async def read_range(self, storage_path: str, info: ObjectInfo, start: int, end: int) -> bytes:
+		return await self._run(self._read_range, storage_path, info.version, start, min(end, info.size))
+
+	async def iter_chunks(
+		self,
+		storage_path: str,
+		info: ObjectInfo,
+		start: int = 0,
+		end: int | None = None,
+	) -> AsyncGenerator[bytes, None]:
+		"""
+		Read an object front to back in ``range_chunk_size`` ranges of the version in ``info``.
+
+		Up to ``range_parallelism`` ranges are fetched ahead of the consumer, nothing is fetched
+		before the first chunk is asked for. When the whole object is read, the content is checked
+		against the MD5 digest of the object once the last chunk has been consumed.
+
+		:param storage_path: object to read, the backend must serve byte ranges.
+		:param info: result of a stat of the object.
+		:param start: first byte to read.
+		:param end: byte to stop before, the end of the object by default.
+		:return: the content of the object in order.
+		"""
+		end = info.size if end is None else min(end, info.size)
+		whole_object = start == 0 and end == info.size
+		starts = iter(range(start, end, self.range_chunk_size))
+		pending: deque[asyncio.Future[bytes]] = deque()
+		md5 = hashlib.md5()
+		try:
+			while True:
+				while len(pending) < self.range_parallelism and (chunk_start := next(starts, None)) is not None:
+					chunk_end = min(chunk_start + self.range_chunk_size, end)
+					pending.append(asyncio.ensure_future(self.read_range(storage_path, info, chunk_start, chunk_end)))
+				if not pending:
+					break
+				chunk = await pending.popleft()
+				md5.update(chunk)
+				yield chunk
+		finally:
+			for future in pending:
+				future.cancel()
+		if whole_object and info.md5 is not None and md5.hexdigest() != info.md5:
+			raise ChecksumMismatchError(f"Streamed {storage_path} has MD5 {md5.hexdigest()}, expected {info.md5}")
+
+	@asynccontextmanager
+	async def open(self, storage_path: str) -> AsyncIterator[str]:
+		"""
+		Hold a local, read-only copy of an object.
+
+		:param storage_path: object to read.
+		:return: path of the local copy, it is released when the context exits.
+		"""
+		if self.cache is None:
+			local_path = await self.download_file(os.path.basename(storage_path), storage_path)
+			try:
+				yield local_path
+			finally:
+				os.unlink(local_path)
+			return
+
+		info = await self._run(self.backend.stat, storage_path)
+
+		async def fetch(destination: str) -> None:
+			await self.download_to_filename(storage_path, destination, info)
+
+		async with self.cache.open(storage_path, info.version, fetch) as local_path:
+			yield local_path
+
+	@asynccontextmanager
+	async def open_local(self, storage_path: str, info: ObjectInfo) -> AsyncIterator[str | None]:
+		"""
+		Hold a copy of an object on this node without downloading it.
+
+		:param storage_path: object to read.
+		:param info: result of a stat of the object.
+		:return: the file of a local backend or the cached copy of this version, read-only and valid
+			until the context exits. None when the object has to be read with :meth:`iter_chunks`;
+			backends that cannot serve ranges are downloaded instead.
+		"""
+		local_path = self.backend.local_path(storage_path)
+		if local_path is not None:
+			yield local_path
+		elif not self.backend.supports_ranges:
+			async with self.open(storage_path) as local_path:
+				yield local_path
+		elif self.cache is not None:
+			async with self.cache.hold(storage_path, info.version) as cached_path:
+				yield cached_path
+		else:
+			yield None
+
+	async def download_file(self, file_name: str, storage_path: str, destination_dir: str | None = None) -> str:
+		destination = StorageBackend.local_destination(file_name, destination_dir)
+		await self.download_to_filename(storage_path, destination)
+		return destination
+
+	async def download_to_filename(self, storage_path: str, destination: str, info: ObjectInfo | None = None) -> None:
+		"""
+		Download an object, over several ranged requests when it is large enough.
+
+		:param storage_path: object to download.
+		:param destination: local path to write to.
+		:param info: result of a stat the caller already made, saves a metadata request.
+		"""
+		if self.range_threshold is not None and self.backend.supports_ranges:
+			if info is None:
+				info = await self.stat(storage_path)
+			if info.size >= self.range_threshold:
+				await self._download_ranges(storage_path, destination, info)
+				return
+		await self._run(self.backend.download_to_filename, storage_path, destination)
+
+	async def get_signed_url(self, storage_path: str, expiration: timedelta) -> SignedUrl:
+		"""
+		Return a URL that grants read access to an object, reusing a cached one when it lives long enough.
+
+		:param storage_path: object to share.
+		:param expiration: requested lifetime of the URL.
+		:return: the URL and when it expires.
+		"""
+		if self.url_cache is not None and (signed_url := self.url_cache.get(storage_path, expiration)):
+			return signed_url
+		expires_at = datetime.now(UTC) + expiration
+		url = await self._run(self.backend.get_signed_url, storage_path, expiration)
+		signed_url = SignedUrl(url=url, expires_at=expires_at)
+		if self.url_cache is not None:
+			self.url_cache.put(storage_path, expiration, signed_url)
+		return signed_url
+
+	async def exists(self, storage_path: str) -> bool:
+		return await self._run(self.backend.exists, storage_path)
+
+	async def delete(self, storage_path: str) -> None:
+		await self._run(self.backend.delete, storage_path)
+		if self.url_cache is not None:
+			self.url_cache.invalidate(storage_path)
+
+	async def _download_ranges(self, storage_path: str, destination: str, info: ObjectInfo) -> None:
+		semaphore = asyncio.Semaphore(self.range_parallelism)
+
+		async def fetch_range(start: int) -> None:
+			end = min(start + self.range_chunk_size, info.size)
+			async with semaphore:
+				await self._run(self._write_range, destination, storage_path, info.version, start, end)
+
+		fd = os.open(destination, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+		try:
+			os.posix_fallocate(fd, 0, info.size)
+		except OSError:
+			os.ftruncate(fd, info.size)
+		finally:
+			os.close(fd)
+		# A failed range must not leave others writing. A cancelled download cannot stop the ranges that
+		# are already in the pool, which is why each of them writes through a descriptor of its own.
+		results = await asyncio.gather(
+			*(fetch_range(start) for start in range(0, info.size, self.range_chunk_size)),
+			return_exceptions=True,
+		)
+		for result in results:
+			if isinstance(result, BaseException):
+				raise result
+
+		if info.md5 is not None:
+			md5 = await self._run(AsyncStorage._md5_file, destination)
+			if md5 != info.md5:
+				raise ChecksumMismatchError(f"Downloaded {storage_path} has MD5 {md5}, expected {info.md5}")
+
+	def _write_range(self, destination: str, storage_path: str, version: str, start: int, end: int) -> None:
+		data = memoryview(self._read_range(storage_path, version, start, end))
+		fd = os.open(destination, os.O_WRONLY)
+		try:
+			while data:
+				written = os.pwrite(fd, data, start)
+				data, start = data[written:], start + written
+		finally:
+			os.close(fd)
+
+	def _read_range(self, storage_path: str, version: str, start: int, end: int) -> bytes:
+		data = self.backend.read_range(storage_path, version, start, end)
+		if len(data) != end - start:
+			raise ChecksumMismatchError(f"Range {start}-{end} of {storage_path} returned {len(data)} bytes")
+		return data
+
+	@staticmethod
+	def _md5_file(file_path: str) -> str:
+		with open(file_path, "rb") as downloaded:
+			return hashlib.file_digest(downloaded, "md5").hexdigest()
+
+	async def _run(self, function: Callable[..., T], *args: Any) -> T:
+		loop = asyncio.get_running_loop()
+		return await loop.run_in_executor(self._executor, partial(function, *args))
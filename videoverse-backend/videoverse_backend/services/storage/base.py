@@ -0,0 +1,129 @@
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import NamedTuple
+
+
+class ObjectInfo(NamedTuple):
+	version: str
+	size: int
+	md5: str | None = None
+
+
+class ObjectWriter(ABC):
+	"""Upload of an object written piece by piece, nothing is stored under the path before :meth:`commit`."""
+
+	@abstractmethod
+	def write(self, data: bytes) -> None:
+		"""Append bytes to the object."""
+
+	@abstractmethod
+	def commit(self) -> str:
+		"""Store the written bytes, replacing any existing object, and return the version."""
+
+	@abstractmethod
+	def abort(self) -> None:
+		"""Drop the written bytes and leave the stored object as it was."""
+
+
+class SpooledObjectWriter(ObjectWriter):
+	"""Collects the object in a temporary file and uploads it whole on commit."""
+
+	def __init__(self, backend: "StorageBackend", storage_path: str) -> None:
+		self.backend = backend
+		self.storage_path = storage_path
+		self._file = tempfile.NamedTemporaryFile(delete=False)
+
+	def write(self, data: bytes) -> None:
+		self._file.write(data)
+
+	def commit(self) -> str:
+		self._file.close()
+		try:
+			return self.backend.upload_file(self.storage_path, self._file.name)
+		finally:
+			os.unlink(self._file.name)
+
+	def abort(self) -> None:
+		self._file.close()
+		os.unlink(self._file.name)
+
+
+class StorageBackend(ABC):
+	"""
+	Object storage for video files.
+
+	Objects are addressed by a storage path such as ``videos/clip_<uuid>.mp4``. Implementations only
+	have to move whole files between the local disk and the store and hand out time-limited URLs.
+	Remote stores that serve byte ranges set ``supports_ranges`` and implement :meth:`read_range`
+	so that large objects can be fetched over several connections at once. Objects produced as a
+	stream are written through :meth:`open_writer`, backends that can upload without a local copy
+	override it.
+	"""
+
+	supports_ranges = False
+
+	@abstractmethod
+	def upload_file(self, storage_path: str, file_path: str) -> str:
+		"""Store the local file under the storage path, replacing any existing object, and return its version."""
+
+	def open_writer(self, storage_path: str) -> ObjectWriter:
+		"""Start an upload to the storage path that is fed piece by piece."""
+		return SpooledObjectWriter(self, storage_path)
+
+	@abstractmethod
+	def stat(self, storage_path: str) -> ObjectInfo:
+		"""
+		Return the version, size and MD5 digest (hex, when the store keeps one) of an object.
+
+		The version changes whenever the object is replaced.
+
+		:raises FileNotFoundError: nothing is stored under the path.
+		"""
+
+	def read_range(self, storage_path: str, version: str, start: int, end: int) -> bytes:
+		"""Return the bytes from ``start`` up to, not including, ``end`` of the given version of an object."""
+		raise NotImplementedError(f"{type(self).__name__} does not serve byte ranges")
+
+	@abstractmethod
+	def download_to_filename(self, storage_path: str, destination: str) -> None:
+		"""Write the object to the local destination path."""
+
+	def local_path(self, storage_path: str) -> str | None:
+		"""Return the file holding the object when it is stored on this node, None for remote stores."""
+		return None
+
+	@abstractmethod
+	def get_signed_url(self, storage_path: str, expiration: timedelta) -> str:
+		"""Return a URL that grants read access to the object until the expiration passes."""
+
+	@abstractmethod
+	def exists(self, storage_path: str) -> bool:
+		"""Tell whether an object is stored under the path."""
+
+	@abstractmethod
+	def delete(self, storage_path: str) -> None:
+		"""Remove the object, missing objects are ignored."""
+
+	def download_file(self, file_name: str, storage_path: str, destination_dir: str | None = None) -> str:
+		"""
+		Download an object to local disk.
+
+		:param file_name: name of the local copy, its extension is kept for temporary files.
+		:param storage_path: object to download.
+		:param destination_dir: directory to place the copy in, a temporary file is used when omitted.
+		:return: path of the local copy.
+		"""
+		destination = StorageBackend.local_destination(file_name, destination_dir)
+		self.download_to_filename(storage_path, destination)
+		return destination
+
+	@staticmethod
+	def local_destination(file_name: str, destination_dir: str | None = None) -> str:
+		if destination_dir is not None:
+			os.makedirs(destination_dir, exist_ok=True)
+			return os.path.join(destination_dir, file_name)
+		fd, destination = tempfile.mkstemp(suffix=f".{file_name.split('.')[-1]}")
+		os.close(fd)
+		return destination
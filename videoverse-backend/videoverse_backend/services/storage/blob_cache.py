@@ -0,0 +1,234 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Awaitable, Callable, Iterator
+
+from videoverse_backend.core import logger
+
+# Each server process keeps its entries in a subdirectory of its own, named after its pid.
+PROCESS_DIR_PREFIX = "process-"
+# Staging files left directly in the cache directory by older versions are removed once this many seconds old.
+STALE_STAGING_AGE = 3600
+
+
+class CacheEntry:
+	def __init__(self, path: str, size: int) -> None:
+		self.path = path
+		self.size = size
+		self.pins = 0
+
+
+class BlobCache:
+	"""
+	Read-through disk cache for stored objects.
+
+	Entries are keyed by storage path and object version, so an overwritten object is never served
+	from a stale copy, and are evicted least recently used first once the cached bytes exceed
+	``max_bytes``. Files are written under a temporary name and renamed into place, concurrent
+	requests for the same key share a single fetch, and an entry is pinned while a caller holds it so
+	that eviction cannot remove a file that ffmpeg is still reading.
+
+	The index, the pins and the budget belong to one process, so every server process on the host keeps
+	its files in a subdirectory of ``directory`` that no other live process touches. A starting process
+	takes over the files of processes that are gone, so the cache stays warm across restarts.
+	"""
+
+	def __init__(self, directory: str, max_bytes: int) -> None:
+		self.root = directory
+		self.directory = os.path.join(directory, f"{PROCESS_DIR_PREFIX}{os.getpid()}")
+		self.max_bytes = max_bytes
+		self.size = 0
+		self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+		self._fetches: dict[str, asyncio.Task[CacheEntry]] = {}
+		os.makedirs(self.directory, exist_ok=True)
+		self._adopt_abandoned()
+		self._load_existing()
+
+	@asynccontextmanager
+	async def open(
+		self,
+		storage_path: str,
+		version: str,
+		fetch: Callable[[str], Awaitable[None]],
+	) -> AsyncIterator[str]:
+		"""
+		Hold a local copy of an object, fetching it on a miss.
+
+		:param storage_path: object to read.
+		:param version: current version of the object as reported by the storage.
+		:param fetch: downloads the object to the given local path.
+		:return: path of the cached copy, valid until the context exits.
+		"""
+		key = BlobCache._key(storage_path, version)
+		entry = self._entries.get(key)
+		while entry is None:
+			fetch_task = self._fetches.get(key)
+			if fetch_task is None:
+				fetch_task = asyncio.create_task(self._fetch(key, storage_path, fetch))
+				self._fetches[key] = fetch_task
+				fetch_task.add_done_callback(lambda _: self._fetches.pop(key, None))
+			# The download is shared, a caller that goes away must not cancel it for the others.
+			await asyncio.shield(fetch_task)
+			# Another caller may have evicted the entry before this one got to pin it.
+			entry = self._entries.get(key)
+
+		with self._pin(key, entry):
+			yield entry.path
+
+	@asynccontextmanager
+	async def hold(self, storage_path: str, version: str) -> AsyncIterator[str | None]:
+		"""
+		Hold the cached copy of an object if there is one, without fetching it on a miss.
+
+		:return: path of the cached copy, valid until the context exits, or None.
+		"""
+		key = BlobCache._key(storage_path, version)
+		entry = self._entries.get(key)
+		if entry is None:
+			yield None
+			return
+		with self._pin(key, entry):
+			yield entry.path
+
+	async def put(self, storage_path: str, version: str, file_path: str) -> None:
+		"""
+		Add a local file as the cached copy of an object that was just written.
+
+		:param storage_path: object the file was stored as.
+		:param version: version the storage assigned to the object.
+		:param file_path: file with the content of the object, it is left in place.
+		"""
+		key = BlobCache._key(storage_path, version)
+		if key in self._entries or key in self._fetches:
+			return
+		staging_path = self._staging_path()
+		try:
+			await asyncio.to_thread(BlobCache._link_or_copy, file_path, staging_path)
+		except OSError as exception:
+			logger.warning(f"Could not cache {storage_path}: {exception}")
+			return
+		self._add(key, staging_path, storage_path)
+		self._evict()
+
+	def contains(self, storage_path: str, version: str) -> bool:
+		return BlobCache._key(storage_path, version) in self._entries
+
+	@contextmanager
+	def _pin(self, key: str, entry: CacheEntry) -> Iterator[None]:
+		self._entries.move_to_end(key)
+		entry.pins += 1
+		try:
+			yield
+		finally:
+			entry.pins -= 1
+			self._evict()
+
+	async def _fetch(self, key: str, storage_path: str, fetch: Callable[[str], Awaitable[None]]) -> CacheEntry:
+		staging_path = self._staging_path()
+		try:
+			await fetch(staging_path)
+		except BaseException:
+			if os.path.exists(staging_path):
+				os.unlink(staging_path)
+			raise
+		return self._add(key, staging_path, storage_path)
+
+	def _add(self, key: str, staging_path: str, storage_path: str) -> CacheEntry:
+		if key in self._entries:
+			# An upload and a fetch of the same version raced, keep the copy that is already indexed.
+			os.unlink(staging_path)
+			return self._entries[key]
+		_, extension = os.path.splitext(storage_path)
+		path = os.path.join(self.directory, f"{key}{extension}")
+		os.replace(staging_path, path)
+		entry = CacheEntry(path, os.path.getsize(path))
+		self._entries[key] = entry
+		self.size += entry.size
+		return entry
+
+	def _evict(self) -> None:
+		for key in list(self._entries):
+			if self.size <= self.max_bytes:
+				break
+			entry = self._entries[key]
+			if entry.pins:
+				continue
+			del self._entries[key]
+			self.size -= entry.size
+			try:
+				os.unlink(entry.path)
+			except FileNotFoundError:
+				pass
+
+	def _adopt_abandoned(self) -> None:
+		"""Move the entries of server processes that are gone into the directory of this one."""
+		for name in os.listdir(self.root):
+			path = os.path.join(self.root, name)
+			pid = name.removeprefix(PROCESS_DIR_PREFIX)
+			if os.path.isdir(path) and pid.isdigit() and path != self.directory and not _process_alive(int(pid)):
+				for entry_name in os.listdir(path):
+					self._adopt_file(os.path.join(path, entry_name), entry_name)
+				try:
+					os.rmdir(path)
+				except OSError:
+					# Another starting process is adopting the same files.
+					pass
+			elif os.path.isfile(path):
+				# Left by a version that shared the directory between processes.
+				self._adopt_file(path, name)
+
+	def _adopt_file(self, path: str, name: str) -> None:
+		try:
+			if not name.startswith("."):
+				os.replace(path, os.path.join(self.directory, name))
+			elif os.path.dirname(path) != self.root or time.time() - os.path.getmtime(path) > STALE_STAGING_AGE:
+				# Staging file of a fetch that was interrupted.
+				os.unlink(path)
+		except FileNotFoundError:
+			# Taken over by another starting process.
+			pass
+
+	def _load_existing(self) -> None:
+		files = []
+		for name in os.listdir(self.directory):
+			path = os.path.join(self.directory, name)
+			if name.startswith("."):
+				# Staging files of an interrupted fetch, by an earlier process with the same pid.
+				os.unlink(path)
+			elif os.path.isfile(path):
+				files.append((os.stat(path), name, path))
+		for stat, name, path in sorted(files, key=lambda file: file[0].st_atime):
+			entry = CacheEntry(path, stat.st_size)
+			self._entries[os.path.splitext(name)[0]] = entry
+			self.size += entry.size
+		self._evict()
+
+	def _staging_path(self) -> str:
+		return os.path.join(self.directory, f".fetch-{uuid.uuid4()}")
+
+	@staticmethod
+	def _key(storage_path: str, version: str) -> str:
+		return hashlib.sha256(f"{storage_path}\0{version}".encode()).hexdigest()
+
+	@staticmethod
+	def _link_or_copy(source: str, destination: str) -> None:
+		try:
+			os.link(source, destination)
+		except OSError:
+			shutil.copyfile(source, destination)
+
+
+def _process_alive(pid: int) -> bool:
+	try:
+		os.kill(pid, 0)
+	except ProcessLookupError:
+		return False
+	except PermissionError:
+		# Alive, but run by another user.
+		return True
+	return True
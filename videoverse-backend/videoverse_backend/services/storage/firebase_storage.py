@@ -0,0 +1,101 @@
+import base64
+import os
+from datetime import timedelta
+
+import firebase_admin
+from firebase_admin import credentials, storage
+from google.cloud.storage import Blob
+from requests.adapters import HTTPAdapter
+
+from videoverse_backend.services.storage.base import ObjectInfo, ObjectWriter, StorageBackend
+
+
+class FirebaseObjectWriter(ObjectWriter):
+	"""Sends the object as a resumable upload, one chunk per request as soon as a chunk is buffered."""
+
+	def __init__(self, blob: Blob, chunk_size: int) -> None:
+		self.blob = blob
+		self._file = blob.open("wb", chunk_size=chunk_size, ignore_flush=True)
+
+	def write(self, data: bytes) -> None:
+		self._file.write(data)
+
+	def commit(self) -> str:
+		self._file.close()
+		# The writer does not keep the metadata of the finished upload.
+		self.blob.reload()
+		return str(self.blob.generation)
+
+	def abort(self) -> None:
+		self._file.terminate()
+
+
+class FirebaseStorage(StorageBackend):
+	"""
+	Stores objects in a Firebase (Google Cloud Storage) bucket.
+
+	All transfers share the keep-alive connection pool of the bucket client, sized for
+	``max_connections`` concurrent requests. Files larger than ``chunk_size`` are sent as a
+	resumable upload in chunks of that size, so a dropped connection only repeats one chunk. Streamed
+	uploads use the same chunks and hold at most one of them in memory.
+	"""
+
+	supports_ranges = True
+
+	def __init__(self, credentials_file: str, bucket_name: str, max_connections: int, chunk_size: int) -> None:
+		cred = credentials.Certificate(credentials_file)
+		firebase_admin.initialize_app(
+			cred,
+			{
+				"storageBucket": bucket_name,
+			},
+		)
+		self.bucket = storage.bucket()
+		self.chunk_size = chunk_size
+
+		# The default adapter keeps 10 connections per host, parallel transfers beyond that would reconnect.
+		adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+		self.bucket.client._http.mount("https://", adapter)
+
+	def upload_file(self, storage_path: str, file_path: str) -> str:
+		blob = self.bucket.blob(storage_path)
+		if os.path.getsize(file_path) > self.chunk_size:
+			blob.chunk_size = self.chunk_size
+		blob.upload_from_filename(file_path)
+		return str(blob.generation)
+
+	def open_writer(self, storage_path: str) -> ObjectWriter:
+		return FirebaseObjectWriter(self.bucket.blob(storage_path), self.chunk_size)
+
+	def stat(self, storage_path: str) -> ObjectInfo:
+		blob = self.bucket.get_blob(storage_path)
+		if blob is None:
+			raise FileNotFoundError(f"No object stored at {storage_path}")
+		# Composite objects carry no MD5, only a CRC32C.
+		md5 = base64.b64decode(blob.md5_hash).hex() if blob.md5_hash else None
+		return ObjectInfo(version=str(blob.generation), size=blob.size, md5=md5)
+
+	def read_range(self, storage_path: str, version: str, start: int, end: int) -> bytes:
+		# Pinning the generation keeps every range of one download on the same object, even if it is replaced meanwhile.
+		blob = self.bucket.blob(storage_path, generation=int(version))
+		return blob.download_as_bytes(start=start, end=end - 1, checksum=None)
+
+	def download_to_filename(self, storage_path: str, destination: str) -> None:
+		blob = self.bucket.blob(storage_path)
+		blob.download_to_filename(destination)
+
+	def get_signed_url(self, storage_path: str, expiration: timedelta) -> str:
+		blob = self.bucket.blob(storage_path)
+		return blob.generate_signed_url(
+			version="v4",
+			expiration=expiration,
+			method="GET",
+		)
+
+	def exists(self, storage_path: str) -> bool:
+		return self.bucket.blob(storage_path).exists()
+
+	def delete(self, storage_path: str) -> None:
+		blob = self.bucket.blob(storage_path)
+		if blob.exists():
+			blob.delete()
@@ -0,0 +1,49 @@
+from collections import OrderedDict
+from datetime import UTC, datetime, timedelta
+from typing import NamedTuple
+
+
+class SignedUrl(NamedTuple):
+	url: str
+	expires_at: datetime
+
+
+class SignedUrlCache:
+	"""
+	Keeps recently signed URLs so that repeated shares of a video skip the signing.
+
+	Entries are keyed by storage path. A cached URL is handed out again for any requested lifetime it
+	still covers within ``min_remaining``: at least that fraction of the lifetime is left on it, and it
+	outlives the lifetime by no more than its inverse. A caller never gets a link that expires much
+	sooner or much later than asked for, while lifetimes that drift from request to request, like the
+	time left until a playlist expires, keep hitting the same URL. The URLs of at most ``max_entries``
+	objects are kept, the least recently used is dropped first.
+	"""
+
+	def __init__(self, max_entries: int, min_remaining: float) -> None:
+		self.max_entries = max_entries
+		self.min_remaining = min_remaining
+		self._entries: OrderedDict[str, list[SignedUrl]] = OrderedDict()
+
+	def get(self, storage_path: str, expiration: timedelta) -> SignedUrl | None:
+		signed_urls = self._entries.get(storage_path)
+		if signed_urls is None:
+			return None
+		now = datetime.now(UTC)
+		for signed_url in signed_urls:
+			if expiration * self.min_remaining <= signed_url.expires_at - now <= expiration / self.min_remaining:
+				self._entries.move_to_end(storage_path)
+				return signed_url
+		return None
+
+	def put(self, storage_path: str, expiration: timedelta, signed_url: SignedUrl) -> None:
+		now = datetime.now(UTC)
+		signed_urls = [cached for cached in self._entries.get(storage_path, []) if cached.expires_at > now]
+		self._entries[storage_path] = [*signed_urls, signed_url]
+		self._entries.move_to_end(storage_path)
+		while len(self._entries) > self.max_entries:
+			self._entries.popitem(last=False)
+
+	def invalidate(self, storage_path: str) -> None:
+		"""Drop every URL of an object, for when its content is replaced."""
+		self._entries.pop(storage_path, None)
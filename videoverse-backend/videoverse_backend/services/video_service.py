@@ -1,46 +1,922 @@
+import asyncio
+import errno
+import fcntl
 import json
 import os
-import subprocess
-from typing import Any
+import struct
+from contextlib import aclosing
+from fractions import Fraction
+from typing import Any, AsyncGenerator, AsyncIterator, NamedTuple, Sequence
 
+import aiofiles
+from aiofiles import tempfile
+
+from videoverse_backend.services.cpu_scheduler import CpuScheduler, WorkClass
+from videoverse_backend.services.ffmpeg_progress import ffmpeg_progress
+from videoverse_backend.services.media_probe import MediaProbe
+from videoverse_backend.services.process_runner import ProcessRunner
 from videoverse_backend.settings import settings
 
+# Stream parameters that must match for the concat demuxer to stream-copy inputs together.
+MERGE_COMPATIBILITY_FIELDS = (
+	"video_codec",
+	"width",
+	"height",
+	"pixel_format",
+	"frame_rate",
+	"audio_codec",
+	"audio_sample_rate",
+)
+
+# Encoders for re-encoding trims and merge inputs, keyed by codec. Parameter sets are repeated in-band so that
+# a re-encoded piece still decodes when it is joined with stream-copied pieces that carry their own.
+TRIM_ENCODERS = {
+	"h264": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-x264-params", "repeat-headers=1"],
+	"hevc": ["-c:v", "libx265", "-preset", "veryfast", "-crf", "18", "-x265-params", "repeat-headers=1"],
+}
+
+# Encoders for converting the audio of merge inputs, keyed by codec.
+AUDIO_ENCODERS = {
+	"aac": "aac",
+	"mp3": "libmp3lame",
+	"opus": "libopus",
+	"vorbis": "libvorbis",
+	"ac3": "ac3",
+	"flac": "flac",
+}
+
+# Bitstream filters that put the parameter sets in front of every keyframe of a stream-copied piece.
+ANNEXB_FILTERS = {"h264": "h264_mp4toannexb", "hevc": "hevc_mp4toannexb"}
+
+# Keyframe times are rounded to the microsecond, seeks are nudged by this much to land on the intended frame.
+SEEK_MARGIN_US = 1000
+
+# Seconds between attempts to open a named pipe that ffmpeg has not opened for reading yet.
+PIPE_OPEN_INTERVAL = 0.01
+# Streamed inputs that fetch ahead of the one ffmpeg reads, so that it does not wait at every switch.
+STREAM_INPUTS_AHEAD = 1
+# Capacity requested for named pipes, fewer wakeups than the default 64 KiB; Linux caps it for unprivileged users.
+PIPE_SIZE = 1024 * 1024
+# Pieces of a segment list shorter than this, in seconds, are dropped as rounding leftovers.
+MIN_SEGMENT_DURATION = 0.001
+
+# Codecs HLS players take in fragmented MP4, sources in other codecs are converted when they are packaged.
+HLS_VIDEO_CODECS = {"h264", "hevc"}
+HLS_AUDIO_CODECS = {"aac", "mp3", "ac3", "eac3"}
+# Encoder of the scaled renditions of a package. Scene cuts get no keyframes of their own, so that every
+# rendition has its keyframes, and so its segment boundaries, at the same times.
+HLS_ENCODER = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-sc_threshold", "0", "-pix_fmt", "yuv420p"]
+# Peak bitrate of an encoded rendition in bits per pixel and frame, it is the bandwidth players pick renditions by.
+HLS_BITS_PER_PIXEL = 0.1
+HLS_MASTER_PLAYLIST = "master.m3u8"
+
+
+class ProbeMetadata(NamedTuple):
+	duration: float
+	container: str | None = None
+	video_codec: str | None = None
+	audio_codec: str | None = None
+	width: int | None = None
+	height: int | None = None
+	pixel_format: str | None = None
+	frame_rate: float | None = None
+	bit_rate: int | None = None
+	audio_sample_rate: int | None = None
+	keyframes: tuple[int, ...] = ()
+
+	def to_columns(self) -> dict[str, Any]:
+		"""Column values for VideoModel, with the keyframe times packed."""
+		columns = self._asdict()
+		columns["keyframes"] = ProbeMetadata.pack_keyframes(self.keyframes)
+		return columns
+
+	@staticmethod
+	def pack_keyframes(keyframes: Sequence[int]) -> bytes:
+		return struct.pack(f"<{len(keyframes)}q", *keyframes)
+
+	@staticmethod
+	def unpack_keyframes(packed: bytes | None) -> tuple[int, ...]:
+		if not packed:
+			return ()
+		return struct.unpack(f"<{len(packed) // 8}q", packed)
+
+	@staticmethod
+	def from_ffprobe(output: dict[str, Any]) -> "ProbeMetadata":
+		"""
+		Build the metadata from ffprobe JSON with format, streams and packets sections.
+
+		:param output: parsed ffprobe output.
+		:return: probe metadata of the first video and first audio stream.
+		"""
+		streams = output.get("streams", [])
+		video: dict[str, Any] = next((stream for stream in streams if stream.get("codec_type") == "video"), {})
+		audio: dict[str, Any] = next((stream for stream in streams if stream.get("codec_type") == "audio"), {})
+		video_index = video.get("index")
+		keyframes = sorted(
+			round(float(packet["pts_time"]) * 1_000_000)
+			for packet in output.get("packets", [])
+			if packet.get("stream_index") == video_index
+			and "K" in packet.get("flags", "")
+			and packet.get("pts_time") not in (None, "N/A")
+		)
+		format_ = output.get("format", {})
+		return ProbeMetadata(
+			duration=float(format_["duration"]),
+			container=format_.get("format_name"),
+			video_codec=video.get("codec_name"),
+			audio_codec=audio.get("codec_name"),
+			width=video.get("width"),
+			height=video.get("height"),
+			pixel_format=video.get("pix_fmt"),
+			frame_rate=ProbeMetadata._parse_rate(video.get("avg_frame_rate")),
+			bit_rate=int(format_["bit_rate"]) if format_.get("bit_rate") else None,
+			audio_sample_rate=int(audio["sample_rate"]) if audio.get("sample_rate") else None,
+			keyframes=tuple(keyframes),
+		)
+
+	@staticmethod
+	def _parse_rate(rate: str | None) -> float | None:
+		if not rate or rate.startswith("0/") or rate.endswith("/0"):
+			return None
+		return float(Fraction(rate))
+
+
+class SmartCut(NamedTuple):
+	"""Keyframe-aligned split of a trim, all times in microseconds."""
+
+	start: int
+	end: int | None
+	first_keyframe: int
+	last_keyframe: int | None
+
+	@property
+	def has_head(self) -> bool:
+		return self.first_keyframe - self.start > SEEK_MARGIN_US
+
+	@property
+	def has_tail(self) -> bool:
+		return (
+			self.end is not None and self.last_keyframe is not None and self.end - self.last_keyframe > SEEK_MARGIN_US
+		)
+
+
+class MergePlan(NamedTuple):
+	"""Stream parameters a merge converges on and the inputs that have to be converted to them."""
+
+	profile: dict[str, Any] | None
+	outliers: tuple[int, ...] = ()
+
+
+class Segment(NamedTuple):
+	"""Part of a stored video played by a virtual video, in seconds of the source."""
+
+	source_video_id: Any
+	start: float
+	end: float
+
+	@property
+	def duration(self) -> float:
+		return self.end - self.start
+
+	def covers(self, source: Any) -> bool:
+		return self.start < MIN_SEGMENT_DURATION and self.end > source.duration - MIN_SEGMENT_DURATION
+
+
+class StreamMuxer(NamedTuple):
+	"""Output format ffmpeg can write to a pipe, with the container name ffprobe reports for it."""
+
+	arguments: list[str]
+	container: str
+
+
+# Muxers for streamed merges by output extension. MP4 is fragmented so that no index has to be patched in at the end.
+STREAM_MUXERS = {
+	".mp4": StreamMuxer(
+		["-f", "mp4", "-movflags", "frag_keyframe+empty_moov+default_base_moof"], "mov,mp4,m4a,3gp,3g2,mj2"
+	),
+	".mov": StreamMuxer(
+		["-f", "mov", "-movflags", "frag_keyframe+empty_moov+default_base_moof"], "mov,mp4,m4a,3gp,3g2,mj2"
+	),
+	".mkv": StreamMuxer(["-f", "matroska"], "matroska,webm"),
+}
+
 
 class VideoService:
+	ffprobe_runner = ProcessRunner(settings.FFPROBE_MAX_PROCESSES, settings.FFPROBE_TIMEOUT)
+	ffmpeg_scheduler = (
+		CpuScheduler(settings.FFMPEG_CPU_BUDGET, settings.FFMPEG_ENCODE_THREADS, settings.FFMPEG_SLOT_DIR)
+		if settings.FFMPEG_CPU_BUDGET
+		else None
+	)
+	ffmpeg_runner = ProcessRunner(
+		settings.FFMPEG_MAX_PROCESSES,
+		settings.FFMPEG_TIMEOUT,
+		ffmpeg_scheduler,
+		ffmpeg_progress,
+	)
+
+	@staticmethod
+	async def get_video_duration(file_path: Any) -> float:
+		media_info = await asyncio.to_thread(MediaProbe.probe, file_path)
+		if media_info is not None:
+			return media_info.duration
+		return await VideoService.get_video_duration_ffprobe(file_path)
+
 	@staticmethod
-	def get_video_duration(file_path: Any) -> float:
+	async def get_video_duration_ffprobe(file_path: Any) -> float:
 		cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "json", file_path]
-		result = subprocess.run(
-			cmd,
-			check=True,
-			capture_output=settings.DEBUG,
-		)
+		result = await VideoService.ffprobe_runner.run(cmd)
 		output = json.loads(result.stdout)
 		return float(output["format"]["duration"])
 
 	@staticmethod
-	def trim_video(file_path: str, start_time: float | None, end_time: float | None, output_path: str) -> None:
-		command = ["ffmpeg", "-i", file_path, "-c", "copy"]
+	async def probe_video(file_path: str) -> ProbeMetadata:
+		"""
+		Capture streams, format and keyframe timestamps with a single ffprobe run.
 
-		if start_time is not None:
-			command.extend(["-ss", str(start_time)])
+		Keyframes come from the packet flags, so nothing has to be decoded.
+		"""
+		cmd = [
+			"ffprobe",
+			"-v",
+			"error",
+			"-of",
+			"json",
+			"-show_entries",
+			"format=duration,bit_rate,format_name"
+			":stream=index,codec_type,codec_name,width,height,pix_fmt,avg_frame_rate,sample_rate"
+			":packet=stream_index,pts_time,flags",
+			file_path,
+		]
+		result = await VideoService.ffprobe_runner.run(cmd)
+		output = await asyncio.to_thread(json.loads, result.stdout)
+		return ProbeMetadata.from_ffprobe(output)
 
-		if end_time is not None:
-			command.extend(["-to", str(end_time)])
+	@staticmethod
+	def find_merge_incompatibility(videos: Sequence[Any]) -> str | None:
+		"""
+		Check from catalog metadata alone whether videos can be stream-copied together.
+
+		Videos stored before metadata was captured are skipped, the concat step reports those.
+
+		:param videos: videos in merge order.
+		:return: description of the first mismatch, or None when the set looks compatible.
+		"""
+		probed = [video for video in videos if video.video_codec is not None]
+		for field in MERGE_COMPATIBILITY_FIELDS:
+			values = {VideoService._comparable(field, getattr(video, field)) for video in probed}
+			if len(values) > 1:
+				return f"Videos differ in {field.replace('_', ' ')}: {', '.join(sorted(map(str, values)))}"
+		return None
+
+	@staticmethod
+	def plan_merge(videos: Sequence[Any]) -> MergePlan:
+		"""
+		Pick the stream parameters of a merge and the inputs that do not match them.
+
+		The target is the profile that covers the most playing time, so the fewest seconds are
+		re-encoded; ties go to the profile of the earliest video. Videos stored before metadata was
+		captured are neither counted nor converted, the concat step reports those.
+
+		:param videos: videos in merge order.
+		:return: the target profile, None when no video is probed, and the indexes of the outliers.
+		"""
+		durations: dict[tuple[Any, ...], float] = {}
+		# The exact parameters of the earliest video of each profile, the profile rounds the frame rate.
+		representatives: dict[tuple[Any, ...], Any] = {}
+		for video in videos:
+			if video.video_codec is not None:
+				profile = VideoService._merge_profile(video)
+				durations[profile] = durations.get(profile, 0.0) + video.duration
+				representatives.setdefault(profile, video)
+		if not durations:
+			return MergePlan(profile=None)
+
+		target = max(durations, key=durations.__getitem__)
+		outliers = tuple(
+			index
+			for index, video in enumerate(videos)
+			if video.video_codec is not None and VideoService._merge_profile(video) != target
+		)
+		representative = representatives[target]
+		return MergePlan(
+			profile={field: getattr(representative, field) for field in MERGE_COMPATIBILITY_FIELDS},
+			outliers=outliers,
+		)
+
+	@staticmethod
+	def find_normalization_problem(videos: Sequence[Any], plan: MergePlan) -> str | None:
+		"""
+		Check that every outlier of a merge plan can be converted to the target profile.
+
+		:param videos: videos in merge order.
+		:param plan: result of :meth:`plan_merge` for the videos.
+		:return: why an outlier cannot be converted, or None when all of them can.
+		"""
+		for index in plan.outliers:
+			video_changes, audio_changes = VideoService._normalization_changes(videos[index], plan.profile)  # type: ignore
+			if video_changes and plan.profile["video_codec"] not in TRIM_ENCODERS:  # type: ignore
+				return f"Videos cannot be converted to {plan.profile['video_codec']} video"  # type: ignore
+			target_audio = plan.profile["audio_codec"]  # type: ignore
+			if audio_changes and target_audio is not None and target_audio not in AUDIO_ENCODERS:
+				return f"Videos cannot be converted to {target_audio} audio"
+		return None
+
+	@staticmethod
+	async def normalize_merge_inputs(
+		inputs: Sequence[Any],
+		videos: Sequence[Any],
+		plan: MergePlan,
+		temp_dir: str,
+		extension: str,
+	) -> list[Any]:
+		"""
+		Convert the outliers of a merge plan to the target profile, all of them concurrently.
+
+		Only the streams that differ are re-encoded, the others are copied. The conversions are
+		admitted against the ffmpeg core budget like any other work, so they spread over the cores.
+
+		:param inputs: merge inputs in order, those of the outliers must be local paths.
+		:param videos: catalog entries of the inputs.
+		:param plan: result of :meth:`plan_merge` for the videos.
+		:param temp_dir: directory for the converted files.
+		:param extension: extension of the converted files, with the dot.
+		:return: the inputs with the outliers replaced by their converted files.
+		"""
+		normalized = list(inputs)
+		commands = []
+		for index in plan.outliers:
+			output_path = os.path.join(temp_dir, f"normalized{index}{extension}")
+			commands.append(
+				VideoService._normalize_command(inputs[index], videos[index], plan.profile, output_path),  # type: ignore
+			)
+			normalized[index] = output_path
+		await VideoService._run_all(commands, "normalize")
+		return normalized
+
+	@staticmethod
+	def _merge_profile(video: Any) -> tuple[Any, ...]:
+		return tuple(VideoService._comparable(field, getattr(video, field)) for field in MERGE_COMPATIBILITY_FIELDS)
+
+	@staticmethod
+	def _comparable(field: str, value: Any) -> Any:
+		if field == "frame_rate" and value is not None:
+			# Average frame rates of the same nominal rate differ in their last digits from file to file.
+			return round(value, 2)
+		return value
+
+	@staticmethod
+	def _normalization_changes(video: Any, profile: dict[str, Any]) -> tuple[bool, bool]:
+		"""Tell whether the video stream and whether the audio stream of a video differ from a profile."""
+
+		def differs(field: str) -> bool:
+			return VideoService._comparable(field, getattr(video, field)) != VideoService._comparable(
+				field, profile[field]
+			)
+
+		video_changes = any(map(differs, ("video_codec", "width", "height", "pixel_format", "frame_rate")))
+		audio_changes = any(map(differs, ("audio_codec", "audio_sample_rate")))
+		return video_changes, audio_changes
+
+	@staticmethod
+	def _normalize_command(
+		file_path: str,
+		video: Any,
+		profile: dict[str, Any],
+		output_path: str,
+	) -> tuple[list[str], WorkClass]:
+		video_changes, audio_changes = VideoService._normalization_changes(video, profile)
+		command = ["ffmpeg", "-i", file_path]
+		audio_input = "0:a:0"
+		if profile["audio_codec"] is not None and video.audio_codec is None:
+			# A silent track keeps the stream layout of every piece the same for the concat demuxer.
+			command.extend(["-f", "lavfi", "-i", f"anullsrc=sample_rate={profile['audio_sample_rate'] or 48000}"])
+			audio_input = "1:a:0"
+		command.extend(["-map", "0:v:0"])
+
+		if video_changes:
+			width, height, frame_rate = profile["width"], profile["height"], profile["frame_rate"]
+			command.extend(TRIM_ENCODERS[profile["video_codec"]])
+			filters = []
+			if width and height:
+				filters.append(
+					f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+					f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1",
+				)
+			if frame_rate:
+				# Drops or repeats frames, so every piece has the frame rate and the time base of the target.
+				filters.append(f"fps={Fraction(frame_rate).limit_denominator(1001)}")
+			if filters:
+				command.extend(["-vf", ",".join(filters)])
+			if profile["pixel_format"]:
+				command.extend(["-pix_fmt", profile["pixel_format"]])
+		else:
+			command.extend(["-c:v", "copy"])
+
+		if profile["audio_codec"] is None:
+			command.append("-an")
+		else:
+			command.extend(["-map", audio_input])
+			if audio_changes:
+				command.extend(["-c:a", AUDIO_ENCODERS[profile["audio_codec"]]])
+				if profile["audio_sample_rate"]:
+					command.extend(["-ar", str(profile["audio_sample_rate"])])
+			else:
+				command.extend(["-c:a", "copy"])
+			if audio_input != "0:a:0":
+				command.append("-shortest")
 
 		command.append(output_path)
+		return command, WorkClass.ENCODE if video_changes else WorkClass.COPY
+
+	@staticmethod
+	async def trim_video(file_path: str, start_time: float | None, end_time: float | None, output_path: str) -> None:
+		"""
+		Cut by stream copy, the fastest mode but the edges snap to keyframes.
+
+		The seek is done on the input side so ffmpeg jumps to the start instead of demuxing everything before it.
+
+		:param end_time: end of the cut in seconds, None keeps everything up to the end of the file.
+		"""
+		command = ["ffmpeg", *VideoService._input_range(file_path, start_time, end_time), "-c", "copy", output_path]
+		await VideoService.ffmpeg_runner.run(command, work_class=WorkClass.COPY, operation="trim")
 
-		process = subprocess.Popen(
-			command,
-			stdout=subprocess.PIPE,
-			stderr=subprocess.PIPE,
-			universal_newlines=True,
-			preexec_fn=os.setsid,
+	@staticmethod
+	async def precise_trim_video(
+		file_path: str,
+		start_time: float | None,
+		end_time: float | None,
+		output_path: str,
+		video_codec: str | None = None,
+		audio_encoder: str | None = None,
+	) -> None:
+		"""
+		Cut frame-accurately by re-encoding the whole video stream, the audio is copied.
+
+		:param video_codec: codec of the source, kept when there is an encoder for it, otherwise ffmpeg
+			picks the default encoder of the output container.
+		:param audio_encoder: re-encode the audio with this encoder instead. Copied audio keeps the packets
+			before the cut behind an edit list, which the concat demuxer plays, so pieces that are joined
+			afterwards need it.
+		"""
+		command = VideoService._precise_trim_command(
+			file_path, start_time, end_time, output_path, video_codec, audio_encoder
 		)
-		stdout, stderr = process.communicate()
+		await VideoService.ffmpeg_runner.run(command, work_class=WorkClass.ENCODE, operation="precise_trim")
 
 	@staticmethod
-	def merge_videos(list_file_path: str, output_path: str) -> None:
+	async def trim_clips(
+		file_path: str,
+		clips: Sequence[tuple[float, float]],
+		output_paths: Sequence[str],
+		precise: bool,
+		video_codec: str | None = None,
+	) -> None:
+		"""
+		Cut several clips of one source.
+
+		Stream copies share a single ffmpeg process in which every clip is an input of its own that seeks
+		to its start, so clips may overlap and only the parts of the source around them are read. With
+		``precise`` every clip is re-encoded like :meth:`precise_trim_video` by a process of its own, so
+		each encoder is admitted to the CPU budget separately.
+
+		:param clips: start and end of each clip in seconds.
+		:param output_paths: file of each clip, in the same order.
+		:param video_codec: codec of the source, see :meth:`precise_trim_video`.
+		"""
+		if precise:
+			commands = [
+				(
+					VideoService._precise_trim_command(file_path, start_time, end_time, output_path, video_codec),
+					WorkClass.ENCODE,
+				)
+				for (start_time, end_time), output_path in zip(clips, output_paths)
+			]
+			await VideoService._run_all(commands, "batch_trim")
+			return
+
+		command = ["ffmpeg"]
+		for start_time, end_time in clips:
+			# Both limits go before the input, after it they would be options of the first output.
+			command.extend(["-ss", str(start_time), "-t", str(end_time - start_time), "-i", file_path])
+		for index, output_path in enumerate(output_paths):
+			command.extend(["-map", f"{index}:v:0", "-map", f"{index}:a:0?", "-c", "copy", output_path])
+		await VideoService.ffmpeg_runner.run(command, work_class=WorkClass.COPY, operation="batch_trim")
+
+	@staticmethod
+	async def smart_trim_video(
+		file_path: str,
+		start_time: float,
+		end_time: float | None,
+		output_path: str,
+		keyframes: Sequence[int],
+		video_codec: str | None,
+		pixel_format: str | None = None,
+		audio_encoder: str | None = None,
+	) -> None:
+		"""
+		Cut frame-accurately while re-encoding only the partial GOPs at the edges.
+
+		The keyframe-aligned middle is stream-copied, the frames before the first keyframe and after the
+		last one are re-encoded, all pieces are produced concurrently and then joined with the concat
+		demuxer while the audio is copied straight from the source. Falls back to a full re-encode when
+		there is no encoder for the codec or no keyframe inside the range.
+
+		:param end_time: end of the cut in seconds, None keeps everything up to the end of the file.
+		:param keyframes: keyframe times of the source in microseconds, sorted.
+		:param video_codec: codec of the source video stream.
+		:param pixel_format: pixel format of the source, the re-encoded pieces use the same.
+		:param audio_encoder: re-encode the audio instead of copying it, see :meth:`precise_trim_video`.
+		"""
+		plan = VideoService.plan_smart_cut(
+			round(start_time * 1_000_000),
+			None if end_time is None else round(end_time * 1_000_000),
+			keyframes,
+		)
+		if plan is None or video_codec not in TRIM_ENCODERS:
+			await VideoService.precise_trim_video(
+				file_path, start_time, end_time, output_path, video_codec, audio_encoder
+			)
+			return
+
+		async with tempfile.TemporaryDirectory() as temp_dir:
+			pieces, commands = VideoService._smart_cut_commands(file_path, plan, video_codec, pixel_format, temp_dir)
+			await VideoService._run_all(commands, "smart_trim")
+
+			list_file_path = os.path.join(temp_dir, "pieces.txt")
+			async with aiofiles.open(list_file_path, "w") as list_file:
+				for piece in pieces:
+					await list_file.write(f"file '{piece}'\n")
+
+			command = [
+				"ffmpeg",
+				"-f",
+				"concat",
+				"-safe",
+				"0",
+				"-i",
+				list_file_path,
+				*VideoService._input_range(file_path, start_time, end_time),
+				"-map",
+				"0:v",
+				"-map",
+				"1:a:0?",
+				"-c",
+				"copy",
+				*(["-c:a", audio_encoder] if audio_encoder else []),
+				output_path,
+			]
+			await VideoService.ffmpeg_runner.run(command, work_class=WorkClass.COPY, operation="smart_trim")
+
+	@staticmethod
+	def plan_smart_cut(start: int, end: int | None, keyframes: Sequence[int]) -> SmartCut | None:
+		"""
+		Find the keyframes a smart cut copies between.
+
+		:param start: start of the cut in microseconds.
+		:param end: end of the cut in microseconds, None for the end of the file.
+		:param keyframes: keyframe times of the source in microseconds, sorted.
+		:return: the split, or None when no whole GOP lies inside the range.
+		"""
+		first_keyframe = next((keyframe for keyframe in keyframes if keyframe >= start - SEEK_MARGIN_US), None)
+		if first_keyframe is None:
+			return None
+		if end is None:
+			return SmartCut(start, None, first_keyframe, None)
+
+		last_keyframe = next((keyframe for keyframe in reversed(keyframes) if keyframe <= end + SEEK_MARGIN_US), None)
+		if last_keyframe is None or last_keyframe - first_keyframe <= SEEK_MARGIN_US:
+			return None
+		return SmartCut(start, end, first_keyframe, last_keyframe)
+
+	@staticmethod
+	def _smart_cut_commands(
+		file_path: str,
+		plan: SmartCut,
+		video_codec: str,
+		pixel_format: str | None,
+		temp_dir: str,
+	) -> tuple[list[str], list[tuple[list[str], WorkClass]]]:
+		"""
+		Build the ffmpeg commands for the pieces of a smart cut.
+
+		:return: piece files in playback order and the commands that write them with their kind of work.
+		"""
+		# Passthrough keeps ffmpeg from duplicating a frame to fill the gap between the seek point and the first frame.
+		encode = [*TRIM_ENCODERS[video_codec], "-fps_mode", "passthrough"]
+		if pixel_format:
+			encode += ["-pix_fmt", pixel_format]
+		pieces: list[str] = []
+		commands: list[tuple[list[str], WorkClass]] = []
+
+		if plan.has_head:
+			head_path = os.path.join(temp_dir, "head.mp4")
+			head_range = ["-ss", VideoService._seconds(plan.start)]
+			head_range += [
+				"-i",
+				file_path,
+				"-t",
+				VideoService._seconds(plan.first_keyframe - plan.start - SEEK_MARGIN_US),
+			]
+			commands.append((["ffmpeg", *head_range, "-map", "0:v:0", *encode, head_path], WorkClass.ENCODE))
+			pieces.append(head_path)
+
+		# Stream copy with -t cuts on decode order and would keep frames of the next GOP, the segment muxer
+		# splits on the presentation time of the last keyframe instead and only the first segment is kept.
+		middle = ["ffmpeg", "-ss", VideoService._seconds(plan.first_keyframe + SEEK_MARGIN_US), "-i", file_path]
+		if plan.last_keyframe is not None:
+			middle_length = plan.last_keyframe - plan.first_keyframe
+			middle += ["-t", VideoService._seconds(middle_length + 1_000_000)]
+		middle += ["-map", "0:v:0", "-c", "copy"]
+		if video_codec in ANNEXB_FILTERS:
+			middle += ["-bsf:v", ANNEXB_FILTERS[video_codec]]
+		if plan.last_keyframe is None:
+			middle_path = os.path.join(temp_dir, "middle.mp4")
+			middle.append(middle_path)
+		else:
+			middle_path = os.path.join(temp_dir, "middle000.mp4")
+			middle += [
+				"-f",
+				"segment",
+				"-segment_times",
+				VideoService._seconds(middle_length - SEEK_MARGIN_US),
+				"-segment_time_delta",
+				VideoService._seconds(SEEK_MARGIN_US),
+				"-segment_format",
+				"mp4",
+				os.path.join(temp_dir, "middle%03d.mp4"),
+			]
+		commands.append((middle, WorkClass.COPY))
+		pieces.append(middle_path)
+
+		if plan.has_tail:
+			tail_path = os.path.join(temp_dir, "tail.mp4")
+			tail_range = ["-ss", VideoService._seconds(plan.last_keyframe - SEEK_MARGIN_US)]  # type: ignore[operator]
+			tail_range += ["-i", file_path, "-t", VideoService._seconds(plan.end - plan.last_keyframe)]  # type: ignore[operator]
+			commands.append((["ffmpeg", *tail_range, "-map", "0:v:0", *encode, tail_path], WorkClass.ENCODE))
+			pieces.append(tail_path)
+
+		return pieces, commands
+
+	@staticmethod
+	async def _run_all(commands: list[tuple[list[str], WorkClass]], operation: str) -> None:
+		tasks = [
+			asyncio.create_task(VideoService.ffmpeg_runner.run(command, work_class=work_class, operation=operation))
+			for command, work_class in commands
+		]
+		try:
+			await asyncio.gather(*tasks)
+		except BaseException:
+			# Kill the pieces still running before their output directory goes away.
+			for task in tasks:
+				task.cancel()
+			await asyncio.gather(*tasks, return_exceptions=True)
+			raise
+
+	@staticmethod
+	def _precise_trim_command(
+		file_path: str,
+		start_time: float | None,
+		end_time: float | None,
+		output_path: str,
+		video_codec: str | None,
+		audio_encoder: str | None = None,
+	) -> list[str]:
+		return [
+			"ffmpeg",
+			*VideoService._input_range(file_path, start_time, end_time),
+			"-map",
+			"0:v:0",
+			"-map",
+			"0:a:0?",
+			*TRIM_ENCODERS.get(video_codec or "", []),
+			"-c:a",
+			audio_encoder or "copy",
+			output_path,
+		]
+
+	@staticmethod
+	def _input_range(file_path: str, start_time: float | None, end_time: float | None) -> list[str]:
+		command = []
+		if start_time:
+			command.extend(["-ss", str(start_time)])
+		command.extend(["-i", file_path])
+		if end_time is not None:
+			command.extend(["-t", str(end_time - (start_time or 0))])
+		return command
+
+	@staticmethod
+	def _seconds(microseconds: int) -> str:
+		return f"{microseconds / 1_000_000:.6f}"
+
+	@staticmethod
+	def stream_muxer(output_filename: str) -> StreamMuxer | None:
+		return STREAM_MUXERS.get(os.path.splitext(output_filename)[-1].lower())
+
+	@staticmethod
+	def concat_metadata(videos: Sequence[Any], container: str, size: int, plan: MergePlan) -> ProbeMetadata:
+		"""
+		Derive the metadata of a stream-copied merge from the catalog metadata of its inputs.
+
+		The concat demuxer shifts every input by the duration of the ones before it, so durations add
+		up and keyframe times are offset the same way. Keyframes are left out when an input has none
+		recorded or was re-encoded, a partial list would mislead smart cuts.
+
+		:param videos: probed videos in merge order.
+		:param container: container name of the merged file.
+		:param size: size of the merged file in bytes.
+		:param plan: result of :meth:`plan_merge`, its outliers were converted to its profile.
+		:return: probe metadata of the merged file.
+		"""
+		first = videos[0]
+		profile = plan.profile or {field: getattr(first, field) for field in MERGE_COMPATIBILITY_FIELDS}
+		keyframes: list[int] = []
+		offset = 0
+		for video in videos:
+			video_keyframes = ProbeMetadata.unpack_keyframes(video.keyframes)
+			if not video_keyframes or plan.outliers:
+				keyframes = []
+				break
+			keyframes.extend(offset + keyframe for keyframe in video_keyframes)
+			offset += round(video.duration * 1_000_000)
+		duration = sum(video.duration for video in videos)
+		return ProbeMetadata(
+			duration=duration,
+			container=container,
+			video_codec=profile["video_codec"],
+			audio_codec=profile["audio_codec"],
+			width=profile["width"],
+			height=profile["height"],
+			pixel_format=profile["pixel_format"],
+			frame_rate=profile["frame_rate"],
+			bit_rate=round(size * 8 / duration) if duration else None,
+			audio_sample_rate=profile["audio_sample_rate"],
+			keyframes=tuple(keyframes),
+		)
+
+	@staticmethod
+	def cut_segments(segments: Sequence[Segment], start: float, end: float | None) -> list[Segment]:
+		"""
+		Trim a segment list on the timeline it plays.
+
+		:param segments: segments in play order.
+		:param start: seconds into the timeline where the cut starts.
+		:param end: seconds into the timeline where the cut ends, None keeps everything up to the end.
+		:return: the parts of the segments inside the cut, still pointing at the stored sources.
+		"""
+		cut = []
+		offset = 0.0
+		for segment in segments:
+			first = max(segment.start, segment.start + start - offset)
+			last = segment.end if end is None else min(segment.end, segment.start + end - offset)
+			if last - first >= MIN_SEGMENT_DURATION:
+				cut.append(Segment(segment.source_video_id, first, last))
+			offset += segment.duration
+		return cut
+
+	@staticmethod
+	def segment_metadata(segments: Sequence[Segment], sources: dict[Any, Any]) -> ProbeMetadata:
+		"""
+		Expected metadata of a virtual video before it is rendered.
+
+		The stream parameters are the ones a render converges on, see :meth:`plan_merge`. Container,
+		bit rate and keyframes are only known once the file exists.
+
+		:param segments: segments in play order.
+		:param sources: source videos by id.
+		"""
+		videos = [sources[segment.source_video_id] for segment in segments]
+		plan = VideoService.plan_merge(videos)
+		profile = plan.profile or {field: getattr(videos[0], field) for field in MERGE_COMPATIBILITY_FIELDS}
+		return ProbeMetadata(
+			duration=sum(segment.duration for segment in segments),
+			**profile,
+		)
+
+	@staticmethod
+	async def stream_merge_videos(
+		inputs: Sequence[str | AsyncGenerator[bytes, None]],
+		muxer: StreamMuxer,
+		chunk_size: int,
+	) -> AsyncIterator[bytes]:
+		"""
+		Merge videos with the concat demuxer without staging inputs or output on disk.
+
+		Inputs given as byte streams are written into named pipes that ffmpeg opens in turn, each
+		stream is pulled only as fast as ffmpeg reads it and the next one starts before ffmpeg gets to
+		it, bounded by ``STREAM_INPUTS_AHEAD``. Inputs given as paths are read in place. The
+		merged video is yielded from ffmpeg's standard output as it is produced; the iteration fails
+		before its end if ffmpeg or any input stream failed.
+
+		:param inputs: local paths or content streams, in merge order. Streams must be readable
+			without seeking, see :meth:`FileService.is_streamable`.
+		:param muxer: output format that can be written to a pipe.
+		:param chunk_size: size of the yielded chunks.
+		:return: the merged video.
+		"""
+		async with tempfile.TemporaryDirectory() as temp_dir:
+			list_file_path = os.path.join(temp_dir, "input_list.txt")
+			finished = asyncio.Event()
+			# Feeders queue for this in merge order.
+			fetching = asyncio.Semaphore(1 + STREAM_INPUTS_AHEAD)
+			feeders: list[asyncio.Task[None]] = []
+			try:
+				async with aiofiles.open(list_file_path, "w") as list_file:
+					for index, source in enumerate(inputs):
+						if not isinstance(source, str):
+							pipe_path = os.path.join(temp_dir, f"input{index}.pipe")
+							os.mkfifo(pipe_path)
+							feeders.append(
+								asyncio.create_task(VideoService._feed_pipe(pipe_path, source, finished, fetching))
+							)
+							source = pipe_path
+						await list_file.write(f"file '{source}'\n")
+
+				command = [
+					"ffmpeg",
+					"-f",
+					"concat",
+					"-safe",
+					"0",
+					"-i",
+					list_file_path,
+					"-c",
+					"copy",
+					*muxer.arguments,
+					"pipe:1",
+				]
+				output = VideoService.ffmpeg_runner.stream(
+					command, chunk_size, work_class=WorkClass.COPY, operation="stream_merge"
+				)
+				async with aclosing(output):  # type: ignore
+					async for chunk in output:
+						yield chunk
+				# ffmpeg takes an input that broke off for a short one, only its feeder knows.
+				finished.set()
+				await asyncio.gather(*feeders)
+			finally:
+				for feeder in feeders:
+					feeder.cancel()
+				await asyncio.gather(*feeders, return_exceptions=True)
+
+	@staticmethod
+	async def _feed_pipe(
+		pipe_path: str,
+		chunks: AsyncGenerator[bytes, None],
+		finished: asyncio.Event,
+		fetching: asyncio.Semaphore,
+	) -> None:
+		async with fetching, aclosing(chunks):
+			first_chunk = await anext(chunks, b"")
+			fd = await VideoService._open_pipe(pipe_path, finished)
+			try:
+				await VideoService._write_pipe(fd, first_chunk)
+				async for chunk in chunks:
+					await VideoService._write_pipe(fd, chunk)
+			finally:
+				os.close(fd)
+
+	@staticmethod
+	async def _open_pipe(pipe_path: str, finished: asyncio.Event) -> int:
+		# A non-blocking open fails until there is a reader, a blocking one could not be cancelled.
+		while True:
+			try:
+				fd = os.open(pipe_path, os.O_WRONLY | os.O_NONBLOCK)
+				break
+			except OSError as exception:
+				if exception.errno != errno.ENXIO:
+					raise
+			if finished.is_set():
+				raise BrokenPipeError(f"ffmpeg exited without reading {os.path.basename(pipe_path)}")
+			await asyncio.sleep(PIPE_OPEN_INTERVAL)
+		try:
+			fcntl.fcntl(fd, fcntl.F_SETPIPE_SZ, PIPE_SIZE)
+		except OSError:
+			pass
+		return fd
+
+	@staticmethod
+	async def _write_pipe(fd: int, data: bytes) -> None:
+		loop = asyncio.get_running_loop()
+		view = memoryview(data)
+		while view:
+			try:
+				view = view[os.write(fd, view) :]
+			except BlockingIOError:
+				writable: asyncio.Future[None] = loop.create_future()
+
+				def wake() -> None:
+					if not writable.done():
+						writable.set_result(None)
+
+				loop.add_writer(fd, wake)
+				try:
+					await writable
+				finally:
+					loop.remove_writer(fd)
+
+	@staticmethod
+	async def merge_videos(list_file_path: str, output_path: str) -> None:
 		command = [
 			"ffmpeg",
 			"-f",
@@ -53,4 +929,106 @@ class VideoService:
 			"copy",
 			output_path,
 		]
-		subprocess.run(command, check=True)
+		await VideoService.ffmpeg_runner.run(command, work_class=WorkClass.COPY, operation="merge")
+
+	@staticmethod
+	async def package_hls(
+		file_path: str,
+		output_dir: str,
+		video: Any,
+		heights: Sequence[int],
+		segment_duration: float,
+	) -> str:
+		"""
+		Cut a video into fragmented MP4 segments with HLS playlists, every rendition in one decode pass.
+
+		The first rendition copies the source streams when players take their codecs, each height below
+		the source one adds a scaled H.264 rendition. Encoded renditions get their keyframes at the
+		keyframes of the copied one, so every rendition is segmented at the same times and players can
+		switch between them at any segment.
+
+		:param video: catalog entry of the source, for its codecs, dimensions and keyframes.
+		:param heights: heights of the scaled renditions, those not below the source height are skipped.
+		:param segment_duration: target length of the segments in seconds, segments start at keyframes.
+		:return: path of the master playlist, the renditions are in numbered directories next to it.
+		"""
+		command, work_class = VideoService._package_command(file_path, output_dir, video, heights, segment_duration)
+		await VideoService.ffmpeg_runner.run(command, work_class=work_class, operation="package")
+		return os.path.join(output_dir, HLS_MASTER_PLAYLIST)
+
+	@staticmethod
+	def _package_command(
+		file_path: str,
+		output_dir: str,
+		video: Any,
+		heights: Sequence[int],
+		segment_duration: float,
+	) -> tuple[list[str], WorkClass]:
+		copy_video = video.video_codec in HLS_VIDEO_CODECS
+		copy_audio = video.audio_codec in HLS_AUDIO_CODECS
+		has_audio = video.audio_codec is not None
+		scaled = sorted(
+			{height for height in heights if video.width and video.height and height < video.height}, reverse=True
+		)
+		frame_rate = video.frame_rate or 30
+
+		command = ["ffmpeg", "-i", file_path]
+		if scaled:
+			branches = "".join(f"[split{index}]" for index in range(len(scaled)))
+			scales = "".join(f";[split{index}]scale=-2:{height}[scaled{index}]" for index, height in enumerate(scaled))
+			command.extend(["-filter_complex", f"[0:v:0]split={len(scaled)}{branches}{scales}"])
+
+		renditions = ["0:v:0", *(f"[scaled{index}]" for index in range(len(scaled)))]
+		variants = []
+		for index, source in enumerate(renditions):
+			command.extend(["-map", source])
+			if has_audio:
+				command.extend(["-map", "0:a:0"])
+			variants.append(f"v:{index},a:{index}" if has_audio else f"v:{index}")
+
+		command.extend(HLS_ENCODER)
+		sizes = [
+			(video.width, video.height),
+			*((round(height * video.width / video.height / 2) * 2, height) for height in scaled),
+		]
+		# Encoded renditions are given keyframes where the copied one has them, or at every segment otherwise.
+		keyframes = ProbeMetadata.unpack_keyframes(video.keyframes)
+		if copy_video and keyframes:
+			forced = ",".join(VideoService._seconds(keyframe) for keyframe in keyframes)
+		else:
+			forced = f"expr:gte(t,n_forced*{segment_duration})"
+		for index, (width, height) in enumerate(sizes):
+			if index == 0 and copy_video:
+				command.extend(["-c:v:0", "copy"])
+				continue
+			# The option only reaches every stream when it is given to each of them.
+			command.extend([f"-force_key_frames:v:{index}", forced])
+			if width and height:
+				max_rate = round(width * height * frame_rate * HLS_BITS_PER_PIXEL)
+				command.extend([f"-maxrate:v:{index}", str(max_rate), f"-bufsize:v:{index}", str(2 * max_rate)])
+		if has_audio:
+			command.extend(["-c:a", "copy" if copy_audio else "aac"])
+
+		command.extend(
+			[
+				"-f",
+				"hls",
+				"-hls_time",
+				str(segment_duration),
+				"-hls_playlist_type",
+				"vod",
+				"-hls_segment_type",
+				"fmp4",
+				"-hls_fmp4_init_filename",
+				"init.mp4",
+				"-hls_segment_filename",
+				os.path.join(output_dir, "%v", "segment%05d.m4s"),
+				"-master_pl_name",
+				HLS_MASTER_PLAYLIST,
+				"-var_stream_map",
+				" ".join(variants),
+				os.path.join(output_dir, "%v", "index.m3u8"),
+			],
+		)
+		encodes = bool(scaled) or not copy_video or (has_audio and not copy_audio)
+		return command, WorkClass.ENCODE if encodes else WorkClass.COPY
@@ -1,5 +1,6 @@
 import enum
 import os
+import tempfile
 from functools import lru_cache
 from typing import Any
 
@@ -47,12 +48,86 @@ class Settings:
 
 		self.DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./videoverse.db")
 
+		# Seconds a request may take before its response starts, 0 lets it run until the client disconnects.
+		self.REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", 300))
+		# Longest deadline a client may ask for with an X-Request-Timeout header.
+		self.MAX_REQUEST_TIMEOUT = float(os.getenv("MAX_REQUEST_TIMEOUT", 3600))
+
 		self.USE_HYPERCORN: bool = os.getenv("USE_HYPERCORN", "False").lower() == "true"
 
 		self.MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 25))
+		self.UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+		self.MAX_RESUMABLE_FILE_SIZE = int(os.getenv("MAX_RESUMABLE_FILE_SIZE", 2048))
+		self.UPLOAD_SESSION_DIR: str = os.getenv(
+			"UPLOAD_SESSION_DIR",
+			os.path.join(tempfile.gettempdir(), "videoverse-uploads"),
+		)
 		self.MIN_DURATION = int(os.getenv("MIN_DURATION", 5))
 		self.MAX_DURATION = int(os.getenv("MAX_DURATION", 300))
 		self.EXPIRATION_TIME = int(os.getenv("EXPIRATION_TIME", 60))
+		self.MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 500))
+		# Clips of one batch trim, they are all cut by a single ffmpeg process.
+		self.MAX_BATCH_CLIPS = int(os.getenv("MAX_BATCH_CLIPS", 50))
+
+		self.STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "firebase").lower()
+		self.FIREBASE_CREDENTIALS: str = os.getenv("FIREBASE_CREDENTIALS", "creds.json")
+		self.FIREBASE_STORAGE_BUCKET: str = os.getenv("FIREBASE_STORAGE_BUCKET", "videoverse-c744a.appspot.com")
+		self.LOCAL_STORAGE_DIR: str = os.getenv("LOCAL_STORAGE_DIR", "./storage")
+		self.LOCAL_STORAGE_BASE_URL: str = os.getenv(
+			"LOCAL_STORAGE_BASE_URL", f"http://localhost:{self.PORT}/api/storage"
+		)
+		self.STORAGE_SIGNING_KEY: str = os.getenv("STORAGE_SIGNING_KEY", "")
+		self.STORAGE_MAX_WORKERS = int(os.getenv("STORAGE_MAX_WORKERS", 8))
+		# Resumable upload chunk size in bytes, Cloud Storage requires a multiple of 256 KiB.
+		self.STORAGE_UPLOAD_CHUNK_SIZE = int(os.getenv("STORAGE_UPLOAD_CHUNK_SIZE", 32 * 1024 * 1024))
+		# Objects from this many bytes on are downloaded as parallel byte ranges, 0 always uses a single stream.
+		self.STORAGE_RANGE_THRESHOLD = int(os.getenv("STORAGE_RANGE_THRESHOLD", 64 * 1024 * 1024))
+		self.STORAGE_RANGE_CHUNK_SIZE = int(os.getenv("STORAGE_RANGE_CHUNK_SIZE", 16 * 1024 * 1024))
+		self.STORAGE_RANGE_PARALLELISM = int(os.getenv("STORAGE_RANGE_PARALLELISM", 4))
+		# Number of videos whose signed share URLs are kept for reuse, 0 signs every request.
+		self.SIGNED_URL_CACHE_SIZE = int(os.getenv("SIGNED_URL_CACHE_SIZE", 10000))
+		# A cached URL is reused while it covers the requested lifetime within this fraction.
+		self.SIGNED_URL_MIN_REMAINING = float(os.getenv("SIGNED_URL_MIN_REMAINING", 0.9))
+		# Signed HLS manifests are served from here, their playlists point at signed URLs of the stored segments.
+		self.PLAYBACK_BASE_URL: str = os.getenv("PLAYBACK_BASE_URL", f"http://localhost:{self.PORT}/api/playback")
+		self.BLOB_CACHE_DIR: str = os.getenv(
+			"BLOB_CACHE_DIR",
+			os.path.join(tempfile.gettempdir(), "videoverse-blob-cache"),
+		)
+		# Size of the local copy of stored videos in MB, 0 disables the cache.
+		self.BLOB_CACHE_SIZE = int(os.getenv("BLOB_CACHE_SIZE", 2048))
+
+		self.FFMPEG_MAX_PROCESSES = int(os.getenv("FFMPEG_MAX_PROCESSES", os.cpu_count() or 1))
+		self.FFMPEG_TIMEOUT = float(os.getenv("FFMPEG_TIMEOUT", 600))
+		# Cores ffmpeg may use across every server process on the host, 0 falls back to FFMPEG_MAX_PROCESSES.
+		self.FFMPEG_CPU_BUDGET = int(os.getenv("FFMPEG_CPU_BUDGET", os.cpu_count() or 1))
+		# Threads, and cores of the budget, given to each re-encode. Stream copies get one.
+		self.FFMPEG_ENCODE_THREADS = int(os.getenv("FFMPEG_ENCODE_THREADS", 4))
+		self.FFMPEG_SLOT_DIR: str = os.getenv(
+			"FFMPEG_SLOT_DIR",
+			os.path.join(tempfile.gettempdir(), "videoverse-ffmpeg-slots"),
+		)
+		# Finished ffmpeg runs kept with their progress for the monitoring endpoints.
+		self.FFMPEG_PROGRESS_HISTORY = int(os.getenv("FFMPEG_PROGRESS_HISTORY", 100))
+		self.FFPROBE_MAX_PROCESSES = int(os.getenv("FFPROBE_MAX_PROCESSES", 2 * (os.cpu_count() or 1)))
+		self.FFPROBE_TIMEOUT = float(os.getenv("FFPROBE_TIMEOUT", 30))
+
+		# Package every uploaded, trimmed and merged video for HLS playback, shares can still ask for a package.
+		self.HLS_PACKAGING: bool = os.getenv("HLS_PACKAGING", "False").lower() == "true"
+		# Heights of the scaled renditions added to a package, comma separated. Empty only repackages the source.
+		self.HLS_RENDITIONS: list[int] = [
+			int(height) for height in os.getenv("HLS_RENDITIONS", "").split(",") if height.strip()
+		]
+		self.HLS_SEGMENT_DURATION = float(os.getenv("HLS_SEGMENT_DURATION", 6))
+
+		# Trim and merge run as background jobs on this many workers per server process.
+		self.JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+		# Queued jobs beyond this count are refused until the workers catch up.
+		self.JOB_QUEUE_DEPTH = int(os.getenv("JOB_QUEUE_DEPTH", 100))
+		# Seconds an idle worker waits before looking for jobs queued by other server processes.
+		self.JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 1))
+		# Seconds between liveness updates of a running job, one missed for four intervals is marked failed.
+		self.JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", 30))
 
 	def __getitem__(self, key: str) -> Any:
 		return getattr(self, key)
@@ -1,6 +1,16 @@
+import json
+from contextlib import aclosing
+from typing import AsyncIterator
+
 from fastapi import APIRouter
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import StreamingResponse
 
 from videoverse_backend.core import DEFAULT_ROUTE_OPTIONS, CommonResponseSchema, StatusEnum
+from videoverse_backend.services import VideoService, ffmpeg_progress
+
+# Seconds between comments on an idle event stream, so proxies do not close it.
+EVENT_STREAM_HEARTBEAT = 15.0
 
 router = APIRouter()
 
@@ -18,3 +28,52 @@ def health_check() -> CommonResponseSchema:
 		status=StatusEnum.SUCCESS,
 		message="The project is healthy.",
 	)
+
+
+@health_router.get("/monitoring/ffmpeg", **DEFAULT_ROUTE_OPTIONS)
+def ffmpeg_scheduler_stats() -> CommonResponseSchema:
+	"""
+	Reports the ffmpeg core budget and, per kind of work, the time spent queued against the time spent running.
+
+	The figures cover the server process that answers the request.
+	"""
+	scheduler = VideoService.ffmpeg_scheduler
+	if scheduler is None:
+		return CommonResponseSchema(status=StatusEnum.SUCCESS, message="The ffmpeg scheduler is disabled.")
+	return CommonResponseSchema(
+		status=StatusEnum.SUCCESS,
+		message="ffmpeg scheduler statistics.",
+		data=scheduler.snapshot(),
+	)
+
+
+@health_router.get("/monitoring/ffmpeg/progress", **DEFAULT_ROUTE_OPTIONS)
+def ffmpeg_progress_stats() -> CommonResponseSchema:
+	"""
+	Reports out_time, fps, speed and bitrate of the running ffmpeg processes and of the recently finished ones.
+
+	The real-time factor of every run is the output time it produced per second of wall time. The figures
+	cover the server process that answers the request, which is named in the response.
+	"""
+	return CommonResponseSchema(
+		status=StatusEnum.SUCCESS,
+		message="ffmpeg progress.",
+		data=jsonable_encoder(ffmpeg_progress.snapshot()),
+	)
+
+
+@health_router.get("/monitoring/ffmpeg/progress/events")
+async def ffmpeg_progress_events() -> StreamingResponse:
+	"""
+	Streams the progress of the ffmpeg processes as Server-Sent Events.
+
+	Every running process is sent first, then each update as a `progress` event. A client that falls behind
+	skips intermediate updates.
+	"""
+
+	async def events() -> AsyncIterator[str]:
+		async with aclosing(ffmpeg_progress.updates(EVENT_STREAM_HEARTBEAT)) as updates:
+			async for run in updates:
+				yield ": heartbeat\n\n" if run is None else f"event: progress\ndata: {json.dumps(run.to_dict())}\n\n"
+
+	return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
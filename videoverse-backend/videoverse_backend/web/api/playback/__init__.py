@@ -0,0 +1,5 @@
+"""Signed HLS playlists of packaged videos."""
+
+from videoverse_backend.web.api.playback.views import playback_router
+
+__all__ = ["playback_router"]
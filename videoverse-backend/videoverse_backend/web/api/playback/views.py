@@ -0,0 +1,45 @@
+import time
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+from pydantic import UUID4
+from starlette.status import HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
+
+from videoverse_backend.dao import VideoDAO
+from videoverse_backend.services import PlaybackService, playback_service
+from videoverse_backend.services.playback_service import HLS_PLAYLIST_TYPE
+
+playback_router = APIRouter(prefix="/playback", tags=["Playback"])
+
+
+@playback_router.get(
+	"/{video_id}/{expires}/{signature}/{playlist_path:path}",
+	summary="Fetch a playlist through a signed manifest URL",
+	include_in_schema=False,
+)
+async def get_signed_playlist(video_id: UUID4, expires: int, signature: str, playlist_path: str) -> Response:
+	"""
+	Serve a playlist of the HLS package of a video.
+
+	:param video_id: packaged video.
+	:param expires: unix time after which the link is no longer valid.
+	:param signature: HMAC of the video and the expiry time.
+	:param playlist_path: playlist relative to the master playlist.
+	:returns: the playlist, with its segments pointing at signed URLs of the storage.
+	"""
+	if not playback_service.verify_signature(video_id, expires, signature):
+		raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Invalid or expired signature")
+	video = await VideoDAO().get(video_id)  # type: ignore
+	storage_path = PlaybackService.resolve_playlist(video.hls_path, playlist_path) if video and video.hls_path else None
+	if storage_path is None:
+		raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Not Found")
+	try:
+		playlist = await playback_service.render_playlist(storage_path, expires)
+	except FileNotFoundError:
+		raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Not Found")
+	# Stored playlists never change, the rendered one holds as long as the URLs in it.
+	return Response(
+		playlist,
+		media_type=HLS_PLAYLIST_TYPE,
+		headers={"Cache-Control": f"private, max-age={max(expires - int(time.time()), 0)}"},
+	)
@@ -3,6 +3,8 @@ from fastapi.routing import APIRouter
 from videoverse_backend.web.api.docs import docs_router
 from videoverse_backend.web.api.echo import echo_router
 from videoverse_backend.web.api.monitoring import health_router
+from videoverse_backend.web.api.playback import playback_router
+from videoverse_backend.web.api.storage import storage_router
 from videoverse_backend.web.api.video import video_router
 
 api_router = APIRouter()
@@ -10,3 +12,5 @@ api_router.include_router(health_router)
 api_router.include_router(docs_router)
 api_router.include_router(echo_router)
 api_router.include_router(video_router)
+api_router.include_router(storage_router)
+api_router.include_router(playback_router)
@@ -0,0 +1,5 @@
+"""Signed file access for the local storage backend."""
+
+from videoverse_backend.web.api.storage.views import storage_router
+
+__all__ = ["storage_router"]
@@ -0,0 +1,37 @@
+import os
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse
+from starlette.status import HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
+
+from videoverse_backend.services.storage import LocalStorage, storage
+
+storage_router = APIRouter(prefix="/storage", tags=["Storage"])
+
+
+@storage_router.get("/{storage_path:path}", summary="Download a file through a signed URL", include_in_schema=False)
+async def download_signed_file(
+	storage_path: str,
+	expires: int = Query(...),
+	signature: str = Query(...),
+) -> FileResponse:
+	"""
+	Serve a file of the local storage backend.
+
+	:param storage_path: path of the file in the storage.
+	:param expires: unix time after which the link is no longer valid.
+	:param signature: HMAC of the path and the expiry time.
+	:returns: the stored file.
+	"""
+	backend = storage.backend
+	if not isinstance(backend, LocalStorage):
+		raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Not Found")
+	if not backend.verify_signature(storage_path, expires, signature):
+		raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Invalid or expired signature")
+	try:
+		file_path = backend.resolve(storage_path)
+	except ValueError:
+		raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Not Found")
+	if not os.path.isfile(file_path):
+		raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Not Found")
+	return FileResponse(file_path)
@@ -1,26 +1,65 @@
 import asyncio
+import glob
+import hashlib
+import mimetypes
 import os
+import shutil
 import subprocess
 import tempfile as sync_tempfile
-from contextlib import contextmanager
+from contextlib import AsyncExitStack, aclosing, contextmanager, suppress
 from datetime import UTC, datetime, timedelta
-from typing import Any
-from uuid import uuid4
+from typing import Any, AsyncGenerator, AsyncIterator, Sequence
+from uuid import UUID, uuid4
 
 import aiofiles
-from aiofiles import tempfile
-from fastapi import UploadFile
 from fastapi.encoders import jsonable_encoder
 from pydantic import UUID4
 from starlette import status
+from starlette.responses import Response
 
-from videoverse_backend.core import APIResponse, StatusEnum, logger
-from videoverse_backend.dao import VideoDAO
-from videoverse_backend.db import VideoModel
-from videoverse_backend.services import FileService, VideoService
-from videoverse_backend.services.firebase_service import firebase_service
+from videoverse_backend.core import (
+	APIResponse,
+	JobKind,
+	JobStatus,
+	RangeResponse,
+	StatusEnum,
+	logger,
+	parse_range_header,
+	requested_deadline,
+)
+from videoverse_backend.core.errors import (
+	FileTooLargeError,
+	JobError,
+	JobQueueFullError,
+	MalformedUploadError,
+	UnsupportedMediaError,
+)
+from videoverse_backend.dao import JobDAO, UploadSessionDAO, VideoDAO, VideoSegmentDAO
+from videoverse_backend.db import VideoModel, VideoSegmentModel
+from videoverse_backend.services import DerivationCache, FileService, VideoService, job_queue, playback_service
+from videoverse_backend.services.file_service import MULTIPART_OVERHEAD, STREAM_HEADER_SIZE, IngestedFile
+from videoverse_backend.services.job_queue import ReportProgress
+from videoverse_backend.services.storage import SignedUrl, storage
+from videoverse_backend.services.video_service import (
+	AUDIO_ENCODERS,
+	MergePlan,
+	ProbeMetadata,
+	Segment,
+	StreamMuxer,
+)
 from videoverse_backend.settings import settings
-from videoverse_backend.web.api.video.schema import MergeSchema, ShareLinkSchema, TrimSchema, TrimType
+from videoverse_backend.web.api.video.schema import (
+	BatchShareLinkSchema,
+	BatchTrimSchema,
+	MergeMode,
+	MergeSchema,
+	Playback,
+	ShareLinkSchema,
+	TrimMode,
+	TrimSchema,
+	TrimType,
+	UploadSessionSchema,
+)
 
 
 class VideoController:
@@ -39,24 +78,63 @@ class VideoController:
 				os.unlink(path)
 
 	@staticmethod
-	async def upload_video(file: UploadFile) -> APIResponse:
-		try:
-			file_size = FileService.get_file_size(file)
-			if file_size > settings.MAX_FILE_SIZE:
-				return APIResponse(
-					status_=StatusEnum.ERROR,
-					message=f"File size must be less than {settings.MAX_FILE_SIZE}MB",
-					status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-				)
+	async def upload_video(content_type: str, content_length: int | None, body: AsyncIterator[bytes]) -> APIResponse:
+		"""
+		Store a video uploaded as the ``file`` field of a ``multipart/form-data`` body.
 
-			async with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-				await temp_file.write(await file.read())
-				temp_file_path = temp_file.name
+		The body is read straight from the client, an upload that is too large or not a video is turned
+		down before the rest of it is received.
+		"""
+		max_size = settings.MAX_FILE_SIZE * 1024 * 1024
+		temp_file_path: str | None = None
+		try:
+			if content_length is not None and content_length > max_size + MULTIPART_OVERHEAD:
+				raise FileTooLargeError(f"File size must be less than {max_size} bytes")
+			filename, chunks = await FileService.read_multipart_file(content_type, body)
+			ingested = await FileService.stream_to_disk(chunks, max_size)
+			temp_file_path = ingested.path
+			return await VideoController._store_uploaded_video(ingested, filename)
+		except FileTooLargeError:
+			return APIResponse(
+				status_=StatusEnum.ERROR,
+				message=f"File size must be less than {settings.MAX_FILE_SIZE}MB",
+				status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+			)
+		except UnsupportedMediaError as exception:
+			return APIResponse(
+				status_=StatusEnum.ERROR,
+				message=str(exception),
+				status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+			)
+		except MalformedUploadError as exception:
+			return APIResponse(
+				status_=StatusEnum.ERROR,
+				message=str(exception),
+				status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+			)
+		except Exception as exception:
+			logger.error(f"Error while uploading video: {exception}")
+			return APIResponse(
+				status_=StatusEnum.ERROR,
+				message="Error while uploading video",
+				data={"error": str(exception)},
+				status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+			)
+		finally:
+			if temp_file_path and os.path.exists(temp_file_path):
+				os.unlink(temp_file_path)
 
-			duration = VideoService.get_video_duration(temp_file_path)
+	@staticmethod
+	async def _store_uploaded_video(ingested: IngestedFile, filename: str) -> APIResponse:
+		duplicate = await VideoDAO().get_by_content_hash(ingested.sha256)  # type: ignore
+		if duplicate:
+			logger.info(f"Upload {filename} has the same content as video {duplicate.id}, reusing {duplicate.path}")
+			storage_path = duplicate.path
+			metadata = {**VideoController._probe_columns(duplicate), "hls_path": duplicate.hls_path}
+		else:
+			duration = await VideoService.get_video_duration(ingested.path)
 			if not (settings.MIN_DURATION <= duration <= settings.MAX_DURATION):
 				logger.info(f"Removing video since its duration is {duration}")
-				os.unlink(temp_file_path)  # type: ignore
 				return APIResponse(
 					status_=StatusEnum.ERROR,
 					message=f"Video duration must be between {settings.MIN_DURATION} and {settings.MAX_DURATION} "
@@ -64,34 +142,305 @@ class VideoController:
 					status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
 				)
 
-			filename_without_extension, extension = os.path.splitext(file.filename)  # type: ignore
-			firebase_path = f"videos/{filename_without_extension}_{uuid4()}{extension}"
-			firebase_service.upload_file(firebase_path, temp_file_path)
+			metadata = (await VideoService.probe_video(ingested.path)).to_columns()
+			filename_without_extension, extension = os.path.splitext(filename)
+			storage_path = f"videos/{filename_without_extension}_{uuid4()}{extension}"
+			await storage.upload_file(storage_path, ingested.path)
 
-			video = await VideoDAO().create(  # type: ignore
+		video = await VideoDAO().create(  # type: ignore
+			{
+				**metadata,
+				"filename": filename,
+				"path": storage_path,
+				"size": ingested.size / (1024 * 1024),
+				"content_hash": ingested.sha256,
+			},
+		)
+		await VideoController._queue_packaging(video)
+		return APIResponse(
+			status_=StatusEnum.SUCCESS,
+			message="Video uploaded successfully",
+			data=jsonable_encoder(
 				{
-					"filename": file.filename,
-					"path": firebase_path,
-					"duration": duration,
-					"size": file_size,
+					"id": video.id,
 				},
-			)
+			),
+			status_code=status.HTTP_201_CREATED,
+		)
+
+	@staticmethod
+	async def _store_output(output: IngestedFile, storage_path: str) -> dict[str, Any]:
+		"""
+		Store a produced file unless a video with the same content is already stored.
+
+		New content is probed once and uploaded, known content reuses the blob, the metadata and
+		the HLS package of the existing video.
+
+		:param output: the produced file.
+		:param storage_path: where to store the file when its content is new.
+		:return: storage, size and probe columns for the video row.
+		"""
+		columns: dict[str, Any] = {
+			"size": output.size / (1024 * 1024),
+			"content_hash": output.sha256,
+		}
+		duplicate = await VideoDAO().get_by_content_hash(output.sha256)  # type: ignore
+		if duplicate:
+			logger.info(f"Output has the same content as video {duplicate.id}, reusing {duplicate.path}")
+			return {
+				**columns,
+				**VideoController._probe_columns(duplicate),
+				"path": duplicate.path,
+				"hls_path": duplicate.hls_path,
+			}
+
+		metadata = await VideoService.probe_video(output.path)
+		await storage.upload_file(storage_path, output.path)
+		return {**columns, **metadata.to_columns(), "path": storage_path, "hls_path": None}
+
+	@staticmethod
+	async def _replace_content(video: VideoModel, output: IngestedFile, storage_path: str) -> VideoModel:
+		"""
+		Make a produced file the content of an existing video.
+
+		The file is stored under a new path and the row switches to it in a single update, so a job cancelled
+		on the way leaves the video with its old content and the metadata that describes it. The old file is
+		deleted once no video refers to it anymore, which is also the case when the new content deduplicated to
+		the file of another video.
+		"""
+		await VideoController._detach_virtual_videos(video)
+		await DerivationCache.invalidate(video.id)
+		previous_path = video.path
+		stored = await VideoController._store_output(output, storage_path)
+		updated = await VideoDAO().update(video.id, stored)  # type: ignore
+		if updated is None:
+			raise JobError(f"Video {video.id} was deleted")
+		if previous_path is not None and updated.path != previous_path:
+			# The row already moved on, a cancellation must not leave the old file behind.
+			await asyncio.shield(VideoController._delete_if_unreferenced(previous_path))
+		return updated
+
+	@staticmethod
+	def _probe_columns(video: VideoModel) -> dict[str, Any]:
+		return {field: getattr(video, field) for field in ProbeMetadata._fields}
+
+	@staticmethod
+	async def create_upload_session(body: UploadSessionSchema) -> APIResponse:
+		if body.length > settings.MAX_RESUMABLE_FILE_SIZE * 1024 * 1024:
 			return APIResponse(
-				status_=StatusEnum.SUCCESS,
-				message="Video uploaded successfully",
-				data={
-					"id": video.id,
+				status_=StatusEnum.ERROR,
+				message=f"File size must be less than {settings.MAX_RESUMABLE_FILE_SIZE}MB",
+				status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+			)
+
+		upload_session = await UploadSessionDAO().create(  # type: ignore
+			{
+				"filename": body.filename,
+				"length": body.length,
+				"offset": 0,
+			},
+		)
+		os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+
+		return APIResponse(
+			status_=StatusEnum.SUCCESS,
+			message="Upload session created successfully",
+			data=jsonable_encoder(
+				{
+					"id": upload_session.id,
+					"offset": upload_session.offset,
+					"length": upload_session.length,
 				},
-				status_code=status.HTTP_201_CREATED,
+			),
+			status_code=status.HTTP_201_CREATED,
+		)
+
+	@staticmethod
+	async def get_upload_session(upload_id: UUID4) -> APIResponse:
+		upload_session = await UploadSessionDAO().get(upload_id)  # type: ignore
+		if not upload_session:
+			return VideoController._upload_session_not_found()
+
+		response = APIResponse(
+			status_=StatusEnum.SUCCESS,
+			message="Upload session status",
+			data=jsonable_encoder(
+				{
+					"id": upload_session.id,
+					"offset": upload_session.offset,
+					"length": upload_session.length,
+				},
+			),
+		)
+		response.headers["Upload-Offset"] = str(upload_session.offset)
+		response.headers["Upload-Length"] = str(upload_session.length)
+		return response
+
+	@staticmethod
+	async def append_upload_chunk(upload_id: UUID4, offset: int, chunks: AsyncIterator[bytes]) -> APIResponse:
+		upload_session = await UploadSessionDAO().get(upload_id)  # type: ignore
+		if not upload_session:
+			return VideoController._upload_session_not_found()
+
+		if offset != upload_session.offset:
+			return VideoController._upload_offset_conflict(upload_session.offset)
+
+		# Every request writes a file of its own, requests racing for the same offset never mix their bytes.
+		staging_path = os.path.join(settings.UPLOAD_SESSION_DIR, f"{upload_session.id}.{uuid4()}.staging")
+		async with aiofiles.open(staging_path, "wb"):
+			pass
+		too_large = False
+		try:
+			await FileService.write_chunks_at(staging_path, 0, chunks, upload_session.length - offset)
+		except FileTooLargeError:
+			too_large = True
+		finally:
+			# Whatever reached the disk counts, so an interrupted PATCH can resume from there.
+			new_offset = await VideoController._store_upload_segment(upload_session.id, offset, staging_path)
+
+		if new_offset is None:
+			upload_session = await UploadSessionDAO().get(upload_id)  # type: ignore
+			if not upload_session:
+				return VideoController._upload_session_not_found()
+			return VideoController._upload_offset_conflict(upload_session.offset)
+		if too_large:
+			return APIResponse(
+				status_=StatusEnum.ERROR,
+				message="The chunk goes past the declared upload length",
+				status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+			)
+
+		response = APIResponse(
+			status_=StatusEnum.SUCCESS,
+			message="Chunk stored successfully",
+			data={"offset": new_offset, "length": upload_session.length},
+		)
+		response.headers["Upload-Offset"] = str(new_offset)
+		return response
+
+	@staticmethod
+	async def complete_upload_session(upload_id: UUID4) -> APIResponse:
+		upload_session = await UploadSessionDAO().get(upload_id)  # type: ignore
+		if not upload_session:
+			return VideoController._upload_session_not_found()
+
+		received = upload_session.offset
+		part_path = os.path.join(settings.UPLOAD_SESSION_DIR, f"{upload_session.id}.{uuid4()}.complete")
+		try:
+			if received == upload_session.length:
+				received = await asyncio.to_thread(VideoController._join_upload_segments, upload_session.id, part_path)
+				if received != upload_session.length:
+					# A chunk was counted but never stored, the client sends everything after the stored ones again.
+					await UploadSessionDAO().advance(upload_session.id, upload_session.length, received)  # type: ignore
+			if received != upload_session.length:
+				return APIResponse(
+					status_=StatusEnum.ERROR,
+					message=f"Upload is incomplete, {received} of {upload_session.length} bytes received",
+					status_code=status.HTTP_409_CONFLICT,
+				)
+
+			ingested = await FileService.inspect_file(part_path)
+			response = await VideoController._store_uploaded_video(ingested, upload_session.filename)
+		except UnsupportedMediaError as exception:
+			await VideoController._discard_upload_session(upload_session.id)
+			return APIResponse(
+				status_=StatusEnum.ERROR,
+				message=str(exception),
+				status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
 			)
 		except Exception as exception:
-			logger.error(f"Error while uploading video: {exception}")
+			# The stored chunks are kept, completing the upload can be retried.
+			logger.error(f"Error while completing upload {upload_id}: {exception}")
 			return APIResponse(
 				status_=StatusEnum.ERROR,
 				message="Error while uploading video",
 				data={"error": str(exception)},
 				status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
 			)
+		finally:
+			if os.path.exists(part_path):
+				os.unlink(part_path)
+
+		# The video was stored, or its content will never be accepted.
+		await VideoController._discard_upload_session(upload_session.id)
+		return response
+
+	@staticmethod
+	async def delete_upload_session(upload_id: UUID4) -> APIResponse:
+		upload_session = await UploadSessionDAO().get(upload_id)  # type: ignore
+		if not upload_session:
+			return VideoController._upload_session_not_found()
+
+		await VideoController._discard_upload_session(upload_session.id)
+		return APIResponse(
+			status_=StatusEnum.SUCCESS,
+			message="Upload session deleted successfully",
+		)
+
+	@staticmethod
+	def _upload_segment_path(upload_id: Any, offset: int) -> str:
+		return os.path.join(settings.UPLOAD_SESSION_DIR, f"{upload_id}.{offset:020d}.part")
+
+	@staticmethod
+	async def _store_upload_segment(upload_id: Any, offset: int, staging_path: str) -> int | None:
+		"""
+		Make a written chunk part of an upload, unless another request stored a chunk at its offset first.
+
+		:param upload_id: upload the chunk belongs to.
+		:param offset: position of the chunk in the upload.
+		:param staging_path: file the chunk was written to, it is moved or removed.
+		:return: offset of the upload after the chunk, or None when the chunk was discarded.
+		"""
+		received = os.path.getsize(staging_path) if os.path.exists(staging_path) else 0
+		try:
+			if not received:
+				return offset
+			if not await UploadSessionDAO().advance(upload_id, offset, offset + received):  # type: ignore
+				return None
+			# Named after its offset, a chunk that is sent again replaces the one stored there before.
+			os.replace(staging_path, VideoController._upload_segment_path(upload_id, offset))
+			return offset + received
+		finally:
+			if os.path.exists(staging_path):
+				os.unlink(staging_path)
+
+	@staticmethod
+	def _join_upload_segments(upload_id: Any, part_path: str) -> int:
+		"""
+		Concatenate the stored chunks of an upload from its start, up to the first one that is missing.
+
+		:return: number of bytes written to ``part_path``.
+		"""
+		with open(part_path, "wb") as part_file:
+			while os.path.exists(segment_path := VideoController._upload_segment_path(upload_id, part_file.tell())):
+				with open(segment_path, "rb") as segment:
+					shutil.copyfileobj(segment, part_file)
+			return part_file.tell()
+
+	@staticmethod
+	async def _discard_upload_session(upload_id: Any) -> None:
+		for path in glob.glob(os.path.join(settings.UPLOAD_SESSION_DIR, f"{upload_id}.*")):
+			with suppress(FileNotFoundError):
+				os.unlink(path)
+		await UploadSessionDAO().delete(upload_id)  # type: ignore
+
+	@staticmethod
+	def _upload_offset_conflict(offset: int) -> APIResponse:
+		response = APIResponse(
+			status_=StatusEnum.ERROR,
+			message=f"Upload-Offset does not match the current offset {offset}",
+			status_code=status.HTTP_409_CONFLICT,
+		)
+		response.headers["Upload-Offset"] = str(offset)
+		return response
+
+	@staticmethod
+	def _upload_session_not_found() -> APIResponse:
+		return APIResponse(
+			status_=StatusEnum.ERROR,
+			message="The upload session does not exist",
+			status_code=status.HTTP_404_NOT_FOUND,
+		)
 
 	@staticmethod
 	async def list_videos() -> APIResponse:
@@ -100,7 +449,7 @@ class VideoController:
 			return APIResponse(
 				status_=StatusEnum.SUCCESS,
 				message="List of videos",
-				data=jsonable_encoder(videos),
+				data=jsonable_encoder(videos, exclude={"keyframes"}),
 			)
 		except Exception as exception:
 			logger.error(f"Error while listing videos: {exception}")
@@ -132,57 +481,231 @@ class VideoController:
 				status_code=status.HTTP_400_BAD_REQUEST,
 			)
 
-		temp_file_path = firebase_service.download_file(video.filename, video.path)
-		with VideoController.manage_temp_file(suffix=f".{video.filename.split('.')[-1]}") as temp_output_path:
-			try:
-				os.unlink(temp_output_path)  # Remove the file created by manage_temp_file
-				VideoService.trim_video(temp_file_path, start_time, end_time, temp_output_path)
-				new_duration = end_time - start_time  # type: ignore
-				new_size = os.path.getsize(temp_output_path) / (1024 * 1024)
+		if body.virtual:
+			return await VideoController._trim_virtually(body, video, start_time, end_time)  # type: ignore
+		if body.save_as_new:
+			reused = await VideoController._reuse_derivation(JobKind.TRIM, body, [video])
+			if reused:
+				return reused
+		return await VideoController._submit_job(JobKind.TRIM, body.model_dump(mode="json"))
+
+	@staticmethod
+	async def _trim_virtually(body: TrimSchema, video: VideoModel, start_time: float, end_time: float) -> APIResponse:
+		stored_segments = await VideoSegmentDAO().get_by_video(video.id)  # type: ignore
+		if not stored_segments and not body.save_as_new:
+			return APIResponse(
+				status_=StatusEnum.ERROR,
+				message="Only virtual videos can be trimmed virtually in place, save the trim as a new video",
+				status_code=status.HTTP_400_BAD_REQUEST,
+			)
+
+		segments = VideoService.cut_segments(
+			VideoController._as_segments(video, stored_segments),
+			start_time,
+			end_time,
+		)
+		columns = await VideoController._virtual_columns(segments)
+		if body.save_as_new:
+			file_name = video.filename.split(".")[0]
+			extension = video.filename.split(".")[-1]
+			new_video = await VideoDAO().create_with_segments(  # type: ignore
+				{**columns, "filename": f"{file_name}_trimmed_{uuid4()}.{extension}"},
+				[segment._asdict() for segment in segments],
+			)
+			return VideoController._virtual_video_created(new_video)
+
+		await VideoDAO().update_with_segments(  # type: ignore
+			video.id,
+			columns,
+			[segment._asdict() for segment in segments],
+		)
+		return APIResponse(
+			status_=StatusEnum.SUCCESS,
+			message="Video trimmed successfully",
+			data=jsonable_encoder({"id": video.id}),
+		)
+
+	@staticmethod
+	async def run_trim_job(payload: dict[str, Any], report_progress: ReportProgress) -> UUID4:
+		"""Trim handler of the job queue, returns the id of the trimmed video."""
+		body = TrimSchema.model_validate(payload)
+		video: VideoModel = await VideoDAO().get(body.video_id)  # type: ignore
+		if not video:
+			raise JobError("The video you are trying to trim does not exist")
+		video = await VideoController._materialize(video)
 
+		async with storage.open(VideoController._stored_path(video)) as source_path:
+			await report_progress(0.25)
+			with VideoController.manage_temp_file(suffix=f".{video.filename.split('.')[-1]}") as temp_output_path:
+				try:
+					os.unlink(temp_output_path)  # Remove the file created by manage_temp_file
+					await VideoController._trim_ffmpeg(body, video, source_path, temp_output_path)
+				except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+					logger.error(f"Error during video trimming: {e} {e.stderr!r}")
+					raise JobError("Error while trimming video") from e
+				await report_progress(0.75)
+				output = await FileService.inspect_file(temp_output_path)
+
+				trimmed_filename = VideoController._trimmed_filename(video)
 				if body.save_as_new:
-					file_name = video.filename.split(".")[0]
-					extension = video.filename.split(".")[-1]
-					trimmed_filename = f"{file_name}_trimmed_{uuid4()}.{extension}"
-					firebase_path = f"videos/{trimmed_filename}"
-					firebase_service.upload_file(firebase_path, temp_output_path)
-					await VideoDAO().create(  # type: ignore
+					stored = await VideoController._store_output(output, f"videos/{trimmed_filename}")
+					new_video = await VideoDAO().create(  # type: ignore
 						{
+							**stored,
 							"filename": trimmed_filename,
-							"path": firebase_path,
-							"duration": new_duration,
-							"size": new_size,
 						},
 					)
+					await VideoController._record_derivation(JobKind.TRIM, body, [video], new_video.id)
+					await VideoController._queue_packaging(new_video)
+					return new_video.id  # type: ignore
 
-					return APIResponse(
-						status_=StatusEnum.SUCCESS,
-						message="Video trimmed and saved as a new copy successfully",
-						status_code=status.HTTP_200_OK,
-					)
-				else:
-					firebase_service.upload_file(video.path, temp_output_path)
-					await VideoDAO().update(  # type: ignore
-						video.id,
-						{
-							"duration": new_duration,
-							"size": new_size,
-						},
-					)
+				updated_video = await VideoController._replace_content(video, output, f"videos/{trimmed_filename}")
+				await VideoController._queue_packaging(updated_video)
+				return video.id  # type: ignore
 
-					return APIResponse(
-						status_=StatusEnum.SUCCESS,
-						message="Video trimmed and updated successfully",
-						status_code=status.HTTP_200_OK,
-					)
+	@staticmethod
+	def _trimmed_filename(video: VideoModel) -> str:
+		file_name = video.filename.split(".")[0]
+		extension = video.filename.split(".")[-1]
+		return f"{file_name}_trimmed_{uuid4()}.{extension}"
 
-			except subprocess.CalledProcessError as e:
-				logger.error(f"Error during video trimming: {e}")
-				return APIResponse(
-					status_=StatusEnum.ERROR,
-					message="Error while trimming video",
-					status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+	@staticmethod
+	async def _trim_ffmpeg(body: TrimSchema, video: VideoModel, source_path: str, output_path: str) -> None:
+		# Trimming the start keeps everything up to the end of the file, whatever the catalogued duration says.
+		start_time, end_time = (body.trim_time, None) if body.trim_type == TrimType.START else (0, body.trim_time)
+		if body.trim_mode == TrimMode.SMART:
+			await VideoService.smart_trim_video(
+				source_path,
+				start_time,  # type: ignore
+				end_time,
+				output_path,
+				ProbeMetadata.unpack_keyframes(video.keyframes),
+				video.video_codec,
+				video.pixel_format,
+			)
+		elif body.trim_mode == TrimMode.PRECISE:
+			await VideoService.precise_trim_video(source_path, start_time, end_time, output_path, video.video_codec)
+		else:
+			await VideoService.trim_video(source_path, start_time, end_time, output_path)
+
+	@staticmethod
+	async def trim_video_batch(body: BatchTrimSchema) -> APIResponse:
+		video: VideoModel = await VideoDAO().get(body.video_id)  # type: ignore
+		if not video:
+			return APIResponse(
+				status_=StatusEnum.ERROR,
+				message="The video you are trying to trim does not exist",
+				status_code=status.HTTP_404_NOT_FOUND,
+			)
+
+		duration = video.duration
+		invalid = [
+			index for index, clip in enumerate(body.clips) if not clip.start < clip.end or clip.start >= duration
+		]
+		if invalid:
+			return APIResponse(
+				status_=StatusEnum.ERROR,
+				message="Invalid clips, every clip must start before its end and before the end of the video",
+				data={"clips": invalid},
+				status_code=status.HTTP_400_BAD_REQUEST,
+			)
+		if sum(not clip.save_as_new for clip in body.clips) > 1:
+			return APIResponse(
+				status_=StatusEnum.ERROR,
+				message="Only one clip can replace the video, save the other clips as new videos",
+				status_code=status.HTTP_400_BAD_REQUEST,
+			)
+		return await VideoController._submit_job(JobKind.BATCH_TRIM, body.model_dump(mode="json"))
+
+	@staticmethod
+	async def run_batch_trim_job(payload: dict[str, Any], report_progress: ReportProgress) -> list[UUID4]:
+		"""Batch trim handler of the job queue, returns the ids of the clips in request order."""
+		body = BatchTrimSchema.model_validate(payload)
+		video: VideoModel = await VideoDAO().get(body.video_id)  # type: ignore
+		if not video:
+			raise JobError("The video you are trying to trim does not exist")
+		video = await VideoController._materialize(video)
+		file_name = video.filename.split(".")[0]
+		extension = video.filename.split(".")[-1]
+
+		async with (
+			storage.open(VideoController._stored_path(video)) as source_path,
+			aiofiles.tempfile.TemporaryDirectory() as temp_dir,
+		):
+			await report_progress(0.25)
+			output_paths = [os.path.join(temp_dir, f"clip{index}.{extension}") for index in range(len(body.clips))]
+			try:
+				await VideoController._trim_clips_ffmpeg(body, video, source_path, output_paths)
+			except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+				logger.error(f"Error during batch trimming: {e} {e.stderr!r}")
+				raise JobError("Error while trimming video") from e
+			await report_progress(0.5)
+			outputs = await asyncio.gather(*(FileService.inspect_file(output_path) for output_path in output_paths))
+
+			clip_ids: list[UUID4 | None] = [None] * len(body.clips)
+			new_clips = [index for index, clip in enumerate(body.clips) if clip.save_as_new]
+			filenames = {index: f"{file_name}_trimmed_{uuid4()}.{extension}" for index in new_clips}
+			stored = await asyncio.gather(
+				*(VideoController._store_output(outputs[index], f"videos/{filenames[index]}") for index in new_clips),
+			)
+			await report_progress(0.75)
+			new_videos = await VideoDAO().create_many(  # type: ignore
+				[{**columns, "filename": filenames[index]} for index, columns in zip(new_clips, stored)],
+			)
+			for index, new_video in zip(new_clips, new_videos):
+				clip_ids[index] = UUID(str(new_video.id))
+				await VideoController._queue_packaging(new_video)
+
+			in_place = next((index for index, clip in enumerate(body.clips) if not clip.save_as_new), None)
+			if in_place is not None:
+				updated_video = await VideoController._replace_content(
+					video,
+					outputs[in_place],
+					f"videos/{file_name}_trimmed_{uuid4()}.{extension}",
 				)
+				clip_ids[in_place] = UUID(str(video.id))
+				await VideoController._queue_packaging(updated_video)
+			return clip_ids  # type: ignore
+
+	@staticmethod
+	async def _trim_clips_ffmpeg(
+		body: BatchTrimSchema,
+		video: VideoModel,
+		source_path: str,
+		output_paths: list[str],
+	) -> None:
+		if body.trim_mode != TrimMode.SMART:
+			await VideoService.trim_clips(
+				source_path,
+				[(clip.start, clip.end) for clip in body.clips],
+				output_paths,
+				precise=body.trim_mode == TrimMode.PRECISE,
+				video_codec=video.video_codec,
+			)
+			return
+
+		# A smart cut is made of pieces joined afterwards, so each clip takes its own processes.
+		tasks = [
+			asyncio.create_task(
+				VideoService.smart_trim_video(
+					source_path,
+					clip.start,
+					clip.end,
+					output_path,
+					ProbeMetadata.unpack_keyframes(video.keyframes),
+					video.video_codec,
+					video.pixel_format,
+				),
+			)
+			for clip, output_path in zip(body.clips, output_paths)
+		]
+		try:
+			await asyncio.gather(*tasks)
+		except BaseException:
+			for task in tasks:
+				task.cancel()
+			await asyncio.gather(*tasks, return_exceptions=True)
+			raise
 
 	@staticmethod
 	async def merge_videos(body: MergeSchema) -> APIResponse:
@@ -200,72 +723,571 @@ class VideoController:
 				status_code=status.HTTP_404_NOT_FOUND,
 			)
 
-		async with aiofiles.tempfile.TemporaryDirectory() as temp_dir:
-			try:
-				input_files = await VideoController._download_videos(videos, temp_dir)
+		# Mismatching videos are converted to the profile of the others, unless there is no encoder for it.
+		problem = VideoService.find_normalization_problem(videos, VideoService.plan_merge(videos))
+		if problem:
+			return APIResponse(
+				status_=StatusEnum.ERROR,
+				message=f"These videos cannot be merged. {problem}",
+				status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+			)
+
+		if body.virtual:
+			segments = []
+			for video in videos:
+				segments.extend(VideoController._as_segments(video, await VideoSegmentDAO().get_by_video(video.id)))  # type: ignore
+			new_video = await VideoDAO().create_with_segments(  # type: ignore
+				{**await VideoController._virtual_columns(segments), "filename": body.output_filename},
+				[segment._asdict() for segment in segments],
+			)
+			return VideoController._virtual_video_created(new_video)
+
+		if body.merge_mode == MergeMode.STREAM:
+			if VideoService.stream_muxer(body.output_filename) is None:
+				return APIResponse(
+					status_=StatusEnum.ERROR,
+					message="Streamed merges can only produce .mp4, .mov or .mkv files",
+					status_code=status.HTTP_400_BAD_REQUEST,
+				)
+			# The metadata of a streamed merge is derived from its inputs, there is no file to probe.
+			if any(video.video_codec is None for video in videos):
+				return APIResponse(
+					status_=StatusEnum.ERROR,
+					message="Videos stored before metadata was captured can only be merged in file mode",
+					status_code=status.HTTP_400_BAD_REQUEST,
+				)
+
+		reused = await VideoController._reuse_derivation(JobKind.MERGE, body, videos)
+		if reused:
+			return reused
+		return await VideoController._submit_job(JobKind.MERGE, body.model_dump(mode="json"))
+
+	@staticmethod
+	async def run_merge_job(payload: dict[str, Any], report_progress: ReportProgress) -> UUID4:
+		"""Merge handler of the job queue, returns the id of the merged video."""
+		body = MergeSchema.model_validate(payload)
+		videos = await VideoController._fetch_videos(body.video_ids)
+		if not videos:
+			raise JobError("One or more videos do not exist")
+		videos = list(await asyncio.gather(*(VideoController._materialize(video) for video in videos)))
+
+		plan = VideoService.plan_merge(videos)
+		if plan.outliers:
+			logger.info(
+				f"Converting {len(plan.outliers)} of {len(videos)} videos before merging. "
+				f"{VideoService.find_merge_incompatibility(videos)}",
+			)
+
+		muxer = VideoService.stream_muxer(body.output_filename)
+		if body.merge_mode == MergeMode.STREAM and muxer is not None:
+			new_video = await VideoController._stream_merge(videos, plan, body.output_filename, muxer, report_progress)
+		else:
+			async with aiofiles.tempfile.TemporaryDirectory() as temp_dir, AsyncExitStack() as sources:
+				input_files = await VideoController._open_videos(videos, sources)
+				input_files = await VideoController._normalize_inputs(
+					input_files, videos, plan, temp_dir, body.output_filename
+				)
+				await report_progress(0.25)
 
 				output_filename, output_path = await VideoController._merge_videos_ffmpeg(
 					input_files,
 					body.output_filename,
 					temp_dir,
 				)
+				await report_progress(0.75)
 
-				new_video = await VideoController._upload_and_save_video(output_filename, output_path, videos)
+				new_video = await VideoController._upload_and_save_video(output_filename, output_path)
 
-				return APIResponse(
-					status_=StatusEnum.SUCCESS,
-					message="Videos merged successfully",
-					status_code=status.HTTP_200_OK,
-					data=jsonable_encoder(
-						{
-							"new_video_id": new_video.id,
-							"filename": new_video.filename,
-							"duration": new_video.duration,
-							"size": new_video.size,
-						},
-					),
+		await VideoController._record_derivation(JobKind.MERGE, body, videos, new_video.id)
+		await VideoController._queue_packaging(new_video)
+		return new_video.id  # type: ignore
+
+	@staticmethod
+	async def _stream_merge(
+		videos: list[VideoModel],
+		plan: MergePlan,
+		output_filename: str,
+		muxer: StreamMuxer,
+		report_progress: ReportProgress,
+	) -> VideoModel:
+		"""
+		Merge while the inputs download and upload the output while it is produced.
+
+		Nothing but inputs that cannot be read front to back is staged on disk, the checksum and the
+		size of the output are taken on the way to the storage.
+		"""
+		filename, extension = os.path.splitext(output_filename)
+		storage_path = f"videos/{filename}_{uuid4()}{extension}"
+		digest = hashlib.sha256()
+		size = 0
+
+		async with AsyncExitStack() as sources:
+			# Inputs that get converted are read from local copies, the converted files are streamed from disk.
+			inputs = await asyncio.gather(
+				*(
+					sources.enter_async_context(storage.open(VideoController._stored_path(video)))
+					if index in plan.outliers
+					else VideoController._stream_source(video, sources)
+					for index, video in enumerate(videos)
+				),
+			)
+			if plan.outliers:
+				temp_dir = await sources.enter_async_context(aiofiles.tempfile.TemporaryDirectory())
+				inputs = await VideoController._normalize_inputs(inputs, videos, plan, temp_dir, output_filename)
+			await report_progress(0.25)
+			merged = VideoService.stream_merge_videos(inputs, muxer, settings.STORAGE_UPLOAD_CHUNK_SIZE)
+
+			async def measured() -> AsyncIterator[bytes]:
+				nonlocal size
+				async for chunk in merged:
+					digest.update(chunk)
+					size += len(chunk)
+					yield chunk
+
+			try:
+				async with aclosing(merged):  # type: ignore
+					await storage.upload_stream(storage_path, measured())
+			except (subprocess.CalledProcessError, subprocess.TimeoutExpired, BrokenPipeError) as e:
+				logger.error(f"Streamed merge failed: {e} {getattr(e, 'stderr', None)!r}")
+				raise JobError("Error while merging videos") from e
+		await report_progress(0.75)
+
+		columns: dict[str, Any] = {"size": size / (1024 * 1024), "content_hash": digest.hexdigest()}
+		duplicate = await VideoDAO().get_by_content_hash(digest.hexdigest())  # type: ignore
+		if duplicate:
+			logger.info(f"Output has the same content as video {duplicate.id}, reusing {duplicate.path}")
+			await storage.delete(storage_path)
+			stored = {
+				**columns,
+				**VideoController._probe_columns(duplicate),
+				"path": duplicate.path,
+				"hls_path": duplicate.hls_path,
+			}
+		else:
+			metadata = VideoService.concat_metadata(videos, muxer.container, size, plan)
+			stored = {**columns, **metadata.to_columns(), "path": storage_path}
+
+		return await VideoDAO().create({**stored, "filename": output_filename})  # type: ignore
+
+	@staticmethod
+	async def _normalize_inputs(
+		inputs: list[Any],
+		videos: list[VideoModel],
+		plan: MergePlan,
+		temp_dir: str,
+		output_filename: str,
+	) -> list[Any]:
+		if not plan.outliers:
+			return inputs
+		try:
+			return await VideoService.normalize_merge_inputs(
+				inputs,
+				videos,
+				plan,
+				temp_dir,
+				os.path.splitext(output_filename)[-1],
+			)
+		except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+			logger.error(f"Converting videos for a merge failed: {e} {e.stderr!r}")
+			raise JobError("Error while converting videos for the merge") from e
+
+	@staticmethod
+	async def _stream_source(video: VideoModel, sources: AsyncExitStack) -> str | AsyncGenerator[bytes, None]:
+		# A local copy costs nothing when it is cached or when the storage links it, otherwise stream it if ffmpeg can.
+		path = VideoController._stored_path(video)
+		info = await storage.stat(path)
+		if storage.backend.supports_ranges and not storage.is_cached(path, info):
+			header = await storage.read_range(path, info, 0, STREAM_HEADER_SIZE)
+			if FileService.is_streamable(header):
+				return storage.iter_chunks(path, info)  # type: ignore
+			logger.info(f"{path} cannot be read without seeking, fetching it before merging")
+		return await sources.enter_async_context(storage.open(path))
+
+	@staticmethod
+	def _as_segments(video: VideoModel, stored_segments: Sequence[VideoSegmentModel]) -> list[Segment]:
+		# A stored video plays as one segment covering all of it, a virtual one as the segments it was cut from.
+		if not stored_segments:
+			return [Segment(video.id, 0.0, video.duration)]
+		return [Segment(segment.source_video_id, segment.start, segment.end) for segment in stored_segments]
+
+	@staticmethod
+	async def _segment_sources(segments: list[Segment]) -> dict[Any, VideoModel]:
+		source_ids = list(dict.fromkeys(segment.source_video_id for segment in segments))
+		return {video.id: video for video in await VideoDAO().get_many(source_ids) if video}  # type: ignore
+
+	@staticmethod
+	async def _virtual_columns(segments: list[Segment]) -> dict[str, Any]:
+		metadata = VideoService.segment_metadata(segments, await VideoController._segment_sources(segments))
+		# Size, checksum, file and package are only known once the video is rendered.
+		return {**metadata.to_columns(), "path": None, "size": None, "content_hash": None, "hls_path": None}
+
+	@staticmethod
+	def _virtual_video_created(video: VideoModel) -> APIResponse:
+		return APIResponse(
+			status_=StatusEnum.SUCCESS,
+			message="Virtual video created, it is rendered when it is first shared",
+			data=jsonable_encoder({"id": video.id, "duration": video.duration}),
+			status_code=status.HTTP_201_CREATED,
+		)
+
+	@staticmethod
+	async def _materialize(video: VideoModel) -> VideoModel:
+		"""
+		Render a virtual video to a stored file the first time a file is needed.
+
+		Rendering runs in jobs only, requests for the file of a virtual video queue a render job. The file
+		is stored like any other output and kept on the row, so later shares and jobs reuse it until the
+		video is trimmed again. A video that is a single whole source reuses the source file.
+
+		:param video: any video, stored videos are returned as they are.
+		:return: the video with its path set.
+		"""
+		if video.path is not None:
+			return video
+
+		segments = VideoController._as_segments(video, await VideoSegmentDAO().get_by_video(video.id))  # type: ignore
+		sources = await VideoController._segment_sources(segments)
+		if len(segments) == 1 and segments[0].covers(sources[segments[0].source_video_id]):
+			source = sources[segments[0].source_video_id]
+			stored = {
+				**VideoController._probe_columns(source),
+				"path": source.path,
+				"size": source.size,
+				"content_hash": source.content_hash,
+				"hls_path": source.hls_path,
+			}
+		else:
+			logger.info(f"Rendering virtual video {video.id} from {len(segments)} segments")
+			async with aiofiles.tempfile.TemporaryDirectory() as temp_dir, AsyncExitStack() as opened:
+				output_path = await VideoController._render_segments(
+					segments, sources, video.filename, temp_dir, opened
 				)
+				output = await FileService.inspect_file(output_path)
+				filename, extension = os.path.splitext(video.filename)
+				stored = await VideoController._store_output(output, f"videos/{filename}_{uuid4()}{extension}")
 
-			except Exception as exception:
-				logger.error(f"Error while merging videos: {exception}")
-				return APIResponse(
-					status_=StatusEnum.ERROR,
-					message="Error while merging videos",
-					status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-					data={"error": str(exception)},
+		rendered = await VideoDAO().store_render(video.id, stored)  # type: ignore
+		if rendered is not None:
+			return rendered
+		# Another job rendered the video first, its file is the one that is kept.
+		logger.info(f"Virtual video {video.id} was rendered by another job")
+		await VideoController._delete_if_unreferenced(stored["path"])
+		return await VideoDAO().get(video.id)  # type: ignore
+
+	@staticmethod
+	async def _delete_if_unreferenced(storage_path: str) -> None:
+		if not await VideoDAO().count_by_path(storage_path):  # type: ignore
+			await storage.delete(storage_path)
+
+	@staticmethod
+	def _stored_path(video: VideoModel) -> str:
+		"""Path of the file of a video, virtual videos only have one once :meth:`_materialize` rendered them."""
+		if video.path is None:
+			raise JobError(f"Video {video.id} has not been rendered")
+		return video.path
+
+	@staticmethod
+	async def run_render_job(payload: dict[str, Any], report_progress: ReportProgress) -> UUID4:
+		"""Rendering handler of the job queue, returns the id of the rendered video."""
+		video = await VideoDAO().get(UUID(payload["video_id"]))  # type: ignore
+		if not video:
+			raise JobError("The video you are trying to render does not exist")
+		await VideoController._materialize(video)
+		return video.id  # type: ignore
+
+	@staticmethod
+	async def _render_segments(
+		segments: list[Segment],
+		sources: dict[Any, VideoModel],
+		filename: str,
+		temp_dir: str,
+		opened: AsyncExitStack,
+	) -> str:
+		# Every cut is frame-accurate and re-encodes as little as the keyframes allow, see smart trims.
+		source_files = dict(
+			zip(
+				sources,
+				await asyncio.gather(
+					*(
+						opened.enter_async_context(storage.open(VideoController._stored_path(source)))
+						for source in sources.values()
+					)
+				),  # type: ignore
+			),
+		)
+		extension = os.path.splitext(filename)[-1]
+		pieces, cuts = [], []
+		for index, segment in enumerate(segments):
+			source = sources[segment.source_video_id]
+			if segment.covers(source):
+				pieces.append(source_files[source.id])
+				continue
+			piece = os.path.join(temp_dir, f"segment{index}{extension}")
+			cuts.append(
+				VideoService.smart_trim_video(
+					source_files[source.id],
+					segment.start,
+					None if segment.end >= source.duration else segment.end,
+					piece,
+					ProbeMetadata.unpack_keyframes(source.keyframes),
+					source.video_codec,
+					source.pixel_format,
+					AUDIO_ENCODERS.get(source.audio_codec or ""),
+				),
+			)
+			pieces.append(piece)
+
+		try:
+			await asyncio.gather(*cuts)
+		except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+			logger.error(f"Cutting the segments of a virtual video failed: {e} {e.stderr!r}")
+			raise JobError("Error while rendering the video") from e
+		if len(pieces) == 1:
+			return pieces[0]
+
+		videos = [sources[segment.source_video_id] for segment in segments]
+		pieces = await VideoController._normalize_inputs(
+			pieces, videos, VideoService.plan_merge(videos), temp_dir, filename
+		)
+		_, output_path = await VideoController._merge_videos_ffmpeg(pieces, filename, temp_dir)
+		return output_path
+
+	@staticmethod
+	async def _detach_virtual_videos(video: VideoModel) -> None:
+		"""
+		Turn the video and the virtual videos cut from it into plain stored videos before its file changes.
+
+		Segments point into the current content of their sources, so the videos cut from this one are
+		rendered first and keep that file. The video itself stops being virtual as its new file no longer
+		matches its segments.
+		"""
+		video_ids = await VideoSegmentDAO().get_video_ids_by_source(video.id)  # type: ignore
+		for virtual_video in await VideoDAO().get_many(video_ids):  # type: ignore
+			await VideoController._materialize(virtual_video)  # type: ignore
+			await VideoSegmentDAO().delete_by_video(virtual_video.id)  # type: ignore
+		await VideoSegmentDAO().delete_by_video(video.id)  # type: ignore
+
+	@staticmethod
+	def _derivation_fingerprint(kind: JobKind, body: TrimSchema | MergeSchema, videos: list[VideoModel]) -> str | None:
+		# Only what changes the content is part of the key, every repeated merge gets the name it asks for.
+		if isinstance(body, TrimSchema):
+			parameters = body.model_dump(mode="json", include={"trim_time", "trim_type", "trim_mode"})
+		else:
+			parameters = {
+				"merge_mode": body.merge_mode.value,
+				"extension": os.path.splitext(body.output_filename)[-1].lower(),
+			}
+		return DerivationCache.fingerprint(kind.value, videos, parameters)
+
+	@staticmethod
+	async def _reuse_derivation(
+		kind: JobKind,
+		body: TrimSchema | MergeSchema,
+		videos: list[VideoModel],
+	) -> APIResponse | None:
+		"""
+		Answer with the output of an identical earlier operation, as a job that is already done.
+
+		The caller gets a video of its own under the name it asked for, which shares the file, metadata and
+		package of the earlier output like a duplicate upload does. Changing either video leaves the other
+		as it is.
+		"""
+		fingerprint = VideoController._derivation_fingerprint(kind, body, videos)
+		cached = await DerivationCache.lookup(fingerprint) if fingerprint else None
+		if cached is None or cached.path is None:
+			return None
+
+		logger.info(f"Reusing the file of video {cached.id} for a repeated {kind.value}")
+		filename = (
+			body.output_filename if isinstance(body, MergeSchema) else VideoController._trimmed_filename(videos[0])
+		)
+		video = await VideoDAO().create(  # type: ignore
+			{
+				**VideoController._probe_columns(cached),
+				"filename": filename,
+				"path": cached.path,
+				"size": cached.size,
+				"content_hash": cached.content_hash,
+				"hls_path": cached.hls_path,
+			},
+		)
+		await VideoController._queue_packaging(video)
+		job = await JobDAO().create(  # type: ignore
+			{
+				"kind": kind.value,
+				"payload": body.model_dump(mode="json"),
+				"status": JobStatus.SUCCEEDED.value,
+				"progress": 1.0,
+				"result_video_id": video.id,
+			},
+		)
+		return APIResponse(
+			status_=StatusEnum.SUCCESS,
+			message=f"The same {kind.value} was done before, its video is reused",
+			data=jsonable_encoder({"job_id": job.id, "status": job.status, "result_video_id": video.id}),
+		)
+
+	@staticmethod
+	async def _record_derivation(
+		kind: JobKind,
+		body: TrimSchema | MergeSchema,
+		videos: list[VideoModel],
+		video_id: Any,
+	) -> None:
+		fingerprint = VideoController._derivation_fingerprint(kind, body, videos)
+		if fingerprint:
+			await DerivationCache.record(fingerprint, kind.value, video_id)
+
+	@staticmethod
+	async def run_package_job(payload: dict[str, Any], report_progress: ReportProgress) -> UUID4:
+		"""Packaging handler of the job queue, returns the id of the packaged video."""
+		video: VideoModel = await VideoDAO().get(UUID(payload["video_id"]))  # type: ignore
+		if not video:
+			raise JobError("The video you are trying to package does not exist")
+		if video.hls_path:
+			return video.id  # type: ignore
+		video = await VideoController._materialize(video)
+
+		# Every package gets a directory of its own, so a package that is being played is never overwritten.
+		path = VideoController._stored_path(video)
+		package_dir = f"{os.path.splitext(path)[0]}_hls_{uuid4()}"
+		async with storage.open(path) as source_path, aiofiles.tempfile.TemporaryDirectory() as temp_dir:
+			await report_progress(0.25)
+			try:
+				await VideoService.package_hls(
+					source_path,
+					temp_dir,
+					video,
+					settings.HLS_RENDITIONS,
+					settings.HLS_SEGMENT_DURATION,
 				)
+			except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+				logger.error(f"Packaging video {video.id} failed: {e} {e.stderr!r}")
+				raise JobError("Error while packaging video") from e
+			await report_progress(0.75)
+			try:
+				hls_path = await playback_service.upload_package(temp_dir, package_dir)
+				# An in-place trim may have replaced the content in the meantime, the package would not match it.
+				packaged = await VideoDAO().store_package(video.id, hls_path, path, video.content_hash)  # type: ignore
+				if packaged is None:
+					current = await VideoDAO().get(video.id)  # type: ignore
+					if current is None or current.content_hash != video.content_hash or current.path != path:
+						raise JobError("The video changed while it was being packaged")
+					logger.info(f"Video {video.id} was packaged by another job, dropping {package_dir}")
+			except BaseException:
+				# The deletions start right away, the temporary directory that names the files goes next.
+				await asyncio.shield(playback_service.delete_package(temp_dir, package_dir))
+				raise
+			if packaged is None:
+				await playback_service.delete_package(temp_dir, package_dir)
+		return video.id  # type: ignore
 
 	@staticmethod
-	async def _fetch_videos(video_ids: list[UUID4]) -> list[VideoModel]:
-		videos = []
-		for video_id in video_ids:
-			video = await VideoDAO().get(video_id)  # type: ignore
-			if not video:
-				logger.error(f"Video with id {video_id} does not exist")
-				return []
-			videos.append(video)
-		return videos
+	async def _queue_packaging(video: VideoModel) -> None:
+		# Packaging is an extra, a video that misses it because the queue is full still plays as a file.
+		if not settings.HLS_PACKAGING or video.hls_path:
+			return
+		try:
+			await job_queue.submit(JobKind.PACKAGE, {"video_id": str(video.id)}, video_id=UUID(str(video.id)))
+		except JobQueueFullError as exception:
+			logger.warning(f"Not packaging video {video.id}: {exception}")
+
+	@staticmethod
+	async def _submit_job(kind: JobKind, payload: dict[str, Any], video_id: UUID | None = None) -> APIResponse:
+		# A client that asked for a deadline waits for the job as well, not only for this request.
+		deadline = requested_deadline.get()
+		deadline_at = datetime.fromtimestamp(deadline, UTC).replace(tzinfo=None) if deadline else None
+		try:
+			job = await job_queue.submit(kind, payload, deadline_at, video_id=video_id)
+		except JobQueueFullError as exception:
+			logger.warning(f"Refused {kind.value} job: {exception}")
+			return APIResponse(
+				status_=StatusEnum.ERROR,
+				message="Too many jobs are queued, try again later",
+				status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+			)
+
+		return APIResponse(
+			status_=StatusEnum.SUCCESS,
+			message=f"The {kind.value} job is queued, poll the job for its result",
+			data=jsonable_encoder({"job_id": job.id, "status": job.status}),
+			status_code=status.HTTP_202_ACCEPTED,
+		)
+
+	@staticmethod
+	async def _submit_video_job(kind: JobKind, video: VideoModel) -> APIResponse:
+		# A player asks over and over while the video renders or packages, they all wait for the same job.
+		return await VideoController._submit_job(kind, {"video_id": str(video.id)}, UUID(str(video.id)))
+
+	@staticmethod
+	async def get_job(job_id: UUID4) -> APIResponse:
+		job = await JobDAO().get(job_id)  # type: ignore
+		if not job:
+			return APIResponse(
+				status_=StatusEnum.ERROR,
+				message="Job not found",
+				status_code=status.HTTP_404_NOT_FOUND,
+			)
+
+		return APIResponse(
+			status_=StatusEnum.SUCCESS,
+			message="Job fetched successfully",
+			data=jsonable_encoder(job, exclude={"heartbeat_at"}),
+		)
 
 	@staticmethod
-	async def _download_videos(videos: list[VideoModel], temp_dir: str) -> list[str]:
-		input_files = []
-		download_tasks = []
+	async def cancel_job(job_id: UUID4) -> APIResponse:
+		job = await JobDAO().get(job_id)  # type: ignore
+		if not job:
+			return APIResponse(
+				status_=StatusEnum.ERROR,
+				message="Job not found",
+				status_code=status.HTTP_404_NOT_FOUND,
+			)
 
-		async def download_video(video: VideoModel):  # type: ignore # noqa
-			unique_filename = f"{uuid4()}_{video.filename}"
-			temp_file_path = firebase_service.download_file(unique_filename, video.path, temp_dir)
-			if os.path.exists(temp_file_path):
-				logger.info(f"Successfully downloaded: {temp_file_path}")
-				return temp_file_path
-			else:
-				logger.error(f"Failed to download or access file: {temp_file_path}")
-				raise FileNotFoundError(f"Failed to download or access file: {temp_file_path}")
+		cancelled = await JobDAO().cancel(job_id)  # type: ignore
+		if not cancelled:
+			return APIResponse(
+				status_=StatusEnum.ERROR,
+				message=f"The job can no longer be cancelled, it is {job.status}",
+				status_code=status.HTTP_409_CONFLICT,
+			)
 
-		for video in videos:
-			download_tasks.append(download_video(video))
+		job_queue.cancel(UUID(str(cancelled.id)))
+		logger.info(f"Cancelled {cancelled.kind} job {cancelled.id}")
+		return APIResponse(
+			status_=StatusEnum.SUCCESS,
+			message="Job cancelled successfully",
+			data=jsonable_encoder(cancelled, exclude={"heartbeat_at"}),
+		)
 
-		input_files = await asyncio.gather(*download_tasks)
-		return input_files  # type: ignore
+	@staticmethod
+	async def _fetch_videos(video_ids: list[UUID4]) -> list[VideoModel]:
+		videos = await VideoDAO().get_many(video_ids)  # type: ignore
+		missing = [str(video_id) for video_id, video in zip(video_ids, videos) if video is None]
+		if missing:
+			logger.error(f"Videos with ids {', '.join(missing)} do not exist")
+			return []
+		return videos  # type: ignore
+
+	@staticmethod
+	async def _open_videos(videos: list[VideoModel], sources: AsyncExitStack) -> list[str]:
+		# Sources are fetched concurrently on the storage pool and stay cached while the stack is open.
+		contexts = [storage.open(VideoController._stored_path(video)) for video in videos]
+		entries = [asyncio.ensure_future(context.__aenter__()) for context in contexts]
+		try:
+			await asyncio.gather(*entries)
+		finally:
+			# Every source that was opened is released with the stack, even when another one failed.
+			for entry in entries:
+				entry.cancel()
+			if entries:
+				await asyncio.wait(entries)
+			for context, entry in zip(contexts, entries):
+				if not entry.cancelled() and entry.exception() is None:
+					sources.push_async_exit(context)
+		logger.info(f"Opened {len(entries)} videos for merging")
+		return [entry.result() for entry in entries]
 
 	@staticmethod
 	async def _merge_videos_ffmpeg(input_files: list[str], output_filename: str, temp_dir: str) -> tuple[str, str]:
@@ -278,7 +1300,7 @@ class VideoController:
 		output_path = os.path.join(temp_dir, temp_output_filename)
 
 		try:
-			VideoService.merge_videos(list_file_path, output_path)
+			await VideoService.merge_videos(list_file_path, output_path)
 		except subprocess.CalledProcessError as e:
 			logger.error(f"FFmpeg merge failed: {e.stderr}")
 			raise
@@ -286,26 +1308,67 @@ class VideoController:
 		return output_filename, output_path
 
 	@staticmethod
-	async def _upload_and_save_video(output_filename: str, output_path: str, videos: list[VideoModel]) -> VideoModel:
+	async def _upload_and_save_video(output_filename: str, output_path: str) -> VideoModel:
 		filename = os.path.splitext(output_filename)[0]
 		extension = os.path.splitext(output_filename)[-1]
-		firebase_path = f"videos/{filename}_{uuid4()}{extension}"
-		firebase_service.upload_file(firebase_path, output_path)
-
-		new_duration = sum(video.duration for video in videos)
-		new_size = os.path.getsize(output_path) / (1024 * 1024)
+		output = await FileService.inspect_file(output_path)
+		stored = await VideoController._store_output(output, f"videos/{filename}_{uuid4()}{extension}")
 
 		new_video = await VideoDAO().create(  # type: ignore
 			{
+				**stored,
 				"filename": output_filename,
-				"path": firebase_path,
-				"duration": new_duration,
-				"size": new_size,
 			},
 		)
 
 		return new_video
 
+	@staticmethod
+	async def get_video_content(
+		video_id: UUID4,
+		range_header: str | None,
+		if_range: str | None,
+		if_none_match: str | None,
+	) -> Response:
+		video = await VideoDAO().get(video_id)  # type: ignore
+		if not video:
+			return APIResponse(
+				status_=StatusEnum.ERROR,
+				message="The video you are trying to fetch does not exist",
+				status_code=status.HTTP_404_NOT_FOUND,
+			)
+		if video.path is None:
+			# Virtual videos are rendered in the background, the content can be asked for again once the job is done.
+			return await VideoController._submit_video_job(JobKind.RENDER, video)
+		path = video.path
+		info = await storage.stat(path)
+		etag = f'"{info.version}"'
+		headers = {"ETag": etag}
+		if if_none_match:
+			# If-None-Match compares weakly, a W/ prefix does not stop a match.
+			entity_tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+			if etag in entity_tags or "*" in entity_tags:
+				return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+		# Ranges of another version than the one the client holds would be spliced into the wrong content.
+		ranges = None
+		if range_header and (if_range is None or if_range.strip() == etag):
+			ranges = parse_range_header(range_header, info.size)
+		if ranges == []:
+			return Response(
+				status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+				headers={**headers, "Content-Range": f"bytes */{info.size}"},
+			)
+		media_type, _ = mimetypes.guess_type(video.filename)  # type: ignore
+		return RangeResponse(
+			info.size,
+			ranges,
+			media_type or "application/octet-stream",
+			open_file=lambda: storage.open_local(path, info),  # type: ignore
+			read=lambda start, end: storage.iter_chunks(path, info, start, end),
+			headers=headers,
+		)
+
 	@staticmethod
 	async def share_video(body: ShareLinkSchema) -> APIResponse:
 		video = await VideoDAO().get(body.video_id)  # type: ignore
@@ -315,11 +1378,13 @@ class VideoController:
 				message="The video you are trying to share does not exist",
 				status_code=status.HTTP_404_NOT_FOUND,
 			)
+		if body.playback == Playback.HLS and not video.hls_path:
+			# Packages are made in the background, the link can be asked for again once the job is done.
+			return await VideoController._submit_video_job(JobKind.PACKAGE, video)
+		if body.playback == Playback.FILE and video.path is None:
+			return await VideoController._submit_video_job(JobKind.RENDER, video)
 		try:
-			expiration = timedelta(hours=body.expiry_hours)
-			signed_url = firebase_service.get_signed_url(video.path, expiration)
-
-			expiry_time = datetime.now(UTC) + expiration
+			signed_url = await VideoController._share_link(video, body.playback, timedelta(hours=body.expiry_hours))
 
 			return APIResponse(
 				status_=StatusEnum.SUCCESS,
@@ -327,8 +1392,8 @@ class VideoController:
 				status_code=status.HTTP_200_OK,
 				data=jsonable_encoder(
 					{
-						"share_link": signed_url,
-						"expiry_time": expiry_time.isoformat(),
+						"share_link": signed_url.url,
+						"expiry_time": signed_url.expires_at.isoformat(),
 						"video_id": video.id,
 						"video_name": video.filename,
 					},
@@ -341,3 +1406,70 @@ class VideoController:
 				message=f"Error generating shareable link: {str(e)}",
 				status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
 			)
+
+	@staticmethod
+	async def _share_link(video: VideoModel, playback: Playback, expiration: timedelta) -> SignedUrl:
+		if playback == Playback.HLS:
+			return playback_service.manifest_url(video.id, expiration)
+		return await storage.get_signed_url(VideoController._stored_path(video), expiration)
+
+	@staticmethod
+	async def share_videos(body: BatchShareLinkSchema) -> APIResponse:
+		video_ids = list(dict.fromkeys(body.video_ids))
+		# Keyed like the requested ids, the column type of the model is not the UUID the schema parses.
+		videos: dict[UUID, VideoModel] = {
+			UUID(str(video.id)): video
+			for video in await VideoDAO().get_many(video_ids)  # type: ignore
+			if video
+		}
+		expiration = timedelta(hours=body.expiry_hours)
+
+		async def share(video_id: UUID4) -> dict[str, Any]:
+			video = videos.get(video_id)
+			if video is None:
+				return {"video_id": video_id, "status": StatusEnum.ERROR, "error": "Video does not exist"}
+			try:
+				if body.playback == Playback.HLS and not video.hls_path:
+					job = await job_queue.submit(JobKind.PACKAGE, {"video_id": str(video.id)}, video_id=video_id)
+					return {
+						"video_id": video_id,
+						"status": StatusEnum.ERROR,
+						"error": "The video is being packaged, share it again once the job is done",
+						"job_id": job.id,
+					}
+				if body.playback == Playback.FILE and video.path is None:
+					job = await job_queue.submit(JobKind.RENDER, {"video_id": str(video.id)}, video_id=video_id)
+					return {
+						"video_id": video_id,
+						"status": StatusEnum.ERROR,
+						"error": "The video is being rendered, share it again once the job is done",
+						"job_id": job.id,
+					}
+				signed_url = await VideoController._share_link(video, body.playback, expiration)
+			except Exception as exception:
+				logger.error(f"Error generating shareable link for video {video_id}: {exception}")
+				return {"video_id": video_id, "status": StatusEnum.ERROR, "error": str(exception)}
+			return {
+				"video_id": video_id,
+				"status": StatusEnum.SUCCESS,
+				"share_link": signed_url.url,
+				"expiry_time": signed_url.expires_at.isoformat(),
+				"video_name": video.filename,
+			}
+
+		# Signing runs on the storage pool, so the links are generated concurrently.
+		results = await asyncio.gather(*(share(video_id) for video_id in video_ids))
+		failed = sum(result["status"] == StatusEnum.ERROR for result in results)
+		return APIResponse(
+			status_=StatusEnum.SUCCESS if not failed else StatusEnum.ERROR,
+			message=f"Generated {len(results) - failed} of {len(results)} shareable links",
+			status_code=status.HTTP_200_OK if not failed else status.HTTP_207_MULTI_STATUS,
+			data=jsonable_encoder({"results": results, "succeeded": len(results) - failed, "failed": failed}),
+		)
+
+
+job_queue.register(JobKind.TRIM, VideoController.run_trim_job)
+job_queue.register(JobKind.MERGE, VideoController.run_merge_job)
+job_queue.register(JobKind.PACKAGE, VideoController.run_package_job)
+job_queue.register(JobKind.BATCH_TRIM, VideoController.run_batch_trim_job)
+job_queue.register(JobKind.RENDER, VideoController.run_render_job)
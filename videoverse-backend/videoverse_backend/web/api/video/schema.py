@@ -1,6 +1,8 @@
 from enum import Enum
 
-from pydantic import UUID4, BaseModel
+from pydantic import UUID4, BaseModel, Field, PositiveInt
+
+from videoverse_backend.settings import settings
 
 
 class TrimType(str, Enum):
@@ -8,18 +10,64 @@ class TrimType(str, Enum):
 	END = "end"
 
 
+class TrimMode(str, Enum):
+	COPY = "copy"
+	PRECISE = "precise"
+	SMART = "smart"
+
+
+class MergeMode(str, Enum):
+	FILE = "file"
+	STREAM = "stream"
+
+
+class Playback(str, Enum):
+	FILE = "file"
+	HLS = "hls"
+
+
 class TrimSchema(BaseModel):
 	video_id: UUID4
 	trim_time: float | None
 	trim_type: TrimType
+	trim_mode: TrimMode = TrimMode.COPY
 	save_as_new: bool | None = False
+	# Record the cut as a segment list instead of producing a file, the file is rendered when it is needed.
+	virtual: bool = False
+
+
+class TrimClipSchema(BaseModel):
+	start: float = Field(..., ge=0)
+	end: float
+	save_as_new: bool = True
+
+
+class BatchTrimSchema(BaseModel):
+	video_id: UUID4
+	clips: list[TrimClipSchema] = Field(..., min_length=1, max_length=settings.MAX_BATCH_CLIPS)
+	trim_mode: TrimMode = TrimMode.COPY
 
 
 class MergeSchema(BaseModel):
 	video_ids: list[UUID4]
 	output_filename: str
+	merge_mode: MergeMode = MergeMode.FILE
+	virtual: bool = False
 
 
 class ShareLinkSchema(BaseModel):
 	video_id: UUID4
 	expiry_hours: float = 24.0
+	# Share a signed HLS manifest instead of the file, a video that is not packaged yet is packaged first.
+	playback: Playback = Playback.FILE
+
+
+class BatchShareLinkSchema(BaseModel):
+	video_ids: list[UUID4] = Field(..., min_length=1, max_length=settings.MAX_BATCH_SIZE)
+	expiry_hours: float = 24.0
+	playback: Playback = Playback.FILE
+
+
+class UploadSessionSchema(BaseModel):
+	filename: str
+	length: PositiveInt
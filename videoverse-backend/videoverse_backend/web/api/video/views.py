@@ -1,8 +1,17 @@
-from fastapi import APIRouter, File, UploadFile
+from fastapi import APIRouter, Header, Request
+from pydantic import UUID4
+from starlette.responses import Response
 
 from videoverse_backend.core import DEFAULT_ROUTE_OPTIONS, APIResponse
 from videoverse_backend.web.api.video.controller import VideoController
-from videoverse_backend.web.api.video.schema import MergeSchema, ShareLinkSchema, TrimSchema
+from videoverse_backend.web.api.video.schema import (
+	BatchShareLinkSchema,
+	BatchTrimSchema,
+	MergeSchema,
+	ShareLinkSchema,
+	TrimSchema,
+	UploadSessionSchema,
+)
 
 video_router = APIRouter(prefix="/video", tags=["Video"])
 
@@ -10,10 +19,78 @@ video_router = APIRouter(prefix="/video", tags=["Video"])
 @video_router.post(
 	"/upload",
 	summary="Upload a video file with maximum size of 25MB",
+	# The body is parsed as it streams in, so the form is described here instead of by a parameter.
+	openapi_extra={
+		"requestBody": {
+			"required": True,
+			"content": {
+				"multipart/form-data": {
+					"schema": {
+						"type": "object",
+						"required": ["file"],
+						"properties": {"file": {"type": "string", "format": "binary"}},
+					},
+				},
+			},
+		},
+	},
+	**DEFAULT_ROUTE_OPTIONS,
+)
+async def upload_video(
+	request: Request,
+	content_type: str = Header(""),
+	content_length: int | None = Header(None, ge=0),
+) -> APIResponse:
+	return await VideoController.upload_video(content_type, content_length, request.stream())
+
+
+@video_router.post(
+	"/uploads",
+	summary="Start a resumable upload",
 	**DEFAULT_ROUTE_OPTIONS,
 )
-async def upload_video(file: UploadFile = File(...)) -> APIResponse:
-	return await VideoController.upload_video(file)
+async def create_upload_session(body: UploadSessionSchema) -> APIResponse:
+	return await VideoController.create_upload_session(body)
+
+
+@video_router.get(
+	"/uploads/{upload_id}",
+	summary="Get the current offset of a resumable upload",
+	**DEFAULT_ROUTE_OPTIONS,
+)
+async def get_upload_session(upload_id: UUID4) -> APIResponse:
+	return await VideoController.get_upload_session(upload_id)
+
+
+@video_router.patch(
+	"/uploads/{upload_id}",
+	summary="Append a chunk to a resumable upload at the given offset",
+	**DEFAULT_ROUTE_OPTIONS,
+)
+async def append_upload_chunk(
+	upload_id: UUID4,
+	request: Request,
+	upload_offset: int = Header(..., ge=0),
+) -> APIResponse:
+	return await VideoController.append_upload_chunk(upload_id, upload_offset, request.stream())
+
+
+@video_router.post(
+	"/uploads/{upload_id}/complete",
+	summary="Finish a resumable upload and store the video",
+	**DEFAULT_ROUTE_OPTIONS,
+)
+async def complete_upload_session(upload_id: UUID4) -> APIResponse:
+	return await VideoController.complete_upload_session(upload_id)
+
+
+@video_router.delete(
+	"/uploads/{upload_id}",
+	summary="Abort a resumable upload",
+	**DEFAULT_ROUTE_OPTIONS,
+)
+async def delete_upload_session(upload_id: UUID4) -> APIResponse:
+	return await VideoController.delete_upload_session(upload_id)
 
 
 @video_router.get(
@@ -27,25 +104,74 @@ async def list_videos() -> APIResponse:
 
 @video_router.post(
 	"/trim",
-	summary="Trim a video",
+	summary="Queue a job that trims a video",
 	**DEFAULT_ROUTE_OPTIONS,
 )
 async def trim_video(body: TrimSchema) -> APIResponse:
 	return await VideoController.trim_video(body)
 
 
+@video_router.post(
+	"/trim/batch",
+	summary="Queue a job that cuts several clips of a video at once",
+	**DEFAULT_ROUTE_OPTIONS,
+)
+async def trim_video_batch(body: BatchTrimSchema) -> APIResponse:
+	return await VideoController.trim_video_batch(body)
+
+
 @video_router.post(
 	"/merge",
-	summary="Merge videos together",
+	summary="Queue a job that merges videos together",
 	**DEFAULT_ROUTE_OPTIONS,
 )
 async def merge_videos(body: MergeSchema) -> APIResponse:
 	return await VideoController.merge_videos(body)
 
 
+@video_router.get(
+	"/jobs/{job_id}",
+	summary="Get the status of a trim, batch trim, merge or package job",
+	**DEFAULT_ROUTE_OPTIONS,
+)
+async def get_job(job_id: UUID4) -> APIResponse:
+	return await VideoController.get_job(job_id)
+
+
+@video_router.delete(
+	"/jobs/{job_id}",
+	summary="Cancel a queued or running job",
+	**DEFAULT_ROUTE_OPTIONS,
+)
+async def cancel_job(job_id: UUID4) -> APIResponse:
+	return await VideoController.cancel_job(job_id)
+
+
 @video_router.post(
 	"/share",
 	summary="Generate a shareable link for a video",
 )
 async def generate_share_link(body: ShareLinkSchema) -> APIResponse:
 	return await VideoController.share_video(body)
+
+
+@video_router.post(
+	"/share/batch",
+	summary="Generate shareable links for many videos at once",
+)
+async def generate_share_links(body: BatchShareLinkSchema) -> APIResponse:
+	return await VideoController.share_videos(body)
+
+
+@video_router.api_route(
+	"/{video_id}/content",
+	methods=["GET", "HEAD"],
+	summary="Stream a video, whole or as byte ranges",
+)
+async def get_video_content(
+	video_id: UUID4,
+	range_header: str | None = Header(None, alias="Range"),
+	if_range: str | None = Header(None),
+	if_none_match: str | None = Header(None),
+) -> Response:
+	return await VideoController.get_video_content(video_id, range_header, if_range, if_none_match)
@@ -7,7 +7,8 @@ from fastapi.staticfiles import StaticFiles
 from starlette.middleware.cors import CORSMiddleware
 
 from videoverse_backend.core import DEFAULT_ROUTE_OPTIONS, TOKENS, CommonResponseSchema, StatusEnum, configure_logging
-from videoverse_backend.middlewares import LoggingMiddleware, StaticAPITokenMiddleware
+from videoverse_backend.middlewares import DeadlineMiddleware, LoggingMiddleware, StaticAPITokenMiddleware
+from videoverse_backend.settings import settings
 from videoverse_backend.web.api.router import api_router
 from videoverse_backend.web.lifespan import lifespan
 
@@ -47,6 +48,13 @@ def get_app() -> FastAPI:
 
 	app.add_middleware(LoggingMiddleware)  # type: ignore
 
+	# Outermost, so a request is cancelled as a whole once its client stops waiting for it.
+	app.add_middleware(
+		DeadlineMiddleware,  # type: ignore
+		default_timeout=settings.REQUEST_TIMEOUT,
+		max_timeout=settings.MAX_REQUEST_TIMEOUT,
+	)
+
 	app.include_router(router=api_router, prefix="/api")
 
 	app.mount("/static", StaticFiles(directory=APP_ROOT / "static"), name="static")
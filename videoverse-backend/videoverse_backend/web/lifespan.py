@@ -3,14 +3,13 @@ from typing import AsyncIterator
 
 from fastapi import FastAPI
 
-from videoverse_backend.db import database
-from videoverse_backend.db.models.base import BaseModel
+from videoverse_backend.services import job_queue
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
 	app.middleware_stack = None
 	app.middleware_stack = app.build_middleware_stack()
-	async with database.engine.begin() as conn:
-		await conn.run_sync(BaseModel.metadata.create_all)
+	job_queue.start()
 	yield
+	await job_queue.stop()